@@ -8,7 +8,10 @@ from hpat import prange
 # adopted from:
 # http://www.pythonforfinance.net/2017/02/20/intraday-stock-mean-reversion-trading-backtest-in-python/
 
-@hpat.jit(locals={'s_open': hpat.float64[:], 's_high': hpat.float64[:],
+# symbols have very different number of days, so iterations are scheduled
+# dynamically one symbol at a time
+@hpat.jit(dynamic_schedule=1,
+        locals={'s_open': hpat.float64[:], 's_high': hpat.float64[:],
         's_low': hpat.float64[:], 's_close': hpat.float64[:],
         's_vol': hpat.float64[:]})
 def intraday_mean_revert():
@@ -0,0 +1,46 @@
+import hpat
+from hpat import prange
+import numpy as np
+import h5py
+import argparse
+import time
+
+@hpat.jit
+def kmeans(iterations):
+    f = h5py.File("kmeans.hdf5", "r")
+    X = f['points'][:]
+    centroids = f['centroids'][:]
+    f.close()
+    N,D = X.shape
+    k = centroids.shape[0]
+    t1 = time.time()
+    for it in range(iterations):
+        sums = np.zeros((k,D))
+        counts = np.zeros(k)
+        for i in prange(N):
+            dist = np.empty(k)
+            for j in range(k):
+                dist[j] = np.sum((X[i,:]-centroids[j,:])**2)
+            c = np.argmin(dist)
+            for l in range(D):
+                sums[c,l] += X[i,l]
+            counts[c] += 1
+        # empty clusters keep their previous centroid
+        for j in range(k):
+            if counts[j] > 0:
+                for l in range(D):
+                    centroids[j,l] = sums[j,l]/counts[j]
+    t2 = time.time()
+    print("Execution time:", t2-t1, "\nresult:", centroids)
+    return centroids
+
+def main():
+    parser = argparse.ArgumentParser(description='K-Means')
+    parser.add_argument('--iterations', dest='iterations', type=int, default=20)
+    args = parser.parse_args()
+    iterations = args.iterations
+
+    res = kmeans(iterations)
+
+if __name__ == '__main__':
+    main()
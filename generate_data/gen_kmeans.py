@@ -0,0 +1,34 @@
+import h5py
+import numpy as np
+import argparse
+import time
+import hpat
+
+@hpat.jit
+def gen_kmeans(N, D, k, file_name):
+    # np.random.seed(0)
+    points = np.random.random((N,D))
+    centroids = np.random.random((k,D))
+    f = h5py.File(file_name, "w")
+    dset1 = f.create_dataset("points", (N,D), dtype='f8')
+    dset1[:] = points
+    dset2 = f.create_dataset("centroids", (k,D), dtype='f8')
+    dset2[:] = centroids
+    f.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Gen K-Means.')
+    parser.add_argument('--samples', dest='samples', type=int, default=2000)
+    parser.add_argument('--features', dest='features', type=int, default=10)
+    parser.add_argument('--centers', dest='centers', type=int, default=5)
+    parser.add_argument('--file', dest='file', type=str, default="kmeans.hdf5")
+    args = parser.parse_args()
+    N = args.samples
+    D = args.features
+    k = args.centers
+    file_name = args.file
+
+    gen_kmeans(N, D, k, file_name)
+
+if __name__ == '__main__':
+    main()
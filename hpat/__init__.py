@@ -1,17 +1,46 @@
 from __future__ import print_function, division, absolute_import
 
+import functools
 import numba
 from numba import *
 import hpat.dict_ext
 import hpat.distributed_api
 from hpat.distributed_api import dist_time
-from hpat.dict_ext import DictIntInt, DictInt32Int32, dict_int_int_type, dict_int32_int32_type
+from hpat.dict_ext import (DictIntInt, DictInt32Int32, dict_int_int_type,
+                                    dict_int32_int32_type, dict_class,
+                                    dist_dict_class)
 import hpat.str_ext
 
+# options handled by HPAT stages instead of Numba
+_hpat_options = ['error_on_rep_input', 'distributed_2d', 'comm_stats',
+                        'trace', 'dynamic_schedule', 'stream_batch_size']
+
 def jit(signature_or_function=None, **options):
     from .compiler import add_hpat_stages
     # set nopython by default
     if 'nopython' not in options:
         options['nopython'] = True
     options['parallel'] = True
-    return numba.jit(signature_or_function, user_pipeline_funcs=[add_hpat_stages], **options)
+    hpat_options = {k: options.pop(k) for k in _hpat_options if k in options}
+    add_stages = functools.partial(add_hpat_stages, options=hpat_options)
+    dispatcher = numba.jit(signature_or_function,
+                                    user_pipeline_funcs=[add_stages], **options)
+    return _setup_dispatcher(dispatcher)
+
+def _setup_dispatcher(dispatcher):
+    # jit() returns a decorator if function is not provided
+    if not isinstance(dispatcher, numba.dispatcher.Dispatcher):
+        return lambda func: _setup_dispatcher(dispatcher(func))
+    # string columns are typed as string arrays only at hpat.jit boundaries
+    numba_typeof_pyval = dispatcher.typeof_pyval
+    def typeof_pyval(val):
+        from .str_arr_ext import typeof_str_arr_arg
+        typ = typeof_str_arr_arg(val)
+        return typ if typ is not None else numba_typeof_pyval(val)
+    dispatcher.typeof_pyval = typeof_pyval
+    def hpat_distribution_report():
+        """report of why arrays of the compiled function are replicated"""
+        from .distributed import get_distribution_report
+        return get_distribution_report(dispatcher.py_func)
+    dispatcher.hpat_distribution_report = hpat_distribution_report
+    return dispatcher
@@ -1,228 +1,945 @@
+#include "mpi.h"
 #include <Python.h>
-#include <unordered_map>
+#include <cstring>
+#include <algorithm>
+#include <cstdint>
+#include <vector>
 #include <iostream>
 #include <limits>
+#include <map>
+#include <string>
+#include "_hpat_common.h"
 
-void* init_dict_int_int();
-void dict_int_int_setitem(std::unordered_map<int64_t, int64_t>* m, int64_t index, int64_t value);
-void dict_int_int_print(std::unordered_map<int64_t, int64_t>* m);
-int64_t dict_int_int_get(std::unordered_map<int64_t, int64_t>* m, int64_t index, int64_t default_val);
-int64_t dict_int_int_getitem(std::unordered_map<int64_t, int64_t>* m, int64_t index);
-int64_t dict_int_int_pop(std::unordered_map<int64_t, int64_t>* m, int64_t index);
-void* dict_int_int_keys(std::unordered_map<int64_t, int64_t>* m);
-int64_t dict_int_int_min(std::unordered_map<int64_t, int64_t>* m);
-int64_t dict_int_int_max(std::unordered_map<int64_t, int64_t>* m);
-bool dict_int_int_not_empty(std::unordered_map<int64_t, int64_t>* m);
-
-// -- int32 versions --
-void* init_dict_int32_int32();
-void dict_int32_int32_setitem(std::unordered_map<int, int>* m, int index, int value);
-void dict_int32_int32_print(std::unordered_map<int, int>* m);
-int dict_int32_int32_get(std::unordered_map<int, int>* m, int index, int default_val);
-int dict_int32_int32_getitem(std::unordered_map<int, int>* m, int index);
-int dict_int32_int32_pop(std::unordered_map<int, int>* m, int index);
-void* dict_int32_int32_keys(std::unordered_map<int, int>* m);
-int dict_int32_int32_min(std::unordered_map<int, int>* m);
-int dict_int32_int32_max(std::unordered_map<int, int>* m);
-bool dict_int32_int32_not_empty(std::unordered_map<int, int>* m);
+// Native dictionaries used by DictType instances. The default is an open
+// addressing hash table with linear probing. Keys and values are stored as
+// fixed-size byte records in contiguous arrays, so lookups don't chase bucket
+// pointers.
+// Fixed-size keys (ints, floats, tuples) are packed by the compiler into
+// key_size bytes and compared bytewise. String keys are copied into a
+// character buffer owned by the table and each key slot holds an
+// (offset, length) pair into that buffer.
+// Ordered dictionaries are balanced trees (std::map) keyed by the actual
+// scalar or string type so that min/max are O(1) and pop is O(log n).
+// Both implement hpat_dict_base so that the compiler calls the same
+// functions for all dictionaries.
+// Distributed dictionaries partition keys across ranks by hash. Updates to
+// keys owned by other ranks are buffered and exchanged in flush(), and the
+// owner merges them with a combine operator (sum/min/max).
+
+#define HPAT_DICT_EMPTY 0
+#define HPAT_DICT_FULL 1
+#define HPAT_DICT_DELETED 2
+#define HPAT_DICT_MIN_CAPACITY 8
+
+// key type codes are HPAT_CTypes of _hpat_common.h for integer and float
+// keys (_dict_scalar_types in dict_ext.py)
+#define HPAT_DICT_KEY_BYTES -1  // other fixed-size keys (tuples, bools, ...)
+#define HPAT_DICT_KEY_STR -2
+
+class hpat_dict_base {
+public:
+    int key_typ;
+    int64_t key_size;  // bytes of fixed-size keys
+    int64_t val_size;  // bytes per value
+
+    hpat_dict_base(int _key_typ, int64_t _key_size, int64_t _val_size)
+        : key_typ(_key_typ), key_size(_key_size), val_size(_val_size) {}
+    virtual ~hpat_dict_base() {}
+    // set value of key, returns true if key existed and its previous value
+    // was copied to old_val (so that the caller can release it)
+    virtual bool setitem(const char* key, int64_t key_len, const char* val, char* old_val) = 0;
+    virtual bool getitem(const char* key, int64_t key_len, char* val_out) = 0;
+    virtual bool pop(const char* key, int64_t key_len, char* val_out) = 0;
+    virtual bool contains(const char* key, int64_t key_len) = 0;
+    virtual int64_t size() = 0;
+    // return pointer to smallest/largest key data or NULL if empty
+    virtual const char* key_min(int64_t* key_len) = 0;
+    virtual const char* key_max(int64_t* key_len) = 0;
+    // iteration position is an opaque 64-bit value, iter_next returns false
+    // when there are no more entries
+    virtual int64_t iter_begin() = 0;
+    virtual bool iter_next(int64_t* pos, const char** key, int64_t* key_len, char* val_out) = 0;
+};
+
+void* init_dict(int64_t key_size, int64_t val_size, int key_typ);
+void* init_ordered_dict(int64_t key_size, int64_t val_size, int key_typ);
+bool dict_setitem(hpat_dict_base* d, char* key, int64_t key_len, char* val, char* old_val);
+bool dict_getitem(hpat_dict_base* d, char* key, int64_t key_len, char* val_out);
+bool dict_pop(hpat_dict_base* d, char* key, int64_t key_len, char* val_out);
+bool dict_contains(hpat_dict_base* d, char* key, int64_t key_len);
+int64_t dict_len(hpat_dict_base* d);
+void dict_print(hpat_dict_base* d, int val_typ);
+const char* dict_key_min(hpat_dict_base* d, int64_t* key_len);
+const char* dict_key_max(hpat_dict_base* d, int64_t* key_len);
+int64_t dict_iter_begin(hpat_dict_base* d);
+bool dict_iter_next(hpat_dict_base* d, int64_t* pos, const char** key, int64_t* key_len, char* val_out);
+void* init_dist_dict(int64_t key_size, int64_t val_size, int key_typ, int val_typ, int combine);
+void dist_dict_setitem(void* dd, char* key, int64_t key_len, char* val);
+void dist_dict_flush(void* dd);
+void dist_dict_get_many(void* dd, char* keys, int64_t n, char* default_val, char* vals_out);
+int64_t dist_dict_len(void* dd);
+void* dist_dict_local(void* dd);
+
+// alltoallv with 64-bit counts of hdist (hpat_alltoallv_int64), which sends
+// large buffers in pieces
+typedef void (*alltoallv_int64_func)(const void* send_buf,
+        const int64_t* send_counts, const int64_t* send_disps, void* recv_buf,
+        const int64_t* recv_counts, const int64_t* recv_disps,
+        MPI_Datatype mpi_typ, MPI_Comm comm);
+static alltoallv_int64_func hpat_alltoallv_large = NULL;
+
+static PyObject* set_alltoallv_large(PyObject* self, PyObject* arg)
+{
+    void* ptr = PyLong_AsVoidPtr(arg);
+    if (ptr==NULL && PyErr_Occurred())
+        return NULL;
+    hpat_alltoallv_large = (alltoallv_int64_func)ptr;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef hdict_ext_methods[] = {
+    {"set_alltoallv_large", set_alltoallv_large, METH_O,
+        "set address of hdist.hpat_alltoallv_int64 used by distributed dicts"},
+    {NULL, NULL, 0, NULL}
+};
 
 
 PyMODINIT_FUNC PyInit_hdict_ext(void) {
     PyObject *m;
     static struct PyModuleDef moduledef = {
-            PyModuleDef_HEAD_INIT, "hdict_ext", "No docs", -1, NULL, };
+            PyModuleDef_HEAD_INIT, "hdict_ext", "No docs", -1, hdict_ext_methods, };
     m = PyModule_Create(&moduledef);
     if (m == NULL)
         return NULL;
 
-    PyObject_SetAttrString(m, "init_dict_int_int",
-                            PyLong_FromVoidPtr((void*)(&init_dict_int_int)));
-    PyObject_SetAttrString(m, "dict_int_int_setitem",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_setitem)));
-    PyObject_SetAttrString(m, "dict_int_int_print",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_print)));
-    PyObject_SetAttrString(m, "dict_int_int_get",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_get)));
-    PyObject_SetAttrString(m, "dict_int_int_getitem",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_getitem)));
-    PyObject_SetAttrString(m, "dict_int_int_pop",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_pop)));
-    PyObject_SetAttrString(m, "dict_int_int_keys",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_keys)));
-    PyObject_SetAttrString(m, "dict_int_int_min",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_min)));
-    PyObject_SetAttrString(m, "dict_int_int_max",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_max)));
-    PyObject_SetAttrString(m, "dict_int_int_not_empty",
-                            PyLong_FromVoidPtr((void*)(&dict_int_int_not_empty)));
-    // ---- int32 versions ----
-    PyObject_SetAttrString(m, "init_dict_int32_int32",
-                            PyLong_FromVoidPtr((void*)(&init_dict_int32_int32)));
-    PyObject_SetAttrString(m, "dict_int32_int32_setitem",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_setitem)));
-    PyObject_SetAttrString(m, "dict_int32_int32_print",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_print)));
-    PyObject_SetAttrString(m, "dict_int32_int32_get",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_get)));
-    PyObject_SetAttrString(m, "dict_int32_int32_getitem",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_getitem)));
-    PyObject_SetAttrString(m, "dict_int32_int32_pop",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_pop)));
-    PyObject_SetAttrString(m, "dict_int32_int32_keys",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_keys)));
-    PyObject_SetAttrString(m, "dict_int32_int32_min",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_min)));
-    PyObject_SetAttrString(m, "dict_int32_int32_max",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_max)));
-    PyObject_SetAttrString(m, "dict_int32_int32_not_empty",
-                            PyLong_FromVoidPtr((void*)(&dict_int32_int32_not_empty)));
+    PyObject_SetAttrString(m, "init_dict",
+                            PyLong_FromVoidPtr((void*)(&init_dict)));
+    PyObject_SetAttrString(m, "init_ordered_dict",
+                            PyLong_FromVoidPtr((void*)(&init_ordered_dict)));
+    PyObject_SetAttrString(m, "dict_setitem",
+                            PyLong_FromVoidPtr((void*)(&dict_setitem)));
+    PyObject_SetAttrString(m, "dict_getitem",
+                            PyLong_FromVoidPtr((void*)(&dict_getitem)));
+    PyObject_SetAttrString(m, "dict_pop",
+                            PyLong_FromVoidPtr((void*)(&dict_pop)));
+    PyObject_SetAttrString(m, "dict_contains",
+                            PyLong_FromVoidPtr((void*)(&dict_contains)));
+    PyObject_SetAttrString(m, "dict_len",
+                            PyLong_FromVoidPtr((void*)(&dict_len)));
+    PyObject_SetAttrString(m, "dict_print",
+                            PyLong_FromVoidPtr((void*)(&dict_print)));
+    PyObject_SetAttrString(m, "dict_key_min",
+                            PyLong_FromVoidPtr((void*)(&dict_key_min)));
+    PyObject_SetAttrString(m, "dict_key_max",
+                            PyLong_FromVoidPtr((void*)(&dict_key_max)));
+    PyObject_SetAttrString(m, "dict_iter_begin",
+                            PyLong_FromVoidPtr((void*)(&dict_iter_begin)));
+    PyObject_SetAttrString(m, "dict_iter_next",
+                            PyLong_FromVoidPtr((void*)(&dict_iter_next)));
+    PyObject_SetAttrString(m, "init_dist_dict",
+                            PyLong_FromVoidPtr((void*)(&init_dist_dict)));
+    PyObject_SetAttrString(m, "dist_dict_setitem",
+                            PyLong_FromVoidPtr((void*)(&dist_dict_setitem)));
+    PyObject_SetAttrString(m, "dist_dict_flush",
+                            PyLong_FromVoidPtr((void*)(&dist_dict_flush)));
+    PyObject_SetAttrString(m, "dist_dict_get_many",
+                            PyLong_FromVoidPtr((void*)(&dist_dict_get_many)));
+    PyObject_SetAttrString(m, "dist_dict_len",
+                            PyLong_FromVoidPtr((void*)(&dist_dict_len)));
+    PyObject_SetAttrString(m, "dist_dict_local",
+                            PyLong_FromVoidPtr((void*)(&dist_dict_local)));
     return m;
 }
 
-void* init_dict_int_int()
+template <class T>
+static int compare_scalar(const char* a, const char* b)
 {
-    return new std::unordered_map<int64_t, int64_t>();
+    T x, y;
+    memcpy(&x, a, sizeof(T));
+    memcpy(&y, b, sizeof(T));
+    return (x > y) - (x < y);
 }
 
-void dict_int_int_setitem(std::unordered_map<int64_t, int64_t>* m, int64_t index, int64_t value)
+// compare keys of a type that supports ordering (scalar codes or string)
+static int compare_keys(int key_typ, const char* a, int64_t a_len, const char* b, int64_t b_len)
 {
-    (*m)[index] = value;
-    return;
+    switch (key_typ) {
+        case HPAT_INT8: return compare_scalar<int8_t>(a, b);
+        case HPAT_UINT8: return compare_scalar<uint8_t>(a, b);
+        case HPAT_INT16: return compare_scalar<int16_t>(a, b);
+        case HPAT_UINT16: return compare_scalar<uint16_t>(a, b);
+        case HPAT_INT32: return compare_scalar<int32_t>(a, b);
+        case HPAT_UINT32: return compare_scalar<uint32_t>(a, b);
+        case HPAT_INT64: return compare_scalar<int64_t>(a, b);
+        case HPAT_UINT64: return compare_scalar<uint64_t>(a, b);
+        case HPAT_FLOAT32: return compare_scalar<float>(a, b);
+        case HPAT_FLOAT64: return compare_scalar<double>(a, b);
+        case HPAT_DICT_KEY_STR: {
+            int res = memcmp(a, b, std::min(a_len, b_len));
+            if (res != 0)
+                return res;
+            return (a_len > b_len) - (a_len < b_len);
+        }
+        default: std::cerr << "dict key type does not support ordering" << std::endl;
+    }
+    return 0;
 }
 
-void dict_int_int_print(std::unordered_map<int64_t, int64_t>* m)
+// FNV-1a followed by a 64-bit finalizer so that low bits (used for slot
+// index) depend on all key bytes
+static uint64_t hash_bytes(const char* data, int64_t len)
 {
-    // TODO: return python string and print in native mode
-    for (auto& x: *m) {
-        std::cout << x.first << ": " << x.second << std::endl;
+    uint64_t h = 14695981039346656037ULL;
+    for (int64_t i=0; i<len; i++) {
+        h ^= (uint8_t)data[i];
+        h *= 1099511628211ULL;
     }
-    return;
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33;
+    h *= 0xc4ceb9fe1a85ec53ULL;
+    h ^= h >> 33;
+    return h;
 }
 
-int64_t dict_int_int_get(std::unordered_map<int64_t, int64_t>* m, int64_t index, int64_t default_val)
+class hpat_dict : public hpat_dict_base {
+public:
+    bool str_keys;
+    int64_t capacity;  // always a power of 2
+    int64_t n_items;   // number of live entries
+    int64_t used;      // live entries plus deleted markers
+    std::vector<uint8_t> states;
+    std::vector<uint64_t> hashes;
+    std::vector<char> keys;
+    std::vector<char> vals;
+    std::vector<char> str_data;
+
+    hpat_dict(int _key_typ, int64_t _key_size, int64_t _val_size)
+        : hpat_dict_base(_key_typ, _key_size, _val_size)
+    {
+        str_keys = (key_typ == HPAT_DICT_KEY_STR);
+        alloc_table(HPAT_DICT_MIN_CAPACITY);
+    }
+
+    bool setitem(const char* key, int64_t key_len, const char* val, char* old_val)
+    {
+        uint64_t h = hash_key(key, key_len);
+        int64_t slot = find_slot(key, key_len, h);
+        if (slot != -1) {
+            char* slot_val = vals.data() + slot*val_size;
+            memcpy(old_val, slot_val, val_size);
+            memcpy(slot_val, val, val_size);
+            return true;
+        }
+        // keep load factor (including deleted markers) below 3/4
+        if (4*(used+1) > 3*capacity) {
+            int64_t new_capacity = capacity;
+            while (4*(n_items+1) > 3*new_capacity/2)
+                new_capacity *= 2;
+            rehash(new_capacity);
+        }
+        int64_t mask = capacity - 1;
+        slot = h & mask;
+        while (states[slot] == HPAT_DICT_FULL)
+            slot = (slot + 1) & mask;
+        place_key(slot, key, key_len, h);
+        memcpy(vals.data() + slot*val_size, val, val_size);
+        return false;
+    }
+
+    bool getitem(const char* key, int64_t key_len, char* val_out)
+    {
+        int64_t slot = find_slot(key, key_len, hash_key(key, key_len));
+        if (slot == -1)
+            return false;
+        memcpy(val_out, vals.data() + slot*val_size, val_size);
+        return true;
+    }
+
+    bool pop(const char* key, int64_t key_len, char* val_out)
+    {
+        int64_t slot = find_slot(key, key_len, hash_key(key, key_len));
+        if (slot == -1)
+            return false;
+        memcpy(val_out, vals.data() + slot*val_size, val_size);
+        states[slot] = HPAT_DICT_DELETED;
+        n_items--;
+        return true;
+    }
+
+    bool contains(const char* key, int64_t key_len)
+    {
+        return find_slot(key, key_len, hash_key(key, key_len)) != -1;
+    }
+
+    int64_t size()
+    {
+        return n_items;
+    }
+
+    // hash tables have no order so min/max are linear scans,
+    // ordered dictionaries should be used for repeated min/max
+    const char* key_min(int64_t* key_len)
+    {
+        return key_min_max(key_len, -1);
+    }
+
+    const char* key_max(int64_t* key_len)
+    {
+        return key_min_max(key_len, 1);
+    }
+
+    int64_t iter_begin()
+    {
+        return 0;
+    }
+
+    bool iter_next(int64_t* pos, const char** key, int64_t* key_len, char* val_out)
+    {
+        int64_t slot = *pos;
+        while (slot < capacity && states[slot] != HPAT_DICT_FULL)
+            slot++;
+        if (slot >= capacity)
+            return false;
+        *key = slot_key(slot, key_len);
+        memcpy(val_out, vals.data() + slot*val_size, val_size);
+        *pos = slot + 1;
+        return true;
+    }
+
+private:
+    inline int64_t key_slot_size()
+    {
+        return str_keys ? 2*sizeof(int64_t) : key_size;
+    }
+
+    inline uint64_t hash_key(const char* key, int64_t key_len)
+    {
+        return hash_bytes(key, str_keys ? key_len : key_size);
+    }
+
+    const char* slot_key(int64_t slot, int64_t* key_len)
+    {
+        const char* key = keys.data() + slot*key_slot_size();
+        if (!str_keys) {
+            *key_len = key_size;
+            return key;
+        }
+        const int64_t* str_slot = (const int64_t*)key;
+        *key_len = str_slot[1];
+        return str_data.data() + str_slot[0];
+    }
+
+    bool slot_key_equal(int64_t slot, const char* key, int64_t key_len)
+    {
+        int64_t len;
+        const char* data = slot_key(slot, &len);
+        return len == key_len && memcmp(data, key, key_len) == 0;
+    }
+
+    // return slot of key or -1 if not found
+    int64_t find_slot(const char* key, int64_t key_len, uint64_t h)
+    {
+        int64_t mask = capacity - 1;
+        int64_t slot = h & mask;
+        while (states[slot] != HPAT_DICT_EMPTY) {
+            if (states[slot] == HPAT_DICT_FULL && hashes[slot] == h
+                    && slot_key_equal(slot, key, key_len))
+                return slot;
+            slot = (slot + 1) & mask;
+        }
+        return -1;
+    }
+
+    // store key in an unused slot without checking for duplicates
+    void place_key(int64_t slot, const char* key, int64_t key_len, uint64_t h)
+    {
+        char* key_ptr = keys.data() + slot*key_slot_size();
+        if (str_keys) {
+            int64_t* str_slot = (int64_t*)key_ptr;
+            str_slot[0] = str_data.size();
+            str_slot[1] = key_len;
+            str_data.insert(str_data.end(), key, key + key_len);
+        }
+        else
+            memcpy(key_ptr, key, key_size);
+        hashes[slot] = h;
+        if (states[slot] == HPAT_DICT_EMPTY)
+            used++;
+        states[slot] = HPAT_DICT_FULL;
+        n_items++;
+    }
+
+    void alloc_table(int64_t new_capacity)
+    {
+        capacity = new_capacity;
+        n_items = 0;
+        used = 0;
+        states.assign(capacity, HPAT_DICT_EMPTY);
+        hashes.assign(capacity, 0);
+        keys.assign(capacity*key_slot_size(), 0);
+        vals.assign(capacity*val_size, 0);
+    }
+
+    // rebuild the table with new capacity, dropping deleted markers and
+    // compacting string key data
+    void rehash(int64_t new_capacity)
+    {
+        hpat_dict old(key_typ, key_size, val_size);
+        old.capacity = capacity;
+        old.states.swap(states);
+        old.hashes.swap(hashes);
+        old.keys.swap(keys);
+        old.vals.swap(vals);
+        old.str_data.swap(str_data);
+        alloc_table(new_capacity);
+        int64_t mask = new_capacity - 1;
+
+        for (int64_t i=0; i<old.capacity; i++) {
+            if (old.states[i] != HPAT_DICT_FULL)
+                continue;
+            int64_t key_len;
+            const char* key = old.slot_key(i, &key_len);
+            uint64_t h = old.hashes[i];
+            int64_t slot = h & mask;
+            while (states[slot] != HPAT_DICT_EMPTY)
+                slot = (slot + 1) & mask;
+            place_key(slot, key, key_len, h);
+            memcpy(vals.data() + slot*val_size,
+                                old.vals.data() + i*val_size, val_size);
+        }
+    }
+
+    const char* key_min_max(int64_t* key_len, int sign)
+    {
+        const char* res = NULL;
+        int64_t res_len = 0;
+        for (int64_t i=0; i<capacity; i++) {
+            if (states[i] != HPAT_DICT_FULL)
+                continue;
+            int64_t len;
+            const char* key = slot_key(i, &len);
+            if (res == NULL || sign*compare_keys(key_typ, key, len, res, res_len) > 0) {
+                res = key;
+                res_len = len;
+            }
+        }
+        *key_len = res_len;
+        return res;
+    }
+};
+
+template <class K>
+static inline K make_key(const char* key, int64_t key_len)
 {
-    auto val = m->find(index);
-    if (val==m->end())
-        return default_val;
-    return (*val).second;
+    K res;
+    memcpy(&res, key, sizeof(K));
+    return res;
 }
 
-int64_t dict_int_int_getitem(std::unordered_map<int64_t, int64_t>* m, int64_t index)
+template <>
+inline std::string make_key<std::string>(const char* key, int64_t key_len)
 {
-    return m->at(index);
+    return std::string(key, key_len);
 }
 
-int64_t dict_int_int_pop(std::unordered_map<int64_t, int64_t>* m, int64_t index)
+template <class K>
+static inline const char* get_key_data(const K& key, int64_t* key_len)
 {
-    int64_t val = m->at(index);
-    m->erase(index);
-    return val;
+    *key_len = sizeof(K);
+    return (const char*)&key;
 }
 
-void* dict_int_int_keys(std::unordered_map<int64_t, int64_t>* m)
+template <>
+inline const char* get_key_data<std::string>(const std::string& key, int64_t* key_len)
 {
-    // TODO: return actual iterator
-    return m;
+    *key_len = key.size();
+    return key.data();
 }
 
-int64_t dict_int_int_min(std::unordered_map<int64_t, int64_t>* m)
-{
-    // TODO: use actual iterator
-    int64_t res = std::numeric_limits<int64_t>::max();
-    for (auto& x: *m) {
-        if (x.first<res)
-            res = x.first;
+template <class K>
+class hpat_ordered_dict : public hpat_dict_base {
+public:
+    typedef typename std::map<K, int64_t>::iterator map_iter;
+    std::map<K, int64_t> index;  // key -> value slot in vals
+    std::vector<char> vals;
+    std::vector<int64_t> free_slots;
+
+    hpat_ordered_dict(int _key_typ, int64_t _key_size, int64_t _val_size)
+        : hpat_dict_base(_key_typ, _key_size, _val_size) {}
+
+    bool setitem(const char* key, int64_t key_len, const char* val, char* old_val)
+    {
+        std::pair<map_iter, bool> res = index.insert(
+                        std::make_pair(make_key<K>(key, key_len), (int64_t)0));
+        if (!res.second) {
+            char* slot_val = vals.data() + res.first->second*val_size;
+            memcpy(old_val, slot_val, val_size);
+            memcpy(slot_val, val, val_size);
+            return true;
+        }
+        int64_t slot;
+        if (free_slots.empty()) {
+            slot = vals.size() / val_size;
+            vals.resize(vals.size() + val_size);
+        }
+        else {
+            slot = free_slots.back();
+            free_slots.pop_back();
+        }
+        res.first->second = slot;
+        memcpy(vals.data() + slot*val_size, val, val_size);
+        return false;
     }
-    return res;
+
+    bool getitem(const char* key, int64_t key_len, char* val_out)
+    {
+        map_iter it = index.find(make_key<K>(key, key_len));
+        if (it == index.end())
+            return false;
+        memcpy(val_out, vals.data() + it->second*val_size, val_size);
+        return true;
+    }
+
+    bool pop(const char* key, int64_t key_len, char* val_out)
+    {
+        map_iter it = index.find(make_key<K>(key, key_len));
+        if (it == index.end())
+            return false;
+        memcpy(val_out, vals.data() + it->second*val_size, val_size);
+        free_slots.push_back(it->second);
+        index.erase(it);
+        return true;
+    }
+
+    bool contains(const char* key, int64_t key_len)
+    {
+        return index.find(make_key<K>(key, key_len)) != index.end();
+    }
+
+    int64_t size()
+    {
+        return index.size();
+    }
+
+    const char* key_min(int64_t* key_len)
+    {
+        if (index.empty())
+            return NULL;
+        return get_key_data<K>(index.begin()->first, key_len);
+    }
+
+    const char* key_max(int64_t* key_len)
+    {
+        if (index.empty())
+            return NULL;
+        return get_key_data<K>(index.rbegin()->first, key_len);
+    }
+
+    // tree iterators are stored in the 64-bit position value
+    int64_t iter_begin()
+    {
+        return encode_iter(index.begin());
+    }
+
+    bool iter_next(int64_t* pos, const char** key, int64_t* key_len, char* val_out)
+    {
+        map_iter it = decode_iter(*pos);
+        if (it == index.end())
+            return false;
+        *key = get_key_data<K>(it->first, key_len);
+        memcpy(val_out, vals.data() + it->second*val_size, val_size);
+        ++it;
+        *pos = encode_iter(it);
+        return true;
+    }
+
+private:
+    static_assert(sizeof(map_iter) <= sizeof(int64_t),
+                                        "map iterator does not fit position");
+
+    int64_t encode_iter(map_iter it)
+    {
+        int64_t pos = 0;
+        memcpy(&pos, (void*)&it, sizeof(map_iter));
+        return pos;
+    }
+
+    map_iter decode_iter(int64_t pos)
+    {
+        map_iter it;
+        memcpy((void*)&it, &pos, sizeof(map_iter));
+        return it;
+    }
+};
+
+void* init_dict(int64_t key_size, int64_t val_size, int key_typ)
+{
+    return new hpat_dict(key_typ, key_size, val_size);
 }
 
-int64_t dict_int_int_max(std::unordered_map<int64_t, int64_t>* m)
+void* init_ordered_dict(int64_t key_size, int64_t val_size, int key_typ)
 {
-    // TODO: use actual iterator
-    int64_t res = std::numeric_limits<int64_t>::min();
-    for (auto& x: *m) {
-        if (x.first>res)
-            res = x.first;
+    switch (key_typ) {
+        case HPAT_INT8: return new hpat_ordered_dict<int8_t>(key_typ, key_size, val_size);
+        case HPAT_UINT8: return new hpat_ordered_dict<uint8_t>(key_typ, key_size, val_size);
+        case HPAT_INT16: return new hpat_ordered_dict<int16_t>(key_typ, key_size, val_size);
+        case HPAT_UINT16: return new hpat_ordered_dict<uint16_t>(key_typ, key_size, val_size);
+        case HPAT_INT32: return new hpat_ordered_dict<int32_t>(key_typ, key_size, val_size);
+        case HPAT_UINT32: return new hpat_ordered_dict<uint32_t>(key_typ, key_size, val_size);
+        case HPAT_INT64: return new hpat_ordered_dict<int64_t>(key_typ, key_size, val_size);
+        case HPAT_UINT64: return new hpat_ordered_dict<uint64_t>(key_typ, key_size, val_size);
+        case HPAT_FLOAT32: return new hpat_ordered_dict<float>(key_typ, key_size, val_size);
+        case HPAT_FLOAT64: return new hpat_ordered_dict<double>(key_typ, key_size, val_size);
+        case HPAT_DICT_KEY_STR:
+            return new hpat_ordered_dict<std::string>(key_typ, key_size, val_size);
+        default: std::cerr << "invalid ordered dict key type" << std::endl;
     }
-    return res;
+    return NULL;
 }
 
-bool dict_int_int_not_empty(std::unordered_map<int64_t, int64_t>* m)
+bool dict_setitem(hpat_dict_base* d, char* key, int64_t key_len, char* val, char* old_val)
 {
-    return !m->empty();
+    return d->setitem(key, key_len, val, old_val);
 }
 
+bool dict_getitem(hpat_dict_base* d, char* key, int64_t key_len, char* val_out)
+{
+    return d->getitem(key, key_len, val_out);
+}
 
-// --------- int32 versions ------
-void* init_dict_int32_int32()
+bool dict_pop(hpat_dict_base* d, char* key, int64_t key_len, char* val_out)
 {
-    return new std::unordered_map<int, int>();
+    return d->pop(key, key_len, val_out);
 }
 
-void dict_int32_int32_setitem(std::unordered_map<int, int>* m, int index, int value)
+bool dict_contains(hpat_dict_base* d, char* key, int64_t key_len)
 {
-    (*m)[index] = value;
-    return;
+    return d->contains(key, key_len);
 }
 
-void dict_int32_int32_print(std::unordered_map<int, int>* m)
+int64_t dict_len(hpat_dict_base* d)
+{
+    return d->size();
+}
+
+template <class T>
+static void print_scalar(const char* data)
+{
+    T val;
+    memcpy(&val, data, sizeof(T));
+    std::cout << val;
+}
+
+static void print_typ(int typ, const char* data, int64_t len)
+{
+    switch (typ) {
+        case HPAT_INT8: std::cout << (int)*(const int8_t*)data; return;
+        case HPAT_UINT8: std::cout << (int)*(const uint8_t*)data; return;
+        case HPAT_INT16: print_scalar<int16_t>(data); return;
+        case HPAT_UINT16: print_scalar<uint16_t>(data); return;
+        case HPAT_INT32: print_scalar<int32_t>(data); return;
+        case HPAT_UINT32: print_scalar<uint32_t>(data); return;
+        case HPAT_INT64: print_scalar<int64_t>(data); return;
+        case HPAT_UINT64: print_scalar<uint64_t>(data); return;
+        case HPAT_FLOAT32: print_scalar<float>(data); return;
+        case HPAT_FLOAT64: print_scalar<double>(data); return;
+        case HPAT_DICT_KEY_STR: std::cout.write(data, len); return;
+        default: std::cout << "?";
+    }
+}
+
+void dict_print(hpat_dict_base* d, int val_typ)
 {
     // TODO: return python string and print in native mode
-    for (auto& x: *m) {
-        std::cout << x.first << ": " << x.second << std::endl;
+    std::vector<char> val(d->val_size);
+    int64_t pos = d->iter_begin();
+    const char* key;
+    int64_t key_len;
+    while (d->iter_next(&pos, &key, &key_len, val.data())) {
+        print_typ(d->key_typ, key, key_len);
+        std::cout << ": ";
+        print_typ(val_typ, val.data(), d->val_size);
+        std::cout << std::endl;
     }
     return;
 }
 
-int dict_int32_int32_get(std::unordered_map<int, int>* m, int index, int default_val)
+const char* dict_key_min(hpat_dict_base* d, int64_t* key_len)
 {
-    auto val = m->find(index);
-    if (val==m->end())
-        return default_val;
-    return (*val).second;
+    return d->key_min(key_len);
 }
 
-int dict_int32_int32_getitem(std::unordered_map<int, int>* m, int index)
+const char* dict_key_max(hpat_dict_base* d, int64_t* key_len)
 {
-    return m->at(index);
+    return d->key_max(key_len);
 }
 
-int dict_int32_int32_pop(std::unordered_map<int, int>* m, int index)
+int64_t dict_iter_begin(hpat_dict_base* d)
 {
-    int val = m->at(index);
-    m->erase(index);
-    return val;
+    return d->iter_begin();
 }
 
-void* dict_int32_int32_keys(std::unordered_map<int, int>* m)
+bool dict_iter_next(hpat_dict_base* d, int64_t* pos, const char** key, int64_t* key_len, char* val_out)
 {
-    // TODO: return actual iterator
-    return m;
+    return d->iter_next(pos, key, key_len, val_out);
 }
 
-int dict_int32_int32_min(std::unordered_map<int, int>* m)
+
+// ---------- distributed dictionary ----------
+
+#define HPAT_DICT_COMBINE_SUM 0
+#define HPAT_DICT_COMBINE_MIN 1
+#define HPAT_DICT_COMBINE_MAX 2
+
+template <class T>
+static void combine_scalar(int combine, char* out, const char* val)
 {
-    // TODO: use actual iterator
-    int res = std::numeric_limits<int>::max();
-    for (auto& x: *m) {
-        if (x.first<res)
-            res = x.first;
+    T a, b;
+    memcpy(&a, out, sizeof(T));
+    memcpy(&b, val, sizeof(T));
+    switch (combine) {
+        case HPAT_DICT_COMBINE_SUM: a = a + b; break;
+        case HPAT_DICT_COMBINE_MIN: a = std::min(a, b); break;
+        case HPAT_DICT_COMBINE_MAX: a = std::max(a, b); break;
+        default: std::cerr << "unknown dict combine operator" << std::endl;
     }
-    return res;
+    memcpy(out, &a, sizeof(T));
 }
 
-int dict_int32_int32_max(std::unordered_map<int, int>* m)
+// combine val into out for value type code val_typ
+static void combine_vals(int val_typ, int combine, char* out, const char* val)
 {
-    // TODO: use actual iterator
-    int res = std::numeric_limits<int>::min();
-    for (auto& x: *m) {
-        if (x.first>res)
-            res = x.first;
+    switch (val_typ) {
+        case HPAT_INT8: combine_scalar<int8_t>(combine, out, val); return;
+        case HPAT_UINT8: combine_scalar<uint8_t>(combine, out, val); return;
+        case HPAT_INT16: combine_scalar<int16_t>(combine, out, val); return;
+        case HPAT_UINT16: combine_scalar<uint16_t>(combine, out, val); return;
+        case HPAT_INT32: combine_scalar<int32_t>(combine, out, val); return;
+        case HPAT_UINT32: combine_scalar<uint32_t>(combine, out, val); return;
+        case HPAT_INT64: combine_scalar<int64_t>(combine, out, val); return;
+        case HPAT_UINT64: combine_scalar<uint64_t>(combine, out, val); return;
+        case HPAT_FLOAT32: combine_scalar<float>(combine, out, val); return;
+        case HPAT_FLOAT64: combine_scalar<double>(combine, out, val); return;
+        default: std::cerr << "unknown dict value type" << std::endl;
+    }
+}
+
+class hpat_dist_dict {
+public:
+    hpat_dict_base* local;  // entries owned by this rank
+    int rank;
+    int n_pes;
+    int val_typ;
+    int combine;
+    // buffered updates per destination rank, each record is
+    // [key length (string keys only)] [key bytes] [value bytes]
+    std::vector<std::vector<char> > send_bufs;
+
+    hpat_dist_dict(int64_t key_size, int64_t val_size, int key_typ, int _val_typ, int _combine)
+        : val_typ(_val_typ), combine(_combine)
+    {
+        int is_initialized;
+        MPI_Initialized(&is_initialized);
+        // same thread level as hpat_dist_get_rank
+        if (!is_initialized)
+        {
+            int provided;
+            MPI_Init_thread(NULL, NULL, MPI_THREAD_MULTIPLE, &provided);
+        }
+        MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+        MPI_Comm_size(MPI_COMM_WORLD, &n_pes);
+        local = new hpat_dict(key_typ, key_size, val_size);
+        send_bufs.resize(n_pes);
+    }
+
+    // the local table uses low hash bits for slots, so owner is chosen using
+    // high bits to avoid clustering all local keys in the same slots
+    int owner(const char* key, int64_t key_len)
+    {
+        return (hash_bytes(key, key_len) >> 32) % n_pes;
+    }
+
+    void update(const char* key, int64_t key_len, const char* val)
+    {
+        int dest = owner(key, key_len);
+        if (dest == rank) {
+            combine_local(key, key_len, val);
+            return;
+        }
+        std::vector<char>& buf = send_bufs[dest];
+        if (local->key_typ == HPAT_DICT_KEY_STR)
+            buf.insert(buf.end(), (const char*)&key_len, (const char*)&key_len + sizeof(int64_t));
+        buf.insert(buf.end(), key, key + key_len);
+        buf.insert(buf.end(), val, val + local->val_size);
+    }
+
+    void combine_local(const char* key, int64_t key_len, const char* val)
+    {
+        // values are scalars so old values don't need to be released
+        char new_val[sizeof(int64_t)], old_val[sizeof(int64_t)];
+        if (local->getitem(key, key_len, new_val)) {
+            combine_vals(val_typ, combine, new_val, val);
+            local->setitem(key, key_len, new_val, old_val);
+        }
+        else
+            local->setitem(key, key_len, val, old_val);
+    }
+
+    // exchange buffered updates and merge them at owners (collective)
+    void flush()
+    {
+        std::vector<int64_t> send_counts(n_pes), recv_counts(n_pes);
+        std::vector<int64_t> send_disps(n_pes, 0), recv_disps(n_pes, 0);
+        for (int i=0; i<n_pes; i++)
+            send_counts[i] = send_bufs[i].size();
+        MPI_Alltoall(send_counts.data(), 1, MPI_INT64_T, recv_counts.data(), 1,
+                                                MPI_INT64_T, MPI_COMM_WORLD);
+        for (int i=1; i<n_pes; i++) {
+            send_disps[i] = send_disps[i-1] + send_counts[i-1];
+            recv_disps[i] = recv_disps[i-1] + recv_counts[i-1];
+        }
+        std::vector<char> send_buf(send_disps[n_pes-1] + send_counts[n_pes-1]);
+        std::vector<char> recv_buf(recv_disps[n_pes-1] + recv_counts[n_pes-1]);
+        for (int i=0; i<n_pes; i++) {
+            std::copy(send_bufs[i].begin(), send_bufs[i].end(), send_buf.begin() + send_disps[i]);
+            std::vector<char>().swap(send_bufs[i]);
+        }
+        hpat_alltoallv_large(send_buf.data(), send_counts.data(), send_disps.data(),
+            recv_buf.data(), recv_counts.data(), recv_disps.data(), MPI_CHAR,
+            MPI_COMM_WORLD);
+
+        const char* curr = recv_buf.data();
+        const char* end = curr + recv_buf.size();
+        while (curr < end) {
+            int64_t key_len = local->key_size;
+            if (local->key_typ == HPAT_DICT_KEY_STR) {
+                memcpy(&key_len, curr, sizeof(int64_t));
+                curr += sizeof(int64_t);
+            }
+            combine_local(curr, key_len, curr + key_len);
+            curr += key_len + local->val_size;
+        }
     }
+
+    // keys are compared bytewise, -0.0 should match 0.0 (same as
+    // pack_dict_key in dict_ext.py)
+    void normalize_key(char* key)
+    {
+        if (local->key_typ == HPAT_FLOAT32) {
+            float v;
+            memcpy(&v, key, sizeof(float));
+            if (v == 0.0f) {
+                v = 0.0f;
+                memcpy(key, &v, sizeof(float));
+            }
+        }
+        if (local->key_typ == HPAT_FLOAT64) {
+            double v;
+            memcpy(&v, key, sizeof(double));
+            if (v == 0.0) {
+                v = 0.0;
+                memcpy(key, &v, sizeof(double));
+            }
+        }
+    }
+
+    // look up n fixed-size keys at their owners (collective), missing keys
+    // get default_val
+    void get_many(const char* in_keys, int64_t n, const char* default_val, char* vals_out)
+    {
+        int64_t key_size = local->key_size;
+        int64_t val_size = local->val_size;
+        std::vector<char> keys_buf(in_keys, in_keys + n*key_size);
+        const char* keys = keys_buf.data();
+        for (int64_t i=0; i<n; i++)
+            normalize_key(keys_buf.data() + i*key_size);
+        std::vector<int> owners(n);
+        std::vector<int64_t> send_counts(n_pes, 0), recv_counts(n_pes);
+        std::vector<int64_t> send_disps(n_pes, 0), recv_disps(n_pes, 0);
+        for (int64_t i=0; i<n; i++) {
+            owners[i] = owner(keys + i*key_size, key_size);
+            send_counts[owners[i]]++;
+        }
+        MPI_Alltoall(send_counts.data(), 1, MPI_INT64_T, recv_counts.data(), 1,
+                                                MPI_INT64_T, MPI_COMM_WORLD);
+        for (int i=1; i<n_pes; i++) {
+            send_disps[i] = send_disps[i-1] + send_counts[i-1];
+            recv_disps[i] = recv_disps[i-1] + recv_counts[i-1];
+        }
+        int64_t n_recv = recv_disps[n_pes-1] + recv_counts[n_pes-1];
+
+        // pack keys by owner, perm maps packed position to input index
+        std::vector<char> send_keys(n*key_size);
+        std::vector<int64_t> perm(n);
+        std::vector<int64_t> fill(send_disps);
+        for (int64_t i=0; i<n; i++) {
+            int64_t pos = fill[owners[i]]++;
+            perm[pos] = i;
+            memcpy(send_keys.data() + pos*key_size, keys + i*key_size, key_size);
+        }
+
+        MPI_Datatype key_mpi_typ, val_mpi_typ;
+        MPI_Type_contiguous(key_size, MPI_CHAR, &key_mpi_typ);
+        MPI_Type_commit(&key_mpi_typ);
+        MPI_Type_contiguous(val_size, MPI_CHAR, &val_mpi_typ);
+        MPI_Type_commit(&val_mpi_typ);
+
+        std::vector<char> recv_keys(n_recv*key_size);
+        hpat_alltoallv_large(send_keys.data(), send_counts.data(), send_disps.data(),
+            recv_keys.data(), recv_counts.data(), recv_disps.data(), key_mpi_typ,
+            MPI_COMM_WORLD);
+
+        std::vector<char> send_vals(n_recv*val_size);
+        for (int64_t i=0; i<n_recv; i++) {
+            char* val = send_vals.data() + i*val_size;
+            if (!local->getitem(recv_keys.data() + i*key_size, key_size, val))
+                memcpy(val, default_val, val_size);
+        }
+
+        // replies follow the reverse pattern of requests
+        std::vector<char> recv_vals(n*val_size);
+        hpat_alltoallv_large(send_vals.data(), recv_counts.data(), recv_disps.data(),
+            recv_vals.data(), send_counts.data(), send_disps.data(), val_mpi_typ,
+            MPI_COMM_WORLD);
+        MPI_Type_free(&key_mpi_typ);
+        MPI_Type_free(&val_mpi_typ);
+
+        for (int64_t i=0; i<n; i++)
+            memcpy(vals_out + perm[i]*val_size, recv_vals.data() + i*val_size, val_size);
+    }
+};
+
+void* init_dist_dict(int64_t key_size, int64_t val_size, int key_typ, int val_typ, int combine)
+{
+    return new hpat_dist_dict(key_size, val_size, key_typ, val_typ, combine);
+}
+
+void dist_dict_setitem(void* dd, char* key, int64_t key_len, char* val)
+{
+    ((hpat_dist_dict*)dd)->update(key, key_len, val);
+}
+
+void dist_dict_flush(void* dd)
+{
+    ((hpat_dist_dict*)dd)->flush();
+}
+
+void dist_dict_get_many(void* dd, char* keys, int64_t n, char* default_val, char* vals_out)
+{
+    ((hpat_dist_dict*)dd)->get_many(keys, n, default_val, vals_out);
+}
+
+// total number of keys on all ranks (collective)
+int64_t dist_dict_len(void* dd)
+{
+    int64_t local_len = ((hpat_dist_dict*)dd)->local->size();
+    int64_t res;
+    MPI_Allreduce(&local_len, &res, 1, MPI_LONG_LONG_INT, MPI_SUM, MPI_COMM_WORLD);
     return res;
 }
 
-bool dict_int32_int32_not_empty(std::unordered_map<int, int>* m)
+void* dist_dict_local(void* dd)
 {
-    return !m->empty();
+    return ((hpat_dist_dict*)dd)->local;
 }
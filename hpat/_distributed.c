@@ -2,8 +2,15 @@
 #include "mpi.h"
 #include <cmath>
 #include <algorithm>
+#include <vector>
+#include <map>
+#include <utility>
+#include <climits>
+#include <complex>
 #include <Python.h>
 
+#include "_hpat_common.h"
+
 int hpat_dist_get_rank();
 int hpat_dist_get_size();
 int64_t hpat_dist_get_start(int64_t total, int num_pes, int node_id);
@@ -14,30 +21,96 @@ double hpat_get_time();
 int hpat_barrier();
 MPI_Datatype get_MPI_typ(int typ_enum);
 int get_elem_size(int type_enum);
-int hpat_dist_reduce_i4(int value);
-int64_t hpat_dist_reduce_i8(int64_t value);
-float hpat_dist_reduce_f4(float value);
-double hpat_dist_reduce_f8(double value);
-
-int hpat_dist_exscan_i4(int value);
-int64_t hpat_dist_exscan_i8(int64_t value);
-float hpat_dist_exscan_f4(float value);
-double hpat_dist_exscan_f8(double value);
+int hpat_dist_reduce_scalar(void* value, int type_enum);
+int hpat_dist_exscan_scalar(void* value, int type_enum, int is_prod);
 
 int hpat_dist_arr_reduce(void* out, int64_t* shapes, int ndims, int type_enum);
-int hpat_dist_irecv(void* out, int size, int type_enum, int pe, int tag, bool cond);
-int hpat_dist_isend(void* out, int size, int type_enum, int pe, int tag, bool cond);
+int hpat_dist_arr_reduce_start(void* out, int64_t* shapes, int ndims, int type_enum);
+int hpat_dist_arr_reduce_wait(int req_id);
+int hpat_dist_arr_accum_init(void* out, int64_t* shapes, int ndims, int type_enum);
+int hpat_dist_allgather(void* in, void* out, int64_t size, int type_enum);
+int hpat_dist_sched_start(int64_t n, int64_t chunk);
+int64_t hpat_dist_sched_next(int sched_id);
+int64_t hpat_dist_sched_chunk_end(int sched_id);
+int hpat_dist_sched_finish(int sched_id);
+int hpat_dist_irecv(void* out, int64_t size, int type_enum, int pe, int tag, bool cond);
+int hpat_dist_isend(void* out, int64_t size, int type_enum, int pe, int tag, bool cond);
 int hpat_dist_wait(int req, bool cond);
 int64_t hpat_dist_get_item_pointer(int64_t ind, int64_t start, int64_t count);
+int hpat_dist_get_grid_rows();
+int hpat_dist_get_grid_cols();
+int hpat_dist_get_grid_row_rank();
+int hpat_dist_get_grid_col_rank();
+int hpat_dist_matmul_2d(void* A, void* B, void* C, int64_t m, int64_t k,
+            int64_t n, int type_enum, bool transA, bool transB, int rep_out);
+int64_t hpat_alltoallv_string_array(uint32_t* offsets, char* data,
+        int64_t* send_counts, uint32_t** out_offsets, char** out_data);
+int64_t hpat_alltoallv_string_array_large(int64_t* offsets, char* data,
+        int64_t* send_counts, int64_t** out_offsets, char** out_data);
+int64_t hpat_shuffle_string_array(uint32_t* offsets, char* data, int64_t size,
+        int32_t* dests, uint32_t** out_offsets, char** out_data);
+int64_t hpat_shuffle_string_array_large(int64_t* offsets, char* data,
+        int64_t size, int32_t* dests, int64_t** out_offsets, char** out_data);
+int hpat_comm_set_loc(int loc);
+void hpat_alltoallv_int64(const void* send_buf, const int64_t* send_counts,
+        const int64_t* send_disps, void* recv_buf, const int64_t* recv_counts,
+        const int64_t* recv_disps, MPI_Datatype mpi_typ, MPI_Comm comm);
+int hpat_trace_event(int id, double start);
 int hpat_dummy_ptr[64];
 void* hpat_get_dummy_ptr() {
     return hpat_dummy_ptr;
 }
 
+static PyObject* hpat_enable_comm_stats(PyObject* self, PyObject* args);
+static PyObject* hpat_disable_comm_stats(PyObject* self, PyObject* args);
+static PyObject* hpat_get_comm_stats(PyObject* self, PyObject* args);
+static PyObject* hpat_reset_comm_stats(PyObject* self, PyObject* args);
+static PyObject* hpat_get_rank_py(PyObject* self, PyObject* args);
+static PyObject* hpat_get_trace_events(PyObject* self, PyObject* args);
+static PyObject* hpat_reset_trace(PyObject* self, PyObject* args);
+static PyObject* hpat_get_trace_summary(PyObject* self, PyObject* arg);
+static PyObject* hpat_get_trace_totals(PyObject* self, PyObject* args);
+static PyObject* hpat_set_max_trace_events(PyObject* self, PyObject* arg);
+static PyObject* hpat_get_trace_dropped(PyObject* self, PyObject* args);
+static PyObject* hpat_set_max_str_arr_data_size(PyObject* self, PyObject* arg);
+static PyObject* hpat_set_max_count(PyObject* self, PyObject* arg);
+
+static PyMethodDef hdist_methods[] = {
+    {"enable_comm_stats", hpat_enable_comm_stats, METH_NOARGS,
+        "start recording communication statistics, returns rank"},
+    {"disable_comm_stats", hpat_disable_comm_stats, METH_NOARGS,
+        "stop recording communication statistics"},
+    {"get_comm_stats", hpat_get_comm_stats, METH_NOARGS,
+        "list of (primitive, location, calls, bytes, time) records"},
+    {"reset_comm_stats", hpat_reset_comm_stats, METH_NOARGS,
+        "clear recorded communication statistics"},
+    {"get_rank", hpat_get_rank_py, METH_NOARGS,
+        "rank of this process, initializes MPI if necessary"},
+    {"get_trace_events", hpat_get_trace_events, METH_NOARGS,
+        "list of (event id, start time, end time) trace records"},
+    {"reset_trace", hpat_reset_trace, METH_NOARGS,
+        "clear recorded trace events"},
+    {"get_trace_summary", hpat_get_trace_summary, METH_O,
+        "list of (max, mean) total time of each event id across processes"},
+    {"get_trace_totals", hpat_get_trace_totals, METH_NOARGS,
+        "list of total time of each event id on this process"},
+    {"set_max_trace_events", hpat_set_max_trace_events, METH_O,
+        "set maximum number of recorded trace records, returns previous value"},
+    {"get_trace_dropped", hpat_get_trace_dropped, METH_NOARGS,
+        "number of trace records not recorded since the maximum was reached"},
+    {"set_max_count", hpat_set_max_count, METH_O,
+        "set maximum number of elements of a single MPI call, larger "
+        "transfers are split (lowered in tests), returns previous value"},
+    {"set_max_str_arr_data_size", hpat_set_max_str_arr_data_size, METH_O,
+        "set maximum received character data size of string arrays with "
+        "32-bit offsets, returns previous value"},
+    {NULL, NULL, 0, NULL}
+};
+
 PyMODINIT_FUNC PyInit_hdist(void) {
     PyObject *m;
     static struct PyModuleDef moduledef = {
-            PyModuleDef_HEAD_INIT, "hdist", "No docs", -1, NULL, };
+            PyModuleDef_HEAD_INIT, "hdist", "No docs", -1, hdist_methods, };
     m = PyModule_Create(&moduledef);
     if (m == NULL)
         return NULL;
@@ -54,31 +127,37 @@ PyMODINIT_FUNC PyInit_hdist(void) {
                             PyLong_FromVoidPtr((void*)(&hpat_dist_get_node_portion)));
     PyObject_SetAttrString(m, "hpat_dist_get_time",
                             PyLong_FromVoidPtr((void*)(&hpat_dist_get_time)));
+    PyObject_SetAttrString(m, "hpat_alltoallv_int64",
+                            PyLong_FromVoidPtr((void*)(&hpat_alltoallv_int64)));
     PyObject_SetAttrString(m, "hpat_get_time",
                             PyLong_FromVoidPtr((void*)(&hpat_get_time)));
     PyObject_SetAttrString(m, "hpat_barrier",
                             PyLong_FromVoidPtr((void*)(&hpat_barrier)));
 
-    PyObject_SetAttrString(m, "hpat_dist_reduce_i4",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_reduce_i4)));
-    PyObject_SetAttrString(m, "hpat_dist_reduce_i8",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_reduce_i8)));
-    PyObject_SetAttrString(m, "hpat_dist_reduce_f4",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_reduce_f4)));
-    PyObject_SetAttrString(m, "hpat_dist_reduce_f8",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_reduce_f8)));
-
-    PyObject_SetAttrString(m, "hpat_dist_exscan_i4",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_exscan_i4)));
-    PyObject_SetAttrString(m, "hpat_dist_exscan_i8",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_exscan_i8)));
-    PyObject_SetAttrString(m, "hpat_dist_exscan_f4",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_exscan_f4)));
-    PyObject_SetAttrString(m, "hpat_dist_exscan_f8",
-                            PyLong_FromVoidPtr((void*)(&hpat_dist_exscan_f8)));
+    PyObject_SetAttrString(m, "hpat_dist_reduce_scalar",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_reduce_scalar)));
+
+    PyObject_SetAttrString(m, "hpat_dist_exscan_scalar",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_exscan_scalar)));
 
     PyObject_SetAttrString(m, "hpat_dist_arr_reduce",
                             PyLong_FromVoidPtr((void*)(&hpat_dist_arr_reduce)));
+    PyObject_SetAttrString(m, "hpat_dist_allgather",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_allgather)));
+    PyObject_SetAttrString(m, "hpat_dist_arr_reduce_start",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_arr_reduce_start)));
+    PyObject_SetAttrString(m, "hpat_dist_arr_reduce_wait",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_arr_reduce_wait)));
+    PyObject_SetAttrString(m, "hpat_dist_arr_accum_init",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_arr_accum_init)));
+    PyObject_SetAttrString(m, "hpat_dist_sched_start",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_sched_start)));
+    PyObject_SetAttrString(m, "hpat_dist_sched_next",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_sched_next)));
+    PyObject_SetAttrString(m, "hpat_dist_sched_chunk_end",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_sched_chunk_end)));
+    PyObject_SetAttrString(m, "hpat_dist_sched_finish",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_sched_finish)));
     PyObject_SetAttrString(m, "hpat_dist_irecv",
                             PyLong_FromVoidPtr((void*)(&hpat_dist_irecv)));
     PyObject_SetAttrString(m, "hpat_dist_isend",
@@ -89,15 +168,252 @@ PyMODINIT_FUNC PyInit_hdist(void) {
                             PyLong_FromVoidPtr((void*)(&hpat_dist_get_item_pointer)));
     PyObject_SetAttrString(m, "hpat_get_dummy_ptr",
                             PyLong_FromVoidPtr((void*)(&hpat_get_dummy_ptr)));
+    PyObject_SetAttrString(m, "hpat_dist_get_grid_rows",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_get_grid_rows)));
+    PyObject_SetAttrString(m, "hpat_dist_get_grid_cols",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_get_grid_cols)));
+    PyObject_SetAttrString(m, "hpat_dist_get_grid_row_rank",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_get_grid_row_rank)));
+    PyObject_SetAttrString(m, "hpat_dist_get_grid_col_rank",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_get_grid_col_rank)));
+    PyObject_SetAttrString(m, "hpat_dist_matmul_2d",
+                            PyLong_FromVoidPtr((void*)(&hpat_dist_matmul_2d)));
+    PyObject_SetAttrString(m, "hpat_alltoallv_string_array",
+                            PyLong_FromVoidPtr((void*)(&hpat_alltoallv_string_array)));
+    PyObject_SetAttrString(m, "hpat_alltoallv_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&hpat_alltoallv_string_array_large)));
+    PyObject_SetAttrString(m, "hpat_shuffle_string_array",
+                            PyLong_FromVoidPtr((void*)(&hpat_shuffle_string_array)));
+    PyObject_SetAttrString(m, "hpat_shuffle_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&hpat_shuffle_string_array_large)));
+    PyObject_SetAttrString(m, "hpat_comm_set_loc",
+                            PyLong_FromVoidPtr((void*)(&hpat_comm_set_loc)));
+    PyObject_SetAttrString(m, "hpat_trace_event",
+                            PyLong_FromVoidPtr((void*)(&hpat_trace_event)));
     return m;
 }
 
+// communication statistics, recorded only after enable_comm_stats() is
+// called. Calls, bytes sent and time are accumulated per primitive and per
+// source location id set by the distributed pass before each call
+enum hpat_comm_prim {
+    HPAT_COMM_ALLREDUCE = 0,
+    HPAT_COMM_EXSCAN,
+    HPAT_COMM_IRECV,
+    HPAT_COMM_ISEND,
+    HPAT_COMM_WAIT,
+    HPAT_COMM_BARRIER,
+    HPAT_COMM_ALLTOALLV,
+    HPAT_COMM_MATMUL_2D,
+    HPAT_COMM_SCHED,
+    HPAT_COMM_ALLGATHER
+};
+
+static const char* hpat_comm_prim_names[] = {"allreduce", "exscan", "irecv",
+        "isend", "wait", "barrier", "alltoallv", "matmul_2d", "sched",
+        "allgather"};
+
+struct hpat_comm_stat {
+    int64_t calls;
+    int64_t bytes;
+    double time;
+};
+
+static bool hpat_comm_stats_enabled = false;
+static int hpat_comm_loc = -1;
+static std::map<std::pair<int, int>, hpat_comm_stat> hpat_comm_stats;
+
+// location of the next communication call, reset after the call is recorded
+int hpat_comm_set_loc(int loc)
+{
+    hpat_comm_loc = loc;
+    return 0;
+}
+
+// records the time from construction to destruction of the object
+struct hpat_comm_timer {
+    int prim;
+    int64_t bytes;
+    bool active;
+    double start;
+
+    hpat_comm_timer(int _prim, int64_t _bytes, bool _active=true)
+        : prim(_prim), bytes(_bytes), active(_active && hpat_comm_stats_enabled)
+    {
+        if (active)
+            start = MPI_Wtime();
+    }
+
+    ~hpat_comm_timer()
+    {
+        if (!active)
+            return;
+        hpat_comm_stat& stat = hpat_comm_stats[std::make_pair(prim, hpat_comm_loc)];
+        stat.calls++;
+        stat.bytes += bytes;
+        stat.time += MPI_Wtime()-start;
+        hpat_comm_loc = -1;
+    }
+};
+
+static PyObject* hpat_enable_comm_stats(PyObject* self, PyObject* args)
+{
+    // make sure MPI is initialized before timers use MPI_Wtime
+    int rank = hpat_dist_get_rank();
+    hpat_comm_stats_enabled = true;
+    return PyLong_FromLong(rank);
+}
+
+static PyObject* hpat_disable_comm_stats(PyObject* self, PyObject* args)
+{
+    hpat_comm_stats_enabled = false;
+    Py_RETURN_NONE;
+}
+
+static PyObject* hpat_get_comm_stats(PyObject* self, PyObject* args)
+{
+    PyObject* out = PyList_New(0);
+    for (auto& item : hpat_comm_stats)
+    {
+        PyObject* rec = Py_BuildValue("(siLLd)",
+            hpat_comm_prim_names[item.first.first], item.first.second,
+            (long long)item.second.calls, (long long)item.second.bytes,
+            item.second.time);
+        PyList_Append(out, rec);
+        Py_DECREF(rec);
+    }
+    return out;
+}
+
+static PyObject* hpat_reset_comm_stats(PyObject* self, PyObject* args)
+{
+    hpat_comm_stats.clear();
+    Py_RETURN_NONE;
+}
+
+// timeline of traced parfors, I/O and communication calls of this process,
+// event ids are assigned by the distributed pass in the same order on all
+// processes
+struct hpat_trace_rec {
+    int id;
+    double start;
+    double end;
+};
+
+static std::vector<hpat_trace_rec> hpat_trace_events;
+// the timeline is capped since traced statements in loops can run many
+// times, total time of each event id is kept for all of them
+static int64_t hpat_max_trace_events = 1000000;
+static int64_t hpat_trace_dropped = 0;
+static std::vector<double> hpat_trace_totals;
+
+int hpat_trace_event(int id, double start)
+{
+    hpat_trace_rec rec = {id, start, MPI_Wtime()};
+    if (id>=0)
+    {
+        if ((size_t)id>=hpat_trace_totals.size())
+            hpat_trace_totals.resize(id+1, 0.0);
+        hpat_trace_totals[id] += rec.end-rec.start;
+    }
+    if ((int64_t)hpat_trace_events.size()<hpat_max_trace_events)
+        hpat_trace_events.push_back(rec);
+    else
+        hpat_trace_dropped++;
+    return 0;
+}
+
+static PyObject* hpat_get_rank_py(PyObject* self, PyObject* args)
+{
+    return PyLong_FromLong(hpat_dist_get_rank());
+}
+
+static PyObject* hpat_get_trace_events(PyObject* self, PyObject* args)
+{
+    PyObject* out = PyList_New(0);
+    for (auto& rec : hpat_trace_events)
+    {
+        PyObject* item = Py_BuildValue("(idd)", rec.id, rec.start, rec.end);
+        PyList_Append(out, item);
+        Py_DECREF(item);
+    }
+    return out;
+}
+
+static PyObject* hpat_reset_trace(PyObject* self, PyObject* args)
+{
+    hpat_trace_events.clear();
+    hpat_trace_totals.clear();
+    hpat_trace_dropped = 0;
+    Py_RETURN_NONE;
+}
+
+static PyObject* hpat_get_trace_totals(PyObject* self, PyObject* args)
+{
+    PyObject* out = PyList_New(0);
+    for (double t : hpat_trace_totals)
+    {
+        PyObject* item = PyFloat_FromDouble(t);
+        PyList_Append(out, item);
+        Py_DECREF(item);
+    }
+    return out;
+}
+
+static PyObject* hpat_set_max_trace_events(PyObject* self, PyObject* arg)
+{
+    int64_t n = PyLong_AsLongLong(arg);
+    if (n==-1 && PyErr_Occurred())
+        return NULL;
+    int64_t old_n = hpat_max_trace_events;
+    hpat_max_trace_events = n;
+    return PyLong_FromLongLong(old_n);
+}
+
+static PyObject* hpat_get_trace_dropped(PyObject* self, PyObject* args)
+{
+    return PyLong_FromLongLong(hpat_trace_dropped);
+}
+
+// total time of each event id on this process is reduced across processes,
+// should be called by all processes with the same number of event ids
+static PyObject* hpat_get_trace_summary(PyObject* self, PyObject* arg)
+{
+    long n_events = PyLong_AsLong(arg);
+    if (n_events==-1 && PyErr_Occurred())
+        return NULL;
+    std::vector<double> local_times(n_events, 0.0);
+    for (long i=0; i<n_events && i<(long)hpat_trace_totals.size(); i++)
+        local_times[i] = hpat_trace_totals[i];
+    std::vector<double> max_times(n_events), sum_times(n_events);
+    hpat_dist_get_rank();  // make sure MPI is initialized
+    MPI_Allreduce(local_times.data(), max_times.data(), (int)n_events,
+                                        MPI_DOUBLE, MPI_MAX, MPI_COMM_WORLD);
+    MPI_Allreduce(local_times.data(), sum_times.data(), (int)n_events,
+                                        MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
+    int num_pes = hpat_dist_get_size();
+    PyObject* out = PyList_New(0);
+    for (long i=0; i<n_events; i++)
+    {
+        PyObject* item = Py_BuildValue("(dd)", max_times[i],
+                                                    sum_times[i]/num_pes);
+        PyList_Append(out, item);
+        Py_DECREF(item);
+    }
+    return out;
+}
+
 int hpat_dist_get_rank()
 {
     int is_initialized;
     MPI_Initialized(&is_initialized);
+    // streams read the next batch in background with MPI-IO, which
+    // requires MPI_THREAD_MULTIPLE (see hpat_h5_stream_start)
     if (!is_initialized)
-        MPI_Init(NULL, NULL);
+    {
+        int provided;
+        MPI_Init_thread(NULL, NULL, MPI_THREAD_MULTIPLE, &provided);
+    }
     int rank;
     MPI_Comm_rank(MPI_COMM_WORLD, &rank);
     // printf("my_rank:%d\n", rank);
@@ -141,6 +457,7 @@ int64_t hpat_dist_get_node_portion(int64_t total, int num_pes, int node_id)
 double hpat_dist_get_time()
 {
     double wtime;
+    hpat_comm_timer timer(HPAT_COMM_BARRIER, 0);
     MPI_Barrier(MPI_COMM_WORLD);
     wtime = MPI_Wtime();
     return wtime;
@@ -155,153 +472,467 @@ double hpat_get_time()
 
 int hpat_barrier()
 {
+    hpat_comm_timer timer(HPAT_COMM_BARRIER, 0);
     MPI_Barrier(MPI_COMM_WORLD);
     return 0;
 }
 
-int hpat_dist_reduce_i4(int value)
+// in place sum of a scalar of type code type_enum across processors
+int hpat_dist_reduce_scalar(void* value, int type_enum)
 {
-    // printf("sum value: %d\n", value);
-    int out=0;
-    MPI_Allreduce(&value, &out, 1, MPI_INT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    hpat_comm_timer timer(HPAT_COMM_ALLREDUCE, get_elem_size(type_enum));
+    MPI_Allreduce(MPI_IN_PLACE, value, 1, get_MPI_typ(type_enum), MPI_SUM,
+                                                            MPI_COMM_WORLD);
+    return 0;
 }
 
-int64_t hpat_dist_reduce_i8(int64_t value)
-{
-    // printf("sum value: %lld\n", value);
-    int64_t out=0;
-    MPI_Allreduce(&value, &out, 1, MPI_LONG_LONG_INT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
-}
+// MPI counts are int, so larger transfers are split into pieces of at most
+// this many elements
+static int64_t hpat_max_count = INT_MAX;
 
-float hpat_dist_reduce_f4(float value)
+static PyObject* hpat_set_max_count(PyObject* self, PyObject* arg)
 {
-    // printf("sum value: %f\n", value);
-    float out=0;
-    MPI_Allreduce(&value, &out, 1, MPI_FLOAT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    int64_t count = PyLong_AsLongLong(arg);
+    if (count==-1 && PyErr_Occurred())
+        return NULL;
+    if (count<1 || count>INT_MAX)
+    {
+        PyErr_SetString(PyExc_ValueError, "max count should be in [1, INT_MAX]");
+        return NULL;
+    }
+    int64_t old_count = hpat_max_count;
+    hpat_max_count = count;
+    return PyLong_FromLongLong(old_count);
 }
 
-double hpat_dist_reduce_f8(double value)
+static int64_t hpat_get_total_size(int64_t* shapes, int ndims)
 {
-    // printf("sum value: %lf\n", value);
-    double out=0;
-    MPI_Allreduce(&value, &out, 1, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    int64_t total_size = shapes[0];
+    for(int i=1; i<ndims; i++)
+        total_size *= shapes[i];
+    return total_size;
 }
 
 int hpat_dist_arr_reduce(void* out, int64_t* shapes, int ndims, int type_enum)
 {
-    int i;
     // printf("ndims:%d shape: ", ndims);
     // for(i=0; i<ndims; i++)
     //     printf("%d ", shapes[i]);
     // printf("\n");
     // fflush(stdout);
-    int total_size = (int)shapes[0];
-    for(i=1; i<ndims; i++)
-        total_size *= (int)shapes[i];
+    int64_t total_size = hpat_get_total_size(shapes, ndims);
     MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
     int elem_size = get_elem_size(type_enum);
-    void* res_buf = malloc(total_size*elem_size);
-    MPI_Allreduce(out, res_buf, total_size, mpi_typ, MPI_SUM, MPI_COMM_WORLD);
-    memcpy(out, res_buf, total_size*elem_size);
-    free(res_buf);
+    hpat_comm_timer timer(HPAT_COMM_ALLREDUCE, total_size*elem_size);
+    // reduce in place to avoid allocating and copying a result buffer
+    char* ptr = (char*)out;
+    for(int64_t i=0; i<total_size; i+=hpat_max_count)
+    {
+        int count = (int)std::min(hpat_max_count, total_size-i);
+        MPI_Allreduce(MPI_IN_PLACE, ptr+i*elem_size, count, mpi_typ, MPI_SUM,
+                                                                MPI_COMM_WORLD);
+    }
     return 0;
 }
 
+// pending nonblocking operations, referred to by index since MPI_Request is
+// not an int in all MPI implementations. Large transfers are split into
+// several requests that are completed together.
+static std::vector<std::vector<MPI_Request> > hpat_reqs;
+static std::vector<int> hpat_free_reqs;
 
-int hpat_dist_exscan_i4(int value)
+static int hpat_add_reqs(std::vector<MPI_Request>& reqs)
 {
-    // printf("sum value: %d\n", value);
-    int out=0;
-    MPI_Exscan(&value, &out, 1, MPI_INT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    if (hpat_free_reqs.empty())
+    {
+        hpat_reqs.push_back(std::vector<MPI_Request>());
+        hpat_reqs.back().swap(reqs);
+        return (int)hpat_reqs.size()-1;
+    }
+    int req_id = hpat_free_reqs.back();
+    hpat_free_reqs.pop_back();
+    hpat_reqs[req_id].swap(reqs);
+    return req_id;
 }
 
-int64_t hpat_dist_exscan_i8(int64_t value)
+static void hpat_wait_reqs(int req_id)
 {
-    // printf("sum value: %lld\n", value);
-    int64_t out=0;
-    MPI_Exscan(&value, &out, 1, MPI_LONG_LONG_INT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    std::vector<MPI_Request>& reqs = hpat_reqs[req_id];
+    MPI_Waitall((int)reqs.size(), reqs.data(), MPI_STATUSES_IGNORE);
+    reqs.clear();
+    hpat_free_reqs.push_back(req_id);
 }
 
-float hpat_dist_exscan_f4(float value)
+// start an in place sum reduction of array out, the array should not be
+// accessed until hpat_dist_arr_reduce_wait() is called on the returned id
+int hpat_dist_arr_reduce_start(void* out, int64_t* shapes, int ndims, int type_enum)
 {
-    // printf("sum value: %f\n", value);
-    float out=0;
-    MPI_Exscan(&value, &out, 1, MPI_FLOAT, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    int64_t total_size = hpat_get_total_size(shapes, ndims);
+    MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
+    int elem_size = get_elem_size(type_enum);
+    hpat_comm_timer timer(HPAT_COMM_ALLREDUCE, total_size*elem_size);
+    std::vector<MPI_Request> reqs;
+    char* ptr = (char*)out;
+    for(int64_t i=0; i<total_size; i+=hpat_max_count)
+    {
+        int count = (int)std::min(hpat_max_count, total_size-i);
+        MPI_Request req;
+        MPI_Iallreduce(MPI_IN_PLACE, ptr+i*elem_size, count, mpi_typ, MPI_SUM,
+                                                        MPI_COMM_WORLD, &req);
+        reqs.push_back(req);
+    }
+    return hpat_add_reqs(reqs);
 }
 
-double hpat_dist_exscan_f8(double value)
+int hpat_dist_arr_reduce_wait(int req_id)
 {
-    // printf("sum value: %lf\n", value);
-    double out=0;
-    MPI_Exscan(&value, &out, 1, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
-    return out;
+    hpat_comm_timer timer(HPAT_COMM_WAIT, 0);
+    hpat_wait_reqs(req_id);
+    return 0;
 }
 
-int hpat_dist_irecv(void* out, int size, int type_enum, int pe, int tag, bool cond)
+// zero an array that is accumulated into by a distributed loop on all
+// processors except rank 0, so that summing the arrays afterwards counts its
+// initial values once
+int hpat_dist_arr_accum_init(void* out, int64_t* shapes, int ndims, int type_enum)
 {
-    MPI_Request mpi_req_recv = -1;
-    // printf("irecv size:%d pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
-    // fflush(stdout);
-    if(cond)
+    if (hpat_dist_get_rank()==0)
+        return 0;
+    int64_t total_size = hpat_get_total_size(shapes, ndims);
+    memset(out, 0, total_size*get_elem_size(type_enum));
+    return 0;
+}
+
+// dynamic scheduling of loop iterations: processors claim chunks of
+// iterations by atomically incrementing a counter of the next unclaimed
+// iteration, which is stored on rank 0
+struct hpat_sched {
+    MPI_Win win;
+    int64_t* counter;
+    int64_t n;
+    int64_t chunk;
+    int64_t chunk_end;
+};
+
+static std::vector<hpat_sched> hpat_scheds;
+static std::vector<int> hpat_free_scheds;
+
+// start dynamic scheduling of n iterations in chunks of chunk iterations,
+// a small chunk size is chosen if chunk is not positive. Collective.
+int hpat_dist_sched_start(int64_t n, int64_t chunk)
+{
+    hpat_comm_timer timer(HPAT_COMM_SCHED, 0);
+    int rank = hpat_dist_get_rank();
+    int num_pes = hpat_dist_get_size();
+    hpat_sched sched;
+    sched.n = n;
+    sched.chunk = chunk;
+    if (chunk<=0)
+        sched.chunk = std::max((int64_t)1, n/(16*(int64_t)num_pes));
+    sched.chunk_end = 0;
+    MPI_Aint win_size = (rank==0) ? sizeof(int64_t) : 0;
+    MPI_Win_allocate(win_size, sizeof(int64_t), MPI_INFO_NULL, MPI_COMM_WORLD,
+                                                &sched.counter, &sched.win);
+    if (rank==0)
     {
-        MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
-        MPI_Irecv(out, size, mpi_typ, pe, tag, MPI_COMM_WORLD, &mpi_req_recv);
+        MPI_Win_lock(MPI_LOCK_EXCLUSIVE, 0, 0, sched.win);
+        *sched.counter = 0;
+        MPI_Win_unlock(0, sched.win);
+    }
+    // counter should be initialized before any processor claims a chunk
+    MPI_Barrier(MPI_COMM_WORLD);
+    MPI_Win_lock_all(MPI_MODE_NOCHECK, sched.win);
+    if (hpat_free_scheds.empty())
+    {
+        hpat_scheds.push_back(sched);
+        return (int)hpat_scheds.size()-1;
+    }
+    int sched_id = hpat_free_scheds.back();
+    hpat_free_scheds.pop_back();
+    hpat_scheds[sched_id] = sched;
+    return sched_id;
+}
+
+// claim the next chunk, returns its first iteration which is not less than
+// the number of iterations if all iterations are claimed
+int64_t hpat_dist_sched_next(int sched_id)
+{
+    hpat_sched& sched = hpat_scheds[sched_id];
+    hpat_comm_timer timer(HPAT_COMM_SCHED, sizeof(int64_t));
+    int64_t start;
+    MPI_Fetch_and_op(&sched.chunk, &start, MPI_INT64_T, 0, 0, MPI_SUM,
+                                                                sched.win);
+    MPI_Win_flush(0, sched.win);
+    sched.chunk_end = std::min(start+sched.chunk, sched.n);
+    return start;
+}
+
+// end of the last chunk claimed by hpat_dist_sched_next()
+int64_t hpat_dist_sched_chunk_end(int sched_id)
+{
+    return hpat_scheds[sched_id].chunk_end;
+}
+
+// free the schedule after all processors are done claiming. Collective.
+int hpat_dist_sched_finish(int sched_id)
+{
+    hpat_comm_timer timer(HPAT_COMM_SCHED, 0);
+    hpat_sched& sched = hpat_scheds[sched_id];
+    MPI_Win_unlock_all(sched.win);
+    MPI_Win_free(&sched.win);
+    hpat_free_scheds.push_back(sched_id);
+    return 0;
+}
+
+
+template <class T>
+static void hpat_set_scalar(void* out, int v)
+{
+    T val = (T)v;
+    memcpy(out, &val, sizeof(T));
+}
+
+// set scalar of type code type_enum to small integer v
+static void hpat_set_scalar_typ(void* out, int type_enum, int v)
+{
+    switch (type_enum) {
+        case HPAT_INT8: hpat_set_scalar<int8_t>(out, v); return;
+        case HPAT_UINT8: hpat_set_scalar<uint8_t>(out, v); return;
+        case HPAT_INT16: hpat_set_scalar<int16_t>(out, v); return;
+        case HPAT_UINT16: hpat_set_scalar<uint16_t>(out, v); return;
+        case HPAT_INT32: hpat_set_scalar<int32_t>(out, v); return;
+        case HPAT_UINT32: hpat_set_scalar<uint32_t>(out, v); return;
+        case HPAT_INT64: hpat_set_scalar<int64_t>(out, v); return;
+        case HPAT_UINT64: hpat_set_scalar<uint64_t>(out, v); return;
+        case HPAT_FLOAT32: hpat_set_scalar<float>(out, v); return;
+        case HPAT_FLOAT64: hpat_set_scalar<double>(out, v); return;
+        case HPAT_BOOL: hpat_set_scalar<bool>(out, v); return;
+        case HPAT_COMPLEX64:
+            hpat_set_scalar<std::complex<float> >(out, v); return;
+        case HPAT_COMPLEX128:
+            hpat_set_scalar<std::complex<double> >(out, v); return;
+        default: std::cerr << "unknown type code " << type_enum << std::endl;
     }
-    // printf("after irecv size:%d pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
+}
+
+// in place exclusive scan with sum or product of a scalar of type code
+// type_enum, result of rank 0 (undefined in MPI) is 0 or 1
+int hpat_dist_exscan_scalar(void* value, int type_enum, int is_prod)
+{
+    hpat_comm_timer timer(HPAT_COMM_EXSCAN, get_elem_size(type_enum));
+    MPI_Exscan(MPI_IN_PLACE, value, 1, get_MPI_typ(type_enum),
+                        is_prod ? MPI_PROD : MPI_SUM, MPI_COMM_WORLD);
+    if (hpat_dist_get_rank()==0)
+        hpat_set_scalar_typ(value, type_enum, is_prod ? 1 : 0);
+    return 0;
+}
+
+// post nonblocking point to point transfers of count elements, in pieces of
+// at most hpat_max_count elements. Both sides split the same way and
+// messages with the same tag are not reordered, so the pieces match up.
+// A zero size transfer still posts one message.
+static void hpat_post_p2p(void* buf, int64_t count, int type_enum, int pe,
+                        int tag, bool is_send, std::vector<MPI_Request>& reqs)
+{
+    MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
+    int elem_size = get_elem_size(type_enum);
+    char* ptr = (char*)buf;
+    int64_t i = 0;
+    do
+    {
+        int n = (int)std::min(hpat_max_count, count-i);
+        MPI_Request req;
+        if (is_send)
+            MPI_Isend(ptr+i*elem_size, n, mpi_typ, pe, tag, MPI_COMM_WORLD, &req);
+        else
+            MPI_Irecv(ptr+i*elem_size, n, mpi_typ, pe, tag, MPI_COMM_WORLD, &req);
+        reqs.push_back(req);
+        i += n;
+    } while (i<count);
+}
+
+int hpat_dist_irecv(void* out, int64_t size, int type_enum, int pe, int tag, bool cond)
+{
+    // printf("irecv size:%lld pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
     // fflush(stdout);
-    return mpi_req_recv;
+    hpat_comm_timer timer(HPAT_COMM_IRECV, size*get_elem_size(type_enum), cond);
+    if (!cond)
+        return -1;
+    std::vector<MPI_Request> reqs;
+    hpat_post_p2p(out, size, type_enum, pe, tag, false, reqs);
+    return hpat_add_reqs(reqs);
 }
 
-int hpat_dist_isend(void* out, int size, int type_enum, int pe, int tag, bool cond)
+int hpat_dist_isend(void* out, int64_t size, int type_enum, int pe, int tag, bool cond)
 {
-    MPI_Request mpi_req_recv = -1;
-    // printf("isend size:%d pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
+    // printf("isend size:%lld pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
     // fflush(stdout);
-    if(cond)
+    hpat_comm_timer timer(HPAT_COMM_ISEND, size*get_elem_size(type_enum), cond);
+    if (!cond)
+        return -1;
+    std::vector<MPI_Request> reqs;
+    hpat_post_p2p(out, size, type_enum, pe, tag, true, reqs);
+    return hpat_add_reqs(reqs);
+}
+
+int hpat_dist_wait(int req, bool cond)
+{
+    hpat_comm_timer timer(HPAT_COMM_WAIT, 0, cond);
+    if (cond && req>=0)
+        hpat_wait_reqs(req);
+    return 0;
+}
+
+// broadcast count elements of type mpi_typ in pieces of int size
+static void hpat_bcast_large(void* buf, int64_t count, MPI_Datatype mpi_typ,
+                                                    int root, MPI_Comm comm)
+{
+    int elem_size;
+    MPI_Type_size(mpi_typ, &elem_size);
+    char* ptr = (char*)buf;
+    for(int64_t i=0; i<count; i+=hpat_max_count)
     {
-        MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
-        MPI_Isend(out, size, mpi_typ, pe, tag, MPI_COMM_WORLD, &mpi_req_recv);
+        int n = (int)std::min(hpat_max_count, count-i);
+        MPI_Bcast(ptr+i*elem_size, n, mpi_typ, root, comm);
     }
-    // printf("after isend size:%d pe:%d tag:%d, cond:%d\n", size, pe, tag, cond);
-    // fflush(stdout);
-    return mpi_req_recv;
 }
 
-int hpat_dist_wait(int req, bool cond)
+// MPI_Allgatherv with 64-bit counts and displacements (in elements), falls
+// back to a broadcast from each processor if values do not fit in int
+static void hpat_allgatherv_large(const void* send_buf, void* recv_buf,
+        const std::vector<int64_t>& counts, const std::vector<int64_t>& disps,
+        MPI_Datatype mpi_typ, MPI_Comm comm)
+{
+    int num_pes, rank;
+    MPI_Comm_size(comm, &num_pes);
+    MPI_Comm_rank(comm, &rank);
+    int elem_size;
+    MPI_Type_size(mpi_typ, &elem_size);
+    // counts are the same on all processors so no agreement is necessary
+    if (disps[num_pes-1]+counts[num_pes-1]<=hpat_max_count)
+    {
+        std::vector<int> i_counts(counts.begin(), counts.end());
+        std::vector<int> i_disps(disps.begin(), disps.end());
+        MPI_Allgatherv(send_buf, i_counts[rank], mpi_typ, recv_buf,
+                        i_counts.data(), i_disps.data(), mpi_typ, comm);
+        return;
+    }
+    char* out = (char*)recv_buf+disps[rank]*elem_size;
+    std::copy((const char*)send_buf,
+                (const char*)send_buf+counts[rank]*elem_size, out);
+    for(int p=0; p<num_pes; p++)
+        hpat_bcast_large((char*)recv_buf+disps[p]*elem_size, counts[p],
+                                                            mpi_typ, p, comm);
+}
+
+// gather size elements of every processor into out (in rank order)
+int hpat_dist_allgather(void* in, void* out, int64_t size, int type_enum)
 {
-    if (cond)
-        MPI_Wait(&req, MPI_STATUS_IGNORE);
+    int num_pes = hpat_dist_get_size();
+    hpat_comm_timer timer(HPAT_COMM_ALLGATHER, size*get_elem_size(type_enum));
+    std::vector<int64_t> counts(num_pes, size);
+    std::vector<int64_t> disps(num_pes);
+    for(int p=0; p<num_pes; p++)
+        disps[p] = p*size;
+    hpat_allgatherv_large(in, out, counts, disps, get_MPI_typ(type_enum),
+                                                            MPI_COMM_WORLD);
     return 0;
 }
 
-// _h5_typ_table = {
-//     int8:0,
-//     uint8:1,
-//     int32:2,
-//     int64:3,
-//     float32:4,
-//     float64:5
-//     }
+// MPI_Alltoallv with 64-bit counts and displacements (in elements).
+// MPI_Alltoallv is used if all values fit in int on all processors,
+// otherwise data is exchanged with point to point messages in pieces.
+static void hpat_alltoallv_large(const void* send_buf,
+        const std::vector<int64_t>& send_counts,
+        const std::vector<int64_t>& send_disps, void* recv_buf,
+        const std::vector<int64_t>& recv_counts,
+        const std::vector<int64_t>& recv_disps, MPI_Datatype mpi_typ,
+        MPI_Comm comm)
+{
+    int num_pes;
+    MPI_Comm_size(comm, &num_pes);
+    int local_fits = 1;
+    for(int p=0; p<num_pes; p++)
+        if (send_disps[p]+send_counts[p]>hpat_max_count
+                || recv_disps[p]+recv_counts[p]>hpat_max_count)
+            local_fits = 0;
+    int fits;
+    MPI_Allreduce(&local_fits, &fits, 1, MPI_INT, MPI_LAND, comm);
+    if (fits)
+    {
+        std::vector<int> s_counts(send_counts.begin(), send_counts.end());
+        std::vector<int> s_disps(send_disps.begin(), send_disps.end());
+        std::vector<int> r_counts(recv_counts.begin(), recv_counts.end());
+        std::vector<int> r_disps(recv_disps.begin(), recv_disps.end());
+        MPI_Alltoallv(send_buf, s_counts.data(), s_disps.data(), mpi_typ,
+            recv_buf, r_counts.data(), r_disps.data(), mpi_typ, comm);
+        return;
+    }
+    int elem_size;
+    MPI_Type_size(mpi_typ, &elem_size);
+    const int tag = 7;
+    std::vector<MPI_Request> reqs;
+    for(int p=0; p<num_pes; p++)
+        for(int64_t i=0; i<recv_counts[p]; i+=hpat_max_count)
+        {
+            int n = (int)std::min(hpat_max_count, recv_counts[p]-i);
+            MPI_Request req;
+            MPI_Irecv((char*)recv_buf+(recv_disps[p]+i)*elem_size, n, mpi_typ,
+                                                        p, tag, comm, &req);
+            reqs.push_back(req);
+        }
+    for(int p=0; p<num_pes; p++)
+        for(int64_t i=0; i<send_counts[p]; i+=hpat_max_count)
+        {
+            int n = (int)std::min(hpat_max_count, send_counts[p]-i);
+            MPI_Request req;
+            MPI_Isend((const char*)send_buf+(send_disps[p]+i)*elem_size, n,
+                                                mpi_typ, p, tag, comm, &req);
+            reqs.push_back(req);
+        }
+    MPI_Waitall((int)reqs.size(), reqs.data(), MPI_STATUSES_IGNORE);
+}
 
+// hpat_alltoallv_large for other extension modules (distributed dicts of
+// hdict_ext), counts and displacements are arrays of one value per processor
+void hpat_alltoallv_int64(const void* send_buf, const int64_t* send_counts,
+        const int64_t* send_disps, void* recv_buf, const int64_t* recv_counts,
+        const int64_t* recv_disps, MPI_Datatype mpi_typ, MPI_Comm comm)
+{
+    int num_pes;
+    MPI_Comm_size(comm, &num_pes);
+    hpat_alltoallv_large(send_buf,
+        std::vector<int64_t>(send_counts, send_counts+num_pes),
+        std::vector<int64_t>(send_disps, send_disps+num_pes), recv_buf,
+        std::vector<int64_t>(recv_counts, recv_counts+num_pes),
+        std::vector<int64_t>(recv_disps, recv_disps+num_pes), mpi_typ, comm);
+}
+
+// type codes are defined in _hpat_common.h
 MPI_Datatype get_MPI_typ(int typ_enum)
 {
     // printf("h5 type enum:%d\n", typ_enum);
-    MPI_Datatype types_list[] = {MPI_CHAR, MPI_UNSIGNED_CHAR,
-            MPI_INT, MPI_LONG_LONG_INT, MPI_FLOAT, MPI_DOUBLE};
+    // MPI_CHAR is not valid in reductions, use fixed width types instead
+    MPI_Datatype types_list[] = {MPI_INT8_T, MPI_UINT8_T, MPI_INT32_T,
+            MPI_INT64_T, MPI_FLOAT, MPI_DOUBLE, MPI_UINT32_T, MPI_UINT64_T,
+            MPI_INT16_T, MPI_UINT16_T, MPI_C_BOOL, MPI_C_FLOAT_COMPLEX,
+            MPI_C_DOUBLE_COMPLEX};
+    if (typ_enum<0 || typ_enum>=HPAT_NUM_TYPES)
+    {
+        fprintf(stderr, "invalid data type code: %d\n", typ_enum);
+        return MPI_DATATYPE_NULL;
+    }
     return types_list[typ_enum];
 }
 
 int get_elem_size(int type_enum)
 {
-    int types_sizes[] = {1,1,4,8,4,8};
-    return types_sizes[type_enum];
+    if (type_enum<0 || type_enum>=HPAT_NUM_TYPES)
+    {
+        fprintf(stderr, "invalid data type code: %d\n", type_enum);
+        return 0;
+    }
+    return hpat_type_sizes[type_enum];
 }
 
 int64_t hpat_dist_get_item_pointer(int64_t ind, int64_t start, int64_t count)
@@ -311,3 +942,460 @@ int64_t hpat_dist_get_item_pointer(int64_t ind, int64_t start, int64_t count)
         return ind-start;
     return -1;
 }
+
+// 2D process grid for 2D block distribution, rows x cols with rows >= cols
+static int hpat_grid_dims[2] = {0, 0};
+// communicators of processes in the same grid row and same grid column
+static MPI_Comm hpat_grid_row_comm = MPI_COMM_NULL;
+static MPI_Comm hpat_grid_col_comm = MPI_COMM_NULL;
+
+static void hpat_init_grid()
+{
+    if (hpat_grid_dims[0]!=0)
+        return;
+    hpat_dist_get_rank();  // make sure MPI is initialized
+    MPI_Dims_create(hpat_dist_get_size(), 2, hpat_grid_dims);
+}
+
+int hpat_dist_get_grid_rows()
+{
+    hpat_init_grid();
+    return hpat_grid_dims[0];
+}
+
+int hpat_dist_get_grid_cols()
+{
+    hpat_init_grid();
+    return hpat_grid_dims[1];
+}
+
+int hpat_dist_get_grid_row_rank()
+{
+    hpat_init_grid();
+    return hpat_dist_get_rank()/hpat_grid_dims[1];
+}
+
+int hpat_dist_get_grid_col_rank()
+{
+    hpat_init_grid();
+    return hpat_dist_get_rank()%hpat_grid_dims[1];
+}
+
+static void hpat_init_grid_comms()
+{
+    if (hpat_grid_row_comm!=MPI_COMM_NULL)
+        return;
+    int row = hpat_dist_get_grid_row_rank();
+    int col = hpat_dist_get_grid_col_rank();
+    // rank in row communicator is grid column and vice versa
+    MPI_Comm_split(MPI_COMM_WORLD, row, col, &hpat_grid_row_comm);
+    MPI_Comm_split(MPI_COMM_WORLD, col, row, &hpat_grid_col_comm);
+}
+
+// processor that owns index ind in block distribution
+static int hpat_get_block_owner(int64_t total, int num_pes, int64_t ind)
+{
+    int64_t div_chunk = (int64_t)ceil(total/((double)num_pes));
+    return (int)(ind/div_chunk);
+}
+
+// redistribute a 2D block distributed matrix M (rows x cols) into the 2D
+// block distribution of its transpose
+// output data is packed by each sender in M^T order
+template<typename T>
+static void hpat_dist_transpose_2d(const T* in, T* out, int64_t rows,
+                                            int64_t cols, MPI_Datatype mpi_typ)
+{
+    int pr = hpat_dist_get_grid_rows();
+    int pc = hpat_dist_get_grid_cols();
+    int my_row = hpat_dist_get_grid_row_rank();
+    int my_col = hpat_dist_get_grid_col_rank();
+    int num_pes = pr*pc;
+    // my block of M
+    int64_t r0 = hpat_dist_get_start(rows, pr, my_row);
+    int64_t r1 = hpat_dist_get_end(rows, pr, my_row);
+    int64_t c0 = hpat_dist_get_start(cols, pc, my_col);
+    int64_t c1 = hpat_dist_get_end(cols, pc, my_col);
+    // my block of M^T in M coordinates
+    int64_t t_c0 = hpat_dist_get_start(cols, pr, my_row);
+    int64_t t_c1 = hpat_dist_get_end(cols, pr, my_row);
+    int64_t t_r0 = hpat_dist_get_start(rows, pc, my_col);
+    int64_t t_r1 = hpat_dist_get_end(rows, pc, my_col);
+
+    std::vector<int64_t> send_counts(num_pes), send_disps(num_pes);
+    std::vector<int64_t> recv_counts(num_pes), recv_disps(num_pes);
+    std::vector<T> send_buf((r1-r0)*(c1-c0));
+    std::vector<T> recv_buf((t_c1-t_c0)*(t_r1-t_r0));
+
+    int64_t pos = 0;
+    int64_t recv_pos = 0;
+    for(int p=0; p<num_pes; p++)
+    {
+        int p_row = p/pc;
+        int p_col = p%pc;
+        // part of my block needed by p
+        int64_t lo_r = std::max(r0, hpat_dist_get_start(rows, pc, p_col));
+        int64_t hi_r = std::min(r1, hpat_dist_get_end(rows, pc, p_col));
+        int64_t lo_c = std::max(c0, hpat_dist_get_start(cols, pr, p_row));
+        int64_t hi_c = std::min(c1, hpat_dist_get_end(cols, pr, p_row));
+        send_disps[p] = pos;
+        for(int64_t c=lo_c; c<hi_c; c++)
+            for(int64_t r=lo_r; r<hi_r; r++)
+                send_buf[pos++] = in[(r-r0)*(c1-c0)+(c-c0)];
+        send_counts[p] = pos-send_disps[p];
+        // part of p's block I need
+        lo_r = std::max(t_r0, hpat_dist_get_start(rows, pr, p_row));
+        hi_r = std::min(t_r1, hpat_dist_get_end(rows, pr, p_row));
+        lo_c = std::max(t_c0, hpat_dist_get_start(cols, pc, p_col));
+        hi_c = std::min(t_c1, hpat_dist_get_end(cols, pc, p_col));
+        recv_disps[p] = recv_pos;
+        recv_counts[p] = 0;
+        if (hi_r>lo_r && hi_c>lo_c)
+            recv_counts[p] = (hi_r-lo_r)*(hi_c-lo_c);
+        recv_pos += recv_counts[p];
+    }
+    hpat_alltoallv_large(send_buf.data(), send_counts, send_disps,
+        recv_buf.data(), recv_counts, recv_disps, mpi_typ, MPI_COMM_WORLD);
+
+    for(int p=0; p<num_pes; p++)
+    {
+        int p_row = p/pc;
+        int p_col = p%pc;
+        int64_t lo_r = std::max(t_r0, hpat_dist_get_start(rows, pr, p_row));
+        int64_t hi_r = std::min(t_r1, hpat_dist_get_end(rows, pr, p_row));
+        int64_t lo_c = std::max(t_c0, hpat_dist_get_start(cols, pc, p_col));
+        int64_t hi_c = std::min(t_c1, hpat_dist_get_end(cols, pc, p_col));
+        pos = recv_disps[p];
+        for(int64_t c=lo_c; c<hi_c; c++)
+            for(int64_t r=lo_r; r<hi_r; r++)
+                out[(c-t_c0)*(t_r1-t_r0)+(r-t_r0)] = recv_buf[pos++];
+    }
+}
+
+// C = A*B with all matrices 2D block distributed (SUMMA algorithm)
+// panels of A are broadcast along grid rows and panels of B along grid
+// columns, panel boundaries are the union of A's column and B's row blocks
+template<typename T>
+static void hpat_summa(const T* A, const T* B, T* C, int64_t m, int64_t k,
+                                            int64_t n, MPI_Datatype mpi_typ)
+{
+    int pr = hpat_dist_get_grid_rows();
+    int pc = hpat_dist_get_grid_cols();
+    int my_row = hpat_dist_get_grid_row_rank();
+    int my_col = hpat_dist_get_grid_col_rank();
+    hpat_init_grid_comms();
+
+    int64_t lm = hpat_dist_get_node_portion(m, pr, my_row);
+    int64_t ln = hpat_dist_get_node_portion(n, pc, my_col);
+    // A's columns and B's rows on this processor
+    int64_t a_k0 = hpat_dist_get_start(k, pc, my_col);
+    int64_t a_lk = hpat_dist_get_node_portion(k, pc, my_col);
+    int64_t b_k0 = hpat_dist_get_start(k, pr, my_row);
+
+    std::fill(C, C+lm*ln, (T)0);
+    std::vector<int64_t> bounds;
+    for(int i=0; i<=pc; i++)
+        bounds.push_back(hpat_dist_get_start(k, pc, i));
+    for(int i=0; i<=pr; i++)
+        bounds.push_back(hpat_dist_get_start(k, pr, i));
+    bounds.push_back(k);
+    std::sort(bounds.begin(), bounds.end());
+    bounds.erase(std::unique(bounds.begin(), bounds.end()), bounds.end());
+
+    std::vector<T> a_panel, b_panel;
+    for(size_t b=0; b+1<bounds.size(); b++)
+    {
+        int64_t k0 = bounds[b];
+        int64_t kb = bounds[b+1]-k0;
+        if (kb==0)
+            continue;
+        int a_root = hpat_get_block_owner(k, pc, k0);
+        int b_root = hpat_get_block_owner(k, pr, k0);
+        a_panel.resize(lm*kb);
+        b_panel.resize(kb*ln);
+        if (my_col==a_root)
+            for(int64_t i=0; i<lm; i++)
+                std::copy(A+i*a_lk+(k0-a_k0), A+i*a_lk+(k0-a_k0)+kb,
+                                                        a_panel.data()+i*kb);
+        if (my_row==b_root)
+            std::copy(B+(k0-b_k0)*ln, B+(k0-b_k0+kb)*ln, b_panel.data());
+        hpat_bcast_large(a_panel.data(), lm*kb, mpi_typ, a_root, hpat_grid_row_comm);
+        hpat_bcast_large(b_panel.data(), kb*ln, mpi_typ, b_root, hpat_grid_col_comm);
+        // local multiply of panels
+        for(int64_t i=0; i<lm; i++)
+            for(int64_t kk=0; kk<kb; kk++)
+            {
+                T a = a_panel[i*kb+kk];
+                for(int64_t j=0; j<ln; j++)
+                    C[i*ln+j] += a*b_panel[kk*ln+j];
+            }
+    }
+}
+
+// gather a 2D block distributed matrix (rows x cols) on all processors
+template<typename T>
+static void hpat_allgather_2d(const T* in, T* out, int64_t rows, int64_t cols,
+                                                        MPI_Datatype mpi_typ)
+{
+    int pr = hpat_dist_get_grid_rows();
+    int pc = hpat_dist_get_grid_cols();
+    int num_pes = pr*pc;
+    std::vector<int64_t> counts(num_pes), disps(num_pes);
+    int64_t total = 0;
+    for(int p=0; p<num_pes; p++)
+    {
+        counts[p] = hpat_dist_get_node_portion(rows, pr, p/pc)
+                            *hpat_dist_get_node_portion(cols, pc, p%pc);
+        disps[p] = total;
+        total += counts[p];
+    }
+    std::vector<T> all_blocks(total);
+    hpat_allgatherv_large(in, all_blocks.data(), counts, disps, mpi_typ,
+                                                                MPI_COMM_WORLD);
+    // copy blocks to their location in the full matrix
+    for(int p=0; p<num_pes; p++)
+    {
+        int64_t r0 = hpat_dist_get_start(rows, pr, p/pc);
+        int64_t nr = hpat_dist_get_node_portion(rows, pr, p/pc);
+        int64_t c0 = hpat_dist_get_start(cols, pc, p%pc);
+        int64_t nc = hpat_dist_get_node_portion(cols, pc, p%pc);
+        for(int64_t i=0; i<nr; i++)
+            std::copy(all_blocks.data()+disps[p]+i*nc,
+                    all_blocks.data()+disps[p]+(i+1)*nc,
+                    out+(r0+i)*cols+c0);
+    }
+}
+
+template<typename T>
+static void hpat_dist_matmul_2d_typ(void* A, void* B, void* C, int64_t m,
+    int64_t k, int64_t n, MPI_Datatype mpi_typ, bool transA, bool transB,
+    int rep_out)
+{
+    const T* a = (const T*)A;
+    const T* b = (const T*)B;
+    int my_row = hpat_dist_get_grid_row_rank();
+    int my_col = hpat_dist_get_grid_col_rank();
+    std::vector<T> a_buf, b_buf;
+    // transposed input is the local block of the untransposed matrix
+    if (transA)
+    {
+        a_buf.resize(hpat_dist_get_node_portion(m, hpat_dist_get_grid_rows(), my_row)
+                    *hpat_dist_get_node_portion(k, hpat_dist_get_grid_cols(), my_col));
+        hpat_dist_transpose_2d<T>(a, a_buf.data(), k, m, mpi_typ);
+        a = a_buf.data();
+    }
+    if (transB)
+    {
+        b_buf.resize(hpat_dist_get_node_portion(k, hpat_dist_get_grid_rows(), my_row)
+                    *hpat_dist_get_node_portion(n, hpat_dist_get_grid_cols(), my_col));
+        hpat_dist_transpose_2d<T>(b, b_buf.data(), n, k, mpi_typ);
+        b = b_buf.data();
+    }
+    if (rep_out)
+    {
+        // compute local block and gather the replicated output
+        std::vector<T> c_buf(
+            hpat_dist_get_node_portion(m, hpat_dist_get_grid_rows(), my_row)
+            *hpat_dist_get_node_portion(n, hpat_dist_get_grid_cols(), my_col));
+        hpat_summa<T>(a, b, c_buf.data(), m, k, n, mpi_typ);
+        hpat_allgather_2d<T>(c_buf.data(), (T*)C, m, n, mpi_typ);
+        return;
+    }
+    hpat_summa<T>(a, b, (T*)C, m, k, n, mpi_typ);
+}
+
+int hpat_dist_matmul_2d(void* A, void* B, void* C, int64_t m, int64_t k,
+            int64_t n, int type_enum, bool transA, bool transB, int rep_out)
+{
+    // bytes of matmul are not tracked, only calls and time
+    hpat_comm_timer timer(HPAT_COMM_MATMUL_2D, 0);
+    MPI_Datatype mpi_typ = get_MPI_typ(type_enum);
+    switch(type_enum)
+    {
+        case HPAT_INT32:
+            hpat_dist_matmul_2d_typ<int>(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        case HPAT_INT64:
+            hpat_dist_matmul_2d_typ<int64_t>(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        case HPAT_FLOAT32:
+            hpat_dist_matmul_2d_typ<float>(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        case HPAT_FLOAT64:
+            hpat_dist_matmul_2d_typ<double>(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        case HPAT_COMPLEX64:
+            hpat_dist_matmul_2d_typ<std::complex<float> >(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        case HPAT_COMPLEX128:
+            hpat_dist_matmul_2d_typ<std::complex<double> >(A, B, C, m, k, n, mpi_typ, transA, transB, rep_out);
+            break;
+        default:
+            fprintf(stderr, "unsupported type for 2D matmul: %d\n", type_enum);
+            return -1;
+    }
+    return 0;
+}
+
+// maximum character data size for uint32_t offsets, settable for testing
+static int64_t hpat_max_str_arr_data_size = UINT32_MAX;
+
+static PyObject* hpat_set_max_str_arr_data_size(PyObject* self, PyObject* arg)
+{
+    int64_t size = PyLong_AsLongLong(arg);
+    if (size==-1 && PyErr_Occurred())
+        return NULL;
+    int64_t old_size = hpat_max_str_arr_data_size;
+    hpat_max_str_arr_data_size = std::min(size, (int64_t)UINT32_MAX);
+    return PyLong_FromLongLong(old_size);
+}
+
+template <class T> MPI_Datatype hpat_get_offset_MPI_typ();
+template <> MPI_Datatype hpat_get_offset_MPI_typ<uint32_t>() { return MPI_UINT32_T; }
+template <> MPI_Datatype hpat_get_offset_MPI_typ<int64_t>() { return MPI_INT64_T; }
+
+// exchange strings of a string array between all processors. Strings are
+// grouped by destination, with send_counts[p] strings sent to processor p.
+// String lengths are exchanged first, then characters, and output offsets are
+// rebuilt from received lengths. Returns number of received strings, or -1
+// on all processors if received characters of any processor do not fit in
+// offsets of type T.
+template <class T>
+static int64_t hpat_alltoallv_string_array_tmpl(T* offsets, char* data,
+        int64_t* send_counts, T** out_offsets, char** out_data)
+{
+    int num_pes;
+    MPI_Comm_size(MPI_COMM_WORLD, &num_pes);
+    MPI_Datatype offset_typ = hpat_get_offset_MPI_typ<T>();
+
+    // number of strings and characters to send to each processor
+    std::vector<int64_t> send_strs(num_pes), send_strs_disp(num_pes);
+    std::vector<int64_t> send_chars(num_pes), send_chars_disp(num_pes);
+    int64_t curr = 0;
+    for (int i=0; i<num_pes; i++)
+    {
+        send_strs[i] = send_counts[i];
+        send_strs_disp[i] = curr;
+        send_chars[i] = (int64_t)(offsets[curr+send_counts[i]]-offsets[curr]);
+        send_chars_disp[i] = (int64_t)offsets[curr];
+        curr += send_counts[i];
+    }
+    std::vector<T> send_lens(curr);
+    for (int64_t i=0; i<curr; i++)
+        send_lens[i] = offsets[i+1]-offsets[i];
+    hpat_comm_timer timer(HPAT_COMM_ALLTOALLV,
+                        curr*(int64_t)sizeof(T)+(int64_t)offsets[curr]);
+
+    std::vector<int64_t> recv_strs(num_pes), recv_strs_disp(num_pes);
+    std::vector<int64_t> recv_chars(num_pes), recv_chars_disp(num_pes);
+    MPI_Alltoall(send_strs.data(), 1, MPI_INT64_T, recv_strs.data(), 1,
+                                                MPI_INT64_T, MPI_COMM_WORLD);
+    MPI_Alltoall(send_chars.data(), 1, MPI_INT64_T, recv_chars.data(), 1,
+                                                MPI_INT64_T, MPI_COMM_WORLD);
+    int64_t n_recv_strs = 0, n_recv_chars = 0;
+    for (int i=0; i<num_pes; i++)
+    {
+        recv_strs_disp[i] = n_recv_strs;
+        recv_chars_disp[i] = n_recv_chars;
+        n_recv_strs += recv_strs[i];
+        n_recv_chars += recv_chars[i];
+    }
+    // output type is known at compile time, so uint32_t offsets of received
+    // data that grows past 4GB are an error instead of silently overflowing
+    if (sizeof(T)==sizeof(uint32_t))
+    {
+        int too_large = n_recv_chars>hpat_max_str_arr_data_size;
+        MPI_Allreduce(MPI_IN_PLACE, &too_large, 1, MPI_INT, MPI_LOR,
+                                                            MPI_COMM_WORLD);
+        if (too_large)
+            return -1;
+    }
+
+    // exchange lengths, then characters
+    std::vector<T> recv_lens(n_recv_strs);
+    hpat_alltoallv_large(send_lens.data(), send_strs, send_strs_disp,
+            recv_lens.data(), recv_strs, recv_strs_disp, offset_typ,
+            MPI_COMM_WORLD);
+    *out_data = new char[n_recv_chars];
+    hpat_alltoallv_large(data, send_chars, send_chars_disp, *out_data,
+            recv_chars, recv_chars_disp, MPI_CHAR, MPI_COMM_WORLD);
+
+    // rebuild offsets, received strings are in order of source processor
+    *out_offsets = new T[n_recv_strs+1];
+    (*out_offsets)[0] = 0;
+    for (int64_t i=0; i<n_recv_strs; i++)
+        (*out_offsets)[i+1] = (*out_offsets)[i] + recv_lens[i];
+    return n_recv_strs;
+}
+
+// send each string to processor dests[i], keeping order of strings with same
+// destination
+template <class T>
+static int64_t hpat_shuffle_string_array_tmpl(T* offsets, char* data,
+        int64_t size, int32_t* dests, T** out_offsets, char** out_data)
+{
+    int num_pes;
+    MPI_Comm_size(MPI_COMM_WORLD, &num_pes);
+    std::vector<int64_t> send_counts(num_pes, 0);
+    std::vector<int64_t> char_counts(num_pes, 0);
+    for (int64_t i=0; i<size; i++)
+    {
+        send_counts[dests[i]]++;
+        char_counts[dests[i]] += offsets[i+1]-offsets[i];
+    }
+    // start of each destination's strings and characters in send buffers
+    std::vector<int64_t> str_pos(num_pes), char_pos(num_pes);
+    int64_t str_curr = 0, char_curr = 0;
+    for (int i=0; i<num_pes; i++)
+    {
+        str_pos[i] = str_curr;
+        char_pos[i] = char_curr;
+        str_curr += send_counts[i];
+        char_curr += char_counts[i];
+    }
+    std::vector<T> send_offsets(size+1);
+    std::vector<char> send_data(char_curr);
+    std::vector<T> send_lens(size);
+    for (int64_t i=0; i<size; i++)
+    {
+        int dest = dests[i];
+        T len = offsets[i+1]-offsets[i];
+        send_lens[str_pos[dest]] = len;
+        memcpy(&send_data[char_pos[dest]], &data[offsets[i]], len);
+        str_pos[dest]++;
+        char_pos[dest] += len;
+    }
+    send_offsets[0] = 0;
+    for (int64_t i=0; i<size; i++)
+        send_offsets[i+1] = send_offsets[i] + send_lens[i];
+    return hpat_alltoallv_string_array_tmpl<T>(send_offsets.data(),
+            send_data.data(), send_counts.data(), out_offsets, out_data);
+}
+
+int64_t hpat_alltoallv_string_array(uint32_t* offsets, char* data,
+        int64_t* send_counts, uint32_t** out_offsets, char** out_data)
+{
+    return hpat_alltoallv_string_array_tmpl<uint32_t>(offsets, data,
+                                        send_counts, out_offsets, out_data);
+}
+
+int64_t hpat_alltoallv_string_array_large(int64_t* offsets, char* data,
+        int64_t* send_counts, int64_t** out_offsets, char** out_data)
+{
+    return hpat_alltoallv_string_array_tmpl<int64_t>(offsets, data,
+                                        send_counts, out_offsets, out_data);
+}
+
+int64_t hpat_shuffle_string_array(uint32_t* offsets, char* data, int64_t size,
+        int32_t* dests, uint32_t** out_offsets, char** out_data)
+{
+    return hpat_shuffle_string_array_tmpl<uint32_t>(offsets, data, size, dests,
+                                                        out_offsets, out_data);
+}
+
+int64_t hpat_shuffle_string_array_large(int64_t* offsets, char* data,
+        int64_t size, int32_t* dests, int64_t** out_offsets, char** out_data)
+{
+    return hpat_shuffle_string_array_tmpl<int64_t>(offsets, data, size, dests,
+                                                        out_offsets, out_data);
+}
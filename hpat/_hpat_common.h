@@ -0,0 +1,27 @@
+#ifndef _HPAT_COMMON_H_INCLUDED
+#define _HPAT_COMMON_H_INCLUDED
+
+// data type codes passed from generated code to the C libraries,
+// should match _h5_typ_table in hpat/utils.py
+enum HPAT_CTypes {
+    HPAT_INT8 = 0,
+    HPAT_UINT8 = 1,
+    HPAT_INT32 = 2,
+    HPAT_INT64 = 3,
+    HPAT_FLOAT32 = 4,
+    HPAT_FLOAT64 = 5,
+    HPAT_UINT32 = 6,
+    HPAT_UINT64 = 7,
+    HPAT_INT16 = 8,
+    HPAT_UINT16 = 9,
+    HPAT_BOOL = 10,
+    HPAT_COMPLEX64 = 11,
+    HPAT_COMPLEX128 = 12,
+    HPAT_NUM_TYPES = 13
+};
+
+// element sizes in bytes, indexed by type code
+static const int hpat_type_sizes[HPAT_NUM_TYPES] = {
+    1, 1, 4, 8, 4, 8, 4, 8, 2, 2, 1, 8, 16};
+
+#endif // _HPAT_COMMON_H_INCLUDED
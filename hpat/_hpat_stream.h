@@ -0,0 +1,102 @@
+#ifndef _HPAT_STREAM_H_INCLUDED
+#define _HPAT_STREAM_H_INCLUDED
+
+#include <algorithm>
+#include <cstdint>
+#include <cstring>
+#include <functional>
+#include <thread>
+#include <utility>
+#include <vector>
+
+// reads a range of rows in batches for streaming execution. With prefetch,
+// the next batch is read in a background thread into an internal buffer
+// while the current batch is processed (double buffering with the output
+// buffer of next()).
+class hpat_batch_stream {
+  public:
+    // read_func(first_row, num_rows, buffer) reads rows of a batch
+    typedef std::function<void(int64_t, int64_t, char*)> read_func_t;
+
+    // batches are (first row, number of rows) pairs
+    hpat_batch_stream(const std::vector<std::pair<int64_t, int64_t> >& batches,
+            int64_t row_bytes, read_func_t read_func, bool prefetch)
+        : batches(batches), row_bytes(row_bytes), read_func(read_func),
+          prefetch(prefetch), curr(0), curr_offset(0)
+    {
+        if (prefetch && !batches.empty())
+        {
+            int64_t max_rows = 0;
+            for (auto& b : batches)
+                max_rows = std::max(max_rows, b.second);
+            buff.resize(max_rows*row_bytes);
+            start_read(0);
+        }
+    }
+
+    ~hpat_batch_stream()
+    {
+        if (reader.joinable())
+            reader.join();
+    }
+
+    // copy next batch to out and return its number of rows, 0 if done
+    int64_t next(char* out)
+    {
+        if (curr>=batches.size())
+            return 0;
+        int64_t first = batches[curr].first;
+        int64_t n_rows = batches[curr].second;
+        if (prefetch)
+        {
+            reader.join();
+            memcpy(out, buff.data(), n_rows*row_bytes);
+            if (curr+1<batches.size())
+                start_read(curr+1);
+        }
+        else
+            read_func(first, n_rows, out);
+        curr_offset = first;
+        curr++;
+        return n_rows;
+    }
+
+    // first row of the batch returned by last next()
+    int64_t offset() const
+    {
+        return curr_offset;
+    }
+
+  private:
+    void start_read(size_t i)
+    {
+        int64_t first = batches[i].first;
+        int64_t n_rows = batches[i].second;
+        char* out = buff.data();
+        read_func_t func = read_func;
+        reader = std::thread([func, first, n_rows, out]() {
+            func(first, n_rows, out);
+        });
+    }
+
+    std::vector<std::pair<int64_t, int64_t> > batches;
+    int64_t row_bytes;
+    read_func_t read_func;
+    bool prefetch;
+    size_t curr;
+    int64_t curr_offset;
+    std::vector<char> buff;
+    std::thread reader;
+};
+
+// split rows [0, count) into batches of at most batch_rows rows
+static inline std::vector<std::pair<int64_t, int64_t> > hpat_get_batches(
+                                            int64_t count, int64_t batch_rows)
+{
+    std::vector<std::pair<int64_t, int64_t> > batches;
+    for (int64_t i=0; i<count; i+=batch_rows)
+        batches.push_back(std::make_pair(i, std::min(batch_rows, count-i)));
+    return batches;
+}
+
+#endif // _HPAT_STREAM_H_INCLUDED
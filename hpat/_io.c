@@ -3,6 +3,10 @@
 #include <Python.h>
 #include <string>
 #include <iostream>
+#include <vector>
+
+#include "_hpat_common.h"
+#include "_hpat_stream.h"
 
 int hpat_h5_open(char* file_name, char* mode, int64_t is_parallel);
 int64_t hpat_h5_size(hid_t file_id, char* dset_name, int dim);
@@ -18,6 +22,12 @@ int hpat_h5_get_type_enum(std::string *s);
 hid_t get_h5_typ(int typ_enum);
 int h5g_get_num_objs(hid_t file_id);
 void* h5g_get_objname_by_idx(hid_t file_id, int ind);
+int hpat_h5_stream_start(hid_t file_id, char* dset_name, int ndims,
+    int64_t* starts, int64_t* counts, int64_t is_parallel, int typ_enum,
+    int64_t batch_rows);
+int64_t hpat_h5_stream_next(int stream_id, void* out);
+int64_t hpat_h5_stream_offset(int stream_id);
+int hpat_h5_stream_finish(int stream_id);
 
 PyMODINIT_FUNC PyInit_hio(void) {
     PyObject *m;
@@ -47,6 +57,14 @@ PyMODINIT_FUNC PyInit_hio(void) {
                             PyLong_FromVoidPtr((void*)(&h5g_get_num_objs)));
     PyObject_SetAttrString(m, "h5g_get_objname_by_idx",
                             PyLong_FromVoidPtr((void*)(&h5g_get_objname_by_idx)));
+    PyObject_SetAttrString(m, "hpat_h5_stream_start",
+                            PyLong_FromVoidPtr((void*)(&hpat_h5_stream_start)));
+    PyObject_SetAttrString(m, "hpat_h5_stream_next",
+                            PyLong_FromVoidPtr((void*)(&hpat_h5_stream_next)));
+    PyObject_SetAttrString(m, "hpat_h5_stream_offset",
+                            PyLong_FromVoidPtr((void*)(&hpat_h5_stream_offset)));
+    PyObject_SetAttrString(m, "hpat_h5_stream_finish",
+                            PyLong_FromVoidPtr((void*)(&hpat_h5_stream_finish)));
     return m;
 }
 
@@ -142,49 +160,66 @@ int hpat_h5_read(hid_t file_id, char* dset_name, int ndims, int64_t* starts,
 }
 
 
-// _h5_typ_table = {
-//     int8:0,
-//     uint8:1,
-//     int32:2,
-//     int64:3,
-//     float32:4,
-//     float64:5
-//     }
+// type codes are defined in _hpat_common.h
+// bool and complex types use the same layout as h5py: an enum of int8 with
+// FALSE/TRUE values and a compound type with "r" and "i" fields
+static hid_t hpat_h5_bool_typ = -1;
+static hid_t hpat_h5_complex_typs[2] = {-1, -1};
+
+static hid_t hpat_h5_get_complex_typ(int index, hid_t elem_typ, size_t elem_size)
+{
+    if (hpat_h5_complex_typs[index]==-1)
+    {
+        hid_t typ = H5Tcreate(H5T_COMPOUND, 2*elem_size);
+        H5Tinsert(typ, "r", 0, elem_typ);
+        H5Tinsert(typ, "i", elem_size, elem_typ);
+        hpat_h5_complex_typs[index] = typ;
+    }
+    return hpat_h5_complex_typs[index];
+}
 
 hid_t get_h5_typ(int typ_enum)
 {
     // printf("h5 type enum:%d\n", typ_enum);
-    hid_t types_list[] = {H5T_NATIVE_CHAR, H5T_NATIVE_UCHAR,
-            H5T_NATIVE_INT, H5T_NATIVE_LLONG, H5T_NATIVE_FLOAT, H5T_NATIVE_DOUBLE};
+    if (typ_enum==HPAT_BOOL)
+    {
+        if (hpat_h5_bool_typ==-1)
+        {
+            int8_t val = 0;
+            hpat_h5_bool_typ = H5Tenum_create(H5T_NATIVE_INT8);
+            H5Tenum_insert(hpat_h5_bool_typ, "FALSE", &val);
+            val = 1;
+            H5Tenum_insert(hpat_h5_bool_typ, "TRUE", &val);
+        }
+        return hpat_h5_bool_typ;
+    }
+    if (typ_enum==HPAT_COMPLEX64)
+        return hpat_h5_get_complex_typ(0, H5T_NATIVE_FLOAT, sizeof(float));
+    if (typ_enum==HPAT_COMPLEX128)
+        return hpat_h5_get_complex_typ(1, H5T_NATIVE_DOUBLE, sizeof(double));
+    hid_t types_list[] = {H5T_NATIVE_INT8, H5T_NATIVE_UINT8, H5T_NATIVE_INT32,
+            H5T_NATIVE_INT64, H5T_NATIVE_FLOAT, H5T_NATIVE_DOUBLE,
+            H5T_NATIVE_UINT32, H5T_NATIVE_UINT64, H5T_NATIVE_INT16,
+            H5T_NATIVE_UINT16};
+    if (typ_enum<0 || typ_enum>=HPAT_BOOL)
+    {
+        fprintf(stderr, "invalid data type code: %d\n", typ_enum);
+        return -1;
+    }
     return types_list[typ_enum];
 }
 
-//  _h5_str_typ_table = {
-//      'i1':0,
-//      'u1':1,
-//      'i4':2,
-//      'i8':3,
-//      'f4':4,
-//      'f8':5
-//      }
-
+// numpy type strings (e.g. dtype='f8' in create_dataset()) to type codes
 int hpat_h5_get_type_enum(std::string *s)
 {
-    int typ = -1;
-    if ((*s)=="i1")
-        typ = 0;
-    if ((*s)=="u1")
-        typ = 1;
-    if ((*s)=="i4")
-        typ = 2;
-    if ((*s)=="i8")
-        typ = 3;
-    if ((*s)=="f4")
-        typ = 4;
-    if ((*s)=="f8")
-        typ = 5;
-
-    return typ;
+    const char* type_strs[] = {"i1", "u1", "i4", "i8", "f4", "f8", "u4", "u8",
+                                "i2", "u2", "b1", "c8", "c16"};
+    for (int i=0; i<HPAT_NUM_TYPES; i++)
+        if ((*s)==type_strs[i])
+            return i;
+    if ((*s)=="?")
+        return HPAT_BOOL;
+    return -1;
 }
 
 int hpat_h5_close(hid_t file_id)
@@ -276,3 +311,83 @@ void* h5g_get_objname_by_idx(hid_t file_id, int ind)
     // std::cout<<"out: "<<*outstr<<std::endl;
     return outstr;
 }
+
+// streaming reads of a dataset's hyperslab in batches of rows (first
+// dimension), see _hpat_stream.h
+struct hpat_h5_stream {
+    hid_t dataset_id;
+    hpat_batch_stream* stream;
+};
+
+static std::vector<hpat_h5_stream> hpat_h5_streams;
+
+int hpat_h5_stream_start(hid_t file_id, char* dset_name, int ndims,
+    int64_t* starts, int64_t* counts, int64_t is_parallel, int typ_enum,
+    int64_t batch_rows)
+{
+    hid_t dataset_id = H5Dopen2(file_id, dset_name, H5P_DEFAULT);
+    assert(dataset_id != -1);
+    std::vector<hsize_t> h5_starts(starts, starts+ndims);
+    std::vector<hsize_t> h5_counts(counts, counts+ndims);
+    int64_t row_bytes = hpat_type_sizes[typ_enum];
+    for (int i=1; i<ndims; i++)
+        row_bytes *= counts[i];
+    hid_t h5_typ = get_h5_typ(typ_enum);
+
+    // processors read different number of batches so transfers are
+    // independent
+    auto read_func = [dataset_id, h5_starts, h5_counts, h5_typ](
+                                int64_t first, int64_t n_rows, char* out) {
+        std::vector<hsize_t> b_starts(h5_starts);
+        std::vector<hsize_t> b_counts(h5_counts);
+        b_starts[0] += first;
+        b_counts[0] = n_rows;
+        hid_t space_id = H5Dget_space(dataset_id);
+        assert(space_id != -1);
+        herr_t ret = H5Sselect_hyperslab(space_id, H5S_SELECT_SET,
+                            b_starts.data(), NULL, b_counts.data(), NULL);
+        assert(ret != -1);
+        hid_t mem_dataspace = H5Screate_simple((hsize_t)b_counts.size(),
+                                                    b_counts.data(), NULL);
+        assert (mem_dataspace != -1);
+        ret = H5Dread(dataset_id, h5_typ, mem_dataspace, space_id,
+                                                        H5P_DEFAULT, out);
+        assert(ret != -1);
+        H5Sclose(mem_dataspace);
+        H5Sclose(space_id);
+    };
+
+    // reading in background calls MPI-IO in parallel mode, which requires
+    // MPI_THREAD_MULTIPLE
+    bool prefetch = true;
+    if (is_parallel)
+    {
+        int provided;
+        MPI_Query_thread(&provided);
+        prefetch = provided==MPI_THREAD_MULTIPLE;
+    }
+    hpat_h5_stream h5_stream;
+    h5_stream.dataset_id = dataset_id;
+    h5_stream.stream = new hpat_batch_stream(
+        hpat_get_batches(counts[0], batch_rows), row_bytes, read_func, prefetch);
+    hpat_h5_streams.push_back(h5_stream);
+    return (int)hpat_h5_streams.size()-1;
+}
+
+int64_t hpat_h5_stream_next(int stream_id, void* out)
+{
+    return hpat_h5_streams[stream_id].stream->next((char*)out);
+}
+
+int64_t hpat_h5_stream_offset(int stream_id)
+{
+    return hpat_h5_streams[stream_id].stream->offset();
+}
+
+int hpat_h5_stream_finish(int stream_id)
+{
+    hpat_h5_stream& h5_stream = hpat_h5_streams[stream_id];
+    delete h5_stream.stream;
+    h5_stream.stream = NULL;
+    return H5Dclose(h5_stream.dataset_id);
+}
@@ -3,12 +3,17 @@
 #include <string>
 #include <iostream>
 #include <cstring>
+#include <cstdlib>
+#include <algorithm>
+#include <vector>
 
 #include "parquet/api/reader.h"
 #include "parquet/arrow/reader.h"
 #include "arrow/table.h"
 #include "arrow/io/hdfs.h"
 
+#include "_hpat_stream.h"
+
 using parquet::arrow::FileReader;
 using parquet::ParquetFileReader;
 
@@ -24,6 +29,18 @@ int pq_read_string(std::string* file_name, int64_t column_idx,
                                     uint8_t **out_offsets, uint8_t **out_data);
 int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
         uint32_t **out_offsets, uint8_t **out_data, int64_t start, int64_t count);
+int pq_read_string_large(std::string* file_name, int64_t column_idx,
+                                    int64_t **out_offsets, uint8_t **out_data);
+int pq_read_string_parallel_large(std::string* file_name, int64_t column_idx,
+        int64_t **out_offsets, uint8_t **out_data, int64_t start, int64_t count);
+template <class T>
+int pq_read_string_range(std::string* file_name, int64_t column_idx,
+        T **out_offsets, uint8_t **out_data, int64_t start, int64_t count);
+int pq_stream_start(std::string* file_name, int64_t column_idx,
+                            int64_t start, int64_t count, int64_t batch_rows);
+int64_t pq_stream_next(int stream_id, uint8_t* out_data);
+int64_t pq_stream_offset(int stream_id);
+int pq_stream_finish(int stream_id);
 // parquet type sizes (NOT arrow)
 // boolean, int32, int64, int96, float, double
 int pq_type_sizes[] = {1, 4, 8, 12, 4, 8};
@@ -47,6 +64,18 @@ PyMODINIT_FUNC PyInit_parquet_cpp(void) {
                             PyLong_FromVoidPtr((void*)(&pq_read_string)));
     PyObject_SetAttrString(m, "read_string_parallel",
                             PyLong_FromVoidPtr((void*)(&pq_read_string_parallel)));
+    PyObject_SetAttrString(m, "read_string_large",
+                            PyLong_FromVoidPtr((void*)(&pq_read_string_large)));
+    PyObject_SetAttrString(m, "read_string_parallel_large",
+                            PyLong_FromVoidPtr((void*)(&pq_read_string_parallel_large)));
+    PyObject_SetAttrString(m, "stream_start",
+                            PyLong_FromVoidPtr((void*)(&pq_stream_start)));
+    PyObject_SetAttrString(m, "stream_next",
+                            PyLong_FromVoidPtr((void*)(&pq_stream_next)));
+    PyObject_SetAttrString(m, "stream_offset",
+                            PyLong_FromVoidPtr((void*)(&pq_stream_offset)));
+    PyObject_SetAttrString(m, "stream_finish",
+                            PyLong_FromVoidPtr((void*)(&pq_stream_finish)));
 
     return m;
 }
@@ -167,6 +196,104 @@ int pq_read_parallel(std::string* file_name, int64_t column_idx,
     return 0;
 }
 
+static std::vector<hpat_batch_stream*> pq_streams;
+
+// reader of a column for streaming, opened once per stream. Batches are
+// read in order and do not cross row group boundaries, so the decoded row
+// group is kept for its next batches.
+struct pq_stream_reader {
+    std::shared_ptr<FileReader> arrow_reader;
+    int64_t column_idx;
+    int dtype;
+    // first row of each row group followed by the total number of rows
+    std::vector<int64_t> group_starts;
+    int64_t curr_group;
+    std::shared_ptr< ::arrow::Array > curr_arr;
+
+    // read rows [first, first+n_rows) of the file, which are in one group
+    void read(int64_t first, int64_t n_rows, uint8_t* out)
+    {
+        int64_t group = std::upper_bound(group_starts.begin(),
+                    group_starts.end(), first) - group_starts.begin() - 1;
+        if (group!=curr_group)
+        {
+            std::vector<int> column_indices(1, (int)column_idx);
+            std::shared_ptr<::arrow::Table> table;
+            arrow_reader->ReadRowGroup(group, column_indices, &table);
+            std::shared_ptr< ::arrow::ChunkedArray > chunked_arr =
+                                                    table->column(0)->data();
+            if (chunked_arr->num_chunks()!=1) {
+                std::cerr << "invalid parquet number of array chunks" << std::endl;
+            }
+            curr_arr = chunked_arr->chunk(0);
+            curr_group = group;
+        }
+        auto buffers = curr_arr->data()->buffers;
+        if (buffers.size()!=2) {
+            std::cerr << "invalid parquet number of array buffers" << std::endl;
+        }
+        copy_data(out, buffers[1]->data(), first-group_starts[group], n_rows,
+                                                                        dtype);
+    }
+};
+
+// streaming read of rows [start, start+count) of a column in batches of at
+// most batch_rows rows. Batches do not cross row group boundaries so each
+// row group is decoded once, and the next batch is read in background.
+int pq_stream_start(std::string* file_name, int64_t column_idx,
+                            int64_t start, int64_t count, int64_t batch_rows)
+{
+    std::shared_ptr<pq_stream_reader> reader(new pq_stream_reader());
+    pq_init_reader(file_name, &reader->arrow_reader);
+    auto metadata = reader->arrow_reader->parquet_reader()->metadata();
+    int64_t n_row_groups = metadata->num_row_groups();
+    reader->column_idx = column_idx;
+    reader->dtype = metadata->RowGroup(0)->ColumnChunk(column_idx)->type();
+    reader->curr_group = -1;
+
+    std::vector<std::pair<int64_t, int64_t> > batches;
+    int64_t group_start = 0;
+    reader->group_starts.push_back(0);
+    for (int64_t i=0; i<n_row_groups; i++)
+    {
+        int64_t nrows_in_group = metadata->RowGroup(i)->ColumnChunk(column_idx)->num_values();
+        int64_t first = std::max(start, group_start);
+        int64_t last = std::min(start+count, group_start+nrows_in_group);
+        for (int64_t j=first; j<last; j+=batch_rows)
+            batches.push_back(std::make_pair(j-start,
+                                            std::min(batch_rows, last-j)));
+        group_start += nrows_in_group;
+        reader->group_starts.push_back(group_start);
+    }
+
+    // the stream reads batches one at a time in order, and the reads do not
+    // call MPI so they can run in background
+    auto read_func = [reader, start](int64_t first, int64_t n_rows,
+                                                                char* out) {
+        reader->read(start+first, n_rows, (uint8_t*)out);
+    };
+    pq_streams.push_back(new hpat_batch_stream(batches,
+                            pq_type_sizes[reader->dtype], read_func, true));
+    return (int)pq_streams.size()-1;
+}
+
+int64_t pq_stream_next(int stream_id, uint8_t* out_data)
+{
+    return pq_streams[stream_id]->next((char*)out_data);
+}
+
+int64_t pq_stream_offset(int stream_id)
+{
+    return pq_streams[stream_id]->offset();
+}
+
+int pq_stream_finish(int stream_id)
+{
+    delete pq_streams[stream_id];
+    pq_streams[stream_id] = NULL;
+    return 0;
+}
+
 inline void copy_data(uint8_t* out_data, const uint8_t* buff,
                     int64_t rows_to_skip, int64_t rows_to_read, int dtype)
 {
@@ -226,9 +353,31 @@ int pq_read_string(std::string* file_name, int64_t column_idx,
 int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
         uint32_t **out_offsets, uint8_t **out_data, int64_t start, int64_t count)
 {
-    printf("read parquet parallel column: %lld start: %lld count: %lld\n",
-                                                     column_idx, start, count);
+    return pq_read_string_range<uint32_t>(file_name, column_idx, out_offsets,
+                                                    out_data, start, count);
+}
+
+int pq_read_string_large(std::string* file_name, int64_t column_idx,
+                                    int64_t **out_offsets, uint8_t **out_data)
+{
+    int64_t count = pq_get_size(file_name, column_idx);
+    return pq_read_string_range<int64_t>(file_name, column_idx, out_offsets,
+                                                    out_data, 0, count);
+}
+
+int pq_read_string_parallel_large(std::string* file_name, int64_t column_idx,
+        int64_t **out_offsets, uint8_t **out_data, int64_t start, int64_t count)
+{
+    return pq_read_string_range<int64_t>(file_name, column_idx, out_offsets,
+                                                    out_data, start, count);
+}
 
+// read rows [start, start+count) of a string column row group by row group,
+// rebasing Arrow's int32 offsets of each group into offsets of type T
+template <class T>
+int pq_read_string_range(std::string* file_name, int64_t column_idx,
+        T **out_offsets, uint8_t **out_data, int64_t start, int64_t count)
+{
     std::shared_ptr<FileReader> arrow_reader;
     pq_init_reader(file_name, &arrow_reader);
     int dtype = arrow_reader->parquet_reader()->metadata()->RowGroup(0)->
@@ -236,9 +385,13 @@ int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
     if (dtype!=6) // TODO: get constant from parquet-cpp
         std::cerr << "Invalid Parquet string data type" << '\n';
 
-
-    *out_offsets = new uint32_t[count+1];
-    int offset_dtype_size = sizeof(uint32_t);
+    *out_offsets = new T[count+1];
+    (*out_offsets)[0] = 0;
+    // characters are copied directly into the output buffer, which grows
+    // with realloc (in place for large buffers) as row groups are read
+    uint8_t* out_chars = NULL;
+    int64_t n_chars = 0;
+    int64_t chars_capacity = 0;
 
     int64_t n_row_groups = arrow_reader->parquet_reader()->metadata()->num_row_groups();
     std::vector<int> column_indices;
@@ -260,9 +413,6 @@ int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
         nrows_in_group = rg_metadata->ColumnChunk(column_idx)->num_values();
     }
 
-    // printf("first row group: %d skipped_rows: %lld nrows_in_group: %lld\n", row_group_index, skipped_rows, nrows_in_group);
-    const uint32_t* offsets_buff;
-
     while (read_rows<count)
     {
         /* -------- read row group ---------- */
@@ -270,30 +420,43 @@ int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
         arrow_reader->ReadRowGroup(row_group_index, column_indices, &table);
         std::shared_ptr< ::arrow::Column > column = table->column(0);
         std::shared_ptr< ::arrow::ChunkedArray > chunked_arr = column->data();
-        // std::cout << chunked_arr->num_chunks() << std::endl;
         if (chunked_arr->num_chunks()!=1) {
             std::cerr << "invalid parquet number of array chunks" << std::endl;
         }
         std::shared_ptr< ::arrow::Array > arr = chunked_arr->chunk(0);
-        // std::cout << arr->ToString() << std::endl;
         auto buffers = arr->data()->buffers;
-        // std::cout<<"num buffs: "<< buffers.size()<<std::endl;
         if (buffers.size()!=3) {
             std::cerr << "invalid parquet string number of array buffers" << std::endl;
         }
 
-        offsets_buff = (const uint32_t*) buffers[1]->data();
+        const int32_t* offsets_buff = (const int32_t*) buffers[1]->data();
         const uint8_t* data_buff = buffers[2]->data();
-
         /* ----------- read row group ------- */
 
         int64_t rows_to_skip = start - skipped_rows;
         int64_t rows_to_read = std::min(count-read_rows, nrows_in_group-rows_to_skip);
-        printf("rows_to_skip: %ld rows_to_read: %ld\n", rows_to_skip, rows_to_read);
 
-        memcpy(*out_offsets+read_rows,
-            offsets_buff+rows_to_skip,
-            rows_to_read*offset_dtype_size);
+        int32_t group_start = offsets_buff[rows_to_skip];
+        int64_t group_chars = offsets_buff[rows_to_skip+rows_to_read]
+                                                                - group_start;
+        if (sizeof(T)==sizeof(uint32_t) && n_chars+group_chars>UINT32_MAX)
+        {
+            delete[] *out_offsets;
+            free(out_chars);
+            return -1;
+        }
+        if (n_chars+group_chars>chars_capacity)
+        {
+            chars_capacity = std::max(n_chars+group_chars,
+                                            chars_capacity+chars_capacity/2);
+            out_chars = (uint8_t*)realloc(out_chars, chars_capacity);
+        }
+        // offsets of this group start where the previous group's data ended
+        for (int64_t i=1; i<=rows_to_read; i++)
+            (*out_offsets)[read_rows+i] = (T)(n_chars +
+                                    offsets_buff[rows_to_skip+i] - group_start);
+        memcpy(out_chars+n_chars, data_buff+group_start, group_chars);
+        n_chars += group_chars;
 
         skipped_rows += rows_to_skip;
         read_rows += rows_to_read;
@@ -310,11 +473,7 @@ int pq_read_string_parallel(std::string* file_name, int64_t column_idx,
     if (read_rows!=count)
         std::cerr << "parquet read incomplete" << '\n';
 
-    for(int i=0; i<=count; i++)
-    {
-        printf("%d ", (*out_offsets)[i]);
-    }
-    printf("\n");
+    *out_data = out_chars;
     return 0;
 }
 
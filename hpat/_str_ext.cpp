@@ -2,6 +2,13 @@
 #include <string>
 #include <iostream>
 #include <vector>
+#include <regex>
+#include <algorithm>
+#include <cctype>
+#include <cstring>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
 
 void* init_string(char*, int64_t);
 void* init_string_const(char* in_str);
@@ -13,19 +20,67 @@ void* str_substr_int(std::string* str, int64_t index);
 int64_t str_to_int64(std::string* str);
 double str_to_float64(std::string* str);
 int64_t get_str_len(std::string* str);
-void allocate_string_array(uint32_t **offsets, char **data, int64_t num_strings,
+bool str_view_equal(char* data1, int64_t len1, char* data2, int64_t len2);
+int64_t str_view_hash(char* data, int64_t len);
+void* compile_regex(std::string* pat);
+bool str_contains_regex(char* data, int64_t len, std::regex* re);
+bool str_match_regex(char* data, int64_t len, std::regex* re);
+bool str_contains_noregex(char* data, int64_t len, char* pat, int64_t pat_len);
+bool str_startswith(char* data, int64_t len, char* pat, int64_t pat_len);
+int64_t str_lower_len(char* data, int64_t len);
+void str_lower_to(char* out, char* data, int64_t len);
+int64_t str_replace_len(char* data, int64_t len, char* pat, int64_t pat_len,
+                                                char* repl, int64_t repl_len);
+void str_replace_to(char* out, char* data, int64_t len, char* pat,
+                            int64_t pat_len, char* repl, int64_t repl_len);
+int64_t str_split_get_len(char* data, int64_t len, char* sep, int64_t sep_len,
+                                                                int64_t ind);
+void str_split_get_to(char* out, char* data, int64_t len, char* sep,
+                                                int64_t sep_len, int64_t ind);
+int allocate_string_array(uint32_t **offsets, char **data, int64_t num_strings,
                                                             int64_t total_size);
 
 void setitem_string_array(uint32_t *offsets, char *data, std::string* str,
                                                                 int64_t index);
 char* getitem_string_array(uint32_t *offsets, char *data, int64_t index);
 void* getitem_string_array_std(uint32_t *offsets, char *data, int64_t index);
+int allocate_string_array_large(int64_t **offsets, char **data,
+                                    int64_t num_strings, int64_t total_size);
+int allocate_string_array_lens(uint32_t **offsets, char **data,
+                                            int64_t *lens, int64_t num_strings);
+int string_array_from_str_list(uint32_t **offsets, char **data,
+                                    std::string **strs, int64_t num_strings);
+int string_array_from_str_list_large(int64_t **offsets, char **data,
+                                    std::string **strs, int64_t num_strings);
+void* box_string_array(uint32_t *offsets, char *data, int64_t num_strings);
+void* box_string_array_large(int64_t *offsets, char *data, int64_t num_strings);
+int unbox_string_array(PyObject *obj, uint32_t **offsets, char **data,
+                                                        int64_t *num_strings);
+int unbox_string_array_large(PyObject *obj, int64_t **offsets, char **data,
+                                                        int64_t *num_strings);
+int allocate_string_array_lens_large(int64_t **offsets, char **data,
+                                            int64_t *lens, int64_t num_strings);
+void setitem_string_array_large(int64_t *offsets, char *data, std::string* str,
+                                                                int64_t index);
+char* getitem_string_array_large(int64_t *offsets, char *data, int64_t index);
+void* getitem_string_array_std_large(int64_t *offsets, char *data,
+                                                                int64_t index);
 void print_int(int64_t val);
 
+static PyObject* set_max_str_arr_data_size(PyObject* self, PyObject* arg);
+
+static PyMethodDef hstr_ext_methods[] = {
+    {"set_max_str_arr_data_size", set_max_str_arr_data_size, METH_O,
+        "set maximum character data size of string arrays with 32-bit "
+        "offsets (for testing), returns the previous value"},
+    {NULL, NULL, 0, NULL}
+};
+
 PyMODINIT_FUNC PyInit_hstr_ext(void) {
     PyObject *m;
     static struct PyModuleDef moduledef = {
-            PyModuleDef_HEAD_INIT, "hstr_ext", "No docs", -1, NULL, };
+            PyModuleDef_HEAD_INIT, "hstr_ext", "No docs", -1,
+            hstr_ext_methods, };
     m = PyModule_Create(&moduledef);
     if (m == NULL)
         return NULL;
@@ -50,6 +105,48 @@ PyMODINIT_FUNC PyInit_hstr_ext(void) {
                             PyLong_FromVoidPtr((void*)(&str_to_float64)));
     PyObject_SetAttrString(m, "get_str_len",
                             PyLong_FromVoidPtr((void*)(&get_str_len)));
+    PyObject_SetAttrString(m, "str_view_equal",
+                            PyLong_FromVoidPtr((void*)(&str_view_equal)));
+    PyObject_SetAttrString(m, "str_view_hash",
+                            PyLong_FromVoidPtr((void*)(&str_view_hash)));
+    PyObject_SetAttrString(m, "compile_regex",
+                            PyLong_FromVoidPtr((void*)(&compile_regex)));
+    PyObject_SetAttrString(m, "str_contains_regex",
+                            PyLong_FromVoidPtr((void*)(&str_contains_regex)));
+    PyObject_SetAttrString(m, "str_match_regex",
+                            PyLong_FromVoidPtr((void*)(&str_match_regex)));
+    PyObject_SetAttrString(m, "str_contains_noregex",
+                            PyLong_FromVoidPtr((void*)(&str_contains_noregex)));
+    PyObject_SetAttrString(m, "str_startswith",
+                            PyLong_FromVoidPtr((void*)(&str_startswith)));
+    PyObject_SetAttrString(m, "str_lower_len",
+                            PyLong_FromVoidPtr((void*)(&str_lower_len)));
+    PyObject_SetAttrString(m, "str_lower_to",
+                            PyLong_FromVoidPtr((void*)(&str_lower_to)));
+    PyObject_SetAttrString(m, "str_replace_len",
+                            PyLong_FromVoidPtr((void*)(&str_replace_len)));
+    PyObject_SetAttrString(m, "str_replace_to",
+                            PyLong_FromVoidPtr((void*)(&str_replace_to)));
+    PyObject_SetAttrString(m, "str_split_get_len",
+                            PyLong_FromVoidPtr((void*)(&str_split_get_len)));
+    PyObject_SetAttrString(m, "str_split_get_to",
+                            PyLong_FromVoidPtr((void*)(&str_split_get_to)));
+    PyObject_SetAttrString(m, "allocate_string_array_lens",
+                            PyLong_FromVoidPtr((void*)(&allocate_string_array_lens)));
+    PyObject_SetAttrString(m, "allocate_string_array_lens_large",
+                            PyLong_FromVoidPtr((void*)(&allocate_string_array_lens_large)));
+    PyObject_SetAttrString(m, "string_array_from_str_list",
+                            PyLong_FromVoidPtr((void*)(&string_array_from_str_list)));
+    PyObject_SetAttrString(m, "string_array_from_str_list_large",
+                            PyLong_FromVoidPtr((void*)(&string_array_from_str_list_large)));
+    PyObject_SetAttrString(m, "box_string_array",
+                            PyLong_FromVoidPtr((void*)(&box_string_array)));
+    PyObject_SetAttrString(m, "box_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&box_string_array_large)));
+    PyObject_SetAttrString(m, "unbox_string_array",
+                            PyLong_FromVoidPtr((void*)(&unbox_string_array)));
+    PyObject_SetAttrString(m, "unbox_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&unbox_string_array_large)));
     PyObject_SetAttrString(m, "allocate_string_array",
                             PyLong_FromVoidPtr((void*)(&allocate_string_array)));
     PyObject_SetAttrString(m, "setitem_string_array",
@@ -58,6 +155,14 @@ PyMODINIT_FUNC PyInit_hstr_ext(void) {
                             PyLong_FromVoidPtr((void*)(&getitem_string_array)));
     PyObject_SetAttrString(m, "getitem_string_array_std",
                             PyLong_FromVoidPtr((void*)(&getitem_string_array_std)));
+    PyObject_SetAttrString(m, "allocate_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&allocate_string_array_large)));
+    PyObject_SetAttrString(m, "setitem_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&setitem_string_array_large)));
+    PyObject_SetAttrString(m, "getitem_string_array_large",
+                            PyLong_FromVoidPtr((void*)(&getitem_string_array_large)));
+    PyObject_SetAttrString(m, "getitem_string_array_std_large",
+                            PyLong_FromVoidPtr((void*)(&getitem_string_array_std_large)));
     PyObject_SetAttrString(m, "print_int",
                             PyLong_FromVoidPtr((void*)(&print_int)));
     return m;
@@ -139,53 +244,574 @@ int64_t get_str_len(std::string* str)
     return str->length();
 }
 
-void allocate_string_array(uint32_t **offsets, char **data, int64_t num_strings,
+bool str_view_equal(char* data1, int64_t len1, char* data2, int64_t len2)
+{
+    return len1==len2 && memcmp(data1, data2, len1)==0;
+}
+
+int64_t str_view_hash(char* data, int64_t len)
+{
+    // FNV-1a on the characters, no string object is created
+    uint64_t h = 14695981039346656037ULL;
+    for (int64_t i=0; i<len; i++)
+    {
+        h ^= (uint8_t)data[i];
+        h *= 1099511628211ULL;
+    }
+    return (int64_t)h;
+}
+
+// Python re constructs that std::regex's ECMAScript grammar does not support
+// or interprets differently: extension groups other than (?:...), (?=...)
+// and (?!...) (e.g. named groups, lookbehind, inline flags) and the \A and \Z
+// anchors
+static bool is_supported_regex(const std::string& pat)
+{
+    size_t n = pat.size();
+    for (size_t i=0; i<n; i++)
+    {
+        if (pat[i]=='\\')
+        {
+            if (i+1<n && (pat[i+1]=='A' || pat[i+1]=='Z'))
+                return false;
+            i++;
+        }
+        else if (pat[i]=='[')
+        {
+            // skip character class, where '(' and '?' are literals
+            i++;
+            if (i<n && pat[i]=='^')
+                i++;
+            if (i<n && pat[i]==']')
+                i++;
+            while (i<n && pat[i]!=']')
+            {
+                if (pat[i]=='\\')
+                    i++;
+                i++;
+            }
+        }
+        else if (pat[i]=='(' && i+1<n && pat[i+1]=='?')
+        {
+            if (i+2>=n || (pat[i+2]!=':' && pat[i+2]!='=' && pat[i+2]!='!'))
+                return false;
+        }
+    }
+    return true;
+}
+
+// compiled patterns are cached by pattern string for the lifetime of the
+// process since each str.contains()/str.match() call compiles its pattern
+static std::unordered_map<std::string, std::unique_ptr<std::regex>> regex_cache;
+static std::mutex regex_cache_mutex;
+
+// returns NULL if the pattern is invalid or not supported
+void* compile_regex(std::string* pat)
+{
+    std::lock_guard<std::mutex> lock(regex_cache_mutex);
+    auto it = regex_cache.find(*pat);
+    if (it!=regex_cache.end())
+        return it->second.get();
+    if (!is_supported_regex(*pat))
+        return NULL;
+    std::regex* re;
+    try {
+        re = new std::regex(*pat, std::regex_constants::ECMAScript);
+    } catch (const std::regex_error&) {
+        return NULL;
+    }
+    regex_cache[*pat].reset(re);
+    return re;
+}
+
+bool str_contains_regex(char* data, int64_t len, std::regex* re)
+{
+    return std::regex_search(data, data+len, *re);
+}
+
+bool str_match_regex(char* data, int64_t len, std::regex* re)
+{
+    // match at beginning of string like Python's re.match
+    return std::regex_search(data, data+len, *re,
+                                std::regex_constants::match_continuous);
+}
+
+bool str_contains_noregex(char* data, int64_t len, char* pat, int64_t pat_len)
+{
+    return std::search(data, data+len, pat, pat+pat_len)!=data+len || pat_len==0;
+}
+
+bool str_startswith(char* data, int64_t len, char* pat, int64_t pat_len)
+{
+    return len>=pat_len && memcmp(data, pat, pat_len)==0;
+}
+
+static bool is_ascii(char* data, int64_t len)
+{
+    for (int64_t i=0; i<len; i++)
+        if ((unsigned char)data[i]>=0x80)
+            return false;
+    return true;
+}
+
+// lowercase non-ASCII UTF-8 strings using Python's str.lower() since case
+// mapping may change the encoded length, copying to out if not NULL and
+// returning output length. Invalid UTF-8 is kept as is.
+static int64_t str_lower_unicode(char* out, char* data, int64_t len)
+{
+    int64_t out_len = len;
+    PyGILState_STATE gil_state = PyGILState_Ensure();
+    PyObject* str = PyUnicode_DecodeUTF8(data, len, "surrogateescape");
+    PyObject* lower = str ? PyObject_CallMethod(str, "lower", NULL) : NULL;
+    PyObject* bytes = lower ? PyUnicode_AsEncodedString(lower, "utf-8",
+                                                "surrogateescape") : NULL;
+    if (bytes)
+    {
+        out_len = PyBytes_GET_SIZE(bytes);
+        if (out)
+            memcpy(out, PyBytes_AS_STRING(bytes), out_len);
+    }
+    else
+    {
+        PyErr_Clear();
+        if (out)
+            memcpy(out, data, len);
+    }
+    Py_XDECREF(bytes);
+    Py_XDECREF(lower);
+    Py_XDECREF(str);
+    PyGILState_Release(gil_state);
+    return out_len;
+}
+
+int64_t str_lower_len(char* data, int64_t len)
+{
+    if (is_ascii(data, len))
+        return len;
+    return str_lower_unicode(NULL, data, len);
+}
+
+void str_lower_to(char* out, char* data, int64_t len)
+{
+    if (!is_ascii(data, len))
+    {
+        str_lower_unicode(out, data, len);
+        return;
+    }
+    // ASCII only, independent of the C locale
+    for (int64_t i=0; i<len; i++)
+    {
+        char c = data[i];
+        out[i] = (c>='A' && c<='Z') ? c+('a'-'A') : c;
+    }
+}
+
+// replace all non-overlapping occurrences of pat, copying to out if not NULL
+// and returning output length
+int64_t str_replace_impl(char* out, char* data, int64_t len, char* pat,
+                            int64_t pat_len, char* repl, int64_t repl_len)
+{
+    int64_t out_len = 0;
+    char* curr = data;
+    char* end = data+len;
+    while (pat_len>0)
+    {
+        char* next = std::search(curr, end, pat, pat+pat_len);
+        if (next==end)
+            break;
+        if (out!=NULL)
+        {
+            memcpy(out+out_len, curr, next-curr);
+            memcpy(out+out_len+(next-curr), repl, repl_len);
+        }
+        out_len += (next-curr) + repl_len;
+        curr = next + pat_len;
+    }
+    if (out!=NULL)
+        memcpy(out+out_len, curr, end-curr);
+    return out_len + (end-curr);
+}
+
+int64_t str_replace_len(char* data, int64_t len, char* pat, int64_t pat_len,
+                                                char* repl, int64_t repl_len)
+{
+    return str_replace_impl(NULL, data, len, pat, pat_len, repl, repl_len);
+}
+
+void str_replace_to(char* out, char* data, int64_t len, char* pat,
+                            int64_t pat_len, char* repl, int64_t repl_len)
+{
+    str_replace_impl(out, data, len, pat, pat_len, repl, repl_len);
+}
+
+// find token ind of data split by sep, empty if not available
+void str_split_get_token(char* data, int64_t len, char* sep, int64_t sep_len,
+                            int64_t ind, char** token_start, int64_t* token_len)
+{
+    char* curr = data;
+    char* end = data+len;
+    for (int64_t i=0; i<ind && curr!=end+1; i++)
+    {
+        char* next = std::search(curr, end, sep, sep+sep_len);
+        curr = (next==end) ? end+1 : next+sep_len;
+    }
+    if (sep_len==0 || curr==end+1)
+    {
+        *token_start = data;
+        *token_len = 0;
+        return;
+    }
+    *token_start = curr;
+    *token_len = std::search(curr, end, sep, sep+sep_len) - curr;
+}
+
+int64_t str_split_get_len(char* data, int64_t len, char* sep, int64_t sep_len,
+                                                                int64_t ind)
+{
+    char* token;
+    int64_t token_len;
+    str_split_get_token(data, len, sep, sep_len, ind, &token, &token_len);
+    return token_len;
+}
+
+void str_split_get_to(char* out, char* data, int64_t len, char* sep,
+                                                int64_t sep_len, int64_t ind)
+{
+    char* token;
+    int64_t token_len;
+    str_split_get_token(data, len, sep, sep_len, ind, &token, &token_len);
+    memcpy(out, token, token_len);
+}
+
+// string array functions are templated on offset type: uint32_t for regular
+// arrays, int64_t for arrays with more than 4GB of character data
+// maximum character data size for uint32_t offsets, settable for testing
+static int64_t max_str_arr_data_size = UINT32_MAX;
+
+static PyObject* set_max_str_arr_data_size(PyObject* self, PyObject* arg)
+{
+    int64_t size = PyLong_AsLongLong(arg);
+    if (size==-1 && PyErr_Occurred())
+        return NULL;
+    int64_t old_size = max_str_arr_data_size;
+    max_str_arr_data_size = std::min(size, (int64_t)UINT32_MAX);
+    return PyLong_FromLongLong(old_size);
+}
+
+// returns -1 without allocating if data is too large for offsets of type T
+template <class T>
+int allocate_string_array_tmpl(T **offsets, char **data, int64_t num_strings,
                                                             int64_t total_size)
 {
     // std::cout << "allocating string array: " << num_strings << " " <<
     //                                                 total_size << std::endl;
-    *offsets = new uint32_t[num_strings+1];
+    if (sizeof(T)==sizeof(uint32_t) && total_size>max_str_arr_data_size)
+        return -1;
+    *offsets = new T[num_strings+1];
     *data = new char[total_size];
-    // *data = (char*) new std::string("gggg");
-    return;
+    return 0;
 }
 
-void setitem_string_array(uint32_t *offsets, char *data, std::string* str,
+template <class T>
+void setitem_string_array_tmpl(T *offsets, char *data, std::string* str,
                                                                 int64_t index)
 {
     // std::cout << "setitem str: " << *str << " " << index << std::endl;
     if (index==0)
         offsets[index] = 0;
-    uint32_t start = offsets[index];
-    uint32_t len = str->length();
+    T start = offsets[index];
+    T len = str->length();
     // std::cout << "start " << start << " len " << len << std::endl;
     memcpy(&data[start], str->c_str(), len);
     offsets[index+1] = start+len;
     return;
 }
 
-char* getitem_string_array(uint32_t *offsets, char *data, int64_t index)
+template <class T>
+char* getitem_string_array_tmpl(T *offsets, char *data, int64_t index)
 {
-    // printf("getitem string arr index: %d offsets: %d %d", index,
-    //                                  offsets[index], offsets[index+1]);
-    uint32_t size = offsets[index+1]-offsets[index]+1;
-    uint32_t start = offsets[index];
+    T size = offsets[index+1]-offsets[index]+1;
+    T start = offsets[index];
     char* res = new char[size];
     res[size-1] = '\0';
     memcpy(res, &data[start], size-1);
-    // printf(" res %s\n", res);
     return res;
 }
 
-void* getitem_string_array_std(uint32_t *offsets, char *data, int64_t index)
+template <class T>
+void* getitem_string_array_std_tmpl(T *offsets, char *data, int64_t index)
 {
-    // printf("getitem string arr index: %d offsets: %d %d", index,
-    //                                  offsets[index], offsets[index+1]);
-    uint32_t size = offsets[index+1]-offsets[index];
-    uint32_t start = offsets[index];
+    T size = offsets[index+1]-offsets[index];
+    T start = offsets[index];
     return new std::string(&data[start], size);
 }
 
+// allocate string array for given string lengths and set its offsets
+template <class T>
+int allocate_string_array_lens_tmpl(T **offsets, char **data, int64_t *lens,
+                                                            int64_t num_strings)
+{
+    int64_t total_size = 0;
+    for (int64_t i=0; i<num_strings; i++)
+        total_size += lens[i];
+    if (allocate_string_array_tmpl<T>(offsets, data, num_strings, total_size)!=0)
+        return -1;
+    (*offsets)[0] = 0;
+    for (int64_t i=0; i<num_strings; i++)
+        (*offsets)[i+1] = (*offsets)[i] + lens[i];
+    return 0;
+}
+
+int allocate_string_array_lens(uint32_t **offsets, char **data,
+                                            int64_t *lens, int64_t num_strings)
+{
+    return allocate_string_array_lens_tmpl<uint32_t>(offsets, data, lens,
+                                                                num_strings);
+}
+
+int allocate_string_array_lens_large(int64_t **offsets, char **data,
+                                            int64_t *lens, int64_t num_strings)
+{
+    return allocate_string_array_lens_tmpl<int64_t>(offsets, data, lens,
+                                                                num_strings);
+}
+
+// build string array from native list of strings with a single allocation
+template <class T>
+int string_array_from_str_list_tmpl(T **offsets, char **data,
+                                    std::string **strs, int64_t num_strings)
+{
+    int64_t total_size = 0;
+    for (int64_t i=0; i<num_strings; i++)
+        total_size += strs[i]->length();
+    if (allocate_string_array_tmpl<T>(offsets, data, num_strings, total_size)!=0)
+        return -1;
+    T curr = 0;
+    for (int64_t i=0; i<num_strings; i++)
+    {
+        (*offsets)[i] = curr;
+        memcpy(*data+curr, strs[i]->data(), strs[i]->length());
+        curr += strs[i]->length();
+    }
+    (*offsets)[num_strings] = curr;
+    return 0;
+}
+
+// create Python list of str objects directly from the string array buffers
+template <class T>
+void* box_string_array_tmpl(T *offsets, char *data, int64_t num_strings)
+{
+    PyObject* out_list = PyList_New(num_strings);
+    if (out_list==NULL)
+        return NULL;
+    for (int64_t i=0; i<num_strings; i++)
+    {
+        PyObject* s = PyUnicode_FromStringAndSize(&data[offsets[i]],
+                                                    offsets[i+1]-offsets[i]);
+        if (s==NULL)
+        {
+            Py_DECREF(out_list);
+            return NULL;
+        }
+        PyList_SET_ITEM(out_list, i, s);
+    }
+    return out_list;
+}
+
+// unbox Arrow string array by copying its offsets and data buffers
+template <class T>
+int unbox_arrow_string_array(PyObject *obj, T **offsets, char **data,
+                                                        int64_t *num_strings)
+{
+    int ret = -1;
+    Py_buffer offsets_buff, data_buff;
+    PyObject* buffers = PyObject_CallMethod(obj, "buffers", NULL);
+    PyObject* offset_obj = PyObject_GetAttrString(obj, "offset");
+    PyObject* null_count = PyObject_GetAttrString(obj, "null_count");
+    Py_ssize_t n = PyObject_Length(obj);
+    if (buffers==NULL || offset_obj==NULL || null_count==NULL || n<0)
+        goto end;
+    // string arrays have no null bitmap, nulls would read as empty strings
+    if (PyLong_AsLongLong(null_count)!=0)
+    {
+        if (!PyErr_Occurred())
+            PyErr_SetString(PyExc_ValueError,
+                        "null values in Arrow string arrays not supported");
+        goto end;
+    }
+    if (PyObject_GetBuffer(PyList_GetItem(buffers, 1), &offsets_buff,
+                                                        PyBUF_SIMPLE)!=0)
+        goto end;
+    if (PyObject_GetBuffer(PyList_GetItem(buffers, 2), &data_buff,
+                                                        PyBUF_SIMPLE)!=0)
+    {
+        PyBuffer_Release(&offsets_buff);
+        goto end;
+    }
+    {
+        // arrays can be slices of the buffers starting at element 'offset'
+        const int32_t* in_offsets = ((const int32_t*)offsets_buff.buf)
+                                            + PyLong_AsLongLong(offset_obj);
+        int64_t data_start = in_offsets[0];
+        if (allocate_string_array_tmpl<T>(offsets, data, n,
+                                            in_offsets[n]-data_start)!=0)
+        {
+            PyErr_SetString(PyExc_OverflowError,
+                                "string data too large for 32-bit offsets");
+            PyBuffer_Release(&offsets_buff);
+            PyBuffer_Release(&data_buff);
+            goto end;
+        }
+        for (Py_ssize_t i=0; i<=n; i++)
+            (*offsets)[i] = in_offsets[i] - data_start;
+        memcpy(*data, ((const char*)data_buff.buf)+data_start,
+                                                in_offsets[n]-data_start);
+        *num_strings = n;
+        ret = 0;
+    }
+    PyBuffer_Release(&offsets_buff);
+    PyBuffer_Release(&data_buff);
+end:
+    Py_XDECREF(buffers);
+    Py_XDECREF(offset_obj);
+    Py_XDECREF(null_count);
+    return ret;
+}
+
+// unbox a sequence of Python str objects (e.g. numpy object array) or an
+// Arrow string array, returns -1 with Python exception set on error
+template <class T>
+int unbox_string_array_tmpl(PyObject *obj, T **offsets, char **data,
+                                                        int64_t *num_strings)
+{
+    if (PyObject_HasAttrString(obj, "buffers"))
+        return unbox_arrow_string_array<T>(obj, offsets, data, num_strings);
+
+    PyObject* seq = PySequence_Fast(obj, "string array sequence expected");
+    if (seq==NULL)
+        return -1;
+    Py_ssize_t n = PySequence_Fast_GET_SIZE(seq);
+    PyObject** items = PySequence_Fast_ITEMS(seq);
+    // first pass gets total size, UTF-8 data is cached in str objects
+    int64_t total_size = 0;
+    for (Py_ssize_t i=0; i<n; i++)
+    {
+        Py_ssize_t size;
+        if (!PyUnicode_Check(items[i])
+                || PyUnicode_AsUTF8AndSize(items[i], &size)==NULL)
+        {
+            if (!PyErr_Occurred())
+                PyErr_SetString(PyExc_TypeError, "string array element expected");
+            Py_DECREF(seq);
+            return -1;
+        }
+        total_size += size;
+    }
+    if (allocate_string_array_tmpl<T>(offsets, data, n, total_size)!=0)
+    {
+        PyErr_SetString(PyExc_OverflowError,
+                            "string data too large for 32-bit offsets");
+        Py_DECREF(seq);
+        return -1;
+    }
+    T curr = 0;
+    for (Py_ssize_t i=0; i<n; i++)
+    {
+        Py_ssize_t size;
+        const char* c_str = PyUnicode_AsUTF8AndSize(items[i], &size);
+        (*offsets)[i] = curr;
+        memcpy(*data+curr, c_str, size);
+        curr += size;
+    }
+    (*offsets)[n] = curr;
+    *num_strings = n;
+    Py_DECREF(seq);
+    return 0;
+}
+
+int string_array_from_str_list(uint32_t **offsets, char **data,
+                                    std::string **strs, int64_t num_strings)
+{
+    return string_array_from_str_list_tmpl<uint32_t>(offsets, data, strs,
+                                                                num_strings);
+}
+
+int string_array_from_str_list_large(int64_t **offsets, char **data,
+                                    std::string **strs, int64_t num_strings)
+{
+    return string_array_from_str_list_tmpl<int64_t>(offsets, data, strs,
+                                                                num_strings);
+}
+
+void* box_string_array(uint32_t *offsets, char *data, int64_t num_strings)
+{
+    return box_string_array_tmpl<uint32_t>(offsets, data, num_strings);
+}
+
+void* box_string_array_large(int64_t *offsets, char *data, int64_t num_strings)
+{
+    return box_string_array_tmpl<int64_t>(offsets, data, num_strings);
+}
+
+int unbox_string_array(PyObject *obj, uint32_t **offsets, char **data,
+                                                        int64_t *num_strings)
+{
+    return unbox_string_array_tmpl<uint32_t>(obj, offsets, data, num_strings);
+}
+
+int unbox_string_array_large(PyObject *obj, int64_t **offsets, char **data,
+                                                        int64_t *num_strings)
+{
+    return unbox_string_array_tmpl<int64_t>(obj, offsets, data, num_strings);
+}
+
+int allocate_string_array(uint32_t **offsets, char **data, int64_t num_strings,
+                                                            int64_t total_size)
+{
+    return allocate_string_array_tmpl<uint32_t>(offsets, data, num_strings,
+                                                                total_size);
+}
+
+void setitem_string_array(uint32_t *offsets, char *data, std::string* str,
+                                                                int64_t index)
+{
+    setitem_string_array_tmpl<uint32_t>(offsets, data, str, index);
+}
+
+char* getitem_string_array(uint32_t *offsets, char *data, int64_t index)
+{
+    return getitem_string_array_tmpl<uint32_t>(offsets, data, index);
+}
+
+void* getitem_string_array_std(uint32_t *offsets, char *data, int64_t index)
+{
+    return getitem_string_array_std_tmpl<uint32_t>(offsets, data, index);
+}
+
+int allocate_string_array_large(int64_t **offsets, char **data,
+                                    int64_t num_strings, int64_t total_size)
+{
+    return allocate_string_array_tmpl<int64_t>(offsets, data, num_strings,
+                                                                total_size);
+}
+
+void setitem_string_array_large(int64_t *offsets, char *data, std::string* str,
+                                                                int64_t index)
+{
+    setitem_string_array_tmpl<int64_t>(offsets, data, str, index);
+}
+
+char* getitem_string_array_large(int64_t *offsets, char *data, int64_t index)
+{
+    return getitem_string_array_tmpl<int64_t>(offsets, data, index);
+}
+
+void* getitem_string_array_std_large(int64_t *offsets, char *data,
+                                                                int64_t index)
+{
+    return getitem_string_array_std_tmpl<int64_t>(offsets, data, index);
+}
+
 void print_int(int64_t val)
 {
     printf("%ld\n", val);
@@ -0,0 +1,2 @@
+# benchmarks of examples and HiFrames operations with a scaling harness,
+# see hpat/benchmarks/run.py
@@ -0,0 +1,3 @@
+from hpat.benchmarks.run import main
+
+main()
@@ -0,0 +1,89 @@
+import numpy as np
+from hpat import config
+
+# input data generators of benchmarks, written serially by the driver to the
+# current directory before running the benchmark under mpiexec. File names
+# should match the constant names used in hpat/benchmarks/kernels.py since
+# HPAT reads the data types from the files at compile time.
+# Each generator returns the number of rows processed by the benchmark.
+
+def gen_logistic_regression(N, D, seed=0):
+    import h5py
+    np.random.seed(seed)
+    f = h5py.File("lr.hdf5", "w")
+    f.create_dataset("points", data=np.random.random((N, D)))
+    f.create_dataset("responses", data=np.random.random(N))
+    f.close()
+    return N
+
+def gen_linear_regression(N, D, p, seed=0):
+    import h5py
+    np.random.seed(seed)
+    f = h5py.File("lir.hdf5", "w")
+    f.create_dataset("points", data=np.random.random((N, D)))
+    f.create_dataset("responses", data=np.random.random((N, p)))
+    f.close()
+    return N
+
+def gen_kmeans(N, D, k, seed=0):
+    """points and initial centroids, like generate_data/gen_kmeans.py"""
+    import h5py
+    np.random.seed(seed)
+    f = h5py.File("kmeans.hdf5", "w")
+    f.create_dataset("points", data=np.random.random((N, D)))
+    f.create_dataset("centroids", data=np.random.random((k, D)))
+    f.close()
+    return N
+
+def gen_kde(N, seed=0):
+    import h5py
+    np.random.seed(seed)
+    f = h5py.File("kde.hdf5", "w")
+    f.create_dataset("points", data=np.random.random(N))
+    f.close()
+    return N
+
+def gen_kde_pq(N, row_group_size=128*1024, seed=0):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    np.random.seed(seed)
+    df = pd.DataFrame({'points': np.random.random(N)})
+    table = pa.Table.from_pandas(df)
+    pq.write_table(table, 'kde.parquet', row_group_size)
+    return N
+
+def gen_stock_data(nsyms, max_num_days=4000, seed=0):
+    """random walk prices of nsyms symbols with different number of days,
+    in the layout of generate_data/stock_data_read.py
+    """
+    import h5py
+    np.random.seed(seed)
+    f = h5py.File("stock_data_all_google.hdf5", "w")
+    total_days = 0
+    for i in range(nsyms):
+        N = np.random.randint(max_num_days//4, max_num_days+1)
+        close = 50.0 * np.exp(np.cumsum(0.02 * np.random.randn(N)))
+        s_open = close * (1.0 + 0.01 * np.random.randn(N))
+        high = np.maximum(s_open, close) * (1.0 + 0.01 * np.random.ranf(N))
+        low = np.minimum(s_open, close) * (1.0 - 0.01 * np.random.ranf(N))
+        grp = f.create_group("SYM{}".format(i))
+        grp.create_dataset("Open", data=s_open)
+        grp.create_dataset("High", data=high)
+        grp.create_dataset("Low", data=low)
+        grp.create_dataset("Close", data=close)
+        grp.create_dataset("Volume", data=np.random.randint(1000, 100000,
+                                                        N).astype(np.float64))
+        total_days += N
+    f.close()
+    return total_days
+
+def gen_none(N):
+    """benchmarks that generate their input inside the jitted function"""
+    return N
+
+def has_h5py():
+    return config._has_h5py
+
+def has_pyarrow():
+    return config._has_pyarrow
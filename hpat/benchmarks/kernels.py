@@ -0,0 +1,217 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import hpat
+from hpat import prange, config
+from hpat.benchmarks import data
+
+if config._has_h5py:
+    import h5py
+if config._has_pyarrow:
+    import pyarrow.parquet as pq
+
+# jitted functions of benchmarks, adopted from examples/. Input files are
+# generated by hpat/benchmarks/data.py.
+
+@hpat.jit
+def logistic_regression(iterations):
+    f = h5py.File("lr.hdf5", "r")
+    X = f['points'][:]
+    Y = f['responses'][:]
+    D = X.shape[1]
+    w = np.ones(D)-0.5
+    for i in range(iterations):
+        w -= np.dot(((1.0 / (1.0 + np.exp(-Y * np.dot(X,w))) - 1.0) * Y),X)
+    return w
+
+@hpat.jit
+def linear_regression(iterations):
+    f = h5py.File("lir.hdf5", "r")
+    X = f['points'][:]
+    Y = f['responses'][:]
+    N,D = X.shape
+    p = Y.shape[1]
+    alphaN = 0.01/N
+    w = np.zeros((D,p))
+    for i in range(iterations):
+        w -= alphaN * np.dot(X.T, np.dot(X,w)-Y)
+    return w
+
+@hpat.jit
+def kde():
+    f = h5py.File("kde.hdf5", "r")
+    X = f['points'][:]
+    b = 0.5
+    points = np.array([-1.0, 2.0, 5.0])
+    N = points.shape[0]
+    n = X.shape[0]
+    exps = 0
+    for i in prange(n):
+        p = X[i]
+        d = (-(p-points)**2)/(2*b**2)
+        m = np.min(d)
+        exps += m-np.log(b*N)+np.log(np.sum(np.exp(d-m)))
+    return exps
+
+@hpat.jit
+def kde_pq():
+    t = pq.read_table('kde.parquet')
+    df = t.to_pandas()
+    X = df['points'].values
+    b = 0.5
+    points = np.array([-1.0, 2.0, 5.0])
+    N = points.shape[0]
+    n = X.shape[0]
+    exps = 0
+    for i in prange(n):
+        p = X[i]
+        d = (-(p-points)**2)/(2*b**2)
+        m = np.min(d)
+        exps += m-np.log(b*N)+np.log(np.sum(np.exp(d-m)))
+    return exps
+
+@hpat.jit(dynamic_schedule=1,
+        locals={'s_open': hpat.float64[:], 's_high': hpat.float64[:],
+        's_low': hpat.float64[:], 's_close': hpat.float64[:],
+        's_vol': hpat.float64[:]})
+def intraday_mean_revert():
+    f = h5py.File("stock_data_all_google.hdf5", "r")
+    sym_list = list(f.keys())
+    nsyms = len(sym_list)
+    max_num_days = 4000
+    all_res = np.zeros(max_num_days)
+
+    for i in prange(nsyms):
+        symbol = sym_list[i]
+
+        s_open = f[symbol+'/Open'][:]
+        s_high = f[symbol+'/High'][:]
+        s_low = f[symbol+'/Low'][:]
+        s_close = f[symbol+'/Close'][:]
+        s_vol = f[symbol+'/Volume'][:]
+        df = pd.DataFrame({'Open': s_open, 'High': s_high, 'Low': s_low,
+                            'Close': s_close, 'Volume': s_vol,})
+
+        df['Stdev'] = df['Close'].rolling(window=90).std()
+        df['Moving Average'] = df['Close'].rolling(window=20).mean()
+        df['Criteria1'] = (df['Open'] - df['Low'].shift(1)) < -df['Stdev']
+        df['Criteria2'] = df['Open'] > df['Moving Average']
+        df['BUY'] = df['Criteria1'] & df['Criteria2']
+        df['Pct Change'] = (df['Close'] - df['Open']) / df['Open']
+        df['Rets'] = df['Pct Change'][df['BUY'] == True]
+
+        n_days = len(df['Rets'])
+        res = np.zeros(max_num_days)
+        if n_days:
+            res[-n_days:] = df['Rets'].fillna(0)
+        all_res += res
+
+    return all_res.mean()
+
+@hpat.jit
+def kmeans(iterations):
+    f = h5py.File("kmeans.hdf5", "r")
+    X = f['points'][:]
+    centroids = f['centroids'][:]
+    f.close()
+    N,D = X.shape
+    k = centroids.shape[0]
+    for it in range(iterations):
+        sums = np.zeros((k,D))
+        counts = np.zeros(k)
+        for i in prange(N):
+            dist = np.empty(k)
+            for j in range(k):
+                dist[j] = np.sum((X[i,:]-centroids[j,:])**2)
+            c = np.argmin(dist)
+            for l in range(D):
+                sums[c,l] += X[i,l]
+            counts[c] += 1
+        for j in range(k):
+            if counts[j] > 0:
+                for l in range(D):
+                    centroids[j,l] = sums[j,l]/counts[j]
+    return centroids
+
+@hpat.jit
+def rolling(n):
+    df = pd.DataFrame({'A': np.ones(n), 'B': np.random.ranf(n)})
+    df['moving average'] = df.B.rolling(window=5, center=True).mean()
+    return df['moving average'].sum()
+
+@hpat.jit
+def shift(n):
+    df = pd.DataFrame({'A': np.ones(n), 'B': np.random.ranf(n)})
+    Ac = df.B.shift(1)
+    return Ac.sum()
+
+@hpat.jit
+def cumsum(n):
+    df = pd.DataFrame({'A': np.ones(n), 'B': np.random.ranf(n)})
+    Ac = df.B.cumsum()
+    return Ac.sum()
+
+@hpat.jit
+def filter_df(n):
+    df = pd.DataFrame({'A': np.random.ranf(n), 'B': np.random.ranf(n)})
+    df1 = df[df.A > .5]
+    return np.sum(df1.B)
+
+
+class Benchmark(object):
+    """a benchmark with its default parameters. gen(params) writes the input
+    data and returns the number of rows, args(params) are the arguments of
+    the jitted function, and each run processes rows*passes(params) rows.
+    size is the parameter scaled with the number of processors in weak
+    scaling runs.
+    """
+    def __init__(self, func, params, size, gen, args=lambda p: (),
+                    passes=lambda p: 1, requires=lambda: True):
+        self.func = func
+        self.params = params
+        self.size = size
+        self.gen = gen
+        self.args = args
+        self.passes = passes
+        self.requires = requires
+
+BENCHMARKS = OrderedDict([
+    ('logistic_regression', Benchmark(logistic_regression,
+        {'samples': 2000000, 'features': 10, 'iterations': 20}, 'samples',
+        lambda p: data.gen_logistic_regression(p['samples'], p['features']),
+        args=lambda p: (p['iterations'],),
+        passes=lambda p: p['iterations'], requires=data.has_h5py)),
+    ('linear_regression', Benchmark(linear_regression,
+        {'samples': 2000000, 'features': 10, 'functions': 4,
+            'iterations': 20}, 'samples',
+        lambda p: data.gen_linear_regression(p['samples'], p['features'],
+                                                            p['functions']),
+        args=lambda p: (p['iterations'],),
+        passes=lambda p: p['iterations'], requires=data.has_h5py)),
+    ('kmeans', Benchmark(kmeans,
+        {'samples': 2000000, 'features': 10, 'centers': 5, 'iterations': 20},
+        'samples',
+        lambda p: data.gen_kmeans(p['samples'], p['features'], p['centers']),
+        args=lambda p: (p['iterations'],),
+        passes=lambda p: p['iterations'], requires=data.has_h5py)),
+    ('kde', Benchmark(kde, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_kde(p['samples']), requires=data.has_h5py)),
+    ('kde_pq', Benchmark(kde_pq, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_kde_pq(p['samples']),
+        requires=data.has_pyarrow)),
+    ('intraday_mean', Benchmark(intraday_mean_revert, {'symbols': 64},
+        'symbols', lambda p: data.gen_stock_data(p['symbols']),
+        requires=data.has_h5py)),
+    ('rolling', Benchmark(rolling, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_none(p['samples']),
+        args=lambda p: (p['samples'],))),
+    ('shift', Benchmark(shift, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_none(p['samples']),
+        args=lambda p: (p['samples'],))),
+    ('cumsum', Benchmark(cumsum, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_none(p['samples']),
+        args=lambda p: (p['samples'],))),
+    ('filter', Benchmark(filter_df, {'samples': 20000000}, 'samples',
+        lambda p: data.gen_none(p['samples']),
+        args=lambda p: (p['samples'],))),
+])
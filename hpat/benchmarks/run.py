@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from hpat.benchmarks.kernels import BENCHMARKS
+from hpat.benchmarks.worker import _OUTPUT_PREFIX
+
+# runs benchmarks with mpiexec on localhost for a list of processor counts
+# and reports throughput, strong/weak scaling efficiency and compile time
+# as JSON, e.g.:
+#   python -m hpat.benchmarks --benchmarks kde,filter --ranks 1,2,4
+#          --scaling strong,weak --param samples=1000000 --output out.json
+
+def run_mpi(name, params, ranks, repeat, workdir, mpiexec):
+    """run benchmark on ranks processors, returns max compile time and time
+    of each run across processors
+    """
+    cmd = mpiexec + ['-n', str(ranks), sys.executable, '-m',
+                'hpat.benchmarks.worker', name, '--params', json.dumps(params),
+                '--repeat', str(repeat)]
+    out = subprocess.check_output(cmd, cwd=workdir).decode()
+    outputs = [json.loads(line[len(_OUTPUT_PREFIX):])
+                for line in out.splitlines() if line.startswith(_OUTPUT_PREFIX)]
+    if len(outputs)!=ranks:
+        raise RuntimeError("benchmark {} output of {} processors expected, "
+                        "{} found:\n{}".format(name, ranks, len(outputs), out))
+    # the slowest processor determines the time
+    compile_time = max(o['compile_time'] for o in outputs)
+    times = [max(t) for t in zip(*[o['times'] for o in outputs])]
+    return compile_time, times
+
+def add_scaling(results, weak):
+    """add speedup and parallel efficiency of results (in order of processor
+    counts) relative to the first one. In weak scaling the problem size
+    grows with the number of processors, so efficiency is the ratio of times.
+    """
+    base_ranks = results[0]['ranks']
+    base_time = results[0]['time']
+    for res in results:
+        p = res['ranks']
+        t = res['time']
+        if weak:
+            res['efficiency'] = base_time/t
+            res['speedup'] = res['efficiency']*p/base_ranks
+        else:
+            res['speedup'] = base_time/t
+            res['efficiency'] = res['speedup']*base_ranks/p
+    return results
+
+def run_scaling(name, params, ranks_list, weak, repeat, workdir, mpiexec):
+    bench = BENCHMARKS[name]
+    results = []
+    rows = None
+    for p in ranks_list:
+        run_params = dict(params)
+        if weak:
+            run_params[bench.size] = params[bench.size]*p
+        if weak or rows is None:
+            rows = _gen_data(bench, run_params, workdir)
+        compile_time, times = run_mpi(name, run_params, p, repeat, workdir,
+                                                                    mpiexec)
+        # median of runs
+        t = sorted(times)[len(times)//2]
+        results.append({'benchmark': name,
+                        'scaling': 'weak' if weak else 'strong',
+                        'ranks': p, 'params': run_params, 'rows': rows,
+                        'compile_time': compile_time, 'times': times,
+                        'time': t,
+                        'throughput': rows*bench.passes(run_params)/t})
+    return add_scaling(results, weak)
+
+def _gen_data(bench, params, workdir):
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return bench.gen(params)
+    finally:
+        os.chdir(cwd)
+
+def _parse_param(s):
+    key, val = s.split('=', 1)
+    try:
+        val = int(val)
+    except ValueError:
+        val = float(val)
+    return key, val
+
+def main():
+    parser = argparse.ArgumentParser(description='HPAT benchmarks')
+    parser.add_argument('--benchmarks', dest='benchmarks', type=str,
+        default=','.join(BENCHMARKS.keys()),
+        help='comma separated benchmarks from: '+', '.join(BENCHMARKS.keys()))
+    parser.add_argument('--ranks', dest='ranks', type=str, default="1,2,4",
+                        help='comma separated processor counts')
+    parser.add_argument('--scaling', dest='scaling', type=str,
+                        default="strong,weak",
+                        help='strong, weak or both (comma separated)')
+    parser.add_argument('--param', dest='param', action='append', default=[],
+                        help='override benchmark parameter, e.g. '
+                        'samples=1000000 (per processor for weak scaling)')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3)
+    parser.add_argument('--mpiexec', dest='mpiexec', type=str,
+                        default="mpiexec",
+                        help='mpiexec command with any extra arguments')
+    parser.add_argument('--workdir', dest='workdir', type=str, default=None,
+                        help='directory of generated data (temporary if '
+                        'not provided)')
+    parser.add_argument('--output', dest='output', type=str,
+                        default="hpat_benchmarks.json")
+    args = parser.parse_args()
+
+    names = args.benchmarks.split(',')
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError("unknown benchmark {}".format(name))
+    ranks_list = [int(r) for r in args.ranks.split(',')]
+    overrides = dict(_parse_param(s) for s in args.param)
+    mpiexec = args.mpiexec.split()
+    workdir = args.workdir
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix='hpat_benchmarks_')
+
+    results = []
+    skipped = []
+    for name in names:
+        bench = BENCHMARKS[name]
+        if not bench.requires():
+            skipped.append(name)
+            continue
+        params = dict(bench.params)
+        params.update({k: v for k, v in overrides.items() if k in params})
+        for scaling in args.scaling.split(','):
+            res = run_scaling(name, params, ranks_list, scaling=='weak',
+                                            args.repeat, workdir, mpiexec)
+            for r in res:
+                print("{benchmark} {scaling} ranks={ranks} time={time:.4f} "
+                    "compile={compile_time:.2f} throughput={throughput:.4g} "
+                    "efficiency={efficiency:.2f}".format(**r))
+            results.extend(res)
+
+    report = {'host': platform.node(),
+                'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'mpiexec': args.mpiexec, 'skipped': skipped,
+                'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
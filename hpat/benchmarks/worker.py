@@ -0,0 +1,50 @@
+import argparse
+import json
+import time
+import numba
+import hpat
+import hdist
+from hpat.benchmarks.kernels import BENCHMARKS
+
+# runs a benchmark on each processor under mpiexec and prints its timings,
+# started by hpat/benchmarks/run.py in the directory of the input data
+
+_OUTPUT_PREFIX = "HPAT_BENCHMARK:"
+
+@hpat.jit
+def _barrier():
+    hpat.distributed_api.barrier()
+    return 0
+
+def run_benchmark(name, params, repeat):
+    bench = BENCHMARKS[name]
+    func = bench.func
+    args = bench.args(params)
+    # compile explicitly to measure compile time separately from the runs
+    _barrier()
+    t1 = time.time()
+    func.compile(tuple(numba.typeof(a) for a in args))
+    compile_time = time.time()-t1
+    times = []
+    for i in range(repeat):
+        _barrier()
+        t1 = time.time()
+        func(*args)
+        times.append(time.time()-t1)
+    return compile_time, times
+
+def main():
+    parser = argparse.ArgumentParser(description='HPAT benchmark worker')
+    parser.add_argument('name', type=str)
+    parser.add_argument('--params', dest='params', type=str, default="{}",
+                        help='benchmark parameters as JSON')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    params = json.loads(args.params)
+    compile_time, times = run_benchmark(args.name, params, args.repeat)
+    print(_OUTPUT_PREFIX, json.dumps({'rank': hdist.get_rank(),
+                                'compile_time': compile_time, 'times': times}))
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,8 @@ from __future__ import print_function, division, absolute_import
 # from .pio import PIO
 from .distributed import DistributedPass
 from .hiframes import HiFrames
+import copy
+import re
 import numba
 import numba.compiler
 from numba import ir_utils, ir
@@ -19,14 +21,15 @@ from numba.ir_utils import (mk_unique_var, add_offset_to_labels,
 #     io_pass = PIO(pipeline.func_ir, pipeline.locals)
 #     io_pass.run()
 
-def stage_distributed_pass(pipeline):
+def stage_distributed_pass(pipeline, options):
     """
     parallelize for distributed-memory
     """
     # Ensure we have an IR and type information.
     assert pipeline.func_ir
     dist_pass = DistributedPass(pipeline.func_ir, pipeline.typingctx,
-        pipeline.type_annotation.typemap, pipeline.type_annotation.calltypes)
+        pipeline.type_annotation.typemap, pipeline.type_annotation.calltypes,
+        options)
     dist_pass.run()
 
 def stage_df_pass(pipeline):
@@ -38,51 +41,96 @@ def stage_df_pass(pipeline):
     df_pass = HiFrames(pipeline.func_ir, pipeline.typingctx, pipeline.args, pipeline.locals)
     df_pass.run()
 
-def stage_inline_pass(pipeline):
+def stage_inline_pass(pipeline, options):
     """
     Inline function calls (to enable distributed pass analysis)
     """
     # Ensure we have an IR and type information.
     assert pipeline.func_ir
+    # user variable names are matched before inlining adds callee variables
+    if 'distributed_2d' in options:
+        options['distributed_2d_vars'] = get_user_vars(pipeline.func_ir,
+                                                    options['distributed_2d'])
     inline_calls(pipeline.func_ir)
 
-def add_hpat_stages(pipeline_manager, pipeline):
+def add_hpat_stages(pipeline_manager, pipeline, options=None):
+    # options are per compilation since stages add derived options
+    options = dict(options) if options is not None else {}
     pp = pipeline_manager.pipeline_stages['nopython']
     new_pp = []
     for (func,desc) in pp:
         if desc=='nopython frontend':
-            new_pp.append((lambda:stage_inline_pass(pipeline), "inline funcs"))
+            new_pp.append((lambda:stage_inline_pass(pipeline, options), "inline funcs"))
             new_pp.append((lambda:stage_df_pass(pipeline), "convert DataFrames"))
             # run io pass in df pass to enable type inference
             #new_pp.append((lambda:stage_io_pass(pipeline), "replace IO calls"))
         if desc=='nopython mode backend':
-            new_pp.append((lambda:stage_distributed_pass(pipeline), "convert to distributed"))
+            new_pp.append((lambda:stage_distributed_pass(pipeline, options), "convert to distributed"))
         new_pp.append((func,desc))
     pipeline_manager.pipeline_stages['nopython'] = new_pp
 
+def get_user_vars(func_ir, names):
+    """
+    IR variables of user variable names, including the versions created by
+    the frontend for redefined variables (e.g. X.1)
+    """
+    patterns = [re.compile(re.escape(name)+r'(\.\d+)?$') for name in names]
+    var_names = get_name_var_table(func_ir.blocks).keys()
+    return [v for v in var_names if any(p.match(v) for p in patterns)]
+
 def inline_calls(func_ir):
+    """
+    Inline calls to jitted functions transitively using a worklist of blocks.
+    Each worklist item keeps the functions inlined so far on its path to
+    avoid inlining recursive calls infinitely.
+    """
     call_table, _ = ir_utils.get_call_table(func_ir.blocks)
-    for label, block in func_ir.blocks.items():
+    # callee IR per Python function for this compilation, copied for each
+    # call site
+    callee_irs = {}
+    work_list = [(block, frozenset()) for block in func_ir.blocks.values()]
+    while work_list:
+        block, inlined_funcs = work_list.pop()
         for i, stmt in enumerate(block.body):
             if isinstance(stmt, ir.Assign):
                 rhs = stmt.value
                 if isinstance(rhs, ir.Expr) and rhs.op=='call':
                     func = rhs.func.name
                     if (func in call_table and call_table[func]
-                            and isinstance(call_table[func][0], CPUDispatcher)):
+                            and isinstance(call_table[func][0], CPUDispatcher)
+                            and rhs.vararg is None):
                         py_func = call_table[func][0].py_func
-                        inline_calls_inner(func_ir, block, stmt, i, py_func)
-                        return  # inline_calls_inner will call back recursively
+                        if py_func in inlined_funcs:
+                            continue
+                        new_block, callee_blocks = inline_calls_inner(
+                            func_ir, block, stmt, i, py_func, call_table,
+                            callee_irs)
+                        # rest of the caller block and inlined blocks can have
+                        # more calls
+                        work_list.append((new_block, inlined_funcs))
+                        callee_funcs = inlined_funcs | {py_func}
+                        work_list.extend((bl, callee_funcs)
+                                                for bl in callee_blocks)
+                        break
+    return
 
-def inline_calls_inner(func_ir, block, stmt, i, py_func):
+def inline_calls_inner(func_ir, block, stmt, i, py_func, call_table,
+                                                            callee_irs=None):
+    """
+    Inline call in stmt (i-th statement of block) and return the block of
+    statements after the call and the list of inlined blocks.
+    call_table is updated with calls of the inlined blocks.
+    """
     call_expr = stmt.value
     scope = block.scope
-    callee_ir = numba.compiler.run_frontend(py_func)
+    if callee_irs is None:
+        callee_irs = {}
+    callee_ir = _get_callee_ir(py_func, callee_irs)
+    callee_blocks = _copy_blocks(callee_ir.blocks)
 
-    # relabel callee_ir by adding an offset
+    # relabel callee blocks by adding an offset
     max_label = max(func_ir.blocks.keys())
-    callee_blocks = add_offset_to_labels(callee_ir.blocks, max_label+1)
-    callee_ir.blocks = callee_blocks
+    callee_blocks = add_offset_to_labels(callee_blocks, max_label+1)
     min_label = min(callee_blocks.keys())
     max_label = max(callee_blocks.keys())
 
@@ -90,17 +138,16 @@ def inline_calls_inner(func_ir, block, stmt, i, py_func):
     ir_utils._max_label = max_label
 
     # rename all variables in callee blocks
-    var_table = get_name_var_table(callee_ir.blocks)
+    var_table = get_name_var_table(callee_blocks)
     new_var_dict = {}
     for name, var in var_table.items():
         new_var = scope.define(mk_unique_var(var.name), loc=var.loc)
         new_var_dict[name] = new_var
-    replace_vars(callee_ir.blocks, new_var_dict)
+    replace_vars(callee_blocks, new_var_dict)
 
-    # replace callee arguments
-    args = list(call_expr.args)
-    # TODO: replace defaults (add to args)
-    _replace_args(callee_ir.blocks, args)
+    # calls of callee are resolved using the caller's call table
+    callee_call_table, _ = ir_utils.get_call_table(callee_blocks)
+    call_table.update(callee_call_table)
 
     # split caller blocks into two
     new_block = ir.Block(scope, block.loc)
@@ -108,18 +155,66 @@ def inline_calls_inner(func_ir, block, stmt, i, py_func):
     new_label = ir_utils.next_label()
     func_ir.blocks[new_label] = new_block
     block.body = block.body[:i]
+
+    # replace callee arguments, keyword arguments and defaults
+    args = _get_call_args(callee_ir, call_expr, py_func, block)
+    _replace_args(callee_blocks, args)
     block.body.append(ir.Jump(min_label, stmt.loc))
 
     # replace Return with assignment to LHS
-    _replace_returns(callee_ir.blocks, stmt.target, new_label)
+    _replace_returns(callee_blocks, stmt.target, new_label)
 
     # insert all new blocks
-    for label, bl in callee_ir.blocks.items():
+    for label, bl in callee_blocks.items():
         func_ir.blocks[label] = bl
 
-    # run inline_calls recursively to transform other calls
-    inline_calls(func_ir)
-    return
+    return new_block, list(callee_blocks.values())
+
+def _get_callee_ir(py_func, callee_irs):
+    if py_func not in callee_irs:
+        callee_irs[py_func] = numba.compiler.run_frontend(py_func)
+    return callee_irs[py_func]
+
+def _copy_blocks(blocks):
+    """
+    Copy callee blocks for a call site. Statements are modified in place
+    after inlining so they are copied, but the values of globals, free
+    variables and constants (modules, functions, arrays) are shared.
+    """
+    memo = {}
+    for block in blocks.values():
+        for stmt in block.body:
+            if (isinstance(stmt, ir.Assign) and isinstance(stmt.value,
+                                        (ir.Global, ir.FreeVar, ir.Const))):
+                memo[id(stmt.value.value)] = stmt.value.value
+    return copy.deepcopy(blocks, memo)
+
+def _get_call_args(callee_ir, call_expr, py_func, block):
+    """
+    Match call site arguments to callee arguments. Default values of missing
+    arguments are assigned to new variables at the end of block.
+    """
+    args = list(call_expr.args)
+    kws = dict(call_expr.kws)
+    arg_names = callee_ir.arg_names
+    defaults = py_func.__defaults__ or ()
+    first_default = callee_ir.arg_count - len(defaults)
+    scope = block.scope
+    loc = call_expr.loc
+    for i in range(len(args), callee_ir.arg_count):
+        name = arg_names[i]
+        if name in kws:
+            args.append(kws[name])
+        elif i >= first_default:
+            # default: $arg_default = const
+            def_var = ir.Var(scope, mk_unique_var(name+"_default"), loc)
+            def_val = ir.Const(defaults[i-first_default], loc)
+            block.body.append(ir.Assign(def_val, def_var, loc))
+            args.append(def_var)
+        else:
+            raise TypeError("{}() missing required argument '{}'".format(
+                py_func.__name__, name))
+    return args
 
 def _replace_args(blocks, args):
     """
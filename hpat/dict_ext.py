@@ -1,3 +1,4 @@
+import numpy as np
 import numba
 from numba import types, typing
 from numba.typing.templates import (signature, AbstractTemplate, infer,
@@ -6,19 +7,57 @@ from numba.extending import typeof_impl, lower_cast
 from numba.extending import type_callable, box, unbox, NativeValue
 from numba.extending import models, register_model, infer_getattr
 from numba.extending import lower_builtin, overload_method
+from numba.targets.imputils import iternext_impl
+from numba.targets.arrayobj import make_array
+from numba.numpy_support import as_dtype
 from numba import cgutils
 from llvmlite import ir as lir
 import llvmlite.binding as ll
+from hpat.str_ext import StringType, StringViewType, get_str_data_len
+from hpat.utils import _h5_typ_table
 
 class DictType(types.Opaque):
-    def __init__(self, key_typ, val_typ):
+    def __init__(self, key_typ, val_typ, ordered=False):
         self.key_typ = key_typ
         self.val_typ = val_typ
-        super(DictType, self).__init__(name='DictType{}{}'.format(key_typ, val_typ))
+        self.ordered = ordered
+        name = 'OrderedDictType{}{}' if ordered else 'DictType{}{}'
+        super(DictType, self).__init__(name=name.format(key_typ, val_typ))
+
+class DistDictType(types.Opaque):
+    """dictionary with keys partitioned across ranks by hash. Updates are
+    merged with the combine operator ('sum', 'min' or 'max') at the owner.
+    """
+    def __init__(self, key_typ, val_typ, combine):
+        self.key_typ = key_typ
+        self.val_typ = val_typ
+        self.combine = combine
+        super(DistDictType, self).__init__(
+            name='DistDictType{}{}{}'.format(key_typ, val_typ, combine))
+
+    @property
+    def local_dict_typ(self):
+        return DictType(self.key_typ, self.val_typ)
 
 dict_int_int_type = DictType(types.intp, types.intp)
 dict_int32_int32_type = DictType(types.int32, types.int32)
 
+def _is_key_elem_type(typ):
+    return isinstance(typ, (types.Integer, types.Float, types.Boolean))
+
+def is_dict_key_type(typ):
+    """scalars, tuples of scalars and strings can be keys of native dicts"""
+    if isinstance(typ, types.BaseTuple):
+        return len(typ) > 0 and all(_is_key_elem_type(t) for t in typ.types)
+    return _is_key_elem_type(typ) or isinstance(typ, StringType)
+
+def is_dict_val_type(typ):
+    return isinstance(typ, (types.Number, types.Boolean, types.Array))
+
+def is_ordered_dict_key_type(typ):
+    """keys of ordered dicts need native comparison"""
+    return typ in _dict_scalar_types or isinstance(typ, StringType)
+
 class DictIntInt(object):
     def __new__(cls, *args):
         return {}
@@ -27,25 +66,76 @@ class DictInt32Int32(object):
     def __new__(cls, *args):
         return {}
 
-@typeof_impl.register(DictIntInt)
-def typeof_index(val, c):
-    return dict_int_int_type
+def _register_dict_class(cls, dict_typ, init_impl=None):
+    typeof_impl.register(cls)(lambda val, c: dict_typ)
 
-@typeof_impl.register(DictInt32Int32)
-def typeof_index(val, c):
-    return dict_int32_int32_type
+    @type_callable(cls)
+    def type_dict(context):
+        def typer():
+            return dict_typ
+        return typer
 
-@type_callable(DictIntInt)
-def type_dict(context):
-    def typer():
-        return dict_int_int_type
-    return typer
+    lower_builtin(cls)(init_impl or impl_init_dict)
 
-@type_callable(DictInt32Int32)
-def type_dict(context):
-    def typer():
-        return dict_int32_int32_type
-    return typer
+_dict_classes = {}
+
+def dict_class(key_typ, val_typ, ordered=False):
+    """return a constructor for native dictionaries with the given key and
+    value types, to be called inside jit functions (e.g.
+    D = dict_class(string_type, types.float64); d = D()).
+    Ordered dictionaries keep keys sorted (scalar or string keys only), which
+    makes min/max of keys O(1) and iteration sorted.
+    """
+    if not is_dict_key_type(key_typ):
+        raise ValueError("invalid dictionary key type {}".format(key_typ))
+    if not is_dict_val_type(val_typ):
+        raise ValueError("invalid dictionary value type {}".format(val_typ))
+    if ordered and not is_ordered_dict_key_type(key_typ):
+        raise ValueError("invalid ordered dictionary key type {}".format(
+                                                                    key_typ))
+    dict_key = (key_typ, val_typ, ordered)
+    if dict_key not in _dict_classes:
+        name = 'OrderedDict' if ordered else 'Dict'
+        cls = type('{}({}, {})'.format(name, key_typ, val_typ), (object,),
+                                            {'__new__': DictIntInt.__new__})
+        _register_dict_class(cls, DictType(key_typ, val_typ, ordered))
+        _dict_classes[dict_key] = cls
+    return _dict_classes[dict_key]
+
+_dist_dict_combine_table = {'sum': 0, 'min': 1, 'max': 2}
+
+def dist_dict_class(key_typ, val_typ, combine='sum'):
+    """return a constructor for distributed dictionaries. Keys are owned by
+    ranks according to their hash, d[k] = v buffers the update for the owner
+    and d.flush() (collective) merges buffered updates using combine
+    ('sum', 'min' or 'max'). After flush, len(d) is the global number of keys,
+    d.get_many(keys, default) looks up an array of keys at their owners and
+    d.local() is the dictionary of keys owned by this rank.
+    """
+    if not is_dict_key_type(key_typ):
+        raise ValueError("invalid dictionary key type {}".format(key_typ))
+    if val_typ not in _dict_scalar_types:
+        raise ValueError("invalid distributed dictionary value type {}".format(
+                                                                    val_typ))
+    if combine not in _dist_dict_combine_table:
+        raise ValueError("invalid dictionary combine operator {}".format(
+                                                                    combine))
+    dict_key = (key_typ, val_typ, 'dist', combine)
+    if dict_key not in _dict_classes:
+        cls = type('DistDict({}, {}, {})'.format(key_typ, val_typ, combine),
+                                (object,), {'__new__': DictIntInt.__new__})
+        _register_dict_class(cls, DistDictType(key_typ, val_typ, combine),
+                                                        impl_init_dist_dict)
+        _dict_classes[dict_key] = cls
+    return _dict_classes[dict_key]
+
+def _get_key_arg_typ(dict_t, key):
+    # string views (e.g. StringArray elements) are looked up without
+    # allocating a string
+    if (isinstance(dict_t.key_typ, StringType)
+            and isinstance(key, (StringType, StringViewType))):
+        return key
+    return dict_t.key_typ
 
 @infer
 class SetItemDict(AbstractTemplate):
@@ -53,9 +143,9 @@ class SetItemDict(AbstractTemplate):
 
     def generic(self, args, kws):
         dict_t, idx, value = args
-        if isinstance(dict_t, DictType):
-            if isinstance(idx, types.Integer):
-                return signature(types.none, dict_t, idx, dict_t.val_typ)
+        if isinstance(dict_t, (DictType, DistDictType)):
+            return signature(types.none, dict_t,
+                            _get_key_arg_typ(dict_t, idx), dict_t.val_typ)
 
 @infer
 class GetItemDict(AbstractTemplate):
@@ -64,14 +154,45 @@ class GetItemDict(AbstractTemplate):
     def generic(self, args, kws):
         dict_t, idx = args
         if isinstance(dict_t, DictType):
-            if isinstance(idx, types.Integer):
-                return signature(dict_t.val_typ, dict_t, idx)
+            return signature(dict_t.val_typ, dict_t,
+                                                _get_key_arg_typ(dict_t, idx))
+
+@infer
+class InDict(AbstractTemplate):
+    key = "in"
+
+    def generic(self, args, kws):
+        idx, dict_t = args
+        if isinstance(dict_t, DictType):
+            return signature(types.boolean, _get_key_arg_typ(dict_t, idx),
+                                                                        dict_t)
+
+@infer_global(len)
+class LenDict(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        if len(args) == 1 and isinstance(args[0], (DictType, DistDictType)):
+            return signature(types.intp, *args)
 
 @infer
-class PrintDictIntInt(ConcreteTemplate):
+class PrintDict(AbstractTemplate):
     key = "print_item"
-    cases = [signature(types.none, dict_int_int_type),
-            signature(types.none, dict_int32_int32_type)]
+
+    def generic(self, args, kws):
+        dict_t, = args
+        if (isinstance(dict_t, DictType)
+                and is_ordered_dict_key_type(dict_t.key_typ)
+                and dict_t.val_typ in _dict_scalar_types):
+            return signature(types.none, dict_t)
+
+@infer
+class GetIterDict(AbstractTemplate):
+    key = "getiter"
+
+    def generic(self, args, kws):
+        dict_t, = args
+        if isinstance(dict_t, DictType):
+            return signature(DictIteratorType(dict_t, 'keys'), dict_t)
 
 @infer_getattr
 class DictAttribute(AttributeTemplate):
@@ -81,19 +202,57 @@ class DictAttribute(AttributeTemplate):
     def resolve_get(self, dict, args, kws):
         assert not kws
         assert len(args) == 2
-        return signature(args[1], *args)
+        return signature(dict.val_typ, _get_key_arg_typ(dict, args[0]),
+                                                                dict.val_typ)
 
     @bound_function("dict.pop")
     def resolve_pop(self, dict, args, kws):
         assert not kws
-        return signature(dict.val_typ, *args)
+        assert len(args) == 1
+        return signature(dict.val_typ, _get_key_arg_typ(dict, args[0]))
 
     @bound_function("dict.keys")
     def resolve_keys(self, dict, args, kws):
         assert not kws
-        return signature(DictKeyIteratorType(dict.key_typ, dict.val_typ))
+        return signature(DictViewType(dict, 'keys'))
+
+    @bound_function("dict.values")
+    def resolve_values(self, dict, args, kws):
+        assert not kws
+        return signature(DictViewType(dict, 'values'))
+
+    @bound_function("dict.items")
+    def resolve_items(self, dict, args, kws):
+        assert not kws
+        return signature(DictViewType(dict, 'items'))
+
+@infer_getattr
+class DistDictAttribute(AttributeTemplate):
+    key = DistDictType
+
+    @bound_function("distdict.flush")
+    def resolve_flush(self, dict, args, kws):
+        assert not kws
+        return signature(types.none)
+
+    @bound_function("distdict.local")
+    def resolve_local(self, dict, args, kws):
+        assert not kws
+        return signature(dict.local_dict_typ)
+
+    @bound_function("distdict.get_many")
+    def resolve_get_many(self, dict, args, kws):
+        assert not kws
+        assert len(args) == 2
+        keys = args[0]
+        # batched lookup of scalar keys from a contiguous 1D array
+        if (isinstance(keys, types.Array) and keys.ndim == 1
+                and keys.layout == 'C' and keys.dtype == dict.key_typ):
+            return signature(types.Array(dict.val_typ, 1, 'C'), keys,
+                                                                dict.val_typ)
 
 register_model(DictType)(models.OpaqueModel)
+register_model(DistDictType)(models.OpaqueModel)
 
 @box(DictType)
 def box_dict(typ, val, c):
@@ -109,178 +268,427 @@ def box_dict(typ, val, c):
     c.pyapi.decref(class_obj)
     return res
 
-class DictKeyIteratorType(types.SimpleIterableType):
-    def __init__(self, key_typ, val_typ):
-        self.key_typ = key_typ
-        self.val_typ = val_typ
-        super(types.SimpleIterableType, self).__init__(
-                            'DictKeyIteratorType{}{}'.format(key_typ, val_typ))
-
-dict_key_iterator_int_int_type = DictKeyIteratorType(types.intp, types.intp)
-dict_key_iterator_int32_int32_type = DictKeyIteratorType(types.int32, types.int32)
-
-register_model(DictKeyIteratorType)(models.OpaqueModel)
+class DictIteratorType(types.SimpleIteratorType):
+    """iterator over keys, values or items of a native dict"""
+    def __init__(self, dict_typ, kind):
+        self.dict_typ = dict_typ
+        self.kind = kind
+        if kind == 'keys':
+            yield_typ = dict_typ.key_typ
+        elif kind == 'values':
+            yield_typ = dict_typ.val_typ
+        else:
+            yield_typ = types.Tuple([dict_typ.key_typ, dict_typ.val_typ])
+        super(DictIteratorType, self).__init__(
+                    'DictIteratorType({}, {})'.format(dict_typ, kind), yield_typ)
+
+class DictViewType(types.SimpleIterableType):
+    """result of keys(), values() and items() of native dicts"""
+    def __init__(self, dict_typ, kind):
+        self.dict_typ = dict_typ
+        self.kind = kind
+        super(DictViewType, self).__init__(
+                            'DictViewType({}, {})'.format(dict_typ, kind),
+                            DictIteratorType(dict_typ, kind))
+
+# views are the dict pointer
+register_model(DictViewType)(models.OpaqueModel)
+
+@register_model(DictIteratorType)
+class DictIteratorModel(models.StructModel):
+    def __init__(self, dmm, fe_type):
+        members = [
+            ('dict_ptr', types.voidptr),
+            ('pos', types.EphemeralPointer(types.int64)),
+            ]
+        models.StructModel.__init__(self, dmm, fe_type, members)
 
 @infer_global(min)
 @infer_global(max)
 class MinMaxDict(AbstractTemplate):
     def generic(self, args, kws):
-        if len(args) == 1 and isinstance(args[0],DictKeyIteratorType):
-            return signature(args[0].key_typ, *args)
+        if (len(args) == 1 and isinstance(args[0], DictViewType)
+                and args[0].kind == 'keys'
+                and is_ordered_dict_key_type(args[0].dict_typ.key_typ)):
+            return signature(args[0].dict_typ.key_typ, *args)
 
 import hdict_ext
-ll.add_symbol('init_dict_int_int', hdict_ext.init_dict_int_int)
-ll.add_symbol('dict_int_int_setitem', hdict_ext.dict_int_int_setitem)
-ll.add_symbol('dict_int_int_print', hdict_ext.dict_int_int_print)
-ll.add_symbol('dict_int_int_get', hdict_ext.dict_int_int_get)
-ll.add_symbol('dict_int_int_getitem', hdict_ext.dict_int_int_getitem)
-ll.add_symbol('dict_int_int_pop', hdict_ext.dict_int_int_pop)
-ll.add_symbol('dict_int_int_keys', hdict_ext.dict_int_int_keys)
-ll.add_symbol('dict_int_int_min', hdict_ext.dict_int_int_min)
-ll.add_symbol('dict_int_int_max', hdict_ext.dict_int_int_max)
-ll.add_symbol('dict_int_int_not_empty', hdict_ext.dict_int_int_not_empty)
-
-# int32 versions
-ll.add_symbol('init_dict_int32_int32', hdict_ext.init_dict_int32_int32)
-ll.add_symbol('dict_int32_int32_setitem', hdict_ext.dict_int32_int32_setitem)
-ll.add_symbol('dict_int32_int32_print', hdict_ext.dict_int32_int32_print)
-ll.add_symbol('dict_int32_int32_get', hdict_ext.dict_int32_int32_get)
-ll.add_symbol('dict_int32_int32_getitem', hdict_ext.dict_int32_int32_getitem)
-ll.add_symbol('dict_int32_int32_pop', hdict_ext.dict_int32_int32_pop)
-ll.add_symbol('dict_int32_int32_keys', hdict_ext.dict_int32_int32_keys)
-ll.add_symbol('dict_int32_int32_min', hdict_ext.dict_int32_int32_min)
-ll.add_symbol('dict_int32_int32_max', hdict_ext.dict_int32_int32_max)
-ll.add_symbol('dict_int32_int32_not_empty', hdict_ext.dict_int32_int32_not_empty)
-
-
-@lower_builtin(DictIntInt)
-def impl_dict_int_int(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(8).as_pointer(), [])
-    fn = builder.module.get_or_insert_function(fnty, name="init_dict_int_int")
-    return builder.call(fn, [])
-
-@lower_builtin('setitem', DictType, types.intp, types.intp)
+import hdist
+ll.add_symbol('init_dict', hdict_ext.init_dict)
+ll.add_symbol('init_ordered_dict', hdict_ext.init_ordered_dict)
+ll.add_symbol('dict_setitem', hdict_ext.dict_setitem)
+ll.add_symbol('dict_getitem', hdict_ext.dict_getitem)
+ll.add_symbol('dict_pop', hdict_ext.dict_pop)
+ll.add_symbol('dict_contains', hdict_ext.dict_contains)
+ll.add_symbol('dict_len', hdict_ext.dict_len)
+ll.add_symbol('dict_print', hdict_ext.dict_print)
+ll.add_symbol('dict_key_min', hdict_ext.dict_key_min)
+ll.add_symbol('dict_key_max', hdict_ext.dict_key_max)
+ll.add_symbol('dict_iter_begin', hdict_ext.dict_iter_begin)
+ll.add_symbol('dict_iter_next', hdict_ext.dict_iter_next)
+ll.add_symbol('init_dist_dict', hdict_ext.init_dist_dict)
+ll.add_symbol('dist_dict_setitem', hdict_ext.dist_dict_setitem)
+ll.add_symbol('dist_dict_flush', hdict_ext.dist_dict_flush)
+ll.add_symbol('dist_dict_get_many', hdict_ext.dist_dict_get_many)
+ll.add_symbol('dist_dict_len', hdict_ext.dist_dict_len)
+ll.add_symbol('dist_dict_local', hdict_ext.dist_dict_local)
+# distributed dicts exchange buffers with the 64-bit count alltoallv of hdist
+hdict_ext.set_alltoallv_large(hdist.hpat_alltoallv_int64)
+
+# scalar types the native dict can compare, print and combine, passed with
+# their _h5_typ_table codes
+_dict_scalar_types = {t for t in _h5_typ_table
+                                if isinstance(t, (types.Integer, types.Float))}
+
+# key type codes of other keys
+_dict_key_bytes = -1
+_dict_key_str = -2
+
+def _get_dict_key_enum(key_typ):
+    if isinstance(key_typ, StringType):
+        return _dict_key_str
+    if key_typ in _dict_scalar_types:
+        return _h5_typ_table[key_typ]
+    return _dict_key_bytes
+
+def _get_key_elem_types(key_typ):
+    if isinstance(key_typ, types.BaseTuple):
+        return list(key_typ.types)
+    return [key_typ]
+
+def get_key_size(context, key_typ):
+    """number of bytes of a packed fixed-size key, tuple elements are stored
+    without padding
+    """
+    return sum(context.get_abi_sizeof(context.get_data_type(t))
+                                    for t in _get_key_elem_types(key_typ))
+
+def pack_dict_key(context, builder, typ, val):
+    """return pointer and length of key bytes as stored in the native table"""
+    if isinstance(typ, (StringType, StringViewType)):
+        return get_str_data_len(context, builder, typ, val)
+    elem_typs = _get_key_elem_types(typ)
+    if isinstance(typ, types.BaseTuple):
+        elems = cgutils.unpack_tuple(builder, val, len(elem_typs))
+    else:
+        elems = [val]
+    size = get_key_size(context, typ)
+    buf = cgutils.alloca_once(builder, lir.ArrayType(lir.IntType(8), size))
+    buf = builder.bitcast(buf, lir.IntType(8).as_pointer())
+    offset = 0
+    for t, v in zip(elem_typs, elems):
+        if isinstance(t, types.Float):
+            # keys are compared bytewise, -0.0 should match 0.0
+            zero = context.get_constant(t, 0.0)
+            v = builder.select(builder.fcmp_ordered('==', v, zero), zero, v)
+        data = context.data_model_manager[t].as_data(builder, v)
+        ptr = builder.gep(buf, [context.get_constant(types.intp, offset)])
+        builder.store(data, builder.bitcast(ptr, data.type.as_pointer()),
+                                                                    align=1)
+        offset += context.get_abi_sizeof(data.type)
+    return buf, context.get_constant(types.int64, size)
+
+def unpack_dict_key(context, builder, typ, ptr):
+    """load fixed-size key from packed key bytes"""
+    elems = []
+    offset = 0
+    for t in _get_key_elem_types(typ):
+        data_typ = context.get_data_type(t)
+        elem_ptr = builder.gep(ptr, [context.get_constant(types.intp, offset)])
+        data = builder.load(builder.bitcast(elem_ptr, data_typ.as_pointer()),
+                                                                    align=1)
+        elems.append(context.data_model_manager[t].from_data(builder, data))
+        offset += context.get_abi_sizeof(data_typ)
+    if isinstance(typ, types.BaseTuple):
+        return context.make_tuple(builder, typ, elems)
+    return elems[0]
+
+def load_dict_key(context, builder, typ, ptr, key_len):
+    """create key value from key data returned by the native dict"""
+    if isinstance(typ, StringType):
+        fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                                [lir.IntType(8).as_pointer(), lir.IntType(64)])
+        fn = builder.module.get_or_insert_function(fnty, name="init_string")
+        return builder.call(fn, [ptr, key_len])
+    return unpack_dict_key(context, builder, typ, ptr)
+
+def _alloca_dict_val(context, builder, typ, val=None):
+    """return stack slot (and its i8* cast) for a value in data representation"""
+    data_typ = context.get_data_type(typ)
+    if val is None:
+        ptr = cgutils.alloca_once(builder, data_typ)
+    else:
+        data = context.data_model_manager[typ].as_data(builder, val)
+        ptr = cgutils.alloca_once_value(builder, data)
+    return ptr, builder.bitcast(ptr, lir.IntType(8).as_pointer())
+
+def _load_dict_val(context, builder, typ, ptr):
+    return context.data_model_manager[typ].from_data(builder, builder.load(ptr))
+
+def _incref(context, builder, typ, val):
+    if context.enable_nrt:
+        context.nrt.incref(builder, typ, val)
+
+def _decref(context, builder, typ, val):
+    if context.enable_nrt:
+        context.nrt.decref(builder, typ, val)
+
+def _call_dict_lookup(context, builder, name, dict_typ, key_typ, d, key, val_ptr):
+    """call lookup function of native dict that copies value to val_ptr and
+    returns whether key was found
+    """
+    key_ptr, key_len = pack_dict_key(context, builder, key_typ, key)
+    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer(),
+            lir.IntType(8).as_pointer(), lir.IntType(64),
+            lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name=name)
+    return builder.call(fn, [d, key_ptr, key_len, val_ptr])
+
+def _raise_key_error(context, builder, found):
+    with cgutils.if_unlikely(builder, builder.not_(found)):
+        context.call_conv.return_user_exc(builder, KeyError,
+                                                ("dictionary key not found",))
+
+def impl_init_dict(context, builder, sig, args):
+    dict_typ = sig.return_type
+    key_enum = _get_dict_key_enum(dict_typ.key_typ)
+    key_size = 0
+    if key_enum != _dict_key_str:
+        key_size = get_key_size(context, dict_typ.key_typ)
+    val_size = context.get_abi_sizeof(context.get_data_type(dict_typ.val_typ))
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                    [lir.IntType(64), lir.IntType(64), lir.IntType(32)])
+    fname = "init_ordered_dict" if dict_typ.ordered else "init_dict"
+    fn = builder.module.get_or_insert_function(fnty, name=fname)
+    return builder.call(fn, [context.get_constant(types.int64, key_size),
+                            context.get_constant(types.int64, val_size),
+                            context.get_constant(types.int32, key_enum)])
+
+_register_dict_class(DictIntInt, dict_int_int_type)
+_register_dict_class(DictInt32Int32, dict_int32_int32_type)
+
+@lower_builtin('setitem', DictType, types.Any, types.Any)
 def setitem_dict(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer(), lir.IntType(64), lir.IntType(64)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_setitem")
-    return builder.call(fn, args)
-
-@lower_builtin("print_item", dict_int_int_type)
-def print_dict(context, builder, sig, args):
-    # pyapi = context.get_python_api(builder)
-    # strobj = pyapi.unserialize(pyapi.serialize_object("hello!"))
-    # pyapi.print_object(strobj)
-    # pyapi.decref(strobj)
-    # return context.get_dummy_value()
-    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_print")
-    return builder.call(fn, args)
+    dict_typ, key_typ, val_typ = sig.args
+    d, key, val = args
+    key_ptr, key_len = pack_dict_key(context, builder, key_typ, key)
+    # the table holds a reference to the value
+    _incref(context, builder, val_typ, val)
+    _, val_ptr = _alloca_dict_val(context, builder, val_typ, val)
+    old_ptr, old_val_ptr = _alloca_dict_val(context, builder, val_typ)
+    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer(),
+            lir.IntType(8).as_pointer(), lir.IntType(64),
+            lir.IntType(8).as_pointer(), lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_setitem")
+    replaced = builder.call(fn, [d, key_ptr, key_len, val_ptr, old_val_ptr])
+    if context.enable_nrt:
+        with builder.if_then(replaced):
+            _decref(context, builder, val_typ,
+                                _load_dict_val(context, builder, val_typ, old_ptr))
+    return context.get_dummy_value()
+
+@lower_builtin("getitem", DictType, types.Any)
+def lower_dict_getitem(context, builder, sig, args):
+    val_typ = sig.return_type
+    ptr, val_ptr = _alloca_dict_val(context, builder, val_typ)
+    found = _call_dict_lookup(context, builder, "dict_getitem", sig.args[0],
+                                        sig.args[1], args[0], args[1], val_ptr)
+    _raise_key_error(context, builder, found)
+    res = _load_dict_val(context, builder, val_typ, ptr)
+    _incref(context, builder, val_typ, res)
+    return res
 
-@lower_builtin("dict.get", DictType, types.intp, types.intp)
+@lower_builtin("dict.get", DictType, types.Any, types.Any)
 def lower_dict_get(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer(), lir.IntType(64), lir.IntType(64)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_get")
-    return builder.call(fn, args)
-
-@lower_builtin("getitem", DictType, types.intp)
-def lower_dict_getitem(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer(), lir.IntType(64)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_getitem")
-    return builder.call(fn, args)
+    val_typ = sig.return_type
+    ptr, val_ptr = _alloca_dict_val(context, builder, val_typ)
+    found = _call_dict_lookup(context, builder, "dict_getitem", sig.args[0],
+                                        sig.args[1], args[0], args[1], val_ptr)
+    res = builder.select(found, _load_dict_val(context, builder, val_typ, ptr),
+                                                                        args[2])
+    _incref(context, builder, val_typ, res)
+    return res
 
-@lower_builtin("dict.pop", DictType, types.intp)
+@lower_builtin("dict.pop", DictType, types.Any)
 def lower_dict_pop(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer(), lir.IntType(64)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_pop")
-    return builder.call(fn, args)
-
-@lower_builtin("dict.keys", dict_int_int_type)
-def lower_dict_keys(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(8).as_pointer(), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_keys")
+    # reference held by the table is transferred to the caller
+    val_typ = sig.return_type
+    ptr, val_ptr = _alloca_dict_val(context, builder, val_typ)
+    found = _call_dict_lookup(context, builder, "dict_pop", sig.args[0],
+                                        sig.args[1], args[0], args[1], val_ptr)
+    _raise_key_error(context, builder, found)
+    return _load_dict_val(context, builder, val_typ, ptr)
+
+@lower_builtin("in", types.Any, DictType)
+def lower_dict_in(context, builder, sig, args):
+    key_ptr, key_len = pack_dict_key(context, builder, sig.args[0], args[0])
+    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer(),
+                                lir.IntType(8).as_pointer(), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_contains")
+    return builder.call(fn, [args[1], key_ptr, key_len])
+
+@lower_builtin(len, DictType)
+def lower_dict_len(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_len")
     return builder.call(fn, args)
 
-@lower_builtin(min, dict_key_iterator_int_int_type)
-def lower_dict_min(context, builder, sig, args):
+@lower_builtin("print_item", DictType)
+def print_dict(context, builder, sig, args):
+    dict_typ = sig.args[0]
+    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer(),
+                                                            lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_print")
+    val_enum = context.get_constant(types.int32,
+                                            _h5_typ_table[dict_typ.val_typ])
+    return builder.call(fn, [args[0], val_enum])
+
+@lower_builtin("dict.keys", DictType)
+@lower_builtin("dict.values", DictType)
+@lower_builtin("dict.items", DictType)
+def lower_dict_view(context, builder, sig, args):
+    return args[0]
+
+@lower_builtin('getiter', DictType)
+@lower_builtin('getiter', DictViewType)
+def getiter_dict(context, builder, sig, args):
+    iter_typ = sig.return_type
+    it = cgutils.create_struct_proxy(iter_typ)(context, builder)
     fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_min")
-    return builder.call(fn, args)
+    fn = builder.module.get_or_insert_function(fnty, name="dict_iter_begin")
+    it.dict_ptr = args[0]
+    it.pos = cgutils.alloca_once_value(builder, builder.call(fn, args))
+    return it._getvalue()
+
+@lower_builtin('iternext', DictIteratorType)
+@iternext_impl
+def iternext_dict(context, builder, sig, args, result):
+    iter_typ = sig.args[0]
+    dict_typ = iter_typ.dict_typ
+    it = cgutils.create_struct_proxy(iter_typ)(context, builder, value=args[0])
+    key_ptr = cgutils.alloca_once(builder, lir.IntType(8).as_pointer())
+    key_len = cgutils.alloca_once(builder, lir.IntType(64))
+    ptr, val_ptr = _alloca_dict_val(context, builder, dict_typ.val_typ)
+    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer(),
+            lir.IntType(64).as_pointer(), key_ptr.type, key_len.type,
+            lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_iter_next")
+    is_valid = builder.call(fn, [it.dict_ptr, it.pos, key_ptr, key_len, val_ptr])
+    result.set_valid(is_valid)
+
+    with builder.if_then(is_valid):
+        if iter_typ.kind in ('keys', 'items'):
+            key = load_dict_key(context, builder, dict_typ.key_typ,
+                            builder.load(key_ptr), builder.load(key_len))
+        if iter_typ.kind in ('values', 'items'):
+            val = _load_dict_val(context, builder, dict_typ.val_typ, ptr)
+            _incref(context, builder, dict_typ.val_typ, val)
+        if iter_typ.kind == 'keys':
+            result.yield_(key)
+        elif iter_typ.kind == 'values':
+            result.yield_(val)
+        else:
+            result.yield_(context.make_tuple(builder, iter_typ.yield_type,
+                                                                [key, val]))
+
+def _lower_dict_min_max(context, builder, sig, args, name):
+    key_typ = sig.return_type
+    key_len = cgutils.alloca_once(builder, lir.IntType(64))
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                            [lir.IntType(8).as_pointer(), key_len.type])
+    fn = builder.module.get_or_insert_function(fnty, name=name)
+    key_ptr = builder.call(fn, [args[0], key_len])
+    with cgutils.if_unlikely(builder, cgutils.is_null(builder, key_ptr)):
+        context.call_conv.return_user_exc(builder, ValueError,
+                                    ("min/max of empty dictionary",))
+    return load_dict_key(context, builder, key_typ, key_ptr,
+                                                        builder.load(key_len))
+
+@lower_builtin(min, DictViewType)
+def lower_dict_min(context, builder, sig, args):
+    return _lower_dict_min_max(context, builder, sig, args, "dict_key_min")
 
-@lower_builtin(max, dict_key_iterator_int_int_type)
+@lower_builtin(max, DictViewType)
 def lower_dict_max(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_max")
-    return builder.call(fn, args)
+    return _lower_dict_min_max(context, builder, sig, args, "dict_key_max")
 
-@lower_cast(dict_int_int_type, types.boolean)
+@lower_cast(DictType, types.boolean)
 def dict_empty(context, builder, fromty, toty, val):
-    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int_int_not_empty")
-    return builder.call(fn, (val,))
-
-
-# ------ int32 versions ------
-@lower_builtin(DictInt32Int32)
-def impl_dict_int_int(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(8).as_pointer(), [])
-    fn = builder.module.get_or_insert_function(fnty, name="init_dict_int32_int32")
-    return builder.call(fn, [])
-
-@lower_builtin('setitem', DictType, types.int32, types.int32)
-def setitem_dict(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer(), lir.IntType(32), lir.IntType(32)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_setitem")
-    return builder.call(fn, args)
-
-@lower_builtin("print_item", dict_int32_int32_type)
-def print_dict(context, builder, sig, args):
-    # pyapi = context.get_python_api(builder)
-    # strobj = pyapi.unserialize(pyapi.serialize_object("hello!"))
-    # pyapi.print_object(strobj)
-    # pyapi.decref(strobj)
-    # return context.get_dummy_value()
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dict_len")
+    return builder.icmp_signed('!=', builder.call(fn, (val,)),
+                                        context.get_constant(types.int64, 0))
+
+
+# ------ distributed dictionary ------
+
+def impl_init_dist_dict(context, builder, sig, args):
+    dict_typ = sig.return_type
+    key_enum = _get_dict_key_enum(dict_typ.key_typ)
+    key_size = 0
+    if key_enum != _dict_key_str:
+        key_size = get_key_size(context, dict_typ.key_typ)
+    val_size = context.get_abi_sizeof(context.get_data_type(dict_typ.val_typ))
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                    [lir.IntType(64), lir.IntType(64), lir.IntType(32),
+                    lir.IntType(32), lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="init_dist_dict")
+    return builder.call(fn, [context.get_constant(types.int64, key_size),
+        context.get_constant(types.int64, val_size),
+        context.get_constant(types.int32, key_enum),
+        context.get_constant(types.int32, _h5_typ_table[dict_typ.val_typ]),
+        context.get_constant(types.int32,
+                                _dist_dict_combine_table[dict_typ.combine])])
+
+@lower_builtin('setitem', DistDictType, types.Any, types.Any)
+def setitem_dist_dict(context, builder, sig, args):
+    dict_typ, key_typ, val_typ = sig.args
+    d, key, val = args
+    key_ptr, key_len = pack_dict_key(context, builder, key_typ, key)
+    _, val_ptr = _alloca_dict_val(context, builder, val_typ, val)
+    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer(),
+            lir.IntType(8).as_pointer(), lir.IntType(64),
+            lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dist_dict_setitem")
+    builder.call(fn, [d, key_ptr, key_len, val_ptr])
+    return context.get_dummy_value()
+
+@lower_builtin("distdict.flush", DistDictType)
+def lower_dist_dict_flush(context, builder, sig, args):
     fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_print")
-    return builder.call(fn, args)
-
-@lower_builtin("dict.get", DictType, types.int32, types.int32)
-def lower_dict_get(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer(), lir.IntType(32), lir.IntType(32)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_get")
-    return builder.call(fn, args)
-
-@lower_builtin("getitem", DictType, types.int32)
-def lower_dict_getitem(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer(), lir.IntType(32)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_getitem")
+    fn = builder.module.get_or_insert_function(fnty, name="dist_dict_flush")
+    builder.call(fn, args)
+    return context.get_dummy_value()
+
+@lower_builtin("distdict.local", DistDictType)
+def lower_dist_dict_local(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                                                [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dist_dict_local")
     return builder.call(fn, args)
 
-@lower_builtin("dict.pop", DictType, types.int32)
-def lower_dict_pop(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer(), lir.IntType(32)])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_pop")
-    return builder.call(fn, args)
-
-@lower_builtin("dict.keys", dict_int32_int32_type)
-def lower_dict_keys(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(8).as_pointer(), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_keys")
-    return builder.call(fn, args)
-
-@lower_builtin(min, dict_key_iterator_int32_int32_type)
-def lower_dict_min(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_min")
-    return builder.call(fn, args)
-
-@lower_builtin(max, dict_key_iterator_int32_int32_type)
-def lower_dict_max(context, builder, sig, args):
-    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_max")
+@lower_builtin(len, DistDictType)
+def lower_dist_dict_len(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dist_dict_len")
     return builder.call(fn, args)
 
-@lower_cast(dict_int32_int32_type, types.boolean)
-def dict_empty(context, builder, fromty, toty, val):
-    fnty = lir.FunctionType(lir.IntType(1), [lir.IntType(8).as_pointer()])
-    fn = builder.module.get_or_insert_function(fnty, name="dict_int32_int32_not_empty")
-    return builder.call(fn, (val,))
+@lower_builtin("distdict.get_many", DistDictType, types.Array, types.Any)
+def lower_dist_dict_get_many(context, builder, sig, args):
+    out_typ = sig.return_type
+    keys = make_array(sig.args[1])(context, builder, args[1])
+    np_dtype = as_dtype(out_typ.dtype)
+    out_arr = context.compile_internal(builder,
+                            lambda n: np.empty(n, np_dtype),
+                            signature(out_typ, types.intp), [keys.nitems])
+    out = make_array(out_typ)(context, builder, out_arr)
+    _, default_ptr = _alloca_dict_val(context, builder, sig.args[2], args[2])
+    fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(8).as_pointer(),
+            lir.IntType(8).as_pointer(), lir.IntType(64),
+            lir.IntType(8).as_pointer(), lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="dist_dict_get_many")
+    builder.call(fn, [args[0],
+                builder.bitcast(keys.data, lir.IntType(8).as_pointer()),
+                keys.nitems, default_ptr,
+                builder.bitcast(out.data, lir.IntType(8).as_pointer())])
+    return out_arr
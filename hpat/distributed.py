@@ -2,6 +2,7 @@ from __future__ import print_function, division, absolute_import
 
 import types as pytypes  # avoid confusion with numba.types
 import copy
+from collections import OrderedDict
 import numba
 from numba import (ir, types, typing, config, numpy_support,
                     ir_utils, postproc)
@@ -15,13 +16,15 @@ from numba.typing import signature
 from numba.parfor import (get_parfor_reductions, get_parfor_params,
                             wrap_parfor_blocks, unwrap_parfor_blocks)
 from numba.parfor import Parfor, lower_parfor_sequential
+from numba.analysis import (compute_cfg_from_blocks, compute_use_defs,
+                            compute_live_map, ir_extension_usedefs)
 import numpy as np
 
 import hpat
 from hpat import (distributed_api,
                   distributed_lower)  # import lower for module initialization
 from hpat.str_ext import string_type
-from hpat.str_arr_ext import string_array_type
+from hpat.str_arr_ext import StringArrayType
 from hpat.distributed_analysis import (Distribution,
                                        DistributedAnalysis,
                                        get_stencil_accesses)
@@ -34,14 +37,61 @@ distributed_run_extensions = {}
 # analysis data for debugging
 dist_analysis = None
 fir_text = None
+# REP reports of compiled functions
+distribution_reports = {}
+# distributed_api calls that communicate, instrumented by comm_stats option
+_comm_funcs = {distributed_api.dist_reduce, distributed_api.dist_arr_reduce,
+    distributed_api.dist_arr_reduce_start, distributed_api.dist_arr_reduce_wait,
+    distributed_api.dist_cumsum, distributed_api.dist_cumprod,
+    distributed_api.dist_exscan, distributed_api.dist_exscan_prod,
+    distributed_api.dist_matmul, distributed_api.irecv, distributed_api.isend,
+    distributed_api.wait, distributed_api.barrier, distributed_api.dist_time,
+    distributed_api.alltoallv_string_array,
+    distributed_api.shuffle_string_array, distributed_api.dist_sched_start,
+    distributed_api.dist_sched_next, distributed_api.dist_sched_finish,
+    distributed_api.dist_qr, distributed_api.dist_lstsq}
+# Numpy calls that do not change their array arguments
+_readonly_np_calls = {'empty_like', 'zeros_like', 'ones_like', 'full_like',
+    'copy', 'sum', 'prod', 'mean', 'std', 'var', 'min', 'max', 'dot'}
+
+def get_distribution_report(py_func):
+    """report of why arrays of last compilation of py_func are REP"""
+    if py_func not in distribution_reports:
+        return "{} is not compiled yet".format(py_func.__name__)
+    return distribution_reports[py_func]
+
+
+class _HaloBatch(object):
+    """halo exchange shared by a group of stencil parfors, with halo widths
+    and received halo buffers of arrays on each side
+    """
+    def __init__(self, first_parfor):
+        self.first_parfor = first_parfor
+        self.left_lens = OrderedDict()
+        self.right_lens = OrderedDict()
+        self.left_buffs = {}
+        self.right_buffs = {}
+
+
+class _StreamRead(object):
+    """file read of an array consumed in batches by a single parfor"""
+    def __init__(self, arr, parfor, is_h5):
+        self.arr = arr
+        self.parfor = parfor
+        self.is_h5 = is_h5
+        self.stream_var = None  # stream id returned by start call
+        self.start_var = None  # first row of array on this processor
+        self.batch_start_var = None  # first row of current batch
+
 
 class DistributedPass(object):
     """analyze program and transfrom to distributed"""
-    def __init__(self, func_ir, typingctx, typemap, calltypes):
+    def __init__(self, func_ir, typingctx, typemap, calltypes, options=None):
         self.func_ir = func_ir
         self.typingctx = typingctx
         self.typemap = typemap
         self.calltypes = calltypes
+        self.options = options if options is not None else {}
 
         self._call_table,_ = get_call_table(func_ir.blocks)
         self._tuple_table = get_tuple_table(func_ir.blocks)
@@ -51,6 +101,11 @@ class DistributedPass(object):
 
         self._rank_var = None # will be set in run
         self._size_var = None
+        # 2D processor grid dimensions and location of this processor
+        self._grid_rows_var = None
+        self._grid_cols_var = None
+        self._grid_row_rank_var = None
+        self._grid_col_rank_var = None
         self._g_dist_var = None
         self._set1_var = None # variable set to 1
         self._set0_var = None # variable set to 0
@@ -61,23 +116,62 @@ class DistributedPass(object):
         self._shape_attrs = {}
         # keep array sizes of parallel arrays to handle shape attrs
         self._array_sizes = {}
-        self._stencil_left_border = {}
-        self._stencil_right_border = {}
+        # stencil border blocks to run after their halos are received,
+        # id of statement to run after -> list of (border block, is_left)
+        self._stencil_borders = {}
+        # halo exchanges shared by stencil parfors, parfor id -> _HaloBatch
+        self._halo_batches = {}
+        # waits of nonblocking array reductions, id of wait -> array name
+        self._arr_reduce_waits = {}
+        # cumsum/cumprod calls that can reuse their input array for output
+        self._inplace_scans = set()
+        # dynamically scheduled parfors, id of parfor -> (schedule id var,
+        # number of iterations var)
+        self._dynamic_parfors = {}
+        # True while processing the body of a parfor
+        self._in_parfor_body = False
+        # streamed file reads, id of read statement -> array name
+        self._stream_reads = {}
+        # parfors consuming streamed arrays, id of parfor -> _StreamRead
+        self._stream_parfors = {}
+        # number of top-level statements using each variable
+        self._arr_uses = {}
+        # arrays accumulated into by parfors (taken from analysis)
+        self._parfor_accums = {}
+        # output tuples of distributed QR (and their unpacked iterators) ->
+        # input matrix
+        self._qr_tuples = {}
 
     def run(self):
         remove_dels(self.func_ir.blocks)
         dprint_func_ir(self.func_ir, "starting distributed pass")
         dist_analysis_pass = DistributedAnalysis(self.func_ir, self.typemap,
-                                                                self.calltypes)
+                    self.calltypes,
+                    self.options.get('distributed_2d_vars', ()))
         self._dist_analysis = dist_analysis_pass.run()
         self._T_arrs = dist_analysis_pass._T_arrs
         self._parallel_accesses = dist_analysis_pass._parallel_accesses
+        self._parfor_accums = dist_analysis_pass._parfor_accums
         if config.DEBUG_ARRAY_OPT==1:
             print("distributions: ", self._dist_analysis)
-
+        distribution_reports[self.func_ir.func_id.func] = \
+            dist_analysis_pass.get_rep_report(self._dist_analysis.array_dists)
+        if self.options.get('error_on_rep_input', False):
+            self._check_rep_inputs(dist_analysis_pass)
+
+        self._inplace_scans = self._find_inplace_scans(self.func_ir.blocks)
+        if self.options.get('stream_batch_size', 0):
+            self._arr_uses = self._count_var_uses(self.func_ir.blocks)
         self._gen_dist_inits()
         self.func_ir.blocks = self._run_dist_pass(self.func_ir.blocks)
         self.func_ir.blocks = self._dist_prints(self.func_ir.blocks)
+        self._sink_arr_reduce_waits(self.func_ir.blocks)
+        if self.options.get('trace', False):
+            distributed_api.enable_trace()
+            self._gen_trace(self.func_ir.blocks)
+        if self.options.get('comm_stats', False):
+            distributed_api.enable_comm_stats()
+            self._gen_comm_locs(self.func_ir.blocks)
         remove_dead(self.func_ir.blocks, self.func_ir.arg_names, self.typemap)
         dprint_func_ir(self.func_ir, "after distributed pass")
         lower_parfor_sequential(self.typingctx, self.func_ir, self.typemap, self.calltypes)
@@ -93,12 +187,29 @@ class DistributedPass(object):
         fir_text = str_io.getvalue()
         str_io.close()
 
+    def _check_rep_inputs(self, dist_analysis_pass):
+        """raise error if an array read from file is replicated"""
+        array_dists = self._dist_analysis.array_dists
+        rep_inputs = [a for a in sorted(dist_analysis_pass._input_arrs)
+                                    if array_dists[a]==Distribution.REP]
+        if rep_inputs:
+            msg = "input arrays {} are replicated on all processors:\n".format(
+                                                        ', '.join(rep_inputs))
+            for arr in rep_inputs:
+                for varname, cause in dist_analysis_pass.get_rep_chain(arr):
+                    msg += "    {}: {} ({})\n".format(varname, cause.reason,
+                                                                    cause.loc)
+            raise ValueError(msg)
+
     def _run_dist_pass(self, blocks):
         topo_order = find_topo_order(blocks)
         namevar_table = get_name_var_table(blocks)
+        arr_aliases = self._get_array_alias_sets(blocks)
         #
         for label in topo_order:
             new_body = []
+            self._plan_stencil_halos(blocks[label].body, arr_aliases)
+            self._plan_stream_reads(blocks[label].body)
             for inst in blocks[label].body:
                 if type(inst) in distributed_run_extensions:
                     f = distributed_run_extensions[type(inst)]
@@ -108,7 +219,10 @@ class DistributedPass(object):
                     new_body += self._run_parfor(inst, namevar_table)
                     # run dist pass recursively
                     p_blocks = wrap_parfor_blocks(inst)
+                    in_parfor_body = self._in_parfor_body
+                    self._in_parfor_body = True
                     self._run_dist_pass(p_blocks)
+                    self._in_parfor_body = in_parfor_body
                     unwrap_parfor_blocks(inst)
                     continue
                 if isinstance(inst, ir.Assign):
@@ -123,34 +237,47 @@ class DistributedPass(object):
                                 rhs.index, rhs, inst)
                             continue
                         if (rhs.op=='getattr'
-                                and self._is_1D_arr(rhs.value.name)
+                                and self._is_dist_arr(rhs.value.name)
                                 and rhs.attr=='shape'):
                             self._shape_attrs[lhs] = rhs.value.name
                         if (rhs.op=='getattr'
-                                and self._is_1D_arr(rhs.value.name)
+                                and self._is_dist_arr(rhs.value.name)
                                 and rhs.attr=='T'):
                             assert lhs in self._T_arrs
                             orig_arr = rhs.value.name
-                            self._array_starts[lhs] = copy.copy(
-                                self._array_starts[orig_arr]).reverse()
-                            self._array_counts[lhs] = copy.copy(
-                                self._array_counts[orig_arr]).reverse()
-                            self._array_sizes[lhs] = copy.copy(
-                                self._array_sizes[orig_arr]).reverse()
+                            self._array_starts[lhs] = list(reversed(
+                                self._array_starts[orig_arr]))
+                            self._array_counts[lhs] = list(reversed(
+                                self._array_counts[orig_arr]))
+                            self._array_sizes[lhs] = list(reversed(
+                                self._array_sizes[orig_arr]))
                         if (rhs.op=='exhaust_iter'
                                 and rhs.value.name in self._shape_attrs):
                             self._shape_attrs[lhs] = self._shape_attrs[rhs.value.name]
+                        if (rhs.op in ('exhaust_iter', 'static_getitem')
+                                and rhs.value.name in self._qr_tuples):
+                            arr = self._qr_tuples[rhs.value.name]
+                            if rhs.op=='exhaust_iter':
+                                self._qr_tuples[lhs] = arr
+                            elif rhs.index==0:
+                                # Q has the same rows as the input matrix
+                                self._array_starts[lhs] = self._array_starts[arr]
+                                self._array_counts[lhs] = self._array_counts[arr]
+                                self._array_sizes[lhs] = self._array_sizes[arr]
                         if (rhs.op=='static_getitem'
                                 and rhs.value.name in self._shape_attrs):
                             arr = self._shape_attrs[rhs.value.name]
                             ndims = self.typemap[arr].ndim
                             sizes = self._array_sizes[arr]
-                            if arr not in self._T_arrs and rhs.index==0:
+                            # both dimensions of 2D arrays are partitioned
+                            if self._is_2D_arr(arr):
+                                inst.value = sizes[rhs.index]
+                            elif arr not in self._T_arrs and rhs.index==0:
                                 inst.value = sizes[rhs.index]
                             # last dimension of transposed arrays is partitioned
-                            if arr in self._T_arrs and rhs.index==ndims-1:
+                            elif arr in self._T_arrs and rhs.index==ndims-1:
                                 inst.value = sizes[rhs.index]
-                    if isinstance(rhs, ir.Var) and self._is_1D_arr(rhs.name):
+                    if isinstance(rhs, ir.Var) and self._is_dist_arr(rhs.name):
                         self._array_starts[lhs] = self._array_starts[rhs.name]
                         self._array_counts[lhs] = self._array_counts[rhs.name]
                         self._array_sizes[lhs] = self._array_sizes[rhs.name]
@@ -167,58 +294,194 @@ class DistributedPass(object):
                 new_body.append(inst)
             blocks[label].body = new_body
 
-        if self._stencil_left_border:
-            blocks = self._add_stencil_border(blocks, self._stencil_left_border, is_left=True)
-
-        if self._stencil_right_border:
-            blocks = self._add_stencil_border(blocks, self._stencil_right_border, is_left=False)
+        if self._stencil_borders:
+            blocks = self._add_stencil_borders(blocks)
+        if self._dynamic_parfors and not self._in_parfor_body:
+            blocks = self._add_dynamic_loops(blocks)
+        if self._stream_parfors and not self._in_parfor_body:
+            blocks = self._add_stream_loops(blocks)
 
         return blocks
 
-    def _add_stencil_border(self, blocks, border_dict, is_left):
+    def _gen_comm_locs(self, blocks):
+        """set source location id before each communication call to collect
+        communication statistics per location
+        """
+        for block in blocks.values():
+            new_body = []
+            for inst in block.body:
+                if isinstance(inst, Parfor):
+                    p_blocks = wrap_parfor_blocks(inst)
+                    self._gen_comm_locs(p_blocks)
+                    unwrap_parfor_blocks(inst)
+                if (isinstance(inst, ir.Assign)
+                        and isinstance(inst.value, ir.Expr)
+                        and inst.value.op=='call'
+                        and self._is_comm_call(inst.value.func.name)):
+                    new_body += self._gen_set_comm_loc(inst.target.scope,
+                                                                    inst.loc)
+                new_body.append(inst)
+            block.body = new_body
+        return
+
+    def _is_comm_call(self, func_var):
+        return self._get_global_func(func_var) in _comm_funcs
+
+    def _get_global_func(self, func_var):
+        """Python function of a global function variable, or None"""
+        fnty = self.typemap.get(func_var, None)
+        if not isinstance(fnty, types.Function):
+            return None
+        return getattr(fnty.templates[0], 'key', None)
+
+    def _get_loc_str(self, loc):
+        return "{} ({}:{})".format(self.func_ir.func_id.func_qualname,
+                                                        loc.filename, loc.line)
+
+    def _gen_set_comm_loc(self, scope, loc):
+        loc_id = distributed_api.get_comm_loc_id(self._get_loc_str(loc))
+        out = []
+        id_var = ir.Var(scope, mk_unique_var("$comm_loc_id"), loc)
+        self.typemap[id_var.name] = types.int32
+        out.append(ir.Assign(ir.Const(loc_id, loc), id_var, loc))
+        attr_var = ir.Var(scope, mk_unique_var("$comm_loc_attr"), loc)
+        self.typemap[attr_var.name] = get_global_func_typ(
+                                                distributed_api.set_comm_loc)
+        attr_call = ir.Expr.getattr(self._g_dist_var, "set_comm_loc", loc)
+        out.append(ir.Assign(attr_call, attr_var, loc))
+        err_var = ir.Var(scope, mk_unique_var("$comm_loc_err"), loc)
+        self.typemap[err_var.name] = types.int32
+        loc_call = ir.Expr.call(attr_var, [id_var], (), loc)
+        self.calltypes[loc_call] = self.typemap[attr_var.name].get_call_type(
+            self.typingctx, [types.int32], {})
+        out.append(ir.Assign(loc_call, err_var, loc))
+        return out
+
+    def _gen_trace(self, blocks):
+        """record start and end times of distributed parfors, I/O calls and
+        communication calls for the trace timeline
+        """
+        io_funcs = set()
+        if hpat.config._has_h5py:
+            io_funcs |= {hpat.pio_api.h5read, hpat.pio_api.h5write}
+        if hpat.config._has_pyarrow:
+            io_funcs |= {hpat.parquet_pio.read_parquet,
+                hpat.parquet_pio.read_parquet_parallel,
+                hpat.parquet_pio.read_parquet_str,
+                hpat.parquet_pio.read_parquet_str_parallel,
+                hpat.parquet_pio.read_parquet_str_large,
+                hpat.parquet_pio.read_parquet_str_parallel_large}
+
+        for block in blocks.values():
+            new_body = []
+            for inst in block.body:
+                event = None
+                if (isinstance(inst, Parfor) and self._dist_analysis.parfor_dists.get(
+                        inst.id, Distribution.REP)!=Distribution.REP):
+                    event = ("parfor {}".format(inst.id), "parfor")
+                if (isinstance(inst, ir.Assign)
+                        and isinstance(inst.value, ir.Expr)
+                        and inst.value.op=='call'):
+                    func = self._get_global_func(inst.value.func.name)
+                    if func in _comm_funcs:
+                        event = (func.__name__, "comm")
+                    if func in io_funcs:
+                        event = (func.__name__, "io")
+                if event is None:
+                    new_body.append(inst)
+                    continue
+                event_id = distributed_api.get_trace_event_id(event[0],
+                                            event[1], self._get_loc_str(inst.loc))
+                start_var = ir.Var(block.scope, mk_unique_var("$trace_start"),
+                                                                    inst.loc)
+                new_body += self._gen_trace_start(start_var)
+                new_body.append(inst)
+                new_body += self._gen_trace_end(event_id, start_var)
+            block.body = new_body
+        return
+
+    def _gen_trace_start(self, start_var):
+        scope = start_var.scope
+        loc = start_var.loc
+        out = []
+        # start_var = time.time()
+        time_func_var = ir.Var(scope, mk_unique_var("$trace_time_func"), loc)
+        self.typemap[time_func_var.name] = get_global_func_typ(time.time)
+        out.append(ir.Assign(ir.Global('time', time.time, loc),
+                                                        time_func_var, loc))
+        self.typemap[start_var.name] = types.float64
+        time_call = ir.Expr.call(time_func_var, [], (), loc)
+        self.calltypes[time_call] = self.typemap[time_func_var.name].get_call_type(
+            self.typingctx, [], {})
+        out.append(ir.Assign(time_call, start_var, loc))
+        return out
+
+    def _gen_trace_end(self, event_id, start_var):
+        scope = start_var.scope
+        loc = start_var.loc
+        out = []
+        id_var = ir.Var(scope, mk_unique_var("$trace_event_id"), loc)
+        self.typemap[id_var.name] = types.int32
+        out.append(ir.Assign(ir.Const(event_id, loc), id_var, loc))
+        attr_var = ir.Var(scope, mk_unique_var("$trace_event_attr"), loc)
+        self.typemap[attr_var.name] = get_global_func_typ(
+                                                distributed_api.trace_event)
+        attr_call = ir.Expr.getattr(self._g_dist_var, "trace_event", loc)
+        out.append(ir.Assign(attr_call, attr_var, loc))
+        err_var = ir.Var(scope, mk_unique_var("$trace_event_err"), loc)
+        self.typemap[err_var.name] = types.int32
+        trace_call = ir.Expr.call(attr_var, [id_var, start_var], (), loc)
+        self.calltypes[trace_call] = self.typemap[attr_var.name].get_call_type(
+            self.typingctx, [types.int32, types.float64], {})
+        out.append(ir.Assign(trace_call, err_var, loc))
+        return out
+
+    def _add_stencil_borders(self, blocks):
+        """split blocks after statements that complete the halos of stencils
+        and run the border blocks of the stencils there, on processors that
+        have a neighbor on the border's side
+        """
         new_blocks = {}
         for (block_label, block) in blocks.items():
             scope = block.scope
-            for i, stmt in enumerate(block.body):
-                if not isinstance(stmt, Parfor) or stmt.id not in border_dict:
+            curr_body = []
+            for stmt in block.body:
+                curr_body.append(stmt)
+                if id(stmt) not in self._stencil_borders:
                     continue
-                # find last wait call
-                for j in reversed(range(i+1, len(block.body))):
-                    inst = block.body[j]
-                    if isinstance(inst, ir.Assign) and inst.target.name.startswith('wait_err'):
-                        break
-                border_block = border_dict.pop(stmt.id)
                 loc = stmt.loc
-                # split block after parfor wait
-                prev_block = ir.Block(scope, loc)
-                new_blocks[block_label] = prev_block
-                block_label = ir_utils.next_label()
-                border_label = ir_utils.next_label()
-
-                prev_block.body = block.body[:j+1]
-                rank_comp_var = ir.Var(scope, mk_unique_var("$rank_comp"), loc)
-                self.typemap[rank_comp_var.name] = types.boolean
-                if is_left:
-                    border_rank = self._set0_var
-                else:
-                    border_rank =  ir.Var(scope, mk_unique_var("$border_rank"), loc)
-                    self.typemap[border_rank.name] = types.intp
-                    last_pe_call = ir.Expr.binop('-', self._size_var, self._set1_var, loc)
-                    if last_pe_call not in self.calltypes:
-                        self.calltypes[last_pe_call] = find_op_typ('-', [types.int32, types.int64])
-                    prev_block.body.append(ir.Assign(last_pe_call, border_rank, loc))
-
-                comp_expr = ir.Expr.binop('!=', self._rank_var, border_rank, loc)
-                expr_typ = find_op_typ('!=', [types.int32, types.int64])
-                self.calltypes[comp_expr] = expr_typ
-                comp_assign = ir.Assign(comp_expr, rank_comp_var, loc)
-                prev_block.body.append(comp_assign)
-                border_branch = ir.Branch(rank_comp_var, border_label, block_label, loc)
-                prev_block.body.append(border_branch)
-
-                border_block.body.append(ir.Jump(block_label, loc))
-                new_blocks[border_label] = border_block
-                block.body = block.body[j+1:]
+                for border_block, is_left in self._stencil_borders.pop(id(stmt)):
+                    # split block after the statement
+                    prev_block = ir.Block(scope, loc)
+                    new_blocks[block_label] = prev_block
+                    block_label = ir_utils.next_label()
+                    border_label = ir_utils.next_label()
+
+                    prev_block.body = curr_body
+                    rank_comp_var = ir.Var(scope, mk_unique_var("$rank_comp"), loc)
+                    self.typemap[rank_comp_var.name] = types.boolean
+                    if is_left:
+                        border_rank = self._set0_var
+                    else:
+                        border_rank =  ir.Var(scope, mk_unique_var("$border_rank"), loc)
+                        self.typemap[border_rank.name] = types.intp
+                        last_pe_call = ir.Expr.binop('-', self._size_var, self._set1_var, loc)
+                        if last_pe_call not in self.calltypes:
+                            self.calltypes[last_pe_call] = find_op_typ('-', [types.int32, types.int64])
+                        prev_block.body.append(ir.Assign(last_pe_call, border_rank, loc))
+
+                    comp_expr = ir.Expr.binop('!=', self._rank_var, border_rank, loc)
+                    expr_typ = find_op_typ('!=', [types.int32, types.int64])
+                    self.calltypes[comp_expr] = expr_typ
+                    comp_assign = ir.Assign(comp_expr, rank_comp_var, loc)
+                    prev_block.body.append(comp_assign)
+                    border_branch = ir.Branch(rank_comp_var, border_label, block_label, loc)
+                    prev_block.body.append(border_branch)
+
+                    border_block.body.append(ir.Jump(block_label, loc))
+                    new_blocks[border_label] = border_block
+                    curr_body = []
+            block.body = curr_body
             new_blocks[block_label] = block
         return new_blocks
 
@@ -275,8 +538,35 @@ class DistributedPass(object):
         size_assign = ir.Assign(size_call, size_var, loc)
         self._size_var = size_var
         out += [size_attr_assign, size_assign]
+
+        # processor grid for 2D distributed arrays
+        if Distribution.TwoD in self._dist_analysis.array_dists.values():
+            self._grid_rows_var = self._gen_grid_var("get_grid_rows", out)
+            self._grid_cols_var = self._gen_grid_var("get_grid_cols", out)
+            self._grid_row_rank_var = self._gen_grid_var(
+                                                    "get_grid_row_rank", out)
+            self._grid_col_rank_var = self._gen_grid_var(
+                                                    "get_grid_col_rank", out)
         first_block.body = out+first_block.body
 
+    def _gen_grid_var(self, func_name, out):
+        scope = self._g_dist_var.scope
+        loc = self._g_dist_var.loc
+        # attr call: grid_attr = getattr(g_dist_var, func_name)
+        attr_call = ir.Expr.getattr(self._g_dist_var, func_name, loc)
+        attr_var = ir.Var(scope, mk_unique_var("$"+func_name+"_attr"), loc)
+        self.typemap[attr_var.name] = get_global_func_typ(
+                                        getattr(distributed_api, func_name))
+        out.append(ir.Assign(attr_call, attr_var, loc))
+        # grid_var = hpat.distributed_api.func_name()
+        grid_var = ir.Var(scope, mk_unique_var("$"+func_name[4:]), loc)
+        self.typemap[grid_var.name] = types.int32
+        grid_call = ir.Expr.call(attr_var, [], (), loc)
+        self.calltypes[grid_call] = self.typemap[attr_var.name].get_call_type(
+            self.typingctx, [], {})
+        out.append(ir.Assign(grid_call, grid_var, loc))
+        return grid_var
+
     def _run_call(self, assign, block_body):
         lhs = assign.target.name
         rhs = assign.value
@@ -289,10 +579,34 @@ class DistributedPass(object):
             return out
         call_list = self._call_table[func_var]
 
-        if self._is_call(func_var, [len]) and rhs.args and self._is_1D_arr(rhs.args[0].name):
+        if self._is_call(func_var, [len]) and rhs.args and self._is_dist_arr(rhs.args[0].name):
             arr = rhs.args[0].name
             assign.value = self._array_sizes[arr][0]
 
+        # divide 2D alloc into blocks of processor grid
+        if self._is_2D_arr(lhs) and self._is_alloc_call(func_var):
+            size_var = rhs.args[0]
+            assert size_var.name in self._tuple_table
+            size_list = self._tuple_table[size_var.name]
+            self._array_sizes[lhs] = size_list
+            out, row_start, row_count = self._gen_1D_div(size_list[0], scope,
+                loc, "$alloc", "get_node_portion",
+                distributed_api.get_node_portion, self._grid_rows_var,
+                self._grid_row_rank_var)
+            col_nodes, col_start, col_count = self._gen_1D_div(size_list[1],
+                scope, loc, "$alloc", "get_node_portion",
+                distributed_api.get_node_portion, self._grid_cols_var,
+                self._grid_col_rank_var)
+            out += col_nodes
+            tuple_var = ir.Var(scope, mk_unique_var("$tuple_var"), loc)
+            self.typemap[tuple_var.name] = self.typemap[size_var.name]
+            tuple_call = ir.Expr.build_tuple([row_count, col_count], loc)
+            out.append(ir.Assign(tuple_call, tuple_var, loc))
+            rhs.args[0] = tuple_var
+            self._array_starts[lhs] = [row_start, col_start]
+            self._array_counts[lhs] = [row_count, col_count]
+            out.append(assign)
+
         # divide 1D alloc
         if self._is_1D_arr(lhs) and self._is_alloc_call(func_var):
             size_var = rhs.args[0]
@@ -322,10 +636,12 @@ class DistributedPass(object):
                 self._array_starts[lhs] = [self._set0_var]*ndims
                 self._array_starts[lhs][0] = start_var
                 self._array_counts[lhs] = new_size_list
+            if lhs in self._stream_reads.values():
+                self._gen_stream_alloc(lhs, assign, out)
             out.append(assign)
 
         if (self._is_h5_read_write_call(func_var)
-                and self._is_1D_arr(rhs.args[6].name)):
+                and self._is_dist_arr(rhs.args[6].name)):
             arr = rhs.args[6].name
             ndims = len(self._array_starts[arr])
             starts_var = ir.Var(scope, mk_unique_var("$h5_starts"), loc)
@@ -343,6 +659,9 @@ class DistributedPass(object):
             # set parallel arg in file open
             file_varname = rhs.args[0].name
             self._file_open_set_parallel(file_varname)
+            if id(assign) in self._stream_reads:
+                out = [starts_assign, counts_assign]
+                out += self._gen_stream_start(arr, rhs.args, scope, loc)
 
         if (self._is_parquet_read_call(func_var)
                 and self._is_1D_arr(rhs.args[2].name)):
@@ -350,6 +669,9 @@ class DistributedPass(object):
             assert len(self._array_starts[arr]) == 1, "only 1D arrs in parquet"
             start_var = self._array_starts[arr][0]
             count_var = self._array_counts[arr][0]
+            if id(assign) in self._stream_reads:
+                return self._gen_stream_start(arr,
+                    [rhs.args[0], rhs.args[1], start_var, count_var], scope, loc)
             rhs.args += [start_var, count_var]
             def f(fname, cindex, arr, start, count):
                 return hpat.parquet_pio.read_parquet_parallel(fname, cindex,
@@ -376,6 +698,10 @@ class DistributedPass(object):
             def f(fname, cindex, start, count):
                 return hpat.parquet_pio.read_parquet_str_parallel(fname, cindex,
                                                             start, count)
+            if self.typemap[lhs].is_large:
+                def f(fname, cindex, start, count):
+                    return hpat.parquet_pio.read_parquet_str_parallel_large(
+                                                    fname, cindex, start, count)
 
             f_block = compile_to_numba_ir(f, {'hpat': hpat}, self.typingctx,
             (string_type, types.intp, types.intp, types.intp),
@@ -384,6 +710,14 @@ class DistributedPass(object):
             out += f_block.body[:-2]
             out[-1].target = assign.target
 
+        # string array allocated from lengths array has same properties
+        if (self._is_call(func_var, ['alloc_str_arr_from_lens', 'str_arr_ext',
+                hpat]) and not self._is_REP(rhs.args[0].name)):
+            in_arr = rhs.args[0].name
+            self._array_starts[lhs] = self._array_starts[in_arr]
+            self._array_counts[lhs] = self._array_counts[in_arr]
+            self._array_sizes[lhs] = self._array_sizes[in_arr]
+
         # output array has same properties (starts etc.) as input array
         if (len(call_list)==2 and call_list[1]==np
                 and call_list[0] in ['cumsum', 'cumprod', 'empty_like',
@@ -400,11 +734,14 @@ class DistributedPass(object):
             in_arr = rhs.args[0].name
             in_arr_var = rhs.args[0]
             lhs_var = assign.target
-            # allocate output array
-            # TODO: compute inplace if input array is dead
-            out = mk_alloc(self.typemap, self.calltypes, lhs_var,
-                            tuple(self._array_sizes[in_arr]),
-                            self.typemap[in_arr].dtype, scope, loc)
+            if assign in self._inplace_scans:
+                # input array is dead, compute inplace: lhs = in_arr
+                out = [ir.Assign(in_arr_var, lhs_var, loc)]
+            else:
+                # allocate output array
+                out = mk_alloc(self.typemap, self.calltypes, lhs_var,
+                                tuple(self._array_sizes[in_arr]),
+                                self.typemap[lhs].dtype, scope, loc)
             # generate distributed call
             dist_attr_var = ir.Var(scope, mk_unique_var("$dist_attr"), loc)
             dist_func_name = "dist_"+call_list[0]
@@ -420,6 +757,42 @@ class DistributedPass(object):
             dist_assign = ir.Assign(dist_call, err_var, loc)
             return out+[dist_func_assign, dist_assign]
 
+        if (self._is_linalg_call(func_var, 'qr') and len(rhs.args)==1
+                and self._is_1D_arr(rhs.args[0].name)):
+            # tall-skinny QR across processors
+            self._qr_tuples[lhs] = rhs.args[0].name
+            qr_attr_var = ir.Var(scope, mk_unique_var("$dist_qr_attr"), loc)
+            self.typemap[qr_attr_var.name] = get_global_func_typ(
+                                                        distributed_api.dist_qr)
+            qr_attr_assign = ir.Assign(ir.Expr.getattr(self._g_dist_var,
+                                            "dist_qr", loc), qr_attr_var, loc)
+            rhs.func = qr_attr_var
+            self.calltypes.pop(rhs)
+            self.calltypes[rhs] = self.typemap[qr_attr_var.name].get_call_type(
+                self.typingctx, [self.typemap[rhs.args[0].name]], {})
+            return [qr_attr_assign, assign]
+
+        if (self._is_linalg_call(func_var, 'lstsq')
+                and self._is_1D_arr(rhs.args[0].name)):
+            # least squares using tall-skinny QR across processors
+            rhs.args += [v for (k, v) in rhs.kws if k=='rcond']
+            rhs.kws = ()
+            lstsq_attr_var = ir.Var(scope, mk_unique_var("$dist_lstsq_attr"),
+                                                                        loc)
+            self.typemap[lstsq_attr_var.name] = get_global_func_typ(
+                                                    distributed_api.dist_lstsq)
+            lstsq_attr_assign = ir.Assign(ir.Expr.getattr(self._g_dist_var,
+                                    "dist_lstsq", loc), lstsq_attr_var, loc)
+            rhs.func = lstsq_attr_var
+            self.calltypes.pop(rhs)
+            self.calltypes[rhs] = self.typemap[lstsq_attr_var.name].get_call_type(
+                self.typingctx, [self.typemap[v.name] for v in rhs.args], {})
+            return [lstsq_attr_assign, assign]
+
+        if (self._is_call(func_var, ['dot', np])
+                and self._is_2D_arr(rhs.args[0].name)):
+            return self._run_dot_2D(assign)
+
         if self._is_call(func_var, ['dot', np]):
             arg0 = rhs.args[0].name
             arg1 = rhs.args[1].name
@@ -430,30 +803,27 @@ class DistributedPass(object):
             t1 = arg1 in self._T_arrs
 
             # reduction across dataset
-            if self._is_1D_arr(arg0) and self._is_1D_arr(arg1):
+            if (self._is_1D_arr(arg0) and self._is_1D_arr(arg1)
+                    and not (ndim0==1 and ndim1==1)):
+                dprint("run dot dist reduce:", arg0, arg1)
+                self._gen_arr_reduce(assign.target, out)
+
+            # output of vector dot() is scalar
+            if (self._is_1D_arr(arg0) and self._is_1D_arr(arg1)
+                    and ndim0==1 and ndim1==1):
                 dprint("run dot dist reduce:", arg0, arg1)
                 reduce_attr_var = ir.Var(scope, mk_unique_var("$reduce_attr"), loc)
-                reduce_func_name = "dist_arr_reduce"
-                reduce_func = distributed_api.dist_arr_reduce
-                # output of vector dot() is scalar
-                if ndim0==1 and ndim1==1:
-                    reduce_func_name = "dist_reduce"
-                    reduce_func = distributed_api.dist_reduce
-                reduce_attr_call = ir.Expr.getattr(self._g_dist_var, reduce_func_name, loc)
+                reduce_attr_call = ir.Expr.getattr(self._g_dist_var, "dist_reduce", loc)
                 self.typemap[reduce_attr_var.name] = get_global_func_typ(
-                                                                    reduce_func)
+                                                    distributed_api.dist_reduce)
                 reduce_assign = ir.Assign(reduce_attr_call, reduce_attr_var, loc)
                 out.append(reduce_assign)
-                err_var = ir.Var(scope, mk_unique_var("$reduce_err_var"), loc)
-                self.typemap[err_var.name] = types.int32
                 # scalar reduce is not updated inplace
-                if ndim0==1 and ndim1==1:
-                    err_var = assign.target
                 reduce_var = assign.target
                 reduce_call = ir.Expr.call(reduce_attr_var, [reduce_var], (), loc)
                 self.calltypes[reduce_call] = self.typemap[reduce_attr_var.name].get_call_type(
                     self.typingctx, [self.typemap[reduce_var.name]], {})
-                reduce_assign = ir.Assign(reduce_call, err_var, loc)
+                reduce_assign = ir.Assign(reduce_call, reduce_var, loc)
                 out.append(reduce_assign)
 
             # assign starts/counts/sizes data structures for output array
@@ -479,9 +849,151 @@ class DistributedPass(object):
 
         return out
 
+    def _run_dot_2D(self, assign):
+        """matrix multiply of 2D distributed arrays, output is 2D or REP"""
+        lhs = assign.target
+        rhs = assign.value
+        scope = lhs.scope
+        loc = lhs.loc
+        arg0 = rhs.args[0].name
+        arg1 = rhs.args[1].name
+        out = []
+        # global sizes (sizes of transposed arrays are reversed already)
+        m = self._get_size_var(self._array_sizes[arg0][0], out, scope, loc)
+        k = self._get_size_var(self._array_sizes[arg0][1], out, scope, loc)
+        n = self._get_size_var(self._array_sizes[arg1][1], out, scope, loc)
+        if self._is_2D_arr(lhs.name):
+            row_nodes, row_start, row_count = self._gen_1D_div(m, scope, loc,
+                "$alloc", "get_node_portion", distributed_api.get_node_portion,
+                self._grid_rows_var, self._grid_row_rank_var)
+            col_nodes, col_start, col_count = self._gen_1D_div(n, scope, loc,
+                "$alloc", "get_node_portion", distributed_api.get_node_portion,
+                self._grid_cols_var, self._grid_col_rank_var)
+            out += row_nodes + col_nodes
+            self._array_starts[lhs.name] = [row_start, col_start]
+            self._array_counts[lhs.name] = [row_count, col_count]
+            self._array_sizes[lhs.name] = [m, n]
+            alloc_sizes = (row_count, col_count)
+            rep_out = self._set0_var
+        else:
+            alloc_sizes = (m, n)
+            rep_out = self._set1_var
+        out += mk_alloc(self.typemap, self.calltypes, lhs, alloc_sizes,
+                                    self.typemap[lhs.name].dtype, scope, loc)
+
+        # err = dist_matmul(A, B, C, m, k, n, rep_out)
+        matmul_attr_var = ir.Var(scope, mk_unique_var("$matmul_attr"), loc)
+        matmul_attr_call = ir.Expr.getattr(self._g_dist_var, "dist_matmul", loc)
+        self.typemap[matmul_attr_var.name] = get_global_func_typ(
+                                                distributed_api.dist_matmul)
+        out.append(ir.Assign(matmul_attr_call, matmul_attr_var, loc))
+        call_args = [rhs.args[0], rhs.args[1], lhs, m, k, n, rep_out]
+        matmul_call = ir.Expr.call(matmul_attr_var, call_args, (), loc)
+        self.calltypes[matmul_call] = self.typemap[matmul_attr_var.name].get_call_type(
+            self.typingctx, [self.typemap[v.name] for v in call_args], {})
+        err_var = ir.Var(scope, mk_unique_var("$matmul_err_var"), loc)
+        self.typemap[err_var.name] = types.int32
+        out.append(ir.Assign(matmul_call, err_var, loc))
+        return out
+
+    def _get_size_var(self, size, out, scope, loc):
+        # sizes can be constants in tuples
+        if isinstance(size, ir.Var):
+            return size
+        size_var = ir.Var(scope, mk_unique_var("$size_var"), loc)
+        self.typemap[size_var.name] = types.intp
+        out.append(ir.Assign(ir.Const(size, loc), size_var, loc))
+        return size_var
+
+    def _find_inplace_scans(self, blocks):
+        """find distributed cumsum/cumprod calls with input arrays that are
+        not used afterwards (including aliases) using liveness analysis
+        """
+        cfg = compute_cfg_from_blocks(blocks)
+        usedefs = compute_use_defs(blocks)
+        live_map = compute_live_map(cfg, blocks, usedefs.usemap, usedefs.defmap)
+        alias_map, not_owned = self._find_array_aliases(blocks)
+        inplace_scans = set()
+        for label, block in blocks.items():
+            # variables live after current statement
+            lives = {v.name for v in block.terminator.list_vars()}
+            for out_blk, _data in cfg.successors(label):
+                lives |= live_map[out_blk]
+            for stmt in reversed(block.body):
+                if (isinstance(stmt, ir.Assign)
+                        and isinstance(stmt.value, ir.Expr)
+                        and stmt.value.op=='call'
+                        and self._is_scan_call(stmt.value.func.name)
+                        and self._is_1D_arr(stmt.value.args[0].name)):
+                    in_arr = stmt.value.args[0].name
+                    aliases = alias_map.get(in_arr, {in_arr})
+                    # output reuses the input buffer only if types match
+                    # (e.g. cumsum of int32 returns int64)
+                    same_type = (self.typemap[in_arr]
+                                            ==self.typemap[stmt.target.name])
+                    if (same_type and not (aliases & lives)
+                            and not (aliases & not_owned)):
+                        inplace_scans.add(stmt)
+                if type(stmt) in ir_extension_usedefs:
+                    uses, defs = ir_extension_usedefs[type(stmt)](stmt)
+                else:
+                    uses = {v.name for v in stmt.list_vars()}
+                    defs = set()
+                    if isinstance(stmt, ir.Assign):
+                        defs = {stmt.target.name}
+                        uses -= defs
+                lives = (lives - defs) | uses
+        return inplace_scans
+
+    def _find_array_aliases(self, blocks):
+        """find sets of variables that can refer to the same array data
+        (assignments, views, containers), and arrays not allocated in
+        this function (arguments, globals)
+        """
+        alias_map = {}
+        not_owned = set()
+        def add_alias(v1, v2):
+            new_set = alias_map.get(v1, {v1}) | alias_map.get(v2, {v2})
+            for v in new_set:
+                alias_map[v] = new_set
+        for block in blocks.values():
+            for stmt in block.body:
+                if isinstance(stmt, Parfor):
+                    # parfor bodies only read and write array elements
+                    continue
+                if not isinstance(stmt, ir.Assign):
+                    continue
+                lhs = stmt.target.name
+                rhs = stmt.value
+                if isinstance(rhs, (ir.Arg, ir.Global, ir.FreeVar, ir.Const)):
+                    not_owned.add(lhs)
+                    continue
+                if isinstance(rhs, ir.Var):
+                    add_alias(lhs, rhs.name)
+                    continue
+                # output of cumsum/cumprod is a new array
+                if (isinstance(rhs, ir.Expr) and rhs.op=='call'
+                        and self._is_scan_call(rhs.func.name)):
+                    continue
+                # any array or container computed from an array can be a view
+                if (isinstance(rhs, ir.Expr)
+                        and not isinstance(self.typemap[lhs],
+                                        (types.Number, types.Boolean))):
+                    for v in rhs.list_vars():
+                        if self._isarray(v.name):
+                            add_alias(lhs, v.name)
+        return alias_map, not_owned
+
+    def _is_scan_call(self, func_var):
+        if func_var not in self._call_table:
+            return False
+        call_list = self._call_table[func_var]
+        return (len(call_list)==2 and call_list[1]==np
+                and call_list[0] in ['cumsum', 'cumprod'])
+
     def _run_getsetitem(self, arr, index_var, node, full_node):
         out = [full_node]
-        if self._is_1D_arr(arr.name) and (arr.name, index_var.name) in self._parallel_accesses:
+        if self._is_dist_arr(arr.name) and (arr.name, index_var.name) in self._parallel_accesses:
             scope = index_var.scope
             loc = index_var.loc
             ndims = self._get_arr_ndim(arr.name)
@@ -496,6 +1008,11 @@ class DistributedPass(object):
                 out = sub_nodes
                 new_index_list = copy.copy(index_list)
                 new_index_list[0] = sub_nodes[-1].target
+                if self._is_2D_arr(arr.name):
+                    sub_nodes = self._get_ind_sub(index_list[1],
+                                                self._array_starts[arr.name][1])
+                    out += sub_nodes
+                    new_index_list[1] = sub_nodes[-1].target
                 tuple_var = ir.Var(scope, mk_unique_var("$tuple_var"), loc)
                 self.typemap[tuple_var.name] = self.typemap[index_var.name]
                 tuple_call = ir.Expr.build_tuple(new_index_list, loc)
@@ -533,12 +1050,26 @@ class DistributedPass(object):
         stencil_accesses, neighborhood = get_stencil_accesses(
             parfor, self.typemap)
 
+        if self._dist_analysis.parfor_dists[parfor.id]==Distribution.TwoD:
+            out = self._gen_accum_inits(parfor, namevar_table)
+            out += self._run_parfor_2D(parfor)
+            self._gen_parfor_reductions(parfor, namevar_table, out)
+            return out
+
         if self._dist_analysis.parfor_dists[parfor.id]!=Distribution.OneD:
             # TODO: make sure loop index is not used for calculations in
             # OneD_Var parfors
             if config.DEBUG_ARRAY_OPT==1:
                 print("parfor "+str(parfor.id)+" not parallelized.")
             return [parfor]
+        if id(parfor) in self._stream_parfors:
+            # loop range is set for each batch in _add_stream_loops
+            out = self._gen_accum_inits(parfor, namevar_table)
+            out.append(parfor)
+            self._gen_parfor_reductions(parfor, namevar_table, out)
+            return out
+        if self._is_dynamic_parfor(parfor, stencil_accesses):
+            return self._run_parfor_dynamic(parfor, namevar_table)
         #
         scope = parfor.init_block.scope
         loc = parfor.init_block.loc
@@ -570,7 +1101,7 @@ class DistributedPass(object):
 
         parfor.loop_nests[0].start = start_var
         parfor.loop_nests[0].stop = end_var
-
+        out += self._gen_accum_inits(parfor, namevar_table)
 
         if stencil_accesses:
             # TODO assuming single array in stencil
@@ -582,24 +1113,457 @@ class DistributedPass(object):
         else:
             out.append(parfor)
 
+        self._gen_parfor_reductions(parfor, namevar_table, out)
+        return out
+
+    def _is_dynamic_parfor(self, parfor, stencil_accesses):
+        """parfors can be scheduled dynamically if enabled and they do not
+        access distributed arrays, since iterations can run on any processor
+        """
+        if not self.options.get('dynamic_schedule', False):
+            return False
+        if stencil_accesses or self._in_parfor_body:
+            return False
+        return not any(self._is_dist_arr(v.name) for v in parfor.list_vars())
+
+    def _run_parfor_dynamic(self, parfor, namevar_table):
+        """start dynamic scheduling of parfor iterations, the parfor runs for
+        each chunk of iterations claimed (see _add_dynamic_loops)
+        """
+        scope = parfor.init_block.scope
+        loc = parfor.init_block.loc
+        out = []
+        range_size = parfor.loop_nests[0].stop
+        if isinstance(range_size, int):
+            range_size = self._gen_const_var(range_size, out, scope, loc)
+        # chunk size of True option is chosen at runtime
+        chunk = self.options['dynamic_schedule']
+        chunk = 0 if chunk is True else int(chunk)
+        chunk_var = self._gen_const_var(chunk, out, scope, loc)
+        # sched_var = dist_sched_start(range_size, chunk)
+        sched_var = ir.Var(scope, mk_unique_var("$sched_var"), loc)
+        self.typemap[sched_var.name] = types.int32
+        out += self._gen_dist_call("dist_sched_start",
+                    distributed_api.dist_sched_start, [range_size, chunk_var],
+                    [types.int64, types.int64], sched_var)
+        self._dynamic_parfors[id(parfor)] = (sched_var, range_size)
+        out += self._gen_accum_inits(parfor, namevar_table)
+        out.append(parfor)
+        self._gen_parfor_reductions(parfor, namevar_table, out)
+        return out
+
+    def _add_claim_loops(self, blocks, claim_parfors, gen_claim):
+        """run each parfor in claim_parfors for ranges of iterations claimed
+        until none is left:
+              (init block of parfor)
+            header:
+              (claim nodes)
+              branch cond, body, exit
+            body:
+              (range nodes)
+              parfor(start, end)
+              jump header
+            exit:
+              (finish nodes)
+        gen_claim(info, scope, loc) returns claim nodes, cond var, range
+        nodes, start and end vars, and finish nodes of a parfor using its
+        info in claim_parfors.
+        """
+        new_blocks = {}
+        for (block_label, block) in blocks.items():
+            scope = block.scope
+            curr_body = []
+            for stmt in block.body:
+                if id(stmt) not in claim_parfors:
+                    curr_body.append(stmt)
+                    continue
+                loc = stmt.loc
+                (claim_nodes, cond_var, range_nodes, start_var, end_var,
+                    finish_nodes) = gen_claim(claim_parfors.pop(id(stmt)),
+                                                                    scope, loc)
+                header_label = ir_utils.next_label()
+                body_label = ir_utils.next_label()
+                # split block at the parfor, init block runs once
+                prev_block = ir.Block(scope, loc)
+                prev_block.body = curr_body + stmt.init_block.body
+                prev_block.body.append(ir.Jump(header_label, loc))
+                stmt.init_block.body = []
+                new_blocks[block_label] = prev_block
+                block_label = ir_utils.next_label()
+
+                header_block = ir.Block(scope, loc)
+                header_block.body = claim_nodes
+                header_block.body.append(ir.Branch(cond_var, body_label,
+                                                            block_label, loc))
+                new_blocks[header_label] = header_block
+
+                body_block = ir.Block(scope, loc)
+                body_block.body = range_nodes
+                stmt.loop_nests[0].start = start_var
+                stmt.loop_nests[0].stop = end_var
+                body_block.body.append(stmt)
+                body_block.body.append(ir.Jump(header_label, loc))
+                new_blocks[body_label] = body_block
+
+                curr_body = finish_nodes
+            block.body = curr_body
+            new_blocks[block_label] = block
+        return new_blocks
+
+    def _add_dynamic_loops(self, blocks):
+        """run dynamically scheduled parfors for chunks of iterations until
+        all iterations are claimed:
+            header:
+              chunk_start = dist_sched_next(sched)
+              branch chunk_start < n, body, exit
+            body:
+              chunk_end = dist_sched_chunk_end(sched)
+              parfor(chunk_start, chunk_end)
+            exit:
+              dist_sched_finish(sched)
+        """
+        def gen_claim(info, scope, loc):
+            sched_var, n_var = info
+            start_var = ir.Var(scope, mk_unique_var("$chunk_start"), loc)
+            self.typemap[start_var.name] = types.int64
+            claim_nodes = self._gen_dist_call("dist_sched_next",
+                distributed_api.dist_sched_next, [sched_var],
+                [types.int32], start_var)
+            cond_var = ir.Var(scope, mk_unique_var("$chunk_cond"), loc)
+            self.typemap[cond_var.name] = types.boolean
+            cond_expr = ir.Expr.binop('<', start_var, n_var, loc)
+            self.calltypes[cond_expr] = find_op_typ('<',
+                            [types.int64, self.typemap[n_var.name]])
+            claim_nodes.append(ir.Assign(cond_expr, cond_var, loc))
+
+            end_var = ir.Var(scope, mk_unique_var("$chunk_end"), loc)
+            self.typemap[end_var.name] = types.int64
+            range_nodes = self._gen_dist_call("dist_sched_chunk_end",
+                distributed_api.dist_sched_chunk_end, [sched_var],
+                [types.int32], end_var)
+
+            err_var = ir.Var(scope, mk_unique_var("$sched_err"), loc)
+            self.typemap[err_var.name] = types.int32
+            finish_nodes = self._gen_dist_call("dist_sched_finish",
+                distributed_api.dist_sched_finish, [sched_var],
+                [types.int32], err_var)
+            return (claim_nodes, cond_var, range_nodes, start_var, end_var,
+                                                                finish_nodes)
+
+        return self._add_claim_loops(blocks, self._dynamic_parfors, gen_claim)
+
+    def _plan_stream_reads(self, body):
+        """find file reads of 1D arrays that can be streamed in batches of
+        rows if enabled. The array should be used only by its allocation, the
+        read, and one later parfor in the block that accesses it in parallel.
+        The parfor is moved right after the read to consume the batches.
+        """
+        if not self.options.get('stream_batch_size', 0) or self._in_parfor_body:
+            return
+        i = 0
+        while i < len(body):
+            stmt = body[i]
+            i += 1
+            if not (isinstance(stmt, ir.Assign)
+                    and isinstance(stmt.value, ir.Expr)
+                    and stmt.value.op=='call'):
+                continue
+            func_var = stmt.value.func.name
+            if self._is_call(func_var, ['h5read', hpat.pio_api]):
+                arr = stmt.value.args[6].name
+                is_h5 = True
+            elif self._is_parquet_read_call(func_var):
+                arr = stmt.value.args[2].name
+                is_h5 = False
+            else:
+                continue
+            if not self._is_1D_arr(arr) or arr in self._T_arrs:
+                continue
+            users = [s for s in body if arr in {v.name for v in s.list_vars()}]
+            size_stmts = self._get_stream_size_stmts(arr, body)
+            if self._arr_uses.get(arr, 0)!=len(users):
+                continue
+            users = [s for s in users if id(s) not in size_stmts]
+            if (len(users)!=3 or users[1] is not stmt
+                    or not isinstance(users[2], Parfor)
+                    or not isinstance(users[0], ir.Assign)
+                    or users[0].target.name!=arr):
+                continue
+            parfor = users[2]
+            parfor_ind = body.index(parfor)
+            between_stmts = [s for s in body[i:parfor_ind]
+                                                if id(s) not in size_stmts]
+            if not self._can_stream_parfor(parfor, arr, between_stmts):
+                continue
+            # run the parfor right after the read, after size statements it
+            # may use (e.g. in allocation of its output array)
+            moved = [s for s in body[i:parfor_ind] if id(s) in size_stmts]
+            moved.append(parfor)
+            body[i:parfor_ind+1] = moved + between_stmts
+            self._stream_reads[id(stmt)] = arr
+            self._stream_parfors[id(parfor)] = _StreamRead(arr, parfor, is_h5)
+        return
+
+    def _get_stream_size_stmts(self, arr, body):
+        """ids of statements of body that only get the total size of arr:
+        A.shape and its first element, which is replaced with the total size
+        and does not depend on the rows in memory
+        """
+        size_stmts = set()
+        for stmt in body:
+            if not (isinstance(stmt, ir.Assign)
+                    and isinstance(stmt.value, ir.Expr)
+                    and stmt.value.op=='getattr' and stmt.value.attr=='shape'
+                    and stmt.value.value.name==arr):
+                continue
+            shape_var = stmt.target.name
+            shape_users = [s for s in body if s is not stmt
+                            and shape_var in {v.name for v in s.list_vars()}]
+            if (self._arr_uses.get(shape_var, 0)!=len(shape_users)+1
+                    or not all(isinstance(s, ir.Assign)
+                        and isinstance(s.value, ir.Expr)
+                        and s.value.op=='static_getitem'
+                        and s.value.index==0 for s in shape_users)):
+                continue
+            size_stmts.add(id(stmt))
+            size_stmts.update(id(s) for s in shape_users)
+        return size_stmts
+
+    def _count_var_uses(self, blocks):
+        uses = {}
+        for block in blocks.values():
+            for stmt in block.body:
+                for v in {v.name for v in stmt.list_vars()}:
+                    uses[v] = uses.get(v, 0) + 1
+        return uses
+
+    def _can_stream_parfor(self, parfor, arr, between_stmts):
+        """parfor can consume arr in batches if it is a 1D non-stencil parfor
+        that accesses arr only with its index, and it can run before the
+        statements between the read and the parfor
+        """
+        if self._dist_analysis.parfor_dists[parfor.id]!=Distribution.OneD:
+            return False
+        stencil_accesses, _ = get_stencil_accesses(parfor, self.typemap)
+        if stencil_accesses:
+            return False
+        for block in parfor.loop_body.values():
+            for stmt in block.body:
+                if arr not in {v.name for v in stmt.list_vars()}:
+                    continue
+                if not (isinstance(stmt, ir.Assign)
+                        and isinstance(stmt.value, ir.Expr)
+                        and stmt.value.op=='getitem'
+                        and stmt.value.value.name==arr
+                        and (arr, stmt.value.index.name)
+                                            in self._parallel_accesses):
+                    return False
+        if any(arr in {v.name for v in stmt.list_vars()}
+                                for stmt in parfor.init_block.body):
+            return False
+        # moving the parfor is safe if the statements in between do not share
+        # variables with it and do not access arrays (which may be aliases)
+        parfor_vars = {v.name for v in parfor.list_vars()}
+        for stmt in between_stmts:
+            if isinstance(stmt, Parfor):
+                return False
+            stmt_vars = {v.name for v in stmt.list_vars()}
+            if stmt_vars & parfor_vars or any(self._isarray(v)
+                                                    for v in stmt_vars):
+                return False
+        return True
+
+    def _gen_stream_alloc(self, arr, assign, out):
+        """allocate one batch of rows for streamed array"""
+        scope = assign.target.scope
+        loc = assign.target.loc
+        rhs = assign.value
+        count_var = self._array_counts[arr][0]
+        batch_var = self._gen_const_var(
+            int(self.options['stream_batch_size']), out, scope, loc)
+        def f(count, batch):
+            return min(count, batch)
+        f_block = compile_to_numba_ir(f, {}, self.typingctx,
+            (types.intp, types.intp), self.typemap,
+            self.calltypes).blocks.popitem()[1]
+        replace_arg_nodes(f_block, [count_var, batch_var])
+        out += f_block.body[:-2]
+        buff_count_var = f_block.body[-3].target
+        if self.typemap[rhs.args[0].name]==types.intp:
+            rhs.args[0] = buff_count_var
+        else:
+            size_list = copy.copy(self._array_counts[arr])
+            size_list[0] = buff_count_var
+            tuple_var = ir.Var(scope, mk_unique_var("$tuple_var"), loc)
+            self.typemap[tuple_var.name] = self.typemap[rhs.args[0].name]
+            out.append(ir.Assign(ir.Expr.build_tuple(size_list, loc),
+                                                            tuple_var, loc))
+            rhs.args[0] = tuple_var
+        return
+
+    def _gen_stream_start(self, arr, args, scope, loc):
+        """start streaming the rows of arr, which are then accessed relative
+        to the first row of current batch
+        """
+        stream = next(s for s in self._stream_parfors.values() if s.arr==arr)
+        out = []
+        batch_var = self._gen_const_var(
+            int(self.options['stream_batch_size']), out, scope, loc)
+        if stream.is_h5:
+            def f(f_id, dset, ndims, starts, counts, is_parallel, arr, batch):
+                return hpat.pio_api.h5_stream_start(f_id, dset, ndims, starts,
+                                            counts, is_parallel, arr, batch)
+        else:
+            def f(fname, cindex, start, count, batch):
+                return hpat.parquet_pio.pq_stream_start(fname, cindex, start,
+                                                                count, batch)
+        args = args + [batch_var]
+        arg_typs = tuple(self.typemap[v.name] for v in args)
+        f_block = compile_to_numba_ir(f, {'hpat': hpat}, self.typingctx,
+            arg_typs, self.typemap, self.calltypes).blocks.popitem()[1]
+        replace_arg_nodes(f_block, args)
+        out += f_block.body[:-2]
+        stream.stream_var = f_block.body[-3].target
+        stream.start_var = self._array_starts[arr][0]
+        stream.batch_start_var = ir.Var(scope, mk_unique_var("$batch_start"),
+                                                                        loc)
+        self.typemap[stream.batch_start_var.name] = types.int64
+        self._array_starts[arr] = ([stream.batch_start_var]
+                                            + self._array_starts[arr][1:])
+        return out
+
+    def _add_stream_loops(self, blocks):
+        """run streaming parfors for each batch of rows read:
+            header:
+              n = stream_next(stream, A)
+              branch n > 0, body, exit
+            body:
+              batch_start = start + stream_offset(stream)
+              batch_end = batch_start + n
+              parfor(batch_start, batch_end)
+            exit:
+              stream_finish(stream)
+        """
+        def gen_claim(stream, scope, loc):
+            if stream.is_h5:
+                api = hpat.pio_api
+                next_func, offset_func, finish_func = (
+                    'h5_stream_next', 'h5_stream_offset', 'h5_stream_finish')
+            else:
+                api = hpat.parquet_pio
+                next_func, offset_func, finish_func = (
+                    'pq_stream_next', 'pq_stream_offset', 'pq_stream_finish')
+            arr_var = ir.Var(scope, stream.arr, loc)
+            n_var = ir.Var(scope, mk_unique_var("$batch_rows"), loc)
+            self.typemap[n_var.name] = types.int64
+            claim_nodes = self._gen_func_call(api, next_func,
+                [stream.stream_var, arr_var],
+                [types.int32, self.typemap[stream.arr]], n_var)
+            zero_var = self._gen_const_var(0, claim_nodes, scope, loc)
+            cond_var = ir.Var(scope, mk_unique_var("$batch_cond"), loc)
+            self.typemap[cond_var.name] = types.boolean
+            cond_expr = ir.Expr.binop('>', n_var, zero_var, loc)
+            self.calltypes[cond_expr] = find_op_typ('>',
+                                                [types.int64, types.intp])
+            claim_nodes.append(ir.Assign(cond_expr, cond_var, loc))
+
+            offset_var = ir.Var(scope, mk_unique_var("$batch_offset"), loc)
+            self.typemap[offset_var.name] = types.int64
+            range_nodes = self._gen_func_call(api, offset_func,
+                [stream.stream_var], [types.int32], offset_var)
+            start_expr = ir.Expr.binop('+', stream.start_var, offset_var, loc)
+            self.calltypes[start_expr] = find_op_typ('+',
+                [self.typemap[stream.start_var.name], types.int64])
+            range_nodes.append(ir.Assign(start_expr, stream.batch_start_var,
+                                                                        loc))
+            end_var = ir.Var(scope, mk_unique_var("$batch_end"), loc)
+            self.typemap[end_var.name] = types.int64
+            end_expr = ir.Expr.binop('+', stream.batch_start_var, n_var, loc)
+            self.calltypes[end_expr] = find_op_typ('+',
+                                                [types.int64, types.int64])
+            range_nodes.append(ir.Assign(end_expr, end_var, loc))
+
+            err_var = ir.Var(scope, mk_unique_var("$stream_err"), loc)
+            self.typemap[err_var.name] = types.int32
+            finish_nodes = self._gen_func_call(api, finish_func,
+                [stream.stream_var], [types.int32], err_var)
+            return (claim_nodes, cond_var, range_nodes,
+                        stream.batch_start_var, end_var, finish_nodes)
+
+        return self._add_claim_loops(blocks, self._stream_parfors, gen_claim)
+
+    def _gen_func_call(self, module, func_name, args, arg_typs, lhs):
+        """generate lhs = module.func(*args) for a function of an hpat
+        module
+        """
+        scope = lhs.scope
+        loc = lhs.loc
+        func = getattr(module, func_name)
+        func_var = ir.Var(scope, mk_unique_var("$"+func_name+"_func"), loc)
+        self.typemap[func_var.name] = get_global_func_typ(func)
+        func_assign = ir.Assign(ir.Global(func_name, func, loc), func_var, loc)
+        call = ir.Expr.call(func_var, args, (), loc)
+        self.calltypes[call] = self.typemap[func_var.name].get_call_type(
+            self.typingctx, arg_typs, {})
+        return [func_assign, ir.Assign(call, lhs, loc)]
+
+    def _gen_dist_call(self, func_name, func, args, arg_typs, lhs):
+        """generate lhs = distributed_api.func(*args)"""
+        scope = lhs.scope
+        loc = lhs.loc
+        attr_var = ir.Var(scope, mk_unique_var("$"+func_name+"_attr"), loc)
+        self.typemap[attr_var.name] = get_global_func_typ(func)
+        attr_assign = ir.Assign(ir.Expr.getattr(self._g_dist_var, func_name,
+                                                        loc), attr_var, loc)
+        call = ir.Expr.call(attr_var, args, (), loc)
+        self.calltypes[call] = self.typemap[attr_var.name].get_call_type(
+            self.typingctx, arg_typs, {})
+        return [attr_assign, ir.Assign(call, lhs, loc)]
+
+    def _run_parfor_2D(self, parfor):
+        """divide 2D loop nest over the rows and columns of processor grid"""
+        scope = parfor.init_block.scope
+        loc = parfor.init_block.loc
+        out, row_start, row_end = self._gen_1D_div(parfor.loop_nests[0].stop,
+            scope, loc, "$loop", "get_end", distributed_api.get_end,
+            self._grid_rows_var, self._grid_row_rank_var)
+        col_nodes, col_start, col_end = self._gen_1D_div(
+            parfor.loop_nests[1].stop, scope, loc, "$loop", "get_end",
+            distributed_api.get_end, self._grid_cols_var,
+            self._grid_col_rank_var)
+        out += col_nodes
+        parfor.loop_nests[0].start = row_start
+        parfor.loop_nests[0].stop = row_end
+        parfor.loop_nests[1].start = col_start
+        parfor.loop_nests[1].stop = col_end
+        out.append(parfor)
+        return out
+
+    def _gen_accum_inits(self, parfor, namevar_table):
+        """zero arrays accumulated by parfor on processors other than rank 0
+        before the parfor, they are summed in _gen_parfor_reductions
+        """
+        out = []
+        for arr in sorted(self._parfor_accums.get(parfor.id, ())):
+            arr_var = namevar_table[arr]
+            err_var = ir.Var(arr_var.scope, mk_unique_var("$accum_err"),
+                                                                arr_var.loc)
+            self.typemap[err_var.name] = types.int32
+            out += self._gen_dist_call("dist_arr_accum_init",
+                distributed_api.dist_arr_accum_init, [arr_var],
+                [self.typemap[arr]], err_var)
+        return out
+
+    def _gen_parfor_reductions(self, parfor, namevar_table, out):
+        scope = parfor.init_block.scope
+        loc = parfor.init_block.loc
         _, reductions = get_parfor_reductions(parfor, parfor.params, self.calltypes)
+        for arr in sorted(self._parfor_accums.get(parfor.id, ())):
+            self._gen_arr_reduce(namevar_table[arr], out)
 
         for reduce_varname, (init_val, reduce_nodes) in reductions.items():
             if self._isarray(reduce_varname):
-                reduce_attr_var = ir.Var(scope, mk_unique_var("$reduce_attr"), loc)
-                reduce_attr_call = ir.Expr.getattr(self._g_dist_var, "dist_arr_reduce", loc)
-                self.typemap[reduce_attr_var.name] = get_global_func_typ(
-                                                distributed_api.dist_arr_reduce)
-                reduce_assign = ir.Assign(reduce_attr_call, reduce_attr_var, loc)
-                out.append(reduce_assign)
-                reduce_var = namevar_table[reduce_varname]
-                reduce_call = ir.Expr.call(reduce_attr_var, [reduce_var], (), loc)
-                self.calltypes[reduce_call] = self.typemap[reduce_attr_var.name].get_call_type(
-                    self.typingctx, [self.typemap[reduce_varname]], {})
-                err_var = ir.Var(scope, mk_unique_var("$reduce_err_var"), loc)
-                self.typemap[err_var.name] = types.int32
-                reduce_assign = ir.Assign(reduce_call, err_var, loc)
-                out.append(reduce_assign)
+                self._gen_arr_reduce(namevar_table[reduce_varname], out)
             else:
                 reduce_attr_var = ir.Var(scope, mk_unique_var("$reduce_attr"), loc)
                 reduce_attr_call = ir.Expr.getattr(self._g_dist_var, "dist_reduce", loc)
@@ -613,8 +1577,168 @@ class DistributedPass(object):
                     self.typingctx, [self.typemap[reduce_varname]], {})
                 reduce_assign = ir.Assign(reduce_call, reduce_var, loc)
                 out.append(reduce_assign)
+        return
 
-        return out
+    def _plan_stencil_halos(self, body, arr_aliases):
+        """group the 1D stencil parfors of a block that can share one halo
+        exchange. Halos of all arrays in a group are received before the
+        first stencil of the group, with the maximum width used by the
+        stencils of each array, and packed into one message per neighbor.
+        Stencils not planned here exchange their own halos.
+        """
+        # current group of each dtype and its position in the block
+        curr_batches = {}
+        for i, stmt in enumerate(body):
+            if (not isinstance(stmt, Parfor) or self._dist_analysis.parfor_dists[
+                    stmt.id]!=Distribution.OneD):
+                continue
+            stencil_accesses, neighborhood = get_stencil_accesses(stmt,
+                                                                self.typemap)
+            if not stencil_accesses:
+                continue
+            arr_set = set(stencil_accesses.values())
+            if len(arr_set)!=1:
+                continue
+            arr = arr_set.pop()
+            left_length, right_length = self._get_stencil_border_length(
+                                                                neighborhood)
+            dtype = self.typemap[arr].dtype
+            if dtype in curr_batches:
+                batch, batch_ind = curr_batches[dtype]
+                # array should be defined before the group's exchange and not
+                # changed up to this stencil
+                arrs = arr_aliases.get(arr, {arr})
+                if any(self._may_modify_arr(s, arrs)
+                                            for s in body[batch_ind:i]):
+                    batch = None
+            else:
+                batch = None
+            if batch is None:
+                batch = _HaloBatch(stmt.id)
+                curr_batches[dtype] = (batch, i)
+            batch.left_lens[arr] = max(batch.left_lens.get(arr, 0), left_length)
+            batch.right_lens[arr] = max(batch.right_lens.get(arr, 0),
+                                                                right_length)
+            self._halo_batches[stmt.id] = batch
+        return
+
+    def _may_modify_arr(self, stmt, arrs):
+        """conservatively check if statement can change the data of an array,
+        given the names of the array and its aliases (views and other arrays
+        that may share its data). Calls taking any of them as positional or
+        keyword argument are writes unless known to be read-only.
+        """
+        if isinstance(stmt, ir.Assign):
+            if stmt.target.name in arrs:
+                return True
+            rhs = stmt.value
+            if (isinstance(rhs, ir.Expr) and rhs.op=='call'
+                    and any(v.name in arrs for v in rhs.list_vars()
+                                                if v.name!=rhs.func.name)
+                    and not self._is_readonly_call(rhs.func.name)):
+                return True
+        if (isinstance(stmt, (ir.SetItem, ir.StaticSetItem))
+                and stmt.target.name in arrs):
+            return True
+        if isinstance(stmt, Parfor):
+            blocks = list(stmt.loop_body.values()) + [stmt.init_block]
+            return any(self._may_modify_arr(s, arrs)
+                            for block in blocks for s in block.body)
+        return False
+
+    def _is_readonly_call(self, func_var):
+        """calls that do not change their array arguments"""
+        call_list = self._call_table.get(func_var, None)
+        return (call_list==[len] or (call_list is not None
+            and len(call_list)==2 and call_list[1]==np
+            and call_list[0] in _readonly_np_calls))
+
+    def _gen_arr_reduce(self, reduce_var, out):
+        """start a nonblocking in place reduction of array reduce_var and wait
+        for it. The wait is moved to the first statement that can access the
+        array later (see _sink_arr_reduce_waits).
+        """
+        scope = reduce_var.scope
+        loc = reduce_var.loc
+        start_attr_var = ir.Var(scope, mk_unique_var("$reduce_attr"), loc)
+        start_attr_call = ir.Expr.getattr(self._g_dist_var,
+                                                "dist_arr_reduce_start", loc)
+        self.typemap[start_attr_var.name] = get_global_func_typ(
+                                        distributed_api.dist_arr_reduce_start)
+        out.append(ir.Assign(start_attr_call, start_attr_var, loc))
+        req_var = ir.Var(scope, mk_unique_var("$reduce_req"), loc)
+        self.typemap[req_var.name] = types.int32
+        start_call = ir.Expr.call(start_attr_var, [reduce_var], (), loc)
+        self.calltypes[start_call] = self.typemap[start_attr_var.name].get_call_type(
+            self.typingctx, [self.typemap[reduce_var.name]], {})
+        out.append(ir.Assign(start_call, req_var, loc))
+
+        wait_attr_var = ir.Var(scope, mk_unique_var("$reduce_wait_attr"), loc)
+        wait_attr_call = ir.Expr.getattr(self._g_dist_var,
+                                                "dist_arr_reduce_wait", loc)
+        self.typemap[wait_attr_var.name] = get_global_func_typ(
+                                        distributed_api.dist_arr_reduce_wait)
+        out.append(ir.Assign(wait_attr_call, wait_attr_var, loc))
+        err_var = ir.Var(scope, mk_unique_var("$reduce_err_var"), loc)
+        self.typemap[err_var.name] = types.int32
+        wait_call = ir.Expr.call(wait_attr_var, [req_var], (), loc)
+        self.calltypes[wait_call] = self.typemap[wait_attr_var.name].get_call_type(
+            self.typingctx, [types.int32], {})
+        wait_assign = ir.Assign(wait_call, err_var, loc)
+        out.append(wait_assign)
+        self._arr_reduce_waits[id(wait_assign)] = reduce_var.name
+        return
+
+    def _sink_arr_reduce_waits(self, blocks):
+        """move waits of nonblocking array reductions down to the first
+        statement that can access the array, so that independent computation
+        overlaps with the reduction
+        """
+        if not self._arr_reduce_waits:
+            return
+        aliases = self._get_array_alias_sets(blocks)
+        for block in blocks.values():
+            new_body = []
+            # waits not placed yet and array names they protect
+            pending = []
+            for stmt in block.body:
+                if id(stmt) in self._arr_reduce_waits:
+                    arr = self._arr_reduce_waits.pop(id(stmt))
+                    pending.append((stmt, aliases.get(arr, {arr})))
+                    continue
+                if pending:
+                    stmt_vars = {v.name for v in stmt.list_vars()}
+                    is_terminator = stmt is block.body[-1]
+                    not_placed = []
+                    for wait, arrs in pending:
+                        if is_terminator or arrs & stmt_vars:
+                            new_body.append(wait)
+                        else:
+                            not_placed.append((wait, arrs))
+                    pending = not_placed
+                new_body.append(stmt)
+            block.body = new_body
+        return
+
+    def _get_array_alias_sets(self, blocks):
+        """array name -> names of arrays that may share its data,
+        conservatively arrays assigned from expressions of other arrays
+        """
+        aliases = {}
+        for block in blocks.values():
+            for stmt in block.body:
+                if not (isinstance(stmt, ir.Assign)
+                        and self._isarray(stmt.target.name)):
+                    continue
+                for v in stmt.value.list_vars() if isinstance(stmt.value,
+                                        ir.Expr) else stmt.list_vars():
+                    if v.name == stmt.target.name or not self._isarray(v.name):
+                        continue
+                    merged = (aliases.get(stmt.target.name, {stmt.target.name})
+                                        | aliases.get(v.name, {v.name}))
+                    for name in merged:
+                        aliases[name] = merged
+        return aliases
 
     def _run_parfor_stencil(self, parfor, out, start_var, end_var,
                                                     neighborhood, arr_var):
@@ -623,14 +1747,21 @@ class DistributedPass(object):
         loc = parfor.init_block.loc
 
         left_length, right_length = self._get_stencil_border_length(neighborhood)
+        batch = self._halo_batches.get(parfor.id, None)
+        if batch is None:
+            # not grouped by _plan_stencil_halos, exchange halos of this
+            # parfor only
+            batch = _HaloBatch(parfor.id)
+            batch.left_lens[arr_var.name] = left_length
+            batch.right_lens[arr_var.name] = right_length
+        first_in_batch = batch.first_parfor==parfor.id
+
+        # post send/receive of halos of all arrays of the group
+        if first_in_batch:
+            req_vars = self._gen_stencil_batch_halos(batch, arr_var.scope,
+                                                            arr_var.loc, out)
 
-        dtype = self.typemap[arr_var.name].dtype
-
-        # post left send/receive
         if left_length != 0:
-            left_recv_buff, left_recv_req, left_send_req = self._gen_stencil_halo(
-                            left_length, arr_var, out, is_left=True)
-
             # add stencil length to parfor start
             index_const = ir.Var(scope, mk_unique_var("stencil_const_var"), loc)
             self.typemap[index_const.name] = types.intp
@@ -646,11 +1777,7 @@ class DistributedPass(object):
             out.append(index_assign)
             parfor.loop_nests[0].start = start_ind
 
-        # post right send/receive
         if right_length != 0:
-            right_recv_buff, right_recv_req, right_send_req = self._gen_stencil_halo(
-                            right_length, arr_var, out, is_left=False)
-
             # subtract stencil length from parfor end
             index_const = ir.Var(scope, mk_unique_var("stencil_const_var"), loc)
             self.typemap[index_const.name] = types.intp
@@ -666,17 +1793,16 @@ class DistributedPass(object):
             out.append(index_assign)
             parfor.loop_nests[0].stop = end_ind
 
+        # interior iterations run while halo messages are in flight
         out.append(parfor)
 
-        # wait on isend/irecv
-        if left_length != 0:
-            self._gen_stencil_wait(left_recv_req, out, is_left=True)
-            self._gen_stencil_wait(left_send_req, out, is_left=False)
-
-        if right_length != 0:
-            #
-            self._gen_stencil_wait(right_recv_req, out, is_left=False)
-            self._gen_stencil_wait(right_send_req, out, is_left=True)
+        # border iterations of each side run after halos of the side are
+        # received (see _add_stencil_borders), later stencils of the group
+        # use the received halos right after their parfor
+        left_done = right_done = parfor
+        if first_in_batch:
+            left_done, right_done = self._gen_stencil_batch_waits(batch,
+                                        req_vars, arr_var.scope, arr_var.loc, out)
 
         # generate border blocks
         assert len(parfor.loop_body)==1  # only one block supported
@@ -689,19 +1815,119 @@ class DistributedPass(object):
 
         if left_length != 0:
             border_block_left = copy.copy(body_block)
-            border_block_left.body = self._gen_stencil_border(parfor_index, buff_index, body_block.body,
-                left_recv_buff, left_length, end_var, is_left=True)
-            self._stencil_left_border[parfor.id] = border_block_left
+            border_block_left.body = self._gen_stencil_border(parfor_index,
+                buff_index, body_block.body, batch.left_buffs[arr_var.name],
+                batch.left_lens[arr_var.name], left_length, end_var,
+                is_left=True)
+            self._stencil_borders.setdefault(id(left_done), []).append(
+                                                    (border_block_left, True))
 
         if right_length != 0:
             border_block_right = copy.copy(body_block)
-            border_block_right.body = self._gen_stencil_border(parfor_index, buff_index, body_block.body,
-                right_recv_buff, right_length, end_var, is_left=False)
-            self._stencil_right_border[parfor.id] = border_block_right
-
+            border_block_right.body = self._gen_stencil_border(parfor_index,
+                buff_index, body_block.body, batch.right_buffs[arr_var.name],
+                batch.right_lens[arr_var.name], right_length, end_var,
+                is_left=False)
+            self._stencil_borders.setdefault(id(right_done), []).append(
+                                                    (border_block_right, False))
 
         return
 
+    def _gen_stencil_batch_halos(self, batch, scope, loc, out):
+        """post one irecv and one isend per side for halos of all arrays of
+        the stencil group, returns the requests of each side
+        """
+        req_vars = {}
+        for is_left, halo_lens in ((True, batch.left_lens),
+                                                (False, batch.right_lens)):
+            total_len = sum(halo_lens.values())
+            if total_len == 0:
+                continue
+            arrs = [a for a in halo_lens.keys() if halo_lens[a] != 0]
+            dtype = self.typemap[arrs[0]].dtype
+            buff_typ = types.Array(dtype, 1, 'C')
+            # receive halos of all arrays in one buffer
+            recv_buff = ir.Var(scope, mk_unique_var("halo_recv_buff"), loc)
+            self.typemap[recv_buff.name] = buff_typ
+            out += mk_alloc(self.typemap, self.calltypes, recv_buff,
+                                            (total_len,), dtype, scope, loc)
+            recv_req = self._gen_stencil_comm(recv_buff, total_len, out,
+                                                is_left=is_left, is_send=False)
+            # pack the last elements of arrays for the right neighbor's left
+            # halo, or the first elements for the left neighbor's right halo
+            send_buff = ir.Var(scope, mk_unique_var("halo_send_buff"), loc)
+            self.typemap[send_buff.name] = buff_typ
+            out += mk_alloc(self.typemap, self.calltypes, send_buff,
+                                            (total_len,), dtype, scope, loc)
+            if is_left:
+                def f(buff, A, off, w):
+                    buff[off:off+w] = A[len(A)-w:]
+            else:
+                def f(buff, A, off, w):
+                    buff[off:off+w] = A[:w]
+            offset = 0
+            for arr in arrs:
+                arr_var = ir.Var(scope, arr, loc)
+                off_var = self._gen_const_var(offset, out, scope, loc)
+                len_var = self._gen_const_var(halo_lens[arr], out, scope, loc)
+                f_block = compile_to_numba_ir(f, {}, self.typingctx,
+                    (buff_typ, self.typemap[arr], types.intp, types.intp),
+                    self.typemap, self.calltypes).blocks.popitem()[1]
+                replace_arg_nodes(f_block, [send_buff, arr_var, off_var,
+                                                                    len_var])
+                out += f_block.body[:-3]  # remove none return
+                offset += halo_lens[arr]
+            send_req = self._gen_stencil_comm(send_buff, total_len, out,
+                                            is_left=(not is_left), is_send=True)
+            req_vars[is_left] = (recv_buff, recv_req, send_req)
+        return req_vars
+
+    def _gen_stencil_batch_waits(self, batch, req_vars, scope, loc, out):
+        """wait for halos of each side and unpack them to the halo buffers of
+        arrays, returns the last statements of left and right halo handling
+        """
+        done_stmts = {True: out[-1], False: out[-1]}
+        for is_left, halo_lens, halo_buffs in (
+                (True, batch.left_lens, batch.left_buffs),
+                (False, batch.right_lens, batch.right_buffs)):
+            if is_left not in req_vars:
+                continue
+            recv_buff, recv_req, _ = req_vars[is_left]
+            self._gen_stencil_wait(recv_req, out, is_left=is_left)
+            def f(halo, buff, off):
+                halo[:] = buff[off:off+len(halo)]
+            offset = 0
+            for arr, halo_len in halo_lens.items():
+                if halo_len == 0:
+                    continue
+                halo_buff = ir.Var(scope, mk_unique_var("halo_buff"), loc)
+                self.typemap[halo_buff.name] = self.typemap[arr]
+                out += mk_alloc(self.typemap, self.calltypes, halo_buff,
+                            (halo_len,), self.typemap[arr].dtype, scope, loc)
+                off_var = self._gen_const_var(offset, out, scope, loc)
+                f_block = compile_to_numba_ir(f, {}, self.typingctx,
+                    (self.typemap[arr], self.typemap[recv_buff.name],
+                    types.intp), self.typemap, self.calltypes
+                    ).blocks.popitem()[1]
+                replace_arg_nodes(f_block, [halo_buff, recv_buff, off_var])
+                out += f_block.body[:-3]  # remove none return
+                halo_buffs[arr] = halo_buff
+                offset += halo_len
+            done_stmts[is_left] = out[-1]
+
+        # isends only read their buffers, so their waits can be after borders
+        for is_left in (True, False):
+            if is_left in req_vars:
+                self._gen_stencil_wait(req_vars[is_left][2], out,
+                                                        is_left=(not is_left))
+        return done_stmts[True], done_stmts[False]
+
+    def _gen_const_var(self, val, out, scope, loc):
+        const_var = ir.Var(scope, mk_unique_var("$const_var"), loc)
+        self.typemap[const_var.name] = types.intp
+        out.append(ir.Assign(ir.Const(val, loc), const_var, loc))
+        return const_var
+
     def _get_stencil_border_length(self, neighborhood):
         # XXX: hack to get lengths assuming they are constant
         from hpat.hiframes import _get_definitions
@@ -751,7 +1977,7 @@ class DistributedPass(object):
         return None
 
     def _gen_stencil_border(self, parfor_index, buff_index, body,
-                                halo_recv_buff, halo_length, end_var, is_left):
+                    halo_recv_buff, buff_len, halo_length, end_var, is_left):
         scope = parfor_index.scope
         loc = parfor_index.loc
         new_body = []
@@ -768,8 +1994,10 @@ class DistributedPass(object):
                                                     [types.intp, types.intp])
                 new_body.append(ir.Assign(calc_call, parfor_index, loc))
 
+            # left buffer holds the last buff_len elements of left neighbor,
+            # right buffer the first elements of right neighbor
             if is_left:
-                buff_index_start = halo_length-i
+                buff_index_start = buff_len+i
             else:
                 buff_index_start = -(i+1)
 
@@ -795,7 +2023,7 @@ class DistributedPass(object):
                             and expr.lhs.name == parfor_index.name
                             and expr.rhs.name in halo_consts):
                         expr.lhs = buff_index
-                        buff_indices = stmt.target.name
+                        buff_indices.add(stmt.target.name)
                     if expr.op == 'getitem' and expr.index.name in buff_indices:
                         expr.value = halo_recv_buff
                     if st.value in self.calltypes:
@@ -805,61 +2033,6 @@ class DistributedPass(object):
                 new_body.append(stmt)
         return new_body
 
-    def _gen_stencil_halo(self, halo_length, arr_var, out, is_left):
-        scope = arr_var.scope
-        loc = arr_var.loc
-        dtype = self.typemap[arr_var.name].dtype
-        # allocate halo tmp buffer for irecv
-        halo_recv_buff = ir.Var(scope, mk_unique_var("halo_recv_buff"), loc)
-        self.typemap[halo_recv_buff.name] = self.typemap[arr_var.name]
-        out += mk_alloc(self.typemap, self.calltypes, halo_recv_buff,
-                            (halo_length,), dtype, scope, loc)
-
-        # recv from halo
-        halo_recv_req = self._gen_stencil_comm(halo_recv_buff, halo_length,
-                                        out, is_left=is_left, is_send=False)
-
-        # send to match recv
-        if is_left:
-            # copy array's last elements to buffer
-            halo_send_buff = ir.Var(scope, mk_unique_var("halo_send_buff"), loc)
-            self.typemap[halo_send_buff.name] = self.typemap[arr_var.name]
-            # const = -size
-            const_msize = ir.Var(scope, mk_unique_var("const_msize"), loc)
-            self.typemap[const_msize.name] = types.intp
-            out.append(ir.Assign(ir.Const(-halo_length, loc), const_msize, loc))
-            # const = none
-            const_none = ir.Var(scope, mk_unique_var("const_none"), loc)
-            self.typemap[const_none.name] = types.none
-            out.append(ir.Assign(ir.Const(None, loc), const_none, loc))
-            # g_slice = Global(slice)
-            g_slice_var = ir.Var(scope, mk_unique_var("g_slice_var"), loc)
-            self.typemap[g_slice_var.name] = get_global_func_typ(slice)
-            out.append(ir.Assign(ir.Global('slice', slice, loc),
-                                                        g_slice_var, loc))
-            # slice_ind_out = slice(-size, none)
-            slice_ind_out = ir.Var(scope, mk_unique_var("slice_ind_out"), loc)
-            slice_call = ir.Expr.call(g_slice_var, [const_msize,
-                            const_none], (), loc)
-            self.calltypes[slice_call] = self.typemap[g_slice_var.name].get_call_type(self.typingctx,
-                                                        [types.intp, types.none], {})
-            self.typemap[slice_ind_out.name] = self.calltypes[slice_call].return_type
-            out.append(ir.Assign(slice_call, slice_ind_out, loc))
-            # halo_send_buff = A[slice]
-            getslice_call = ir.Expr.static_getitem(arr_var, slice(-halo_length, None, None),
-                                                                slice_ind_out, loc)
-            self.calltypes[getslice_call] = signature(
-                                self.typemap[halo_send_buff.name],
-                                self.typemap[arr_var.name],
-                                self.typemap[slice_ind_out.name])
-            out.append(ir.Assign(getslice_call, halo_send_buff, loc))
-        else:
-            halo_send_buff = arr_var
-
-        halo_send_req = self._gen_stencil_comm(halo_send_buff, halo_length, out,
-                                            is_left=(not is_left), is_send=True)
-        return halo_recv_buff, halo_recv_req, halo_send_req
-
     def _gen_stencil_wait(self, req, out, is_left):
         scope = req.scope
         loc = req.loc
@@ -876,6 +2049,7 @@ class DistributedPass(object):
         self.calltypes[wait_call] = self.typemap[wait_attr_var.name].get_call_type(
             self.typingctx, [types.int32, types.boolean], {})
         out.append(ir.Assign(wait_call, wait_err, loc))
+        return wait_err
 
     def _gen_stencil_comm(self, buff, size, out, is_left, is_send):
         scope = buff.scope
@@ -892,7 +2066,7 @@ class DistributedPass(object):
 
         # comm_size = size
         comm_size = ir.Var(scope, mk_unique_var("comm_size"), loc)
-        self.typemap[comm_size.name] = types.int32
+        self.typemap[comm_size.name] = types.int64
         out.append(ir.Assign(ir.Const(size, loc), comm_size, loc))
 
         # comm_pe = rank +/- 1
@@ -921,7 +2095,7 @@ class DistributedPass(object):
         icomm_call = ir.Expr.call(icomm_attr_var, [buff, comm_size,
             comm_pe, comm_tag, comm_cond], (), loc)
         self.calltypes[icomm_call] = self.typemap[icomm_attr_var.name].get_call_type(
-            self.typingctx, [self.typemap[buff.name], types.int32,
+            self.typingctx, [self.typemap[buff.name], types.int64,
             types.int32, types.int32, types.boolean], {})
         out.append(ir.Assign(icomm_call, comm_req, loc))
         return comm_req
@@ -948,7 +2122,12 @@ class DistributedPass(object):
 
         return comm_cond
 
-    def _gen_1D_div(self, size_var, scope, loc, prefix, end_call_name, end_call):
+    def _gen_1D_div(self, size_var, scope, loc, prefix, end_call_name,
+                                    end_call, pes_var=None, rank_var=None):
+        # divide over all processors by default, or a dimension of the grid
+        if pes_var is None:
+            pes_var = self._size_var
+            rank_var = self._rank_var
         div_nodes = []
         if isinstance(size_var, int):
             new_size_var = ir.Var(scope, mk_unique_var(prefix+"_size_var"), loc)
@@ -967,7 +2146,7 @@ class DistributedPass(object):
         start_var = ir.Var(scope, mk_unique_var(prefix+"_start_var"), loc)
         self.typemap[start_var.name] = types.int64
         start_expr = ir.Expr.call(start_attr_var, [size_var,
-            self._size_var, self._rank_var], (), loc)
+            pes_var, rank_var], (), loc)
         self.calltypes[start_expr] = self.typemap[start_attr_var.name].get_call_type(
             self.typingctx, [types.int64, types.int32, types.int32], {})
         start_assign = ir.Assign(start_expr, start_var, loc)
@@ -981,7 +2160,7 @@ class DistributedPass(object):
         end_var = ir.Var(scope, mk_unique_var(prefix+"_end_var"), loc)
         self.typemap[end_var.name] = types.int64
         end_expr = ir.Expr.call(end_attr_var, [size_var,
-            self._size_var, self._rank_var], (), loc)
+            pes_var, rank_var], (), loc)
         self.calltypes[end_expr] = self.typemap[end_attr_var.name].get_call_type(
             self.typingctx, [types.int64, types.int32, types.int32], {})
         end_assign = ir.Assign(end_expr, end_var, loc)
@@ -1089,7 +2268,7 @@ class DistributedPass(object):
                 and isinstance(self.typemap[varname], types.npytypes.Array))
 
     def _get_arr_ndim(self, arrname):
-        if self.typemap[arrname] == string_array_type:
+        if isinstance(self.typemap[arrname], StringArrayType):
             return 1
         return self.typemap[arrname].ndim
 
@@ -1099,6 +2278,13 @@ class DistributedPass(object):
         return (arr_name in self._dist_analysis.array_dists and
                 self._dist_analysis.array_dists[arr_name]==Distribution.OneD)
 
+    def _is_2D_arr(self, arr_name):
+        return (arr_name in self._dist_analysis.array_dists and
+                self._dist_analysis.array_dists[arr_name]==Distribution.TwoD)
+
+    def _is_dist_arr(self, arr_name):
+        return self._is_1D_arr(arr_name) or self._is_2D_arr(arr_name)
+
     def _is_REP(self, arr_name):
         return (arr_name not in self._dist_analysis.array_dists or
                 self._dist_analysis.array_dists[arr_name]==Distribution.REP)
@@ -1122,13 +2308,19 @@ class DistributedPass(object):
     def _is_parquet_read_str_call(self, func_var):
         if func_var not in self._call_table:
             return False
-        return hpat.config._has_pyarrow and (self._call_table[func_var]==[hpat.parquet_pio.read_parquet_str])
+        return hpat.config._has_pyarrow and (self._call_table[func_var] in (
+                                [hpat.parquet_pio.read_parquet_str],
+                                [hpat.parquet_pio.read_parquet_str_large]))
 
     def _is_call(self, func_var, call_list):
         if func_var not in self._call_table:
             return False
         return self._call_table[func_var]==call_list
 
+    def _is_linalg_call(self, func_var, name):
+        return (self._is_call(func_var, [name, 'linalg', np])
+            or self._is_call(func_var, [getattr(np.linalg, name)]))
+
 
 def _find_first_print(body):
     for (i, inst) in enumerate(body):
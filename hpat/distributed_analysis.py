@@ -1,6 +1,6 @@
 from __future__ import print_function, division, absolute_import
-from collections import namedtuple
-import copy
+from collections import namedtuple, defaultdict
+import heapq
 
 import numba
 from numba import ir, ir_utils, types
@@ -20,63 +20,167 @@ class Distribution(Enum):
 
 _dist_analysis_result = namedtuple('dist_analysis_result', 'array_dists,parfor_dists')
 
+# statement, source location and reason of an array becoming REP, source is
+# the array it inherited REP from (if any)
+_rep_cause = namedtuple('rep_cause', 'inst,loc,reason,source')
+
 distributed_analysis_extensions = {}
 
 
+class _TrackedDists(dict):
+    """distribution map that records the keys whose values changed"""
+    def __init__(self):
+        super(_TrackedDists, self).__init__()
+        self.changed = set()
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key]!=value:
+            self.changed.add(key)
+        super(_TrackedDists, self).__setitem__(key, value)
+
+
 class DistributedAnalysis(object):
     """analyze program for to distributed transfromation"""
-    def __init__(self, func_ir, typemap, calltypes):
+    def __init__(self, func_ir, typemap, calltypes, arrs_2d=()):
         self.func_ir = func_ir
         self.typemap = typemap
         self.calltypes = calltypes
+        # arrays the user requested to be 2D block distributed
+        self._arrs_2d = arrs_2d
         self._call_table,_ = get_call_table(func_ir.blocks)
         self._tuple_table = get_tuple_table(func_ir.blocks)
         self._parallel_accesses = set()
         self._T_arrs = set()
         self.second_pass = False
-        self.in_parallel_parfor = False
+        # statements in program order (including parfor bodies) as
+        # (inst, enclosing parfors) pairs, used as worklist items
+        self._stmts = []
+        # variable name -> indices of statements that use it
+        self._var_users = defaultdict(list)
+        # parfor id -> statement indices of parfors nested inside it
+        self._nested_parfors = defaultdict(list)
+        # parfor id -> (parallel arrays, index pattern forces REP)
+        self._parfor_info = {}
+        # parfor id -> arrays accumulated into at data-dependent indices
+        # (e.g. per-cluster sums of k-means), combined with allreduce
+        self._parfor_accums = {}
+        # array name -> _rep_cause of first REP decision
+        self._rep_causes = {}
+        # arrays read from files (h5/parquet)
+        self._input_arrs = set()
+        # output tuples of np.linalg.qr() (and their unpacked iterators) ->
+        # input matrix
+        self._qr_tuples = {}
+        self._curr_inst = None
 
     def run(self):
         blocks = self.func_ir.blocks
-        array_dists = {}
-        parfor_dists = {}
+        array_dists = _TrackedDists()
+        parfor_dists = _TrackedDists()
         topo_order = find_topo_order(blocks)
-        self._run_analysis(self.func_ir.blocks, topo_order, array_dists, parfor_dists)
+        for arr in self._arrs_2d:
+            if self._isarray(arr) and self.typemap[arr].ndim==2:
+                array_dists[arr] = Distribution.TwoD
+        self._collect_stmts(blocks, topo_order, [])
+        self._run_analysis(array_dists, parfor_dists)
         self.second_pass = True
-        self._run_analysis(self.func_ir.blocks, topo_order, array_dists, parfor_dists)
-
-        return _dist_analysis_result(array_dists=array_dists, parfor_dists=parfor_dists)
-
-    def _run_analysis(self, blocks, topo_order, array_dists, parfor_dists):
-        save_array_dists = {}
-        save_parfor_dists = {1:1} # dummy value
-        # fixed-point iteration
-        while array_dists!=save_array_dists or parfor_dists!=save_parfor_dists:
-            save_array_dists = copy.copy(array_dists)
-            save_parfor_dists = copy.copy(parfor_dists)
-            for label in topo_order:
-                self._analyze_block(blocks[label], array_dists, parfor_dists)
-
-    def _analyze_block(self, block, array_dists, parfor_dists):
-        for inst in block.body:
-            if isinstance(inst, ir.Assign):
-                self._analyze_assign(inst, array_dists, parfor_dists)
-            elif isinstance(inst, Parfor):
-                self._analyze_parfor(inst, array_dists, parfor_dists)
-            elif isinstance(inst, (ir.SetItem, ir.StaticSetItem)):
-                if isinstance(inst, ir.SetItem):
-                    index = inst.index.name
+        self._run_analysis(array_dists, parfor_dists)
+
+        return _dist_analysis_result(array_dists=dict(array_dists),
+                                                parfor_dists=dict(parfor_dists))
+
+    def _collect_stmts(self, blocks, topo_order, parfor_nest):
+        """flatten statements of blocks (and parfors recursively) into
+        worklist items and build the variable to statement use table
+        """
+        for label in topo_order:
+            for inst in blocks[label].body:
+                if isinstance(inst, ir.Jump):
+                    continue
+                if isinstance(inst, Parfor):
+                    # init block is analyzed in the context of the enclosing
+                    # parfor before the parfor itself
+                    init_order = find_topo_order({0: inst.init_block})
+                    self._collect_stmts({0: inst.init_block}, init_order,
+                                                                    parfor_nest)
+                    ind = self._add_stmt(inst, parfor_nest,
+                                            self._get_parfor_info(inst)[0])
+                    for p in parfor_nest:
+                        self._nested_parfors[p.id].append(ind)
+                    body = wrap_parfor_blocks(inst)
+                    body_order = [l for l in find_topo_order(body)
+                                        if body[l] is not inst.init_block]
+                    self._collect_stmts(body, body_order, parfor_nest+[inst])
+                    unwrap_parfor_blocks(inst)
                 else:
-                    index = inst.index_var.name
-                if ((inst.target.name, index) not in self._parallel_accesses):
-                    # no parallel to parallel array set (TODO)
-                    self._set_REP([inst.value], array_dists)
-            elif type(inst) in distributed_analysis_extensions:
-                # let external calls handle stmt if type matches
-                f = distributed_analysis_extensions[type(inst)]
-                f(inst, array_dists)
+                    self._add_stmt(inst, parfor_nest,
+                                        [v.name for v in inst.list_vars()])
+
+    def _add_stmt(self, inst, parfor_nest, varnames):
+        ind = len(self._stmts)
+        self._stmts.append((inst, tuple(parfor_nest)))
+        for varname in set(varnames):
+            self._var_users[varname].append(ind)
+        return ind
+
+    def _run_analysis(self, array_dists, parfor_dists):
+        # worklist iteration: start from all statements in program order and
+        # revisit only statements that use variables whose distributions
+        # changed (distributions only decrease so this terminates)
+        work_list = list(range(len(self._stmts)))
+        in_list = set(work_list)
+        while work_list:
+            ind = heapq.heappop(work_list)
+            in_list.remove(ind)
+            inst, parfor_nest = self._stmts[ind]
+            array_dists.changed.clear()
+            parfor_dists.changed.clear()
+            self._curr_inst = inst
+            self._analyze_inst(inst, parfor_nest, array_dists, parfor_dists)
+            # make sure every REP decision has a recorded cause
+            for varname in array_dists.changed:
+                if array_dists[varname]==Distribution.REP:
+                    self._add_rep_cause(varname, "used in {}".format(
+                        type(inst).__name__))
+            users = set()
+            for varname in array_dists.changed:
+                users.update(self._var_users[varname])
+            for parfor_id in parfor_dists.changed:
+                users.update(self._nested_parfors[parfor_id])
+            for user in users:
+                if user not in in_list:
+                    in_list.add(user)
+                    heapq.heappush(work_list, user)
+
+    def _analyze_inst(self, inst, parfor_nest, array_dists, parfor_dists):
+        if isinstance(inst, ir.Assign):
+            self._analyze_assign(inst, array_dists, parfor_dists)
+        elif isinstance(inst, Parfor):
+            self._analyze_parfor(inst, parfor_nest, array_dists, parfor_dists)
+        elif isinstance(inst, (ir.SetItem, ir.StaticSetItem)):
+            if isinstance(inst, ir.SetItem):
+                index = inst.index.name
             else:
-                self._set_REP(inst.list_vars(), array_dists)
+                index = inst.index_var.name
+            if ((inst.target.name, index) not in self._parallel_accesses):
+                # no parallel to parallel array set (TODO)
+                self._set_REP([inst.value], array_dists,
+                    "set into array {} with non-parallel index".format(
+                                                            inst.target.name))
+                # no distributed setitem for 2D arrays
+                if array_dists.get(inst.target.name, None)==Distribution.TwoD:
+                    self._set_REP([inst.target], array_dists,
+                                    "set into 2D array with non-parallel index")
+        elif type(inst) in distributed_analysis_extensions:
+            # let external calls handle stmt if type matches
+            f = distributed_analysis_extensions[type(inst)]
+            f(inst, array_dists)
+        elif isinstance(inst, ir.Return):
+            self._set_REP(inst.list_vars(), array_dists,
+                                                    "returned from function")
+        else:
+            self._set_REP(inst.list_vars(), array_dists,
+                        "unsupported statement {}".format(type(inst).__name__))
 
     def _analyze_assign(self, inst, array_dists, parfor_dists):
         lhs = inst.target.name
@@ -102,61 +206,192 @@ class DistributedAnalysis(object):
             return
         elif isinstance(rhs, ir.Expr) and rhs.op=='getattr' and rhs.attr=='shape':
             pass # X.shape doesn't affect X distribution
+        elif (isinstance(rhs, ir.Expr) and rhs.op in ('exhaust_iter',
+                'static_getitem') and rhs.value.name in self._qr_tuples):
+            arr = self._qr_tuples[rhs.value.name]
+            if rhs.op=='exhaust_iter':
+                self._qr_tuples[lhs] = arr
+            elif rhs.index==0:
+                # Q has the same row distribution as the input matrix
+                self._meet_array_dists(lhs, arr, array_dists)
+            else:
+                # R is small (columns x columns)
+                self._set_REP([inst.target], array_dists,
+                                                "R of np.linalg.qr()")
         elif isinstance(rhs, ir.Expr) and rhs.op=='call':
             self._analyze_call(lhs, rhs.func.name, rhs.args, array_dists)
         else:
-            self._set_REP(inst.list_vars(), array_dists)
+            self._set_REP(inst.list_vars(), array_dists,
+                                        "unsupported expression {}".format(rhs))
         return
 
-    def _analyze_parfor(self, parfor, array_dists, parfor_dists):
-        if parfor.id not in parfor_dists:
-            parfor_dists[parfor.id] = Distribution.OneD
-
-        # analyze init block first to see array definitions
-        self._analyze_block(parfor.init_block, array_dists, parfor_dists)
-        out_dist = Distribution.OneD
-        if self.in_parallel_parfor:
-            out_dist = Distribution.REP
-
+    def _get_parfor_info(self, parfor):
+        """find arrays accessed in parallel by parfor (computed once)"""
+        if parfor.id in self._parfor_info:
+            return self._parfor_info[parfor.id]
         parfor_arrs = set() # arrays this parfor accesses in parallel
+        index_rep = False
         array_accesses = ir_utils.get_array_accesses(parfor.loop_body)
         par_index_var = parfor.loop_nests[0].index_variable.name
         stencil_accesses, _ = get_stencil_accesses(parfor, self.typemap)
+        # 2D distribution needs a 2D loop nest with A[i,j] accesses only
+        is_2d = len(parfor.loop_nests)==2 and not stencil_accesses
         for (arr,index) in array_accesses:
             if index==par_index_var or index in stencil_accesses:
                 parfor_arrs.add(arr)
                 self._parallel_accesses.add((arr,index))
+                is_2d = False
             if index in self._tuple_table:
                 index_tuple = [(var.name if isinstance(var, ir.Var) else var)
                     for var in self._tuple_table[index]]
                 if index_tuple[0]==par_index_var:
                     parfor_arrs.add(arr)
                     self._parallel_accesses.add((arr,index))
+                    if is_2d and index_tuple[1:]!=[
+                            parfor.loop_nests[1].index_variable.name]:
+                        is_2d = False
                 if par_index_var in index_tuple[1:]:
-                    out_dist = Distribution.REP
+                    index_rep = True
             # TODO: check for index dependency
+        self._parfor_info[parfor.id] = (parfor_arrs, index_rep, is_2d)
+        return parfor_arrs, index_rep, is_2d
+
+    def _get_parfor_accums(self, parfor):
+        """find arrays defined outside parfor that are only updated as
+        A[ind] = A[ind] + v in its body, like A[argmin(dists)] += x. The index
+        can be any value computed in the loop (arrays also accessed with the
+        parfor index are distributed instead, see _get_parfor_info). Each
+        processor can accumulate its iterations locally and the arrays are
+        summed after the parfor.
+        """
+        if parfor.id in self._parfor_accums:
+            return self._parfor_accums[parfor.id]
+        stmts = _get_parfor_body_stmts(parfor)
+        defs = {}
+        uses = defaultdict(int)
+        for stmt in stmts:
+            if isinstance(stmt, ir.Assign):
+                defs[stmt.target.name] = stmt.value
+            for v in stmt.list_vars():
+                uses[v.name] += 1
+
+        parfor_arrs = self._get_parfor_info(parfor)[0]
+        candidates = set()
+        for stmt in stmts:
+            if (isinstance(stmt, (ir.SetItem, ir.StaticSetItem))
+                    and self._isarray(stmt.target.name)
+                    and stmt.target.name not in defs
+                    and stmt.target.name not in parfor_arrs):
+                candidates.add(stmt.target.name)
+
+        accums = set()
+        for arr in candidates:
+            updates = 0
+            reads = 0
+            is_accum = True
+            for stmt in stmts:
+                if arr not in {v.name for v in stmt.list_vars()}:
+                    continue
+                if (isinstance(stmt, ir.Assign)
+                        and isinstance(stmt.value, ir.Expr)
+                        and stmt.value.op in ('getitem', 'static_getitem')
+                        and stmt.value.value.name==arr):
+                    reads += 1
+                elif (isinstance(stmt, (ir.SetItem, ir.StaticSetItem))
+                        and stmt.target.name==arr
+                        and self._is_accum_update(stmt, arr, defs, uses)):
+                    updates += 1
+                else:
+                    is_accum = False
+            # every read should be the old value of an update
+            if is_accum and reads==updates:
+                accums.add(arr)
+        self._parfor_accums[parfor.id] = accums
+        return accums
+
+    def _is_accum_update(self, stmt, arr, defs, uses):
+        """check for A[ind] = A[ind] + v where the read of A[ind] is used only
+        in the addition
+        """
+        # static index constants are compared for static getitem/setitem
+        value = defs.get(stmt.value.name, None)
+        if not (isinstance(value, ir.Expr) and (
+                (value.op=='binop' and value.fn=='+')
+                or (value.op=='inplace_binop' and value.fn=='+='))):
+            return False
+        for operand in (value.lhs, value.rhs):
+            old = defs.get(operand.name, None)
+            if (isinstance(old, ir.Expr)
+                    and old.op in ('getitem', 'static_getitem')
+                    and old.value.name==arr and uses[operand.name]==2
+                    and self._same_index(old.index, stmt.index)):
+                return True
+        return False
 
-        for arr in parfor_arrs:
+    def _same_index(self, ind1, ind2):
+        if isinstance(ind1, ir.Var) and isinstance(ind2, ir.Var):
+            if ind1.name==ind2.name:
+                return True
+            if ind1.name in self._tuple_table and ind2.name in self._tuple_table:
+                items1 = self._tuple_table[ind1.name]
+                items2 = self._tuple_table[ind2.name]
+                return (len(items1)==len(items2) and all(
+                    (a.name==b.name if isinstance(a, ir.Var)
+                        and isinstance(b, ir.Var) else a==b)
+                    for a, b in zip(items1, items2)))
+            return False
+        return ind1==ind2
+
+    def _analyze_parfor(self, parfor, parfor_nest, array_dists, parfor_dists):
+        if parfor.id not in parfor_dists:
+            parfor_dists[parfor.id] = Distribution.OneD
+
+        # accumulated arrays are replicated and summed after the parfor
+        for arr in sorted(self._get_parfor_accums(parfor)):
+            if array_dists.get(arr, None)!=Distribution.REP:
+                self._add_rep_cause(arr, "accumulated in parfor {}".format(
+                                                                    parfor.id))
+                array_dists[arr] = Distribution.REP
+
+        out_dist = Distribution.OneD
+        reason, source = None, None
+        # parfors nested inside a parallel parfor are sequential
+        if self.second_pass and any(parfor_dists.get(p.id, None)
+                in (Distribution.OneD, Distribution.TwoD) for p in parfor_nest):
+            out_dist = Distribution.REP
+            reason = "accessed in parfor {} nested in a parallel parfor".format(
+                                                                    parfor.id)
+
+        parfor_arrs, index_rep, is_2d = self._get_parfor_info(parfor)
+        if index_rep:
+            out_dist = Distribution.REP
+            reason = ("parfor {} index is not the first array "
+                                            "index".format(parfor.id))
+        if (not is_2d and any(array_dists.get(a, None)==Distribution.TwoD
+                                                        for a in parfor_arrs)):
+            out_dist = Distribution.REP
+            reason = ("parfor {} accesses 2D distributed arrays without "
+                                            "a 2D loop nest".format(parfor.id))
+
+        for arr in sorted(parfor_arrs):
             if arr in array_dists:
+                if (array_dists[arr]==Distribution.REP
+                        and out_dist!=Distribution.REP):
+                    reason = "accessed in parfor {} with {}".format(
+                                                                parfor.id, arr)
+                    source = arr
                 out_dist = Distribution(min(out_dist.value, array_dists[arr].value))
         parfor_dists[parfor.id] = out_dist
         for arr in parfor_arrs:
             if arr in array_dists:
+                if out_dist==Distribution.REP and arr!=source:
+                    self._add_rep_cause(arr, reason, source)
                 array_dists[arr] = out_dist
 
         # TODO: find prange actually coming from user
         # for pattern in parfor.patterns:
         #     if pattern[0] == 'prange' and not self.in_parallel_parfor:
         #         parfor_dists[parfor.id] = Distribution.OneD
-
-        # run analysis recursively on parfor body
-        if self.second_pass and out_dist==Distribution.OneD:
-            self.in_parallel_parfor = True
-        blocks = wrap_parfor_blocks(parfor)
-        for b in blocks.values():
-            self._analyze_block(b, array_dists, parfor_dists)
-        unwrap_parfor_blocks(parfor)
-        self.in_parallel_parfor = False
         return
 
     def _analyze_call(self, lhs, func_var, args, array_dists):
@@ -174,15 +409,22 @@ class DistributedAnalysis(object):
         if self._is_call(func_var, [len]):
             return
 
-        if hpat.config._has_h5py and (self._is_call(func_var, ['h5read', hpat.pio_api])
-                or self._is_call(func_var, ['h5write', hpat.pio_api])):
+        if hpat.config._has_h5py and self._is_call(func_var, ['h5read', hpat.pio_api]):
+            self._input_arrs.add(args[6].name)
+            return
+
+        if hpat.config._has_h5py and self._is_call(func_var, ['h5write', hpat.pio_api]):
             return
 
         if hpat.config._has_pyarrow and call_list==[hpat.parquet_pio.read_parquet]:
+            self._input_arrs.add(args[2].name)
             return
 
-        if hpat.config._has_pyarrow and call_list==[hpat.parquet_pio.read_parquet_str]:
+        if hpat.config._has_pyarrow and call_list in (
+                                [hpat.parquet_pio.read_parquet_str],
+                                [hpat.parquet_pio.read_parquet_str_large]):
             # string read creates array in output
+            self._input_arrs.add(lhs)
             if lhs not in array_dists:
                 array_dists[lhs] = Distribution.OneD
             return
@@ -194,6 +436,63 @@ class DistributedAnalysis(object):
             self._meet_array_dists(lhs, in_arr, array_dists)
             return
 
+        if call_list in (['alltoallv_string_array', 'distributed_api', hpat],
+                        ['shuffle_string_array', 'distributed_api', hpat],
+                        [hpat.distributed_api.alltoallv_string_array],
+                        [hpat.distributed_api.shuffle_string_array]):
+            # output chunks have variable length after exchange
+            if lhs not in array_dists:
+                array_dists[lhs] = Distribution.OneD_Var
+            array_dists[lhs] = Distribution(min(array_dists[lhs].value,
+                                                Distribution.OneD_Var.value))
+            return
+
+        if self._is_call(func_var, ['alloc_str_arr_from_lens', 'str_arr_ext',
+                                                                        hpat]):
+            # string array has same distribution as its lengths array
+            self._meet_array_dists(lhs, args[0].name, array_dists)
+            return
+
+        if (len(call_list) == 2 and isinstance(call_list[1], ir.Var)
+                and call_list[0] == 'get_many' and isinstance(
+                    self.typemap[call_list[1].name], hpat.dict_ext.DistDictType)):
+            # distributed dict lookup is collective, output values have the
+            # same layout as the keys
+            self._meet_array_dists(lhs, args[0].name, array_dists)
+            return
+
+        if self._is_linalg_call(func_var, 'qr') and len(args)==1:
+            arr = args[0].name
+            if array_dists.get(arr, None)==Distribution.TwoD:
+                self._set_REP(args, array_dists,
+                                "np.linalg.qr() of 2D distributed matrix")
+            # tall-skinny QR (TSQR) of 1D matrix, Q and R are assigned when
+            # the output tuple is unpacked
+            self._qr_tuples[lhs] = arr
+            return
+
+        if (self._is_linalg_call(func_var, 'lstsq') and len(args) in (2, 3)
+                and self.typemap[args[0].name].ndim==2
+                and args[0].name not in self._T_arrs
+                and array_dists.get(args[0].name, None)!=Distribution.TwoD):
+            # least squares of a tall-skinny matrix distributed by rows uses
+            # TSQR (see dist_lstsq), rows of the right-hand side should have
+            # the same distribution. Outputs are replicated when unpacked.
+            self._meet_array_dists(args[0].name, args[1].name, array_dists)
+            return
+
+        if any(self._is_linalg_call(func_var, f)
+                                    for f in ('solve', 'lstsq', 'inv')):
+            # small systems (e.g. normal equations X.T*X w = X.T*y) are
+            # solved on every processor, which needs no communication
+            reason = "{}() of replicated system".format(
+                                            self._get_call_name(func_var))
+            self._set_REP(args, array_dists, reason)
+            if self._isarray(lhs):
+                self._add_rep_cause(lhs, reason)
+                array_dists[lhs] = Distribution.REP
+            return
+
         if self._is_call(func_var, ['dot', np]):
             arg0 = args[0].name
             arg1 = args[1].name
@@ -204,6 +503,16 @@ class DistributedAnalysis(object):
             # Fortran layout is caused by X.T and means transpose
             t0 = arg0 in self._T_arrs
             t1 = arg1 in self._T_arrs
+            if ndim0==2 and ndim1==2 and Distribution.TwoD in (dist0, dist1):
+                # 2D distributed matrix multiply, output can be 2D or REP
+                self._meet_array_dists(arg0, arg1, array_dists)
+                if lhs not in array_dists:
+                    array_dists[lhs] = Distribution.TwoD
+                if array_dists[arg0]==Distribution.REP:
+                    self._add_rep_cause(lhs, "np.dot() of REP arrays", arg0)
+                    array_dists[lhs] = Distribution.REP
+                dprint("dot 2D:", arg0, arg1)
+                return
             if ndim0==1 and ndim1==1:
                 # vector dot, both vectors should have same layout
                 new_dist = Distribution(min(array_dists[arg0].value,
@@ -215,6 +524,7 @@ class DistributedAnalysis(object):
                 # special case were arg1 vector is treated as column vector
                 # samples dot weights: np.dot(X,w)
                 # w is always REP
+                self._add_rep_cause(arg1, "weight vector of np.dot()")
                 array_dists[arg1] = Distribution.REP
                 if lhs not in array_dists:
                     array_dists[lhs] = Distribution.OneD
@@ -225,6 +535,7 @@ class DistributedAnalysis(object):
             if ndim0==1 and ndim1==2 and not t1:
                 # reduction across samples np.dot(Y,X)
                 # lhs is always REP
+                self._add_rep_cause(lhs, "reduction output of np.dot()")
                 array_dists[lhs] = Distribution.REP
                 # Y and X have same distribution
                 self._meet_array_dists(arg0, arg1, array_dists)
@@ -233,6 +544,7 @@ class DistributedAnalysis(object):
             if ndim0==2 and ndim1==2 and t0 and not t1:
                 # reduction across samples np.dot(X.T,Y)
                 # lhs is always REP
+                self._add_rep_cause(lhs, "reduction output of np.dot()")
                 array_dists[lhs] = Distribution.REP
                 # Y and X have same distribution
                 self._meet_array_dists(arg0, arg1, array_dists)
@@ -241,6 +553,7 @@ class DistributedAnalysis(object):
             if ndim0==2 and ndim1==2 and not t0 and not t1:
                 # samples dot weights: np.dot(X,w)
                 # w is always REP
+                self._add_rep_cause(arg1, "weight matrix of np.dot()")
                 array_dists[arg1] = Distribution.REP
                 self._meet_array_dists(lhs, arg0, array_dists)
                 dprint("dot case 4 Xw:", arg0, arg1)
@@ -249,12 +562,15 @@ class DistributedAnalysis(object):
         self._analyze_call_set_REP(lhs, func_var, args, array_dists)
 
     def _analyze_call_set_REP(self, lhs, func_var, args, array_dists):
+        reason = "unsupported call {}".format(self._get_call_name(func_var))
         for v in args:
             if self._isarray(v.name):
                 dprint("dist setting call arg REP {}".format(v.name))
+                self._add_rep_cause(v.name, reason)
                 array_dists[v.name] = Distribution.REP
         if self._isarray(lhs):
             dprint("dist setting call out REP {}".format(lhs))
+            self._add_rep_cause(lhs, reason)
             array_dists[lhs] = Distribution.REP
 
     def _meet_array_dists(self, arr1, arr2, array_dists):
@@ -265,16 +581,72 @@ class DistributedAnalysis(object):
 
         new_dist = Distribution(min(array_dists[arr1].value,
                                             array_dists[arr2].value))
+        # only 2D arrays can have 2D distribution
+        if new_dist==Distribution.TwoD and not (
+                self._get_ndim(arr1)==2 and self._get_ndim(arr2)==2):
+            new_dist = Distribution.REP
+        if new_dist==Distribution.REP:
+            if array_dists[arr1]!=Distribution.REP:
+                self._add_rep_cause(arr1, "same distribution as {}".format(
+                                                                    arr2), arr2)
+            if array_dists[arr2]!=Distribution.REP:
+                self._add_rep_cause(arr2, "same distribution as {}".format(
+                                                                    arr1), arr1)
         array_dists[arr1] = new_dist
         array_dists[arr2] = new_dist
 
-    def _set_REP(self, var_list, array_dists):
+    def _set_REP(self, var_list, array_dists, reason):
         for var in var_list:
             varname = var.name
             if self._isarray(varname):
                 dprint("dist setting REP {}".format(varname))
+                self._add_rep_cause(varname, reason)
                 array_dists[varname] = Distribution.REP
 
+    def _add_rep_cause(self, varname, reason, source=None):
+        # only the first cause is kept since REP is final
+        if varname not in self._rep_causes:
+            inst = self._curr_inst
+            self._rep_causes[varname] = _rep_cause(inst,
+                                        getattr(inst, 'loc', None), reason, source)
+
+    def _get_call_name(self, func_var):
+        call_list = self._call_table.get(func_var, None)
+        if not call_list:
+            return func_var
+        names = [getattr(c, '__name__', str(c)) for c in reversed(call_list)]
+        return '.'.join(names)
+
+    def get_rep_chain(self, varname):
+        """list of REP causes starting from varname following sources"""
+        chain = []
+        visited = set()
+        while varname in self._rep_causes and varname not in visited:
+            visited.add(varname)
+            cause = self._rep_causes[varname]
+            chain.append((varname, cause))
+            varname = cause.source
+        return chain
+
+    def get_rep_report(self, array_dists):
+        """text report of why each REP array is replicated"""
+        lines = []
+        rep_arrs = sorted(a for a, d in array_dists.items()
+                                                    if d==Distribution.REP)
+        for arr in rep_arrs:
+            lines.append("{} is REP:".format(arr))
+            for varname, cause in self.get_rep_chain(arr):
+                lines.append("    {}: {} ({})\n        {}".format(varname,
+                                    cause.reason, cause.loc, cause.inst))
+        if not rep_arrs:
+            lines.append("no REP arrays")
+        return '\n'.join(lines)
+
+    def _get_ndim(self, varname):
+        if not self._isarray(varname):
+            return 1
+        return self.typemap[varname].ndim
+
     def _isarray(self, varname):
         return (varname in self.typemap
             and isinstance(self.typemap[varname], numba.types.npytypes.Array))
@@ -284,6 +656,22 @@ class DistributedAnalysis(object):
             return False
         return self._call_table[func_var]==call_list
 
+    def _is_linalg_call(self, func_var, name):
+        return (self._is_call(func_var, [name, 'linalg', np])
+            or self._is_call(func_var, [getattr(np.linalg, name)]))
+
+
+def _get_parfor_body_stmts(parfor):
+    """statements of parfor body including bodies of nested parfors"""
+    stmts = []
+    for block in parfor.loop_body.values():
+        for stmt in block.body:
+            if isinstance(stmt, Parfor):
+                stmts += stmt.init_block.body
+                stmts += _get_parfor_body_stmts(stmt)
+            else:
+                stmts.append(stmt)
+    return stmts
 
 def is_array(varname, typemap):
     return True
@@ -2,6 +2,10 @@ from numba import types
 from numba.typing.templates import infer_global, AbstractTemplate
 from numba.typing import signature
 import time
+import atexit
+import json
+import numpy as np
+from hpat.str_arr_ext import StringArrayType
 
 def get_rank():
     """dummy function for C mpi get_rank"""
@@ -26,6 +30,26 @@ def get_node_portion(total_size, pes, rank):
     """get portion of size for alloc division"""
     return 0
 
+def get_grid_rows():
+    """dummy function for number of rows in 2D processor grid"""
+    return 0
+
+def get_grid_cols():
+    """dummy function for number of columns in 2D processor grid"""
+    return 0
+
+def get_grid_row_rank():
+    """dummy function for row of this processor in 2D processor grid"""
+    return 0
+
+def get_grid_col_rank():
+    """dummy function for column of this processor in 2D processor grid"""
+    return 0
+
+def dist_matmul(A, B, C, m, k, n, rep_out):
+    """dummy to implement matrix multiply of 2D distributed arrays"""
+    return 0
+
 def dist_reduce(value):
     """dummy to implement simple reductions"""
     return value
@@ -34,6 +58,50 @@ def dist_arr_reduce(arr):
     """dummy to implement array reductions"""
     return -1
 
+def dist_arr_reduce_start(arr):
+    """dummy to start a nonblocking array reduction, returns request id"""
+    return 0
+
+def dist_arr_reduce_wait(req):
+    """dummy to wait for a nonblocking array reduction"""
+    return 0
+
+def dist_arr_accum_init(arr):
+    """dummy to zero an accumulated array on processors other than rank 0"""
+    return 0
+
+def dist_allgather(in_arr, out_arr):
+    """dummy to gather in_arr of every processor into out_arr in rank order"""
+    return 0
+
+def dist_qr(A):
+    """dummy for tall-skinny QR of a matrix distributed by rows, returns Q
+    with the same rows as A and replicated R
+    """
+    return np.linalg.qr(A)
+
+def dist_lstsq(X, y, rcond=-1):
+    """dummy for least squares of a tall-skinny matrix distributed by rows
+    using TSQR, the rows of y are distributed like X
+    """
+    return np.linalg.lstsq(X, y, rcond)
+
+def dist_sched_start(n, chunk):
+    """dummy to start dynamic scheduling of n loop iterations, returns id"""
+    return 0
+
+def dist_sched_next(sched):
+    """dummy to claim the next chunk of iterations, returns its start"""
+    return 0
+
+def dist_sched_chunk_end(sched):
+    """dummy that returns end of the last claimed chunk of iterations"""
+    return 0
+
+def dist_sched_finish(sched):
+    """dummy to end dynamic scheduling of loop iterations"""
+    return 0
+
 def dist_cumsum(arr):
     """dummy to implement cumsum"""
     return arr
@@ -46,12 +114,34 @@ def dist_exscan(value):
     """dummy to implement simple exscan"""
     return value
 
+def dist_exscan_prod(value):
+    """dummy to implement exscan with product"""
+    return value
+
 def dist_setitem(arr, index, val):
     return 0
 
+def alltoallv_string_array(arr, send_counts):
+    """dummy to implement exchange of string array elements grouped by
+    destination, send_counts[p] strings are sent to processor p
+    """
+    return arr
+
+def shuffle_string_array(arr, dests):
+    """dummy to implement sending string arr[i] to processor dests[i]"""
+    return arr
+
 def dist_time():
     return time.time()
 
+def set_comm_loc(loc_id):
+    """dummy to set source location of the next communication call"""
+    return 0
+
+def trace_event(event_id, start):
+    """dummy to record end of a traced event that started at time start"""
+    return 0
+
 def irecv():
     return 0
 
@@ -61,6 +151,195 @@ def isend():
 def wait():
     return 0
 
+# source locations of instrumented communication calls, indexed by id
+_comm_locs = []
+_comm_loc_ids = {}
+# rank of this processor, set when statistics are enabled
+_comm_stats_rank = None
+
+def get_comm_loc_id(loc_str):
+    """id of a source location to pass to set_comm_loc()"""
+    if loc_str not in _comm_loc_ids:
+        _comm_loc_ids[loc_str] = len(_comm_locs)
+        _comm_locs.append(loc_str)
+    return _comm_loc_ids[loc_str]
+
+def enable_comm_stats():
+    """record calls, bytes sent and time of communication calls, and dump
+    the statistics of each processor at exit
+    """
+    global _comm_stats_rank
+    if _comm_stats_rank is None:
+        import hdist
+        _comm_stats_rank = hdist.enable_comm_stats()
+        atexit.register(dump_comm_stats)
+
+def disable_comm_stats():
+    """stop recording communication statistics, clear them and do not dump
+    them at exit, until enable_comm_stats() is called again (by compiling
+    with comm_stats=True)
+    """
+    global _comm_stats_rank
+    import hdist
+    if _comm_stats_rank is not None:
+        hdist.disable_comm_stats()
+        atexit.unregister(dump_comm_stats)
+        _comm_stats_rank = None
+    hdist.reset_comm_stats()
+
+def get_comm_stats():
+    """communication statistics of this processor as a dictionary of
+    (primitive, location) to number of calls, bytes sent and time in seconds
+    """
+    import hdist
+    stats = {}
+    for prim, loc_id, calls, nbytes, t in hdist.get_comm_stats():
+        loc = _comm_locs[loc_id] if loc_id >= 0 else "unknown"
+        stats[(prim, loc)] = {'calls': calls, 'bytes': nbytes, 'time': t}
+    return stats
+
+def reset_comm_stats():
+    import hdist
+    hdist.reset_comm_stats()
+
+def dump_comm_stats(file_name=None):
+    """write communication statistics of this processor as JSON, to
+    hpat_comm_stats_<rank>.json by default
+    """
+    if file_name is None:
+        file_name = "hpat_comm_stats_{}.json".format(_comm_stats_rank)
+    records = [dict(primitive=prim, location=loc, **v)
+                for (prim, loc), v in get_comm_stats().items()]
+    records.sort(key=lambda r: r['time'], reverse=True)
+    with open(file_name, 'w') as f:
+        json.dump({'rank': _comm_stats_rank, 'stats': records}, f, indent=1)
+
+# name, category and source location of traced events, indexed by id
+_trace_events = []
+_trace_rank = None
+
+def get_trace_event_id(name, cat, loc_str):
+    """id of a new traced event to pass to trace_event()"""
+    _trace_events.append((name, cat, loc_str))
+    return len(_trace_events)-1
+
+def enable_trace():
+    """dump the trace timeline of each processor at exit. The summary across
+    processors is not written at exit since it needs all processors and
+    would hang if one has failed, see dump_trace_summary() and
+    summarize_trace_files().
+    """
+    global _trace_rank
+    if _trace_rank is None:
+        import hdist
+        _trace_rank = hdist.get_rank()
+        atexit.register(dump_trace)
+
+def disable_trace():
+    """do not dump the trace at exit and clear the recorded events, functions
+    compiled with tracing keep recording until enable_trace() is called again
+    (by compiling with trace=True)
+    """
+    global _trace_rank
+    import hdist
+    if _trace_rank is not None:
+        atexit.unregister(dump_trace)
+        _trace_rank = None
+    hdist.reset_trace()
+
+def set_max_count(n):
+    """set maximum number of elements sent by a single MPI call, larger
+    transfers are split into pieces. Lowered in tests to exercise the split
+    paths, returns the previous value (INT_MAX by default).
+    """
+    import hdist
+    return hdist.set_max_count(n)
+
+def set_max_trace_events(n):
+    """set maximum number of trace records kept for the timeline of each
+    processor (total times of the summary include all records), returns the
+    previous value
+    """
+    import hdist
+    return hdist.set_max_trace_events(n)
+
+def get_trace():
+    """traced events of this processor in order of completion, with start
+    and end times in seconds
+    """
+    import hdist
+    return [dict(zip(('name', 'cat', 'location'), _trace_events[event_id]),
+                                                        start=start, end=end)
+                for event_id, start, end in hdist.get_trace_events()]
+
+def _get_trace_totals():
+    """total time of each traced event on this processor"""
+    import hdist
+    totals = hdist.get_trace_totals()
+    totals += [0.0]*(len(_trace_events)-len(totals))
+    return [dict(zip(('name', 'cat', 'location'), event), total=t)
+                                for event, t in zip(_trace_events, totals)]
+
+def _make_trace_summary(events, max_times, mean_times):
+    summary = []
+    for (name, cat, loc), max_time, mean_time in zip(events, max_times,
+                                                                mean_times):
+        imbalance = max_time/mean_time if mean_time > 0 else 1.0
+        summary.append({'name': name, 'cat': cat, 'location': loc,
+                'max': max_time, 'mean': mean_time, 'imbalance': imbalance})
+    summary.sort(key=lambda e: e['max'], reverse=True)
+    return summary
+
+def get_trace_summary():
+    """max and mean total time of each traced event across processors,
+    needs to be called on all processors
+    """
+    import hdist
+    times = hdist.get_trace_summary(len(_trace_events))
+    return _make_trace_summary(_trace_events, [t[0] for t in times],
+                                                    [t[1] for t in times])
+
+def dump_trace_summary(file_name="hpat_trace_summary.json"):
+    """write the summary across processors from processor 0, needs to be
+    called on all processors
+    """
+    summary = get_trace_summary()
+    if _trace_rank == 0:
+        with open(file_name, 'w') as f:
+            json.dump(summary, f, indent=1)
+
+def summarize_trace_files(file_names):
+    """summary across processors from the trace files written by
+    dump_trace() of each processor, without communication
+    """
+    totals = []
+    for file_name in file_names:
+        with open(file_name) as f:
+            totals.append({(e['name'], e['cat'], e['location']): e['total']
+                            for e in json.load(f)['otherData']['totals']})
+    events = sorted(set().union(*totals))
+    max_times = [max(t.get(e, 0.0) for t in totals) for e in events]
+    mean_times = [sum(t.get(e, 0.0) for t in totals)/len(totals)
+                                                            for e in events]
+    return _make_trace_summary(events, max_times, mean_times)
+
+def dump_trace(file_name=None):
+    """write the trace of this processor in Chrome trace format, to
+    hpat_trace_<rank>.json by default, with total time of each traced event
+    for summarize_trace_files()
+    """
+    import hdist
+    if file_name is None:
+        file_name = "hpat_trace_{}.json".format(_trace_rank)
+    events = [{'name': e['name'], 'cat': e['cat'], 'ph': 'X',
+                'ts': e['start']*1e6, 'dur': (e['end']-e['start'])*1e6,
+                'pid': _trace_rank, 'tid': 0, 'args': {'location': e['location']}}
+                for e in get_trace()]
+    other = {'rank': _trace_rank, 'dropped': hdist.get_trace_dropped(),
+                'totals': _get_trace_totals()}
+    with open(file_name, 'w') as f:
+        json.dump({'traceEvents': events, 'otherData': other}, f)
+
 @infer_global(get_rank)
 class DistRank(AbstractTemplate):
     def generic(self, args, kws):
@@ -75,6 +354,23 @@ class DistSize(AbstractTemplate):
         assert len(args)==0
         return signature(types.int32, *args)
 
+@infer_global(get_grid_rows)
+@infer_global(get_grid_cols)
+@infer_global(get_grid_row_rank)
+@infer_global(get_grid_col_rank)
+class DistGrid(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==0
+        return signature(types.int32, *args)
+
+@infer_global(dist_matmul)
+class DistMatmul(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==7
+        return signature(types.int32, *args)
+
 @infer_global(get_start)
 class DistStart(AbstractTemplate):
     def generic(self, args, kws):
@@ -104,6 +400,7 @@ class DistReduce(AbstractTemplate):
         return signature(args[0], *args)
 
 @infer_global(dist_exscan)
+@infer_global(dist_exscan_prod)
 class DistExscan(AbstractTemplate):
     def generic(self, args, kws):
         assert not kws
@@ -117,6 +414,64 @@ class DistArrReduce(AbstractTemplate):
         assert len(args)==1
         return signature(types.int32, *args)
 
+@infer_global(dist_allgather)
+class DistAllgather(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        return signature(types.int32, *args)
+
+@infer_global(dist_arr_reduce_start)
+@infer_global(dist_arr_reduce_wait)
+@infer_global(dist_arr_accum_init)
+class DistArrReduceStart(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int32, *args)
+
+@infer_global(dist_qr)
+class DistQR(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        # same output types as np.linalg.qr()
+        qr_typ = self.context.resolve_value_type(np.linalg.qr)
+        qr_sig = self.context.resolve_function_type(qr_typ, args, {})
+        return signature(qr_sig.return_type, *args)
+
+@infer_global(dist_lstsq)
+class DistLstsq(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args) in (2, 3)
+        # same output types as np.linalg.lstsq()
+        lstsq_typ = self.context.resolve_value_type(np.linalg.lstsq)
+        lstsq_sig = self.context.resolve_function_type(lstsq_typ, args, {})
+        return signature(lstsq_sig.return_type, *args)
+
+@infer_global(dist_sched_start)
+class DistSchedStart(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        return signature(types.int32, *args)
+
+@infer_global(dist_sched_next)
+@infer_global(dist_sched_chunk_end)
+class DistSchedNext(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int64, *args)
+
+@infer_global(dist_sched_finish)
+class DistSchedFinish(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int32, *args)
+
 @infer_global(time.time)
 class DistTime(AbstractTemplate):
     def generic(self, args, kws):
@@ -154,6 +509,20 @@ class DistIRecv(AbstractTemplate):
         assert len(args)==5
         return signature(types.int32, *args)
 
+@infer_global(set_comm_loc)
+class DistSetCommLoc(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int32, *args)
+
+@infer_global(trace_event)
+class DistTraceEvent(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        return signature(types.int32, *args)
+
 @infer_global(wait)
 class DistWait(AbstractTemplate):
     def generic(self, args, kws):
@@ -161,6 +530,16 @@ class DistWait(AbstractTemplate):
         assert len(args)==2
         return signature(types.int32, *args)
 
+@infer_global(alltoallv_string_array)
+@infer_global(shuffle_string_array)
+class DistStrArrAlltoallv(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        assert isinstance(args[0], StringArrayType)
+        assert isinstance(args[1], types.Array)
+        return signature(args[0], *args)
+
 @infer_global(dist_setitem)
 class DistSetitem(AbstractTemplate):
     def generic(self, args, kws):
@@ -1,10 +1,13 @@
 from numba import types, cgutils
 from numba.targets.imputils import lower_builtin
+from numba.typing import signature
 from numba.targets.arrayobj import make_array
 import numba.targets.arrayobj
 import numpy as np
 import hpat
 from hpat import distributed_api
+from hpat.str_arr_ext import StringArrayType, _get_str_arr_func_name
+from hpat.utils import _h5_typ_table
 import time
 from llvmlite import ir as lir
 import hdist
@@ -17,31 +20,37 @@ ll.add_symbol('hpat_dist_get_node_portion', hdist.hpat_dist_get_node_portion)
 ll.add_symbol('hpat_dist_get_time', hdist.hpat_dist_get_time)
 ll.add_symbol('hpat_get_time', hdist.hpat_get_time)
 ll.add_symbol('hpat_barrier', hdist.hpat_barrier)
-ll.add_symbol('hpat_dist_reduce_i4', hdist.hpat_dist_reduce_i4)
-ll.add_symbol('hpat_dist_reduce_i8', hdist.hpat_dist_reduce_i8)
-ll.add_symbol('hpat_dist_reduce_f4', hdist.hpat_dist_reduce_f4)
-ll.add_symbol('hpat_dist_reduce_f8', hdist.hpat_dist_reduce_f8)
+ll.add_symbol('hpat_dist_reduce_scalar', hdist.hpat_dist_reduce_scalar)
 ll.add_symbol('hpat_dist_arr_reduce', hdist.hpat_dist_arr_reduce)
-ll.add_symbol('hpat_dist_exscan_i4', hdist.hpat_dist_exscan_i4)
-ll.add_symbol('hpat_dist_exscan_i8', hdist.hpat_dist_exscan_i8)
-ll.add_symbol('hpat_dist_exscan_f4', hdist.hpat_dist_exscan_f4)
-ll.add_symbol('hpat_dist_exscan_f8', hdist.hpat_dist_exscan_f8)
+ll.add_symbol('hpat_dist_allgather', hdist.hpat_dist_allgather)
+ll.add_symbol('hpat_dist_arr_reduce_start', hdist.hpat_dist_arr_reduce_start)
+ll.add_symbol('hpat_dist_arr_reduce_wait', hdist.hpat_dist_arr_reduce_wait)
+ll.add_symbol('hpat_dist_arr_accum_init', hdist.hpat_dist_arr_accum_init)
+ll.add_symbol('hpat_dist_sched_start', hdist.hpat_dist_sched_start)
+ll.add_symbol('hpat_dist_sched_next', hdist.hpat_dist_sched_next)
+ll.add_symbol('hpat_dist_sched_chunk_end', hdist.hpat_dist_sched_chunk_end)
+ll.add_symbol('hpat_dist_sched_finish', hdist.hpat_dist_sched_finish)
+ll.add_symbol('hpat_dist_exscan_scalar', hdist.hpat_dist_exscan_scalar)
 ll.add_symbol('hpat_dist_irecv', hdist.hpat_dist_irecv)
 ll.add_symbol('hpat_dist_isend', hdist.hpat_dist_isend)
 ll.add_symbol('hpat_dist_wait', hdist.hpat_dist_wait)
 ll.add_symbol('hpat_dist_get_item_pointer', hdist.hpat_dist_get_item_pointer)
 ll.add_symbol('hpat_get_dummy_ptr', hdist.hpat_get_dummy_ptr)
+ll.add_symbol('hpat_dist_get_grid_rows', hdist.hpat_dist_get_grid_rows)
+ll.add_symbol('hpat_dist_get_grid_cols', hdist.hpat_dist_get_grid_cols)
+ll.add_symbol('hpat_dist_get_grid_row_rank', hdist.hpat_dist_get_grid_row_rank)
+ll.add_symbol('hpat_dist_get_grid_col_rank', hdist.hpat_dist_get_grid_col_rank)
+ll.add_symbol('hpat_dist_matmul_2d', hdist.hpat_dist_matmul_2d)
+ll.add_symbol('hpat_alltoallv_string_array', hdist.hpat_alltoallv_string_array)
+ll.add_symbol('hpat_alltoallv_string_array_large',
+                                    hdist.hpat_alltoallv_string_array_large)
+ll.add_symbol('hpat_shuffle_string_array', hdist.hpat_shuffle_string_array)
+ll.add_symbol('hpat_shuffle_string_array_large',
+                                    hdist.hpat_shuffle_string_array_large)
+ll.add_symbol('hpat_comm_set_loc', hdist.hpat_comm_set_loc)
+ll.add_symbol('hpat_trace_event', hdist.hpat_trace_event)
 
 
-_h5_typ_table = {
-    types.int8:0,
-    types.uint8:1,
-    types.int32:2,
-    types.int64:3,
-    types.float32:4,
-    types.float64:5
-    }
-
 @lower_builtin(distributed_api.get_rank)
 def dist_get_rank(context, builder, sig, args):
     fnty = lir.FunctionType(lir.IntType(32), [])
@@ -54,6 +63,30 @@ def dist_get_size(context, builder, sig, args):
     fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_size")
     return builder.call(fn, [])
 
+@lower_builtin(distributed_api.get_grid_rows)
+def dist_get_grid_rows(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_grid_rows")
+    return builder.call(fn, [])
+
+@lower_builtin(distributed_api.get_grid_cols)
+def dist_get_grid_cols(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_grid_cols")
+    return builder.call(fn, [])
+
+@lower_builtin(distributed_api.get_grid_row_rank)
+def dist_get_grid_row_rank(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_grid_row_rank")
+    return builder.call(fn, [])
+
+@lower_builtin(distributed_api.get_grid_col_rank)
+def dist_get_grid_col_rank(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_grid_col_rank")
+    return builder.call(fn, [])
+
 @lower_builtin(distributed_api.get_start, types.int64, types.int32, types.int32)
 def dist_get_start(context, builder, sig, args):
     fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(64),
@@ -75,20 +108,89 @@ def dist_get_portion(context, builder, sig, args):
     fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_get_node_portion")
     return builder.call(fn, [args[0], args[1], args[2]])
 
-@lower_builtin(distributed_api.dist_reduce, types.int64)
-@lower_builtin(distributed_api.dist_reduce, types.int32)
-@lower_builtin(distributed_api.dist_reduce, types.float32)
-@lower_builtin(distributed_api.dist_reduce, types.float64)
+@lower_builtin(distributed_api.dist_reduce, types.Number)
 def lower_dist_reduce(context, builder, sig, args):
-    ltyp = args[0].type
-    fnty = lir.FunctionType(ltyp, [ltyp])
-    typ_map = {types.int32:"i4", types.int64:"i8", types.float32:"f4", types.float64:"f8"}
-    typ_str = typ_map[sig.args[0]]
-    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_reduce_{}".format(typ_str))
-    return builder.call(fn, [args[0]])
+    return _gen_scalar_reduce_call(context, builder, sig, args,
+                                                    "hpat_dist_reduce_scalar")
 
 @lower_builtin(distributed_api.dist_arr_reduce, types.npytypes.Array)
 def lower_dist_arr_reduce(context, builder, sig, args):
+    return _gen_arr_reduce_call(context, builder, sig, args,
+                                                        "hpat_dist_arr_reduce")
+
+@lower_builtin(distributed_api.dist_allgather, types.npytypes.Array,
+                                                        types.npytypes.Array)
+def lower_dist_allgather(context, builder, sig, args):
+    typ_enum = _h5_typ_table[sig.args[0].dtype]
+    in_arr = make_array(sig.args[0])(context, builder, args[0])
+    out_arr = make_array(sig.args[1])(context, builder, args[1])
+    call_args = [builder.bitcast(in_arr.data, lir.IntType(8).as_pointer()),
+                builder.bitcast(out_arr.data, lir.IntType(8).as_pointer()),
+                in_arr.nitems, lir.Constant(lir.IntType(32), typ_enum)]
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(8).as_pointer(),
+            lir.IntType(8).as_pointer(), lir.IntType(64), lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_allgather")
+    return builder.call(fn, call_args)
+
+@lower_builtin(distributed_api.dist_arr_reduce_start, types.npytypes.Array)
+def lower_dist_arr_reduce_start(context, builder, sig, args):
+    return _gen_arr_reduce_call(context, builder, sig, args,
+                                                "hpat_dist_arr_reduce_start")
+
+@lower_builtin(distributed_api.dist_arr_accum_init, types.npytypes.Array)
+def lower_dist_arr_accum_init(context, builder, sig, args):
+    return _gen_arr_reduce_call(context, builder, sig, args,
+                                                "hpat_dist_arr_accum_init")
+
+@lower_builtin(distributed_api.dist_arr_reduce_wait, types.int32)
+def lower_dist_arr_reduce_wait(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty,
+                                            name="hpat_dist_arr_reduce_wait")
+    return builder.call(fn, args)
+
+@lower_builtin(distributed_api.dist_sched_start, types.int64, types.int64)
+def lower_dist_sched_start(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(64), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_sched_start")
+    return builder.call(fn, args)
+
+@lower_builtin(distributed_api.dist_sched_next, types.int32)
+def lower_dist_sched_next(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_sched_next")
+    return builder.call(fn, args)
+
+@lower_builtin(distributed_api.dist_sched_chunk_end, types.int32)
+def lower_dist_sched_chunk_end(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty,
+                                            name="hpat_dist_sched_chunk_end")
+    return builder.call(fn, args)
+
+@lower_builtin(distributed_api.dist_sched_finish, types.int32)
+def lower_dist_sched_finish(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_sched_finish")
+    return builder.call(fn, args)
+
+def _gen_scalar_reduce_call(context, builder, sig, args, func_name,
+                                                            extra_args=()):
+    # pass the value by pointer with its type enum, the result is written
+    # in place
+    typ_enum = _h5_typ_table[sig.args[0]]
+    val_ptr = cgutils.alloca_once_value(builder, args[0])
+    call_args = [builder.bitcast(val_ptr, lir.IntType(8).as_pointer()),
+        lir.Constant(lir.IntType(32), typ_enum)]
+    call_args += [lir.Constant(lir.IntType(32), a) for a in extra_args]
+    arg_typs = [lir.IntType(8).as_pointer()]
+    arg_typs += [lir.IntType(32)]*(1+len(extra_args))
+    fnty = lir.FunctionType(lir.IntType(32), arg_typs)
+    fn = builder.module.get_or_insert_function(fnty, name=func_name)
+    builder.call(fn, call_args)
+    return builder.load(val_ptr)
+
+def _gen_arr_reduce_call(context, builder, sig, args, func_name):
     # store an int to specify data type
     typ_enum = _h5_typ_table[sig.args[0].dtype]
     typ_arg = cgutils.alloca_once_value(builder, lir.Constant(lir.IntType(32), typ_enum))
@@ -108,9 +210,84 @@ def lower_dist_arr_reduce(context, builder, sig, args):
     arg_typs = [lir.IntType(8).as_pointer(), lir.IntType(64).as_pointer(),
         lir.IntType(32), lir.IntType(32)]
     fnty = lir.FunctionType(lir.IntType(32), arg_typs)
-    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_arr_reduce")
+    fn = builder.module.get_or_insert_function(fnty, name=func_name)
+    return builder.call(fn, call_args)
+
+@lower_builtin(distributed_api.dist_matmul, types.npytypes.Array,
+    types.npytypes.Array, types.npytypes.Array, types.intp, types.intp,
+    types.intp, types.intp)
+def lower_dist_matmul(context, builder, sig, args):
+    # store an int to specify data type
+    typ_enum = _h5_typ_table[sig.args[2].dtype]
+    typ_arg = cgutils.alloca_once_value(builder, lir.Constant(lir.IntType(32), typ_enum))
+    # Fortran layout is caused by X.T and means transpose
+    trans_a = lir.Constant(lir.IntType(1), sig.args[0].layout=='F')
+    trans_b = lir.Constant(lir.IntType(1), sig.args[1].layout=='F')
+
+    A = make_array(sig.args[0])(context, builder, args[0])
+    B = make_array(sig.args[1])(context, builder, args[1])
+    C = make_array(sig.args[2])(context, builder, args[2])
+    call_args = [builder.bitcast(A.data, lir.IntType(8).as_pointer()),
+                builder.bitcast(B.data, lir.IntType(8).as_pointer()),
+                builder.bitcast(C.data, lir.IntType(8).as_pointer()),
+                args[3], args[4], args[5], builder.load(typ_arg),
+                trans_a, trans_b, builder.trunc(args[6], lir.IntType(32))]
+
+    # A, B, C, m, k, n, type enum, transpose A, transpose B, replicated C
+    arg_typs = [lir.IntType(8).as_pointer()]*3 + [lir.IntType(64)]*3 + [
+        lir.IntType(32), lir.IntType(1), lir.IntType(1), lir.IntType(32)]
+    fnty = lir.FunctionType(lir.IntType(32), arg_typs)
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_matmul_2d")
     return builder.call(fn, call_args)
 
+@lower_builtin(distributed_api.alltoallv_string_array, StringArrayType,
+                                                        types.npytypes.Array)
+def lower_alltoallv_string_array(context, builder, sig, args):
+    assert sig.args[1].dtype == types.int64
+    in_arr = cgutils.create_struct_proxy(sig.args[0])(context, builder, args[0])
+    counts = make_array(sig.args[1])(context, builder, args[1])
+    out_arr = cgutils.create_struct_proxy(sig.return_type)(context, builder)
+    # offsets, data, send counts, output offsets, output data
+    arg_typs = [lir.IntType(8).as_pointer()]*2 + [lir.IntType(64).as_pointer()
+                            ] + [lir.IntType(8).as_pointer().as_pointer()]*2
+    fnty = lir.FunctionType(lir.IntType(64), arg_typs)
+    fn = builder.module.get_or_insert_function(fnty,
+        name=_get_str_arr_func_name(sig.args[0], "hpat_alltoallv_string_array"))
+    out_arr.size = builder.call(fn, [in_arr.offsets, in_arr.data, counts.data,
+                                out_arr._get_ptr_by_name('offsets'),
+                                out_arr._get_ptr_by_name('data')])
+    _check_str_arr_exchange(context, builder, out_arr.size)
+    return out_arr._getvalue()
+
+@lower_builtin(distributed_api.shuffle_string_array, StringArrayType,
+                                                        types.npytypes.Array)
+def lower_shuffle_string_array(context, builder, sig, args):
+    assert sig.args[1].dtype == types.int32
+    in_arr = cgutils.create_struct_proxy(sig.args[0])(context, builder, args[0])
+    dests = make_array(sig.args[1])(context, builder, args[1])
+    out_arr = cgutils.create_struct_proxy(sig.return_type)(context, builder)
+    # offsets, data, size, destinations, output offsets, output data
+    arg_typs = [lir.IntType(8).as_pointer()]*2 + [lir.IntType(64),
+                    lir.IntType(32).as_pointer()] + [
+                    lir.IntType(8).as_pointer().as_pointer()]*2
+    fnty = lir.FunctionType(lir.IntType(64), arg_typs)
+    fn = builder.module.get_or_insert_function(fnty,
+        name=_get_str_arr_func_name(sig.args[0], "hpat_shuffle_string_array"))
+    out_arr.size = builder.call(fn, [in_arr.offsets, in_arr.data, in_arr.size,
+                                dests.data, out_arr._get_ptr_by_name('offsets'),
+                                out_arr._get_ptr_by_name('data')])
+    _check_str_arr_exchange(context, builder, out_arr.size)
+    return out_arr._getvalue()
+
+def _check_str_arr_exchange(context, builder, size):
+    """raise OverflowError if received character data is too large for
+    32-bit offsets (size is -1 on all processors)
+    """
+    is_error = builder.icmp_signed('<', size, size.type(0))
+    with cgutils.if_unlikely(builder, is_error):
+        context.call_conv.return_user_exc(builder, OverflowError,
+            ("received string data too large for 32-bit offsets",))
+
 @lower_builtin(time.time)
 def dist_get_time(context, builder, sig, args):
     fnty = lir.FunctionType(lir.DoubleType(), [])
@@ -132,7 +309,8 @@ def dist_barrier(context, builder, sig, args):
 @lower_builtin(distributed_api.dist_cumsum, types.npytypes.Array, types.npytypes.Array)
 def lower_dist_cumsum(context, builder, sig, args):
 
-    dtype = sig.args[0].dtype
+    # accumulate in output type (e.g. int64 for int32 input)
+    dtype = sig.args[1].dtype
     zero = dtype(0)
 
     def cumsum_impl(in_arr, out_arr):
@@ -150,21 +328,127 @@ def lower_dist_cumsum(context, builder, sig, args):
                                     prefix_var=dtype))
     return res
 
+@lower_builtin(distributed_api.dist_cumprod, types.npytypes.Array, types.npytypes.Array)
+def lower_dist_cumprod(context, builder, sig, args):
+
+    # accumulate in output type (e.g. int64 for int32 input)
+    dtype = sig.args[1].dtype
+    one = dtype(1)
+
+    # in_arr and out_arr can be the same array (computed inplace), so
+    # in_arr[i] is read before out_arr[i] is written
+    def cumprod_impl(in_arr, out_arr):
+        c = one
+        for v in np.nditer(in_arr):
+            c *= v.item()
+        prefix_var = distributed_api.dist_exscan_prod(c)
+        for i in range(in_arr.size):
+            prefix_var *= in_arr[i]
+            out_arr[i] = prefix_var
+        return 0
+
+    res = context.compile_internal(builder, cumprod_impl, sig, args,
+                                    locals=dict(c=dtype,
+                                    prefix_var=dtype))
+    return res
+
+
+@lower_builtin(distributed_api.dist_qr, types.npytypes.Array)
+def lower_dist_qr(context, builder, sig, args):
+
+    dtype = sig.args[0].dtype
+
+    # TSQR: factor local rows, allgather the d x d R factors of all
+    # processors, factor them again and apply the corresponding block of the
+    # second Q to the local Q. Like LAPACK, signs of rows of R (and columns of
+    # Q) can differ from a serial np.linalg.qr().
+    def qr_impl(A):
+        rank = distributed_api.get_rank()
+        n_pes = distributed_api.get_size()
+        n, d = A.shape
+        k = min(n, d)
+        Q1 = np.zeros((n, d), dtype)
+        R_local = np.zeros((d, d), dtype)
+        if n > 0:
+            q, r = np.linalg.qr(A)
+            Q1[:, :k] = q
+            R_local[:k, :] = r
+        R_all = np.empty((n_pes*d, d), dtype)
+        distributed_api.dist_allgather(R_local, R_all)
+        Q2, R = np.linalg.qr(R_all)
+        Q2_local = np.ascontiguousarray(Q2[rank*d:(rank+1)*d, :])
+        Q = np.asfortranarray(np.dot(Q1, Q2_local))
+        return Q, R
+
+    res = context.compile_internal(builder, qr_impl, sig, args)
+    return res
 
-@lower_builtin(distributed_api.dist_exscan, types.int64)
-@lower_builtin(distributed_api.dist_exscan, types.int32)
-@lower_builtin(distributed_api.dist_exscan, types.float32)
-@lower_builtin(distributed_api.dist_exscan, types.float64)
+@lower_builtin(distributed_api.dist_lstsq, types.npytypes.Array,
+                                                    types.npytypes.Array)
+@lower_builtin(distributed_api.dist_lstsq, types.npytypes.Array,
+                                    types.npytypes.Array, types.Number)
+def lower_dist_lstsq(context, builder, sig, args):
+
+    # residuals are real
+    res_dtype = sig.return_type.types[1].dtype
+
+    # solve R x = Q.T y using TSQR of X. Singular values and rank of R are
+    # the same as X, but residuals of the original system are computed
+    # since they are always empty for the square R.
+    if sig.args[1].ndim==1:
+        def lstsq_impl(X, y, rcond):
+            Q, R = distributed_api.dist_qr(X)
+            b = np.dot(Q.T, y)
+            distributed_api.dist_arr_reduce(b)
+            x, _res, rank, s = np.linalg.lstsq(R, b, rcond)
+            n = distributed_api.dist_reduce(X.shape[0])
+            d = X.shape[1]
+            if rank==d and n>d:
+                res = np.empty(1, res_dtype)
+                r = y - np.dot(X, x)
+                res[0] = distributed_api.dist_reduce(np.sum(np.abs(r)**2))
+            else:
+                res = np.empty(0, res_dtype)
+            return x, res, rank, s
+    else:
+        def lstsq_impl(X, y, rcond):
+            Q, R = distributed_api.dist_qr(X)
+            b = np.dot(Q.T, y)
+            distributed_api.dist_arr_reduce(b)
+            x, _res, rank, s = np.linalg.lstsq(R, b, rcond)
+            n = distributed_api.dist_reduce(X.shape[0])
+            d = X.shape[1]
+            if rank==d and n>d:
+                k = y.shape[1]
+                res = np.zeros(k, res_dtype)
+                r = y - np.dot(X, x)
+                for i in range(r.shape[0]):
+                    for j in range(k):
+                        res[j] += np.abs(r[i, j])**2
+                distributed_api.dist_arr_reduce(res)
+            else:
+                res = np.empty(0, res_dtype)
+            return x, res, rank, s
+
+    if len(args)==2:
+        # default rcond of np.linalg.lstsq()
+        sig = signature(sig.return_type, *(sig.args+(types.float64,)))
+        args = list(args)+[context.get_constant(types.float64, -1.0)]
+    res = context.compile_internal(builder, lstsq_impl, sig, args)
+    return res
+
+@lower_builtin(distributed_api.dist_exscan, types.Number)
 def lower_dist_exscan(context, builder, sig, args):
-    ltyp = args[0].type
-    fnty = lir.FunctionType(ltyp, [ltyp])
-    typ_map = {types.int32:"i4", types.int64:"i8", types.float32:"f4", types.float64:"f8"}
-    typ_str = typ_map[sig.args[0]]
-    fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_exscan_{}".format(typ_str))
-    return builder.call(fn, [args[0]])
+    return _gen_scalar_reduce_call(context, builder, sig, args,
+                                        "hpat_dist_exscan_scalar", (0,))
 
+@lower_builtin(distributed_api.dist_exscan_prod, types.Number)
+def lower_dist_exscan_prod(context, builder, sig, args):
+    return _gen_scalar_reduce_call(context, builder, sig, args,
+                                        "hpat_dist_exscan_scalar", (1,))
 
-@lower_builtin(distributed_api.irecv, types.npytypes.Array, types.int32,
+
+@lower_builtin(distributed_api.irecv, types.npytypes.Array, types.int64,
 types.int32, types.int32, types.boolean)
 def lower_dist_irecv(context, builder, sig, args):
     # store an int to specify data type
@@ -177,16 +461,16 @@ def lower_dist_irecv(context, builder, sig, args):
                 args[1], builder.load(typ_arg),
                 args[2], args[3], args[4]]
 
-    # array, size, extra arg type for type enum
-    # pe, tag, cond
+    # array, size (int64 to allow large transfers), extra arg type for type
+    # enum, pe, tag, cond
     arg_typs = [lir.IntType(8).as_pointer(),
-        lir.IntType(32), lir.IntType(32), lir.IntType(32), lir.IntType(32),
+        lir.IntType(64), lir.IntType(32), lir.IntType(32), lir.IntType(32),
         lir.IntType(1)]
     fnty = lir.FunctionType(lir.IntType(32), arg_typs)
     fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_irecv")
     return builder.call(fn, call_args)
 
-@lower_builtin(distributed_api.isend, types.npytypes.Array, types.int32,
+@lower_builtin(distributed_api.isend, types.npytypes.Array, types.int64,
 types.int32, types.int32, types.boolean)
 def lower_dist_isend(context, builder, sig, args):
     # store an int to specify data type
@@ -199,10 +483,10 @@ def lower_dist_isend(context, builder, sig, args):
                 args[1], builder.load(typ_arg),
                 args[2], args[3], args[4]]
 
-    # array, size, extra arg type for type enum
-    # pe, tag, cond
+    # array, size (int64 to allow large transfers), extra arg type for type
+    # enum, pe, tag, cond
     arg_typs = [lir.IntType(8).as_pointer(),
-        lir.IntType(32), lir.IntType(32), lir.IntType(32), lir.IntType(32),
+        lir.IntType(64), lir.IntType(32), lir.IntType(32), lir.IntType(32),
         lir.IntType(1)]
     fnty = lir.FunctionType(lir.IntType(32), arg_typs)
     fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_isend")
@@ -214,6 +498,18 @@ def lower_dist_wait(context, builder, sig, args):
     fn = builder.module.get_or_insert_function(fnty, name="hpat_dist_wait")
     return builder.call(fn, args)
 
+@lower_builtin(distributed_api.set_comm_loc, types.int32)
+def lower_set_comm_loc(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_comm_set_loc")
+    return builder.call(fn, args)
+
+@lower_builtin(distributed_api.trace_event, types.int32, types.float64)
+def lower_trace_event(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32), lir.DoubleType()])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_trace_event")
+    return builder.call(fn, args)
+
 @lower_builtin(distributed_api.dist_setitem, types.Array, types.Any, types.Any,
     types.intp, types.intp)
 def dist_setitem_array(context, builder, sig, args):
@@ -24,6 +24,8 @@ if config._has_h5py:
 
 
 df_col_funcs = ['shift', 'pct_change', 'fillna', 'sum', 'mean', 'var', 'std']
+str_funcs = ['contains', 'match', 'startswith', 'len', 'lower', 'replace',
+                                                                'split', 'get']
 LARGE_WIN_SIZE = 10
 
 def remove_hiframes(rhs, lives, call_list):
@@ -51,6 +53,10 @@ class HiFrames(object):
         # arrays that are df columns actually (pd.Series)
         self.df_cols = set()
         self.arrow_tables = {}
+        # df.column.str accessor name -> column_var
+        self.str_accessors = {}
+        # df.column.str.split(sep) call name -> [column_var, sep_var]
+        self.str_split_calls = {}
 
     def run(self):
         dprint_func_ir(self.func_ir, "starting hiframes")
@@ -113,6 +119,9 @@ class HiFrames(object):
                 res = self._handle_rolling_call(assign.target, rhs)
                 if res is not None:
                     return res
+                res = self._handle_str_call(assign.target, rhs)
+                if res is not None:
+                    return res
 
             # d = df['column']
             if (rhs.op == 'static_getitem' and rhs.value.name in self.df_vars
@@ -152,6 +161,12 @@ class HiFrames(object):
                 assign.value = df_cols[rhs.attr]
                 self.df_cols.add(lhs)  # save lhs as column
 
+            # s = df.column.str
+            if (rhs.op=='getattr' and rhs.attr == 'str' and (rhs.value.name
+                    in self.df_cols or rhs.value.name in self.str_split_calls)):
+                self.str_accessors[lhs] = rhs.value
+                return []  # remove
+
             # c = df.column.values
             if (rhs.op=='getattr' and rhs.value.name in self.df_cols and
                         rhs.attr == 'values'):
@@ -310,6 +325,120 @@ class HiFrames(object):
                 *self.rolling_calls[func_def.value.name]+[func_name, lhs])
         return None
 
+    def _handle_str_call(self, lhs, rhs):
+        """
+        Handle Series string calls like:
+          A = df.column.str.contains('AB')
+        """
+        func_def = guard(get_definition, self.func_ir, rhs.func)
+        assert func_def is not None
+        # rare case where function variable is assigned to a new variable
+        if isinstance(func_def, ir.Var):
+            rhs.func = func_def
+            return self._handle_str_call(lhs, rhs)
+        if (isinstance(func_def, ir.Expr) and func_def.op == 'getattr'
+                and func_def.value.name in self.str_accessors):
+            func_name = func_def.attr
+            if func_name not in str_funcs:
+                raise ValueError("string method {} not supported".format(
+                                                                    func_name))
+            col_var = self.str_accessors[func_def.value.name]
+            return self._gen_str_call(lhs, rhs.args, dict(rhs.kws), col_var,
+                                                                    func_name)
+        return None
+
+    def _gen_str_call(self, out_var, args, kws, col_var, func):
+        """generate parfors for string methods that access the string array
+        buffers directly. Methods with string output compute output lengths
+        first, allocate the output array, then fill it in a second parfor.
+        """
+        if col_var.name in self.str_split_calls:
+            if func != 'get':
+                raise ValueError("only str.get() supported after str.split()")
+            col_var, sep_var = self.str_split_calls[col_var.name]
+            self.df_cols.add(out_var.name)
+            return self._gen_str_out_call(out_var, col_var, [sep_var, args[0]],
+                'hpat.str_ext.split_get_len', 'hpat.str_ext.split_get_to')
+        if func == 'get':
+            raise ValueError("str.get() supported only after str.split()")
+        if func == 'split':
+            if len(args) != 1:
+                raise ValueError("separator argument to str.split() required")
+            self.str_split_calls[out_var.name] = [col_var, args[0]]
+            return []  # remove
+        self.df_cols.add(out_var.name)  # output is Series
+        if func == 'lower':
+            return self._gen_str_out_call(out_var, col_var, [],
+                        'hpat.str_ext.lower_len', 'hpat.str_ext.lower_to')
+        if func == 'replace':
+            if len(args) != 2:
+                raise ValueError("pattern and replacement arguments to "
+                                                "str.replace() required")
+            return self._gen_str_out_call(out_var, col_var, args,
+                'hpat.str_ext.replace_len', 'hpat.str_ext.replace_to')
+        if func == 'len':
+            return self._gen_str_map_call(out_var, col_var, [], 'len',
+                                                                    'np.int64')
+        if len(args) != 1:
+            raise ValueError("pattern argument to str.{}() required".format(
+                                                                        func))
+        if func == 'startswith':
+            return self._gen_str_map_call(out_var, col_var, args,
+                                        'hpat.str_ext.startswith', 'np.bool_')
+        regex = True
+        if func == 'contains' and 'regex' in kws:
+            regex = get_constant(self.func_ir, kws['regex'])
+            if regex is NOT_CONSTANT:
+                raise ValueError("regex argument to str.contains() should "
+                                                                "be constant")
+        if func == 'contains' and not regex:
+            return self._gen_str_map_call(out_var, col_var, args,
+                                    'hpat.str_ext.contains_noregex', 'np.bool_')
+        str_func = ('hpat.str_ext.match_regex' if func == 'match'
+                                            else 'hpat.str_ext.contains_regex')
+        return self._gen_str_map_call(out_var, col_var, args, str_func,
+                                                        'np.bool_', regex=True)
+
+    def _gen_str_map_call(self, out_var, col_var, args, str_func, out_dtype,
+                                                                regex=False):
+        # S[i] = str_func(A[i], args...) with pattern compiled once if regex
+        arg_names = ['arg{}'.format(i) for i in range(len(args))]
+        call_args = ['A[i]'] + arg_names
+        func_text = 'def f({}):\n'.format(', '.join(['A', 'S']+arg_names))
+        if regex:
+            func_text += '  r = hpat.str_ext.compile_regex(arg0)\n'
+            call_args = ['A[i]', 'r']
+        func_text += '  n = len(A)\n'
+        func_text += '  S = np.empty(n, {})\n'.format(out_dtype)
+        func_text += '  for i in numba.parfor.prange(n):\n'
+        func_text += '    S[i] = {}({})\n'.format(str_func, ', '.join(call_args))
+        return self._gen_str_blocks(func_text, out_var, col_var, args)
+
+    def _gen_str_out_call(self, out_var, col_var, args, len_func, fill_func):
+        # first pass computes output lengths, second pass fills output array
+        arg_names = ['arg{}'.format(i) for i in range(len(args))]
+        func_text = 'def f({}):\n'.format(', '.join(['A', 'S']+arg_names))
+        func_text += '  n = len(A)\n'
+        func_text += '  lens = np.empty(n, np.int64)\n'
+        func_text += '  for i in numba.parfor.prange(n):\n'
+        func_text += '    lens[i] = {}({})\n'.format(len_func,
+                                            ', '.join(['A[i]']+arg_names))
+        func_text += '  S = hpat.str_arr_ext.alloc_str_arr_from_lens(lens, A)\n'
+        func_text += '  for j in numba.parfor.prange(n):\n'
+        func_text += '    {}(S[j], {})\n'.format(fill_func,
+                                            ', '.join(['A[j]']+arg_names))
+        return self._gen_str_blocks(func_text, out_var, col_var, args)
+
+    def _gen_str_blocks(self, func_text, out_var, col_var, args):
+        loc_vars = {}
+        exec(func_text, {'hpat': hpat, 'np': np, 'numba': numba}, loc_vars)
+        f_blocks = get_inner_ir(loc_vars['f'])
+        replace_var_names(f_blocks, {'A': col_var.name})
+        replace_var_names(f_blocks, {'S': out_var.name})
+        for i, arg in enumerate(args):
+            replace_var_names(f_blocks, {'arg{}'.format(i): arg.name})
+        return f_blocks
+
     def _gen_column_call(self, out_var, args, col_var, func):
         if func in ['fillna', 'pct_change', 'shift']:
             self.df_cols.add(out_var.name) # output is Series except sum
@@ -599,17 +728,17 @@ class HiFrames(object):
                         and isinstance(stmt.value, ir.Expr)
                         and stmt.value.op == 'binop'
                         and stmt.value.fn in ['==', '!=']
-                        and (self.typemap[stmt.value.lhs.name] == string_array_type
-                        or self.typemap[stmt.value.rhs.name] == string_array_type)):
+                        and (isinstance(self.typemap[stmt.value.lhs.name], StringArrayType)
+                        or isinstance(self.typemap[stmt.value.rhs.name], StringArrayType))):
                     lhs = stmt.value.lhs
                     rhs = stmt.value.rhs
                     lhs_access = 'A'
                     rhs_access = 'B'
                     len_call = 'A.size'
-                    if self.typemap[lhs.name] == string_array_type:
+                    if isinstance(self.typemap[lhs.name], StringArrayType):
                         lhs_access = 'A[i]'
-                    if self.typemap[rhs.name] == string_array_type:
-                        lhs_access = 'B[i]'
+                    if isinstance(self.typemap[rhs.name], StringArrayType):
+                        rhs_access = 'B[i]'
                         len_call = 'B.size'
                     func_text = 'def f(A, B):\n'
                     func_text += '  l = {}\n'.format(len_call)
@@ -634,7 +763,7 @@ class HiFrames(object):
                         and call_table[stmt.value.func.name] ==
                                     ['fix_df_array', 'hiframes_api', hpat]
                         and isinstance(self.typemap[stmt.value.args[0].name],
-                                                (types.Array, StringArray))):
+                                                (types.Array, StringArrayType))):
                     stmt.value = stmt.value.args[0]
                 # find df['col2'] = df['col1'][arr]
                 if (isinstance(stmt, ir.Assign)
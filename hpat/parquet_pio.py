@@ -12,7 +12,9 @@ from numba.typing import signature
 import numpy as np
 from hpat.str_ext import StringType
 from hpat.str_arr_ext import StringArray
-from hpat.str_arr_ext import string_array_type
+from hpat.str_arr_ext import (string_array_type, large_string_array_type,
+                                StringArrayType, get_str_arr_type,
+                                _check_str_arr_alloc)
 
 _pq_type_to_numba = {'BOOLEAN': types.Array(types.boolean, 1, 'C'),
                     'INT32': types.Array(types.int32, 1, 'C'),
@@ -30,19 +32,33 @@ def read_parquet_str():
 def read_parquet_str_parallel():
     return 0
 
+def read_parquet_str_large():
+    return 0
+def read_parquet_str_parallel_large():
+    return 0
+
 def read_parquet_parallel():
     return 0
 
 def get_column_size_parquet():
     return 0
 
+def pq_stream_start():
+    return 0
+def pq_stream_next():
+    return 0
+def pq_stream_offset():
+    return 0
+def pq_stream_finish():
+    return 0
+
 def remove_parquet(rhs, lives, call_list):
     # the call is dead if the read array is dead
     if call_list == [read_parquet] and rhs.args[2].name not in lives:
         return True
     if call_list == [get_column_size_parquet]:
         return True
-    if call_list == [read_parquet_str]:
+    if call_list in ([read_parquet_str], [read_parquet_str_large]):
         return True
     return False
 
@@ -89,10 +105,12 @@ def get_column_read_nodes(c_type, cvar, file_name_str, i):
     func_text = ('def f():\n  col_size = get_column_size_parquet("{}", {})\n'.
             format(file_name_str, i))
     # generate strings differently
-    if c_type == string_array_type:
+    if isinstance(c_type, StringArrayType):
         # pass size for easier allocation and distributed analysis
-        func_text += '  column = read_parquet_str("{}", {}, col_size)\n'.format(
-                                                            file_name_str, i)
+        read_func = ('read_parquet_str_large' if c_type.is_large
+                                                    else 'read_parquet_str')
+        func_text += '  column = {}("{}", {}, col_size)\n'.format(
+                                            read_func, file_name_str, i)
     else:
         el_type = get_element_type(c_type.dtype)
         func_text += '  column = np.empty(col_size, dtype=np.{})\n'.format(
@@ -105,7 +123,8 @@ def get_column_read_nodes(c_type, cvar, file_name_str, i):
     _, f_block = compile_to_numba_ir(size_func,
                 {'get_column_size_parquet': get_column_size_parquet,
                 'read_parquet': read_parquet,
-                'read_parquet_str': read_parquet_str, 'np': np,
+                'read_parquet_str': read_parquet_str,
+                'read_parquet_str_large': read_parquet_str_large, 'np': np,
                 'StringArray': StringArray}).blocks.popitem()
 
     out_nodes = f_block.body[:-3]
@@ -139,8 +158,18 @@ def parquet_file_schema(file_name):
         num_cols = len(col_names)
         col_types = [_pq_type_to_numba[f.schema.column(i).physical_type]
                                                     for i in range(num_cols)]
+        # use 64-bit offsets for string columns that can exceed 4GB
+        for i in range(num_cols):
+            if col_types[i] == string_array_type:
+                col_types[i] = get_str_arr_type(
+                                        get_column_data_size(f.metadata, i))
     return col_names, col_types
 
+def get_column_data_size(metadata, col_ind):
+    """uncompressed data size of column (upper bound of string data size)"""
+    return sum(metadata.row_group(i).column(col_ind).total_uncompressed_size
+                                        for i in range(metadata.num_row_groups))
+
 @infer_global(get_column_size_parquet)
 class SizeParquetInfer(AbstractTemplate):
     def generic(self, args, kws):
@@ -172,6 +201,20 @@ class ReadParquetStrParallelInfer(AbstractTemplate):
         assert len(args)==4
         return signature(string_array_type, *args)
 
+@infer_global(read_parquet_str_large)
+class ReadParquetStrLargeInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==3
+        return signature(large_string_array_type, *args)
+
+@infer_global(read_parquet_str_parallel_large)
+class ReadParquetStrParallelLargeInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==4
+        return signature(large_string_array_type, *args)
+
 @infer_global(read_parquet_parallel)
 class ReadParallelParquetInfer(AbstractTemplate):
     def generic(self, args, kws):
@@ -180,6 +223,34 @@ class ReadParallelParquetInfer(AbstractTemplate):
         # array_ty = types.Array(ndim=1, layout='C', dtype=args[2])
         return signature(types.int32, *args)
 
+@infer_global(pq_stream_start)
+class ParquetStreamStartInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==5
+        return signature(types.int32, *args)
+
+@infer_global(pq_stream_next)
+class ParquetStreamNextInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        return signature(types.int64, *args)
+
+@infer_global(pq_stream_offset)
+class ParquetStreamOffsetInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int64, *args)
+
+@infer_global(pq_stream_finish)
+class ParquetStreamFinishInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int32, *args)
+
 from numba import cgutils
 from numba.targets.imputils import lower_builtin
 from numba.targets.arrayobj import make_array
@@ -194,6 +265,13 @@ if _has_pyarrow:
     ll.add_symbol('pq_get_size', parquet_cpp.get_size)
     ll.add_symbol('pq_read_string', parquet_cpp.read_string)
     ll.add_symbol('pq_read_string_parallel', parquet_cpp.read_string_parallel)
+    ll.add_symbol('pq_read_string_large', parquet_cpp.read_string_large)
+    ll.add_symbol('pq_read_string_parallel_large',
+                                    parquet_cpp.read_string_parallel_large)
+    ll.add_symbol('pq_stream_start', parquet_cpp.stream_start)
+    ll.add_symbol('pq_stream_next', parquet_cpp.stream_next)
+    ll.add_symbol('pq_stream_offset', parquet_cpp.stream_offset)
+    ll.add_symbol('pq_stream_finish', parquet_cpp.stream_finish)
 
 @lower_builtin(get_column_size_parquet, StringType, types.intp)
 def pq_size_lower(context, builder, sig, args):
@@ -226,8 +304,38 @@ def pq_read_parallel_lower(context, builder, sig, args):
             builder.bitcast(out_array.data, lir.IntType(8).as_pointer()),
             args[3], args[4]])
 
+@lower_builtin(pq_stream_start, StringType, types.intp, types.intp, types.intp, types.intp)
+def pq_stream_start_lower(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32),
+                            [lir.IntType(8).as_pointer(), lir.IntType(64),
+                             lir.IntType(64), lir.IntType(64), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="pq_stream_start")
+    return builder.call(fn, args)
+
+@lower_builtin(pq_stream_next, types.int32, types.Array)
+def pq_stream_next_lower(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64),
+                            [lir.IntType(32), lir.IntType(8).as_pointer()])
+    out_array = make_array(sig.args[1])(context, builder, args[1])
+    fn = builder.module.get_or_insert_function(fnty, name="pq_stream_next")
+    return builder.call(fn, [args[0],
+            builder.bitcast(out_array.data, lir.IntType(8).as_pointer())])
+
+@lower_builtin(pq_stream_offset, types.int32)
+def pq_stream_offset_lower(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="pq_stream_offset")
+    return builder.call(fn, args)
+
+@lower_builtin(pq_stream_finish, types.int32)
+def pq_stream_finish_lower(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="pq_stream_finish")
+    return builder.call(fn, args)
+
 # read strings
 @lower_builtin(read_parquet_str, StringType, types.intp, types.intp)
+@lower_builtin(read_parquet_str_large, StringType, types.intp, types.intp)
 def pq_read_string_lower(context, builder, sig, args):
     typ = sig.return_type
     string_array = cgutils.create_struct_proxy(typ)(context, builder)
@@ -237,27 +345,31 @@ def pq_read_string_lower(context, builder, sig, args):
                              lir.IntType(8).as_pointer().as_pointer(),
                              lir.IntType(8).as_pointer().as_pointer()])
 
-    fn = builder.module.get_or_insert_function(fnty, name="pq_read_string")
+    fn_name = "pq_read_string_large" if typ.is_large else "pq_read_string"
+    fn = builder.module.get_or_insert_function(fnty, name=fn_name)
     res = builder.call(fn, [args[0], args[1],
                             string_array._get_ptr_by_name('offsets'),
                             string_array._get_ptr_by_name('data')])
-
+    _check_str_arr_alloc(context, builder, res)
     return string_array._getvalue()
 
 @lower_builtin(read_parquet_str_parallel, StringType, types.intp, types.intp, types.intp)
+@lower_builtin(read_parquet_str_parallel_large, StringType, types.intp, types.intp, types.intp)
 def pq_read_string_parallel_lower(context, builder, sig, args):
     typ = sig.return_type
     string_array = cgutils.create_struct_proxy(typ)(context, builder)
-    string_array.size = args[2]
+    string_array.size = args[3]
     fnty = lir.FunctionType(lir.IntType(32),
                             [lir.IntType(8).as_pointer(), lir.IntType(64),
                              lir.IntType(8).as_pointer().as_pointer(),
                              lir.IntType(8).as_pointer().as_pointer(), lir.IntType(64), lir.IntType(64)])
 
-    fn = builder.module.get_or_insert_function(fnty, name="pq_read_string_parallel")
+    fn_name = ("pq_read_string_parallel_large" if typ.is_large
+                                            else "pq_read_string_parallel")
+    fn = builder.module.get_or_insert_function(fnty, name=fn_name)
     res = builder.call(fn, [args[0], args[1],
                             string_array._get_ptr_by_name('offsets'),
                             string_array._get_ptr_by_name('data'), args[2],
                             args[3]])
-
+    _check_str_arr_alloc(context, builder, res)
     return string_array._getvalue()
@@ -48,6 +48,22 @@ def h5close():
     """dummy function for C h5_close"""
     return
 
+def h5_stream_start():
+    """dummy function for C h5_stream_start"""
+    return
+
+def h5_stream_next():
+    """dummy function for C h5_stream_next"""
+    return
+
+def h5_stream_offset():
+    """dummy function for C h5_stream_offset"""
+    return
+
+def h5_stream_finish():
+    """dummy function for C h5_stream_finish"""
+    return
+
 def h5create_dset():
     """dummy function for C h5_create_dset"""
     return
@@ -81,6 +97,34 @@ class H5Read(AbstractTemplate):
         assert len(args)==7
         return signature(types.int32, *args)
 
+@infer_global(h5_stream_start)
+class H5StreamStart(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==8
+        return signature(types.int32, *args)
+
+@infer_global(h5_stream_next)
+class H5StreamNext(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==2
+        return signature(types.int64, *args)
+
+@infer_global(h5_stream_offset)
+class H5StreamOffset(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int64, *args)
+
+@infer_global(h5_stream_finish)
+class H5StreamFinish(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        assert len(args)==1
+        return signature(types.int32, *args)
+
 @infer_global(h5close)
 class H5Close(AbstractTemplate):
     def generic(self, args, kws):
@@ -2,7 +2,7 @@ from numba import types, cgutils
 from numba.targets.imputils import lower_builtin
 from numba.targets.arrayobj import make_array
 from hpat import pio_api
-from hpat.distributed_lower import _h5_typ_table
+from hpat.utils import _h5_typ_table
 from hpat.pio_api import h5file_type
 from hpat.str_ext import StringType
 import h5py
@@ -19,6 +19,10 @@ ll.add_symbol('hpat_h5_write', hio.hpat_h5_write)
 ll.add_symbol('hpat_h5_close', hio.hpat_h5_close)
 ll.add_symbol('h5g_get_num_objs', hio.h5g_get_num_objs)
 ll.add_symbol('h5g_get_objname_by_idx', hio.h5g_get_objname_by_idx)
+ll.add_symbol('hpat_h5_stream_start', hio.hpat_h5_stream_start)
+ll.add_symbol('hpat_h5_stream_next', hio.hpat_h5_stream_next)
+ll.add_symbol('hpat_h5_stream_offset', hio.hpat_h5_stream_offset)
+ll.add_symbol('hpat_h5_stream_finish', hio.hpat_h5_stream_finish)
 
 @lower_builtin(h5py.File, StringType, StringType, types.int64)
 def h5_open(context, builder, sig, args):
@@ -74,6 +78,52 @@ def h5_read(context, builder, sig, args):
 
     return builder.call(fn, call_args)
 
+@lower_builtin(pio_api.h5_stream_start, h5file_type, StringType, types.int32,
+    types.containers.UniTuple, types.containers.UniTuple, types.int64,
+    types.npytypes.Array, types.intp)
+def h5_stream_start(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                            [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="get_c_str")
+    val2 = builder.call(fn, [args[1]])
+    arg_typs = [lir.IntType(32), lir.IntType(8).as_pointer(), lir.IntType(32),
+        lir.IntType(64).as_pointer(), lir.IntType(64).as_pointer(),
+        lir.IntType(64), lir.IntType(32), lir.IntType(64)]
+    fnty = lir.FunctionType(lir.IntType(32), arg_typs)
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_h5_stream_start")
+    # the array is only the batch buffer, its dtype gives the data type
+    start_ptr = cgutils.alloca_once(builder, args[3].type)
+    builder.store(args[3], start_ptr)
+    count_ptr = cgutils.alloca_once(builder, args[4].type)
+    builder.store(args[4], count_ptr)
+    typ_enum = _h5_typ_table[sig.args[6].dtype]
+    call_args = [args[0], val2, args[2],
+        builder.bitcast(start_ptr, lir.IntType(64).as_pointer()),
+        builder.bitcast(count_ptr, lir.IntType(64).as_pointer()), args[5],
+        lir.Constant(lir.IntType(32), typ_enum), args[7]]
+    return builder.call(fn, call_args)
+
+@lower_builtin(pio_api.h5_stream_next, types.int32, types.npytypes.Array)
+def h5_stream_next(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64),
+                            [lir.IntType(32), lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_h5_stream_next")
+    out = make_array(sig.args[1])(context, builder, args[1])
+    return builder.call(fn, [args[0],
+                builder.bitcast(out.data, lir.IntType(8).as_pointer())])
+
+@lower_builtin(pio_api.h5_stream_offset, types.int32)
+def h5_stream_offset(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_h5_stream_offset")
+    return builder.call(fn, args)
+
+@lower_builtin(pio_api.h5_stream_finish, types.int32)
+def h5_stream_finish(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
+    fn = builder.module.get_or_insert_function(fnty, name="hpat_h5_stream_finish")
+    return builder.call(fn, args)
+
 @lower_builtin(pio_api.h5close, h5file_type)
 def h5_close(context, builder, sig, args):
     fnty = lir.FunctionType(lir.IntType(32), [lir.IntType(32)])
@@ -128,15 +178,6 @@ def h5_create_group(context, builder, sig, args):
     fn = builder.module.get_or_insert_function(fnty, name="hpat_h5_create_group")
     return builder.call(fn, [args[0], val2])
 
-# _h5_str_typ_table = {
-#     'i1':0,
-#     'u1':1,
-#     'i4':2,
-#     'i8':3,
-#     'f4':4,
-#     'f8':5
-#     }
-
 @lower_builtin(pio_api.h5write, h5file_type, types.int32, types.int32,
         types.containers.UniTuple, types.containers.UniTuple, types.int64,
         types.npytypes.Array)
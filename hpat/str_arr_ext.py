@@ -1,11 +1,14 @@
+import numpy as np
 import numba
 import hpat
 from numba import types
 from numba.typing.templates import infer_global, AbstractTemplate, infer, signature
 from numba.extending import (typeof_impl, type_callable, models, register_model,
-                                make_attribute_wrapper, lower_builtin, box)
+                                make_attribute_wrapper, lower_builtin, box,
+                                unbox, NativeValue)
 from numba import cgutils
-from hpat.str_ext import string_type
+from hpat.config import _has_pyarrow
+from hpat.str_ext import string_type, string_view_type
 
 class StringArray(object):
     def __init__(self, offsets, data, size):
@@ -17,16 +20,76 @@ class StringArray(object):
         return 'StringArray({}, {}, {})'.format(self.offsets, self.data, self.size)
 
 class StringArrayType(types.Type):
-    def __init__(self):
+    def __init__(self, offset_typ=types.uint32):
+        # 64-bit offsets are used when character data can exceed 4GB
+        self.offset_typ = offset_typ
         super(StringArrayType, self).__init__(
-                                    name='StringArrayType()')
+                                    name='StringArrayType({})'.format(offset_typ))
+
+    @property
+    def is_large(self):
+        return self.offset_typ == types.int64
 
 string_array_type = StringArrayType()
+large_string_array_type = StringArrayType(types.int64)
+
+# maximum size of character data that 32-bit offsets can address
+MAX_STR_ARR_DATA_SIZE = 2**32 - 1
+
+def get_str_arr_type(data_size):
+    """choose string array type based on total size of character data"""
+    if data_size > MAX_STR_ARR_DATA_SIZE:
+        return large_string_array_type
+    return string_array_type
+
+def set_max_str_arr_data_size(size):
+    """set maximum character data size of string arrays with 32-bit offsets
+    (lowered in tests to use 64-bit offsets for small data), returns the
+    previous value
+    """
+    global MAX_STR_ARR_DATA_SIZE
+    import hstr_ext
+    import hdist
+    old_size = MAX_STR_ARR_DATA_SIZE
+    MAX_STR_ARR_DATA_SIZE = min(size, 2**32 - 1)
+    hstr_ext.set_max_str_arr_data_size(size)
+    hdist.set_max_str_arr_data_size(size)
+    return old_size
+
+def _get_str_arr_func_name(typ, name):
+    """name of C string array function for offset type of typ"""
+    if typ.is_large:
+        return name + '_large'
+    return name
 
 @typeof_impl.register(StringArray)
 def typeof_string_array(val, c):
     return string_array_type
 
+def typeof_str_arr_arg(val):
+    """string array type for arguments of hpat.jit functions that are pandas
+    string columns or 1D numpy object arrays of str, None otherwise.
+    Not registered with typeof_impl since object arrays can hold any
+    Python object and plain numba.jit functions should not see them as
+    string arrays. Total string size is only known during unboxing.
+    """
+    import pandas as pd
+    if isinstance(val, pd.Series):
+        val = val.values
+    if (isinstance(val, np.ndarray) and val.ndim == 1
+            and val.dtype == np.object_
+            and pd.api.types.infer_dtype(val, skipna=False) == 'string'):
+        return string_array_type
+    return None
+
+if _has_pyarrow:
+    import pyarrow
+
+    @typeof_impl.register(pyarrow.StringArray)
+    def typeof_arrow_string_array(val, c):
+        # choose offset size from size of the data buffer
+        return get_str_arr_type(val.buffers()[2].size)
+
 # @type_callable(StringArray)
 # def type_string_array_call(context):
 #     def typer(offset, data):
@@ -58,10 +121,11 @@ class GetItemStringArray(AbstractTemplate):
         [ary, idx] = args
         if isinstance(ary, StringArrayType):
             if isinstance(idx, types.SliceType):
-                return signature(string_array_type, *args)
+                return signature(ary, *args)
             else:
                 assert isinstance(idx, types.Integer)
-                return signature(string_type, *args)
+                # reads return a view into the data buffer, no allocation
+                return signature(string_view_type, *args)
 
 
 @infer
@@ -72,16 +136,38 @@ class CmpOpEqStringArray(AbstractTemplate):
         assert not kws
         [va, vb] = args
         # if one of the inputs is string array
-        if va==string_array_type or vb==string_array_type:
+        if isinstance(va, StringArrayType) or isinstance(vb, StringArrayType):
             # inputs should be either string array or string
-            assert va == string_array_type or va == string_type
-            assert vb == string_array_type or vb == string_type
+            assert isinstance(va, StringArrayType) or va == string_type
+            assert isinstance(vb, StringArrayType) or vb == string_type
             return signature(types.Array(types.boolean, 1, 'C'), va, vb)
 
 @infer
 class CmpOpNEqStringArray(CmpOpEqStringArray):
     key = '!='
 
+@infer_global(len)
+class LenStringArray(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        [arr] = args
+        if isinstance(arr, StringArrayType):
+            return signature(types.intp, arr)
+
+def alloc_str_arr_from_lens(lens, A):
+    """allocate string array with string lengths given in lens
+    (same type as A), used for two-pass string operations
+    """
+    return 0
+
+@infer_global(alloc_str_arr_from_lens)
+class AllocStrArrFromLensInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        [lens, arr] = args
+        assert isinstance(lens, types.Array) and isinstance(arr, StringArrayType)
+        return signature(arr, lens, arr)
+
 make_attribute_wrapper(StringArrayType, 'size', 'size')
 make_attribute_wrapper(StringArrayType, 'offsets', 'offsets')
 make_attribute_wrapper(StringArrayType, 'data', 'data')
@@ -96,6 +182,7 @@ make_attribute_wrapper(StringArrayType, 'data', 'data')
 #     return string_array._getvalue()
 
 from numba.targets.listobj import ListInstance
+from numba.targets.arrayobj import make_array
 from llvmlite import ir as lir
 import llvmlite.binding as ll
 import hstr_ext
@@ -104,8 +191,58 @@ ll.add_symbol('allocate_string_array', hstr_ext.allocate_string_array)
 ll.add_symbol('setitem_string_array', hstr_ext.setitem_string_array)
 ll.add_symbol('getitem_string_array', hstr_ext.getitem_string_array)
 ll.add_symbol('getitem_string_array_std', hstr_ext.getitem_string_array_std)
+ll.add_symbol('allocate_string_array_large', hstr_ext.allocate_string_array_large)
+ll.add_symbol('setitem_string_array_large', hstr_ext.setitem_string_array_large)
+ll.add_symbol('getitem_string_array_large', hstr_ext.getitem_string_array_large)
+ll.add_symbol('getitem_string_array_std_large',
+                                    hstr_ext.getitem_string_array_std_large)
+ll.add_symbol('allocate_string_array_lens', hstr_ext.allocate_string_array_lens)
+ll.add_symbol('allocate_string_array_lens_large',
+                                    hstr_ext.allocate_string_array_lens_large)
+ll.add_symbol('string_array_from_str_list', hstr_ext.string_array_from_str_list)
+ll.add_symbol('string_array_from_str_list_large',
+                                    hstr_ext.string_array_from_str_list_large)
+ll.add_symbol('box_string_array', hstr_ext.box_string_array)
+ll.add_symbol('box_string_array_large', hstr_ext.box_string_array_large)
+ll.add_symbol('unbox_string_array', hstr_ext.unbox_string_array)
+ll.add_symbol('unbox_string_array_large', hstr_ext.unbox_string_array_large)
 ll.add_symbol('print_int', hstr_ext.print_int)
 
+@lower_builtin(len, StringArrayType)
+def str_arr_len_impl(context, builder, sig, args):
+    string_array = cgutils.create_struct_proxy(sig.args[0])(
+                                                    context, builder, args[0])
+    return string_array.size
+
+@lower_builtin(alloc_str_arr_from_lens, types.Array, StringArrayType)
+def alloc_str_arr_from_lens_impl(context, builder, sig, args):
+    typ = sig.return_type
+    lens = make_array(sig.args[0])(context, builder, args[0])
+    string_array = cgutils.create_struct_proxy(typ)(context, builder)
+    string_array.size = builder.extract_value(lens.shape, 0)
+    fnty = lir.FunctionType( lir.IntType(32),
+                            [lir.IntType(8).as_pointer().as_pointer(),
+                            lir.IntType(8).as_pointer().as_pointer(),
+                            lir.IntType(64).as_pointer(),
+                            lir.IntType(64)])
+    fn_alloc = builder.module.get_or_insert_function(fnty,
+                name=_get_str_arr_func_name(typ, "allocate_string_array_lens"))
+    status = builder.call(fn_alloc, [string_array._get_ptr_by_name('offsets'),
+                            string_array._get_ptr_by_name('data'),
+                            builder.bitcast(lens.data,
+                                                lir.IntType(64).as_pointer()),
+                            string_array.size])
+    _check_str_arr_alloc(context, builder, status)
+    return string_array._getvalue()
+
+def _check_str_arr_alloc(context, builder, status):
+    """raise OverflowError if string array allocation failed since
+    character data is too large for 32-bit offsets
+    """
+    with cgutils.if_unlikely(builder, cgutils.is_not_null(builder, status)):
+        context.call_conv.return_user_exc(builder, OverflowError,
+                                ("string data too large for 32-bit offsets",))
+
 @lower_builtin(StringArray)
 @lower_builtin(StringArray, types.List)
 def impl_string_array_single(context, builder, sig, args):
@@ -115,90 +252,80 @@ def impl_string_array_single(context, builder, sig, args):
         return string_array._getvalue()
 
     string_list = ListInstance(context, builder, sig.args[0], args[0])
-
-    # get total size of string buffer
-    fnty = lir.FunctionType( lir.IntType(64),
-                            [lir.IntType(8).as_pointer()])
-    fn_len = builder.module.get_or_insert_function(fnty, name="get_str_len")
-    zero = context.get_constant(types.intp, 0)
-    total_size = cgutils.alloca_once_value(builder, zero)
     string_array.size = string_list.size
 
-    # loop through all strings and get length
-    with cgutils.for_range(builder, string_list.size) as loop:
-        str_value = string_list.getitem(loop.index)
-        str_len = builder.call(fn_len, [str_value])
-        builder.store(builder.add(builder.load(total_size), str_len), total_size)
-
-    # allocate string array
-    fnty = lir.FunctionType( lir.VoidType(),
+    # list items are native string pointers, convert in a single call
+    zero = context.get_constant(types.intp, 0)
+    fnty = lir.FunctionType( lir.IntType(32),
                             [lir.IntType(8).as_pointer().as_pointer(),
                             lir.IntType(8).as_pointer().as_pointer(),
-                            lir.IntType(64),
-                            lir.IntType(64)])
-    fn_alloc = builder.module.get_or_insert_function(fnty,
-                                                name="allocate_string_array")
-    builder.call(fn_alloc, [string_array._get_ptr_by_name('offsets'),
-                            string_array._get_ptr_by_name('data'),
-                            string_list.size, builder.load(total_size)])
-
-    # set string array values
-    fnty = lir.FunctionType( lir.VoidType(),
-                            [lir.IntType(8).as_pointer(),
-                            lir.IntType(8).as_pointer(),
-                            lir.IntType(8).as_pointer(),
+                            lir.IntType(8).as_pointer().as_pointer(),
                             lir.IntType(64)])
-    fn_setitem = builder.module.get_or_insert_function(fnty,
-                                                name="setitem_string_array")
-
-    with cgutils.for_range(builder, string_list.size) as loop:
-        str_value = string_list.getitem(loop.index)
-        builder.call(fn_setitem, [string_array.offsets, string_array.data,
-                        str_value, loop.index])
+    fn_from_list = builder.module.get_or_insert_function(fnty,
+                name=_get_str_arr_func_name(typ, "string_array_from_str_list"))
+    status = builder.call(fn_from_list, [
+                        string_array._get_ptr_by_name('offsets'),
+                        string_array._get_ptr_by_name('data'),
+                        builder.bitcast(string_list._gep(zero),
+                                    lir.IntType(8).as_pointer().as_pointer()),
+                        string_list.size])
+    _check_str_arr_alloc(context, builder, status)
 
     return string_array._getvalue()
 
 @box(StringArrayType)
 def box_str(typ, val, c):
-    """
+    """create Python list of strings in a single pass over the buffers
     """
     string_array = cgutils.create_struct_proxy(typ)(c.context, c.builder, val)
 
-    # fnty = lir.FunctionType(lir.VoidType(), [lir.IntType(64)])
-    # fn_print_int = c.builder.module.get_or_insert_function(fnty,
-    #                                             name="print_int")
-    # c.builder.call(fn_print_int, [string_array.size])
-
-    string_list = c.pyapi.list_new(string_array.size)
-    res = cgutils.alloca_once(c.builder, lir.IntType(8).as_pointer())
-    c.builder.store(string_list, res)
-
     fnty = lir.FunctionType( lir.IntType(8).as_pointer(),
                             [lir.IntType(8).as_pointer(),
                             lir.IntType(8).as_pointer(),
                             lir.IntType(64)])
-    fn_getitem = c.builder.module.get_or_insert_function(fnty,
-                                                name="getitem_string_array")
-
-    with cgutils.for_range(c.builder, string_array.size) as loop:
-        c_str = c.builder.call(fn_getitem, [string_array.offsets,
-                                    string_array.data, loop.index])
-        pystr = c.pyapi.string_from_string(c_str)
-        c.pyapi.list_setitem(string_list, loop.index, pystr)
+    fn_box = c.builder.module.get_or_insert_function(fnty,
+                name=_get_str_arr_func_name(typ, "box_string_array"))
+    string_list = c.builder.call(fn_box, [string_array.offsets,
+                                    string_array.data, string_array.size])
 
     c.context.nrt.decref(c.builder, typ, val)
-    return c.builder.load(res)
+    return string_list
+
+@unbox(StringArrayType)
+def unbox_str_arr(typ, obj, c):
+    """copy numpy object array of strings or Arrow string array buffers
+    """
+    string_array = cgutils.create_struct_proxy(typ)(c.context, c.builder)
 
+    fnty = lir.FunctionType( lir.IntType(32),
+                            [lir.IntType(8).as_pointer(),
+                            lir.IntType(8).as_pointer().as_pointer(),
+                            lir.IntType(8).as_pointer().as_pointer(),
+                            lir.IntType(64).as_pointer()])
+    fn_unbox = c.builder.module.get_or_insert_function(fnty,
+                name=_get_str_arr_func_name(typ, "unbox_string_array"))
+    status = c.builder.call(fn_unbox, [obj,
+                                string_array._get_ptr_by_name('offsets'),
+                                string_array._get_ptr_by_name('data'),
+                                string_array._get_ptr_by_name('size')])
+    is_error = cgutils.is_not_null(c.builder, status)
+    return NativeValue(string_array._getvalue(), is_error=is_error)
 
 @lower_builtin('getitem', StringArrayType, types.Integer)
 def lower_string_arr_getitem(context, builder, sig, args):
     typ = sig.args[0]
     string_array = cgutils.create_struct_proxy(typ)(context, builder, args[0])
-    fnty = lir.FunctionType( lir.IntType(8).as_pointer(),
-                            [lir.IntType(8).as_pointer(),
-                            lir.IntType(8).as_pointer(),
-                            lir.IntType(64)])
-    fn_getitem = builder.module.get_or_insert_function(fnty,
-                                                name="getitem_string_array_std")
-    return builder.call(fn_getitem, [string_array.offsets,
-                                string_array.data, args[1]])
+    offset_typ = lir.IntType(typ.offset_typ.bitwidth)
+    offsets = builder.bitcast(string_array.offsets, offset_typ.as_pointer())
+    ind = context.cast(builder, args[1], sig.args[1], types.intp)
+    start = builder.load(cgutils.gep(builder, offsets, ind))
+    end = builder.load(cgutils.gep(builder, offsets,
+                                builder.add(ind, ind.type(1))))
+    if typ.offset_typ.bitwidth < 64:
+        # uint32 offsets are zero extended
+        start = builder.zext(start, lir.IntType(64))
+        end = builder.zext(end, lir.IntType(64))
+    view = cgutils.create_struct_proxy(string_view_type)(context, builder)
+    view.data = builder.gep(string_array.data, [start])
+    view.length = builder.sub(end, start)
+    return view._getvalue()
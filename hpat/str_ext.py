@@ -21,6 +21,28 @@ def _typeof_str(val, c):
 
 register_model(StringType)(models.OpaqueModel)
 
+class StringViewType(types.Type):
+    """pointer and length into character data owned by another object
+    (e.g. StringArray), used for reads without allocation
+    """
+    def __init__(self):
+        super(StringViewType, self).__init__(name='StringViewType')
+
+    def can_convert_to(self, typingctx, other):
+        if isinstance(other, StringType):
+            return types.Conversion.safe
+
+string_view_type = StringViewType()
+
+@register_model(StringViewType)
+class StringViewModel(models.StructModel):
+    def __init__(self, dmm, fe_type):
+        members = [
+            ('data', types.voidptr),
+            ('length', types.intp),
+            ]
+        models.StructModel.__init__(self, dmm, fe_type, members)
+
 @infer
 class StringAdd(ConcreteTemplate):
     key = "+"
@@ -39,6 +61,37 @@ class StringOpEq(AbstractTemplate):
 class StringOpNotEq(StringOpEq):
     key = '!='
 
+@infer
+class StringViewOpEq(AbstractTemplate):
+    key = '=='
+    def generic(self, args, kws):
+        assert not kws
+        (arg1, arg2) = args
+        if ((isinstance(arg1, StringViewType) or isinstance(arg2, StringViewType))
+                and isinstance(arg1, (StringType, StringViewType))
+                and isinstance(arg2, (StringType, StringViewType))):
+            return signature(types.boolean, arg1, arg2)
+
+@infer
+class StringViewOpNotEq(StringViewOpEq):
+    key = '!='
+
+@infer_global(len)
+class StringViewLen(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        [arg] = args
+        if isinstance(arg, (StringType, StringViewType)):
+            return signature(types.intp, arg)
+
+@infer_global(hash)
+class StringHash(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        [arg] = args
+        if isinstance(arg, (StringType, StringViewType)):
+            return signature(types.intp, arg)
+
 @infer_getattr
 class StringAttribute(AttributeTemplate):
     key = StringType
@@ -47,7 +100,14 @@ class StringAttribute(AttributeTemplate):
     def resolve_split(self, dict, args, kws):
         assert not kws
         assert len(args) == 1
-        return signature(types.List(string_type), *args)
+        return signature(types.List(string_type), string_type)
+
+@infer_getattr
+class StringViewAttribute(StringAttribute):
+    key = StringViewType
+
+# string views are converted to strings in calls by the string signatures
+# below, since templates are matched before implicit conversions apply
 
 @infer
 class GetItemString(AbstractTemplate):
@@ -55,25 +115,25 @@ class GetItemString(AbstractTemplate):
 
     def generic(self, args, kws):
         assert not kws
-        if (len(args) == 2 and isinstance(args[0], StringType)
+        if (len(args) == 2 and isinstance(args[0], (StringType, StringViewType))
                 and isinstance(args[1], types.Integer)):
-            return signature(args[0], *args)
+            return signature(string_type, string_type, args[1])
 
 @infer_global(int)
 class StrToInt(AbstractTemplate):
     def generic(self, args, kws):
         assert not kws
         [arg] = args
-        if isinstance(arg, StringType):
-            return signature(types.intp, arg)
+        if isinstance(arg, (StringType, StringViewType)):
+            return signature(types.intp, string_type)
 
 @infer_global(float)
 class StrToFloat(AbstractTemplate):
     def generic(self, args, kws):
         assert not kws
         [arg] = args
-        if isinstance(arg, StringType):
-            return signature(types.float64, arg)
+        if isinstance(arg, (StringType, StringViewType)):
+            return signature(types.float64, string_type)
 
 import hstr_ext
 ll.add_symbol('init_string', hstr_ext.init_string)
@@ -85,6 +145,9 @@ ll.add_symbol('str_split', hstr_ext.str_split)
 ll.add_symbol('str_substr_int', hstr_ext.str_substr_int)
 ll.add_symbol('str_to_int64', hstr_ext.str_to_int64)
 ll.add_symbol('str_to_float64', hstr_ext.str_to_float64)
+ll.add_symbol('get_str_len', hstr_ext.get_str_len)
+ll.add_symbol('str_view_equal', hstr_ext.str_view_equal)
+ll.add_symbol('str_view_hash', hstr_ext.str_view_hash)
 
 @unbox(StringType)
 def unbox_string(typ, obj, c):
@@ -161,6 +224,13 @@ def string_split_impl(context, builder, sig, args):
         _list.setitem(loop.index, value)
     return impl_ret_new_ref(context, builder, sig.return_type, _list.value)
 
+@lower_builtin("str.split", string_view_type, string_type)
+def string_view_split_impl(context, builder, sig, args):
+    # receiver is not converted by the bound function call
+    s = context.cast(builder, args[0], sig.args[0], string_type)
+    new_sig = signature(sig.return_type, string_type, string_type)
+    return string_split_impl(context, builder, new_sig, [s, args[1]])
+
 @lower_builtin('getitem', StringType, types.Integer)
 def getitem_string(context, builder, sig, args):
     fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
@@ -181,3 +251,249 @@ def cast_str_to_float64(context, builder, fromty, toty, val):
     fnty = lir.FunctionType(lir.DoubleType(), [lir.IntType(8).as_pointer()])
     fn = builder.module.get_or_insert_function(fnty, name="str_to_float64")
     return builder.call(fn, (val,))
+
+def get_str_data_len(context, builder, typ, val):
+    """return character pointer and length of a string or string view"""
+    if isinstance(typ, StringViewType):
+        view = cgutils.create_struct_proxy(typ)(context, builder, val)
+        return view.data, view.length
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                            [lir.IntType(8).as_pointer()])
+    fn_data = builder.module.get_or_insert_function(fnty, name="get_c_str")
+    fnty = lir.FunctionType(lir.IntType(64), [lir.IntType(8).as_pointer()])
+    fn_len = builder.module.get_or_insert_function(fnty, name="get_str_len")
+    return builder.call(fn_data, [val]), builder.call(fn_len, [val])
+
+def _str_view_equal(context, builder, sig, args):
+    d1, l1 = get_str_data_len(context, builder, sig.args[0], args[0])
+    d2, l2 = get_str_data_len(context, builder, sig.args[1], args[1])
+    fnty = lir.FunctionType(lir.IntType(1),
+                    [lir.IntType(8).as_pointer(), lir.IntType(64),
+                    lir.IntType(8).as_pointer(), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="str_view_equal")
+    return builder.call(fn, [d1, l1, d2, l2])
+
+@lower_builtin('==', string_view_type, string_view_type)
+@lower_builtin('==', string_view_type, string_type)
+@lower_builtin('==', string_type, string_view_type)
+def string_view_eq_impl(context, builder, sig, args):
+    return _str_view_equal(context, builder, sig, args)
+
+@lower_builtin('!=', string_view_type, string_view_type)
+@lower_builtin('!=', string_view_type, string_type)
+@lower_builtin('!=', string_type, string_view_type)
+def string_view_neq_impl(context, builder, sig, args):
+    return builder.not_(_str_view_equal(context, builder, sig, args))
+
+@lower_builtin(len, string_type)
+@lower_builtin(len, string_view_type)
+def string_len_impl(context, builder, sig, args):
+    _, length = get_str_data_len(context, builder, sig.args[0], args[0])
+    return length
+
+@lower_builtin(hash, string_type)
+@lower_builtin(hash, string_view_type)
+def string_hash_impl(context, builder, sig, args):
+    # strings and views hash the same since only characters are used
+    data, length = get_str_data_len(context, builder, sig.args[0], args[0])
+    fnty = lir.FunctionType(lir.IntType(64),
+                    [lir.IntType(8).as_pointer(), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="str_view_hash")
+    return builder.call(fn, [data, length])
+
+@lower_cast(StringViewType, StringType)
+def cast_str_view_to_str(context, builder, fromty, toty, val):
+    # copies the characters, only used when a real string is required
+    data, length = get_str_data_len(context, builder, fromty, val)
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                            [lir.IntType(8).as_pointer(), lir.IntType(64)])
+    fn = builder.module.get_or_insert_function(fnty, name="init_string")
+    return builder.call(fn, [data, length])
+
+@box(StringViewType)
+def box_str_view(typ, val, c):
+    data, length = get_str_data_len(c.context, c.builder, typ, val)
+    return c.pyapi.string_from_string_and_size(data, length)
+
+# functions used by Series.str methods on string arrays, see hiframes.py
+
+class RegexType(types.Opaque):
+    def __init__(self):
+        super(RegexType, self).__init__(name='RegexType')
+
+regex_type = RegexType()
+
+register_model(RegexType)(models.OpaqueModel)
+
+def compile_regex(pat):
+    return 0
+
+def contains_regex(s, r):
+    return False
+
+def contains_noregex(s, pat):
+    return False
+
+def match_regex(s, r):
+    return False
+
+def startswith(s, pat):
+    return False
+
+def replace_len(s, pat, repl):
+    return 0
+
+def split_get_len(s, sep, ind):
+    return 0
+
+def lower_len(s):
+    return 0
+
+def lower_to(out, s):
+    return
+
+def replace_to(out, s, pat, repl):
+    return
+
+def split_get_to(out, s, sep, ind):
+    return
+
+@infer_global(compile_regex)
+class CompileRegexInfer(AbstractTemplate):
+    def generic(self, args, kws):
+        assert not kws
+        [pat] = args
+        if isinstance(pat, StringType):
+            return signature(regex_type, pat)
+
+class StrFuncInfer(AbstractTemplate):
+    """typer for functions on strings/string views with fixed return type"""
+    ret_type = types.boolean
+
+    def generic(self, args, kws):
+        assert not kws
+        if all(isinstance(a, (StringType, StringViewType, RegexType,
+                                                types.Integer)) for a in args):
+            return signature(self.ret_type, *args)
+
+@infer_global(contains_regex)
+@infer_global(contains_noregex)
+@infer_global(match_regex)
+@infer_global(startswith)
+class StrBoolFuncInfer(StrFuncInfer):
+    ret_type = types.boolean
+
+@infer_global(replace_len)
+@infer_global(split_get_len)
+@infer_global(lower_len)
+class StrLenFuncInfer(StrFuncInfer):
+    ret_type = types.intp
+
+@infer_global(lower_to)
+@infer_global(replace_to)
+@infer_global(split_get_to)
+class StrToFuncInfer(StrFuncInfer):
+    ret_type = types.none
+
+ll.add_symbol('compile_regex', hstr_ext.compile_regex)
+ll.add_symbol('str_contains_regex', hstr_ext.str_contains_regex)
+ll.add_symbol('str_match_regex', hstr_ext.str_match_regex)
+ll.add_symbol('str_contains_noregex', hstr_ext.str_contains_noregex)
+ll.add_symbol('str_startswith', hstr_ext.str_startswith)
+ll.add_symbol('str_lower_len', hstr_ext.str_lower_len)
+ll.add_symbol('str_lower_to', hstr_ext.str_lower_to)
+ll.add_symbol('str_replace_len', hstr_ext.str_replace_len)
+ll.add_symbol('str_replace_to', hstr_ext.str_replace_to)
+ll.add_symbol('str_split_get_len', hstr_ext.str_split_get_len)
+ll.add_symbol('str_split_get_to', hstr_ext.str_split_get_to)
+
+@lower_builtin(compile_regex, string_type)
+def compile_regex_impl(context, builder, sig, args):
+    fnty = lir.FunctionType(lir.IntType(8).as_pointer(),
+                            [lir.IntType(8).as_pointer()])
+    fn = builder.module.get_or_insert_function(fnty, name="compile_regex")
+    res = builder.call(fn, args)
+    with cgutils.if_unlikely(builder, cgutils.is_null(builder, res)):
+        context.call_conv.return_user_exc(builder, ValueError,
+            ("invalid regular expression or Python re syntax not supported "
+                "by ECMAScript (e.g. named groups, lookbehind, inline flags)",))
+    return res
+
+def _get_str_c_args(context, builder, typs, vals):
+    """C arguments for strings and views as (data, length) pairs, regex
+    objects as pointers and integers as int64
+    """
+    c_args = []
+    for typ, val in zip(typs, vals):
+        if isinstance(typ, (StringType, StringViewType)):
+            c_args += list(get_str_data_len(context, builder, typ, val))
+        elif isinstance(typ, RegexType):
+            c_args.append(val)
+        else:
+            c_args.append(context.cast(builder, val, typ, types.int64))
+    return c_args
+
+def _call_str_func(context, builder, sig, args, fname, ret_ir_type):
+    c_args = _get_str_c_args(context, builder, sig.args, args)
+    fnty = lir.FunctionType(ret_ir_type, [a.type for a in c_args])
+    fn = builder.module.get_or_insert_function(fnty, name=fname)
+    return builder.call(fn, c_args)
+
+@lower_builtin(contains_regex, types.Any, regex_type)
+def contains_regex_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_contains_regex",
+                                                            lir.IntType(1))
+
+@lower_builtin(match_regex, types.Any, regex_type)
+def match_regex_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_match_regex",
+                                                            lir.IntType(1))
+
+@lower_builtin(contains_noregex, types.Any, types.Any)
+def contains_noregex_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_contains_noregex",
+                                                            lir.IntType(1))
+
+@lower_builtin(startswith, types.Any, types.Any)
+def startswith_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_startswith",
+                                                            lir.IntType(1))
+
+@lower_builtin(replace_len, types.Any, types.Any, types.Any)
+def replace_len_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_replace_len",
+                                                            lir.IntType(64))
+
+@lower_builtin(lower_len, types.Any)
+def lower_len_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_lower_len",
+                                                            lir.IntType(64))
+
+@lower_builtin(split_get_len, types.Any, types.Any, types.Integer)
+def split_get_len_impl(context, builder, sig, args):
+    return _call_str_func(context, builder, sig, args, "str_split_get_len",
+                                                            lir.IntType(64))
+
+# output of *_to functions is a view into a preallocated string array slot,
+# only its data pointer is passed since the length is already set
+
+def _call_str_to_func(context, builder, sig, args, fname):
+    out, _ = get_str_data_len(context, builder, sig.args[0], args[0])
+    c_args = [out] + _get_str_c_args(context, builder, sig.args[1:], args[1:])
+    fnty = lir.FunctionType(lir.VoidType(), [a.type for a in c_args])
+    fn = builder.module.get_or_insert_function(fnty, name=fname)
+    builder.call(fn, c_args)
+    return context.get_dummy_value()
+
+@lower_builtin(lower_to, string_view_type, types.Any)
+def lower_to_impl(context, builder, sig, args):
+    return _call_str_to_func(context, builder, sig, args, "str_lower_to")
+
+@lower_builtin(replace_to, string_view_type, types.Any, types.Any, types.Any)
+def replace_to_impl(context, builder, sig, args):
+    return _call_str_to_func(context, builder, sig, args, "str_replace_to")
+
+@lower_builtin(split_get_to, string_view_type, types.Any, types.Any,
+                                                                types.Integer)
+def split_get_to_impl(context, builder, sig, args):
+    return _call_str_to_func(context, builder, sig, args, "str_split_get_to")
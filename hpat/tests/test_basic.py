@@ -0,0 +1,409 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+import numba
+import hpat
+import hdist
+from hpat.str_ext import string_type
+from hpat.tests.test_utils import (count_array_REPs, count_array_TwoDs,
+                        count_parfor_OneDs, dist_IR_contains, get_rank,
+                        barrier)
+if hpat.config._has_h5py:
+    import h5py
+if hpat.config._has_pyarrow:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+@hpat.jit
+def inner_add(a, b=3):
+    return a + b
+
+@hpat.jit
+def inner_twice(a, b=1):
+    return inner_add(a, b) + inner_add(a)
+
+DictFloatInt = hpat.dict_class(numba.float64, numba.int64)
+DictStrFloat = hpat.dict_class(string_type, numba.float64)
+DictTupleArr = hpat.dict_class(numba.types.UniTuple(numba.int64, 2),
+                                                        numba.float64[:])
+OrderedDictFloatInt = hpat.dict_class(numba.float64, numba.int64, ordered=True)
+DistDictIntFloat = hpat.dist_dict_class(numba.int64, numba.float64, 'max')
+DistDictFloatIntSum = hpat.dist_dict_class(numba.float64, numba.int64, 'sum')
+
+
+class TestBasic(unittest.TestCase):
+    def test_inline_default_arg(self):
+        def test_impl(n):
+            return inner_add(n)
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(4), test_impl(4))
+
+    def test_inline_kws(self):
+        def test_impl(n):
+            return inner_add(b=2, a=n)
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(4), test_impl(4))
+
+    def test_inline_nested(self):
+        def test_impl(n):
+            return inner_twice(n) + inner_twice(n, 5)
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(4), test_impl(4))
+
+    def test_distribution_report(self):
+        def test_impl(n):
+            X = np.ones(n)
+            return X
+        hpat_func = hpat.jit(test_impl)
+        np.testing.assert_array_equal(hpat_func(4), test_impl(4))
+        report = hpat_func.hpat_distribution_report()
+        self.assertIn("returned from function", report)
+
+    def test_dot_2D(self):
+        def test_impl(n):
+            X = np.ones((n, n))
+            Y = np.dot(X.T, X)
+            return Y.sum()
+        hpat_func = hpat.jit(distributed_2d=['X'])(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_matmul'))
+
+    def test_dot_2D_redefined(self):
+        def test_impl(n):
+            X = np.ones((n, 5))
+            X = X * 2.0
+            Y = np.dot(X.T, X)
+            return Y.sum()
+        hpat_func = hpat.jit(distributed_2d=['X'])(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertTrue(count_array_TwoDs() >= 2)
+        self.assertTrue(dist_IR_contains('dist_matmul'))
+
+    @unittest.skipUnless(hpat.config._has_h5py, "requires h5py")
+    def test_h5_read_2D(self):
+        # non-square matrices, and non-square processor grids when run on
+        # 2, 3 or 6 processors
+        def test_impl():
+            f = h5py.File("read_2d_test.hdf5", "r")
+            X = f['points'][:]
+            f.close()
+            return np.dot(X.T, X)
+        n, m = 13, 7
+        if get_rank()==0:
+            with h5py.File("read_2d_test.hdf5", "w") as f:
+                f.create_dataset('points', data=np.arange(n*m,
+                                    dtype=np.float64).reshape(n, m) % 11)
+        barrier()
+        expected = test_impl()
+        hpat_func = hpat.jit(distributed_2d=['X'])(test_impl)
+        np.testing.assert_allclose(hpat_func(), expected)
+        self.assertTrue(count_array_TwoDs() > 0)
+        self.assertTrue(dist_IR_contains('dist_matmul'))
+        barrier()
+        if get_rank()==0:
+            os.remove("read_2d_test.hdf5")
+
+    def test_dot_arr_reduce_nonblocking(self):
+        def test_impl(n):
+            X = np.ones((n, 3))
+            Y = np.arange(n) * 1.0
+            g = np.dot(Y, X)
+            s = Y.sum()
+            return g.sum() + s
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_arr_reduce_start'))
+
+    def test_arr_reduce_max_count(self):
+        # array reduction split into pieces of 2 elements
+        def test_impl(n):
+            X = np.ones((n, 7))
+            Y = np.arange(n) * 1.0
+            return np.dot(Y, X)
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        old_count = hpat.distributed_api.set_max_count(2)
+        try:
+            np.testing.assert_array_equal(hpat_func(n), test_impl(n))
+        finally:
+            hpat.distributed_api.set_max_count(old_count)
+        self.assertTrue(dist_IR_contains('dist_arr_reduce_start'))
+
+    def test_dot_arr_reduce_complex(self):
+        def test_impl(n):
+            X = np.ones((n, 3), np.complex128)
+            Y = np.arange(n) * (1.0 + 2.0j)
+            return np.dot(Y, X).sum()
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+
+    def test_reduce_int16_uint32(self):
+        def test_impl(n):
+            A = np.arange(n).astype(np.int16)
+            B = np.arange(n).astype(np.uint32)
+            s = np.int16(0)
+            t = np.uint32(0)
+            for i in hpat.prange(n):
+                s += A[i]
+                t += B[i] * np.uint32(100000)
+            return s, t
+        hpat_func = hpat.jit(locals={'s': numba.int16, 't': numba.uint32})(
+                                                                    test_impl)
+        n = 111
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_reduce'))
+
+    def test_dynamic_schedule(self):
+        def test_impl(n):
+            s = 0.0
+            for i in hpat.prange(n):
+                Y = np.ones(i % 5 + 1)
+                s += Y.sum() + i
+            return s
+        hpat_func = hpat.jit(dynamic_schedule=2)(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertTrue(dist_IR_contains('dist_sched_next'))
+
+    @unittest.skipUnless(hpat.config._has_h5py, "requires h5py")
+    def test_h5_stream(self):
+        def test_impl():
+            f = h5py.File("stream_test.hdf5", "r")
+            A = f['A'][:]
+            f.close()
+            return A.sum()
+        if get_rank()==0:
+            with h5py.File("stream_test.hdf5", "w") as f:
+                f.create_dataset('A', data=np.arange(111.0))
+        barrier()
+        hpat_func = hpat.jit(stream_batch_size=10)(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+        self.assertTrue(dist_IR_contains('h5_stream_next'))
+        barrier()
+        if get_rank()==0:
+            os.remove("stream_test.hdf5")
+
+    @unittest.skipUnless(hpat.config._has_h5py, "requires h5py")
+    def test_h5_stream_map(self):
+        # element-wise map with output array, streamed batch by batch
+        def test_impl():
+            f = h5py.File("stream_map_test.hdf5", "r")
+            A = f['A'][:]
+            f.close()
+            B = A * 2.0 + 1.0
+            return np.dot(B, B)
+        if get_rank()==0:
+            with h5py.File("stream_map_test.hdf5", "w") as f:
+                f.create_dataset('A', data=np.arange(111.0))
+        barrier()
+        hpat_func = hpat.jit(stream_batch_size=10)(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('h5_stream_next'))
+        barrier()
+        if get_rank()==0:
+            os.remove("stream_map_test.hdf5")
+
+    @unittest.skipUnless(hpat.config._has_pyarrow, "requires pyarrow")
+    def test_pq_stream(self):
+        # batches of 10 rows in row groups of 16 rows
+        def test_impl():
+            t = pq.read_table('stream_test.parquet')
+            df = t.to_pandas()
+            X = df['A'].values
+            return X.sum()
+        if get_rank()==0:
+            df = pd.DataFrame({'A': np.arange(111.0)})
+            pq.write_table(pa.Table.from_pandas(df), 'stream_test.parquet', 16)
+        barrier()
+        hpat_func = hpat.jit(stream_batch_size=10)(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+        self.assertTrue(dist_IR_contains('pq_stream_next'))
+        barrier()
+        if get_rank()==0:
+            os.remove("stream_test.parquet")
+
+    def test_dict_float_key(self):
+        def test_impl(A):
+            d = DictFloatInt()
+            for i in range(len(A)):
+                d[A[i]] = d.get(A[i], 0) + 1
+            return len(d), d[-0.0], d[1.5], 2.5 in d, 3.0 in d
+        hpat_func = hpat.jit(test_impl)
+        A = np.array([1.5, 0.0, 2.5, 1.5, -0.0, 1.5])
+        self.assertEqual(hpat_func(A), (3, 2, 3, True, False))
+
+    def test_dict_str_key(self):
+        def test_impl(S, A):
+            d = DictStrFloat()
+            for i in range(len(A)):
+                d[S[i]] = d.get(S[i], 0.0) + A[i]
+            return d.pop('AB'), d['C'], len(d)
+        hpat_func = hpat.jit(test_impl)
+        S = np.array(['AB', 'C', 'AB', 'DE', 'C', 'AB'], dtype=object)
+        A = np.arange(6.0)
+        self.assertEqual(hpat_func(S, A), (7.0, 5.0, 2))
+
+    def test_dict_tuple_key_array_val(self):
+        def test_impl(n):
+            d = DictTupleArr()
+            for i in range(n):
+                d[(i % 3, i % 2)] = np.ones(i + 1)
+            return d[(2, 1)].sum() + d[(0, 0)].sum()
+        hpat_func = hpat.jit(test_impl)
+        # keys (2, 1) and (0, 0) are last set at i=5 and i=6
+        self.assertEqual(hpat_func(11), 6.0 + 7.0)
+
+    def test_dict_iter(self):
+        def test_impl(n):
+            d = DictFloatInt()
+            for i in range(n):
+                d[i / 2] = i
+            s = 0.0
+            for k in d:
+                s += k
+            for v in d.values():
+                s += v
+            for k, v in d.items():
+                s += k * v
+            return s
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(13), test_impl(13))
+
+    def test_ordered_dict_min_pop(self):
+        def test_impl(A):
+            d = OrderedDictFloatInt()
+            for i in range(len(A)):
+                d[A[i]] = i
+            order = np.empty(len(d), np.int64)
+            j = 0
+            while d:
+                k = min(d.keys())
+                order[j] = d.pop(k)
+                j += 1
+            return order
+        hpat_func = hpat.jit(test_impl)
+        A = np.array([3.0, -1.5, 7.25, 0.0, 2.0])
+        np.testing.assert_array_equal(hpat_func(A), np.argsort(A))
+
+    def test_dist_dict_max(self):
+        def test_impl(n):
+            A = np.arange(n) % 13
+            B = np.arange(n) * 7 % 11 + 0.5
+            d = DistDictIntFloat()
+            for i in hpat.prange(n):
+                d[A[i]] = B[i]
+            d.flush()
+            K = np.arange(15)
+            return d.get_many(K, -1.0), len(d)
+        hpat_func = hpat.jit(test_impl)
+        n = 101
+        A = np.arange(n) % 13
+        B = np.arange(n) * 7 % 11 + 0.5
+        expected = np.array([B[A == k].max() if k < 13 else -1.0
+                                                        for k in range(15)])
+        vals, n_keys = hpat_func(n)
+        np.testing.assert_array_equal(vals, expected)
+        self.assertEqual(n_keys, 13)
+        self.assertTrue(count_parfor_OneDs() > 0)
+
+    def test_dist_dict_sum(self):
+        # float keys, -0.0 is looked up as 0.0
+        def test_impl(n, K):
+            A = np.arange(n) % 5 * 1.0
+            B = np.arange(n)
+            d = DistDictFloatIntSum()
+            for i in hpat.prange(n):
+                d[A[i]] = B[i]
+            d.flush()
+            return d.get_many(K, -1)
+        hpat_func = hpat.jit(test_impl)
+        n = 101
+        A = np.arange(n) % 5 * 1.0
+        B = np.arange(n)
+        K = np.array([-0.0, 1.0, 4.0, 7.0])
+        expected = np.array([B[A == k].sum() if k in A else -1 for k in K])
+        np.testing.assert_array_equal(hpat_func(n, K), expected)
+        self.assertTrue(count_parfor_OneDs() > 0)
+
+    def test_comm_stats(self):
+        def test_impl(n):
+            X = np.ones(n)
+            return X.sum()
+        hpat_func = hpat.jit(comm_stats=True)(test_impl)
+        hpat.distributed_api.reset_comm_stats()
+        try:
+            self.assertEqual(hpat_func(11), test_impl(11))
+            stats = hpat.distributed_api.get_comm_stats()
+            reduces = [v for (prim, loc), v in stats.items()
+                        if prim == 'allreduce' and 'test_impl' in loc]
+            self.assertEqual(len(reduces), 1)
+            self.assertEqual(reduces[0]['calls'], 1)
+            self.assertEqual(reduces[0]['bytes'], 8)
+        finally:
+            hpat.distributed_api.disable_comm_stats()
+        hpat_func(11)
+        self.assertEqual(hpat.distributed_api.get_comm_stats(), {})
+
+    def test_trace(self):
+        def test_impl(n):
+            X = np.ones(n)
+            return X.sum()
+        hpat_func = hpat.jit(trace=True)(test_impl)
+        try:
+            self.assertEqual(hpat_func(11), test_impl(11))
+            cats = {e['cat'] for e in hpat.distributed_api.get_trace()
+                                            if 'test_impl' in e['location']}
+            self.assertIn('parfor', cats)
+            self.assertIn('comm', cats)
+            summary = [e for e in hpat.distributed_api.get_trace_summary()
+                    if 'test_impl' in e['location'] and e['cat'] == 'parfor']
+            self.assertTrue(summary)
+            self.assertTrue(all(e['max'] >= e['mean'] for e in summary))
+        finally:
+            hpat.distributed_api.disable_trace()
+
+    def test_trace_max_events(self):
+        # timeline is capped, summary totals and trace files include all
+        # records
+        def test_impl(n):
+            X = np.ones(n)
+            return X.sum()
+        hpat_func = hpat.jit(trace=True)(test_impl)
+        # clear records of earlier tests, traced code keeps recording
+        hpat.distributed_api.disable_trace()
+        old_n = hpat.distributed_api.set_max_trace_events(1)
+        try:
+            hpat_func(11)
+            hpat_func(11)
+            self.assertEqual(len(hpat.distributed_api.get_trace()), 1)
+            self.assertTrue(hdist.get_trace_dropped() > 0)
+            summary = [e for e in hpat.distributed_api.get_trace_summary()
+                    if 'test_impl' in e['location'] and e['cat'] == 'parfor']
+            self.assertTrue(summary)
+            file_name = "hpat_trace_test_{}.json".format(get_rank())
+            hpat.distributed_api.dump_trace(file_name)
+            try:
+                file_summary = [e for e in
+                    hpat.distributed_api.summarize_trace_files([file_name])
+                    if 'test_impl' in e['location'] and e['cat'] == 'parfor']
+                self.assertEqual(len(file_summary), len(summary))
+                self.assertTrue(all(e['max'] > 0 for e in file_summary))
+            finally:
+                os.remove(file_name)
+        finally:
+            hpat.distributed_api.set_max_trace_events(old_n)
+            hpat.distributed_api.disable_trace()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import hpat
+from hpat.benchmarks.kernels import BENCHMARKS
+from hpat.benchmarks.run import add_scaling
+from hpat.benchmarks import worker
+from hpat.tests.test_utils import get_rank, barrier
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_strong_scaling(self):
+        results = [{'ranks': 1, 'time': 8.0}, {'ranks': 2, 'time': 4.0},
+                    {'ranks': 4, 'time': 4.0}]
+        add_scaling(results, False)
+        self.assertEqual([r['speedup'] for r in results], [1.0, 2.0, 2.0])
+        self.assertEqual([r['efficiency'] for r in results], [1.0, 1.0, 0.5])
+
+    def test_weak_scaling(self):
+        results = [{'ranks': 2, 'time': 4.0}, {'ranks': 4, 'time': 5.0}]
+        add_scaling(results, True)
+        self.assertEqual([r['efficiency'] for r in results], [1.0, 0.8])
+        self.assertEqual([r['speedup'] for r in results], [1.0, 1.6])
+
+    def test_benchmark_params(self):
+        for name, bench in BENCHMARKS.items():
+            self.assertIn(bench.size, bench.params, name)
+
+    def test_run_benchmarks(self):
+        # compile and run small sizes in process
+        params = {'samples': 100}
+        for name in ['filter', 'cumsum']:
+            compile_time, times = worker.run_benchmark(name, params, 2)
+            self.assertTrue(compile_time >= 0, name)
+            self.assertEqual(len(times), 2, name)
+
+    @unittest.skipUnless(hpat.config._has_h5py, "requires h5py")
+    def test_run_kmeans(self):
+        bench = BENCHMARKS['kmeans']
+        params = dict(bench.params, samples=100, iterations=2)
+        # generate the input serially like the benchmark driver
+        if get_rank()==0:
+            bench.gen(params)
+        barrier()
+        compile_time, times = worker.run_benchmark('kmeans', params, 1)
+        self.assertEqual(len(times), 1)
+        barrier()
+        if get_rank()==0:
+            os.remove("kmeans.hdf5")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,8 @@ import pandas as pd
 import numpy as np
 import hpat
 from hpat.tests.test_utils import (count_array_REPs, count_parfor_REPs,
-                            count_parfor_OneDs, count_array_OneDs, dist_IR_contains)
+                            count_parfor_OneDs, count_array_OneDs, dist_IR_contains,
+                            dist_IR_count)
 
 class TestHiFrames(unittest.TestCase):
     def test_basics(self):
@@ -34,6 +35,64 @@ class TestHiFrames(unittest.TestCase):
         self.assertEqual(count_parfor_OneDs(), 2)
         self.assertTrue(dist_IR_contains('dist_cumsum'))
 
+    def test_cumsum_input_live(self):
+        # input is used after cumsum so it can't be computed inplace
+        def test_impl(n):
+            df = pd.DataFrame({'A': np.ones(n), 'B': np.random.ranf(n)})
+            Ac = df.A.cumsum()
+            return Ac.sum() + df.A.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_cumsum'))
+
+    def test_cumsum_inplace(self):
+        # output of cumsum reuses the input buffer if the input is dead,
+        # which saves the allocation of the live input case
+        def test_impl1(n):
+            A = np.ones(n) + 1.0
+            Ac = A.cumsum()
+            return Ac.sum()
+
+        def test_impl2(n):
+            A = np.ones(n) + 1.0
+            Ac = A.cumsum()
+            return Ac.sum() + A.sum()
+
+        n = 11
+        self.assertEqual(hpat.jit(test_impl1)(n), test_impl1(n))
+        n_allocs1 = dist_IR_count('$empty_attr_attr')
+        self.assertEqual(hpat.jit(test_impl2)(n), test_impl2(n))
+        n_allocs2 = dist_IR_count('$empty_attr_attr')
+        self.assertEqual(n_allocs1, n_allocs2-1)
+
+    def test_cumsum_int32(self):
+        # cumsum of int32 is int64 so the input can't be reused
+        def test_impl(n):
+            A = np.ones(n, np.int32)
+            Ac = A.cumsum()
+            return Ac.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_cumsum'))
+
+    def test_cumprod(self):
+        def test_impl(n):
+            A = np.ones(n) + 1.0
+            Ac = A.cumprod()
+            return Ac.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertTrue(dist_IR_contains('dist_cumprod'))
+
     def test_filter1(self):
         def test_impl(n):
             df = pd.DataFrame({'A': np.ones(n), 'B': np.ones(n)})
@@ -82,6 +141,22 @@ class TestHiFrames(unittest.TestCase):
         self.assertEqual(count_array_REPs(), 0)
         self.assertEqual(count_parfor_REPs(), 0)
 
+    def test_rolling_max_count(self):
+        # halos split into messages of one element
+        def test_impl(n):
+            df = pd.DataFrame({'A': np.arange(n) + 1.0})
+            Ac = df.A.rolling(5, center=True).sum()
+            return Ac.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 21
+        old_count = hpat.distributed_api.set_max_count(1)
+        try:
+            self.assertEqual(hpat_func(n), test_impl(n))
+        finally:
+            hpat.distributed_api.set_max_count(old_count)
+        self.assertEqual(count_array_REPs(), 0)
+
     def test_rolling2(self):
         def test_impl(n):
             df = pd.DataFrame({'A': np.ones(n), 'B': np.random.ranf(n)})
@@ -131,6 +206,55 @@ class TestHiFrames(unittest.TestCase):
         self.assertEqual(count_array_REPs(), 0)
         self.assertEqual(count_parfor_REPs(), 0)
 
+    def test_rolling_shift_chain(self):
+        # second stencil reads borders of the first in the same block
+        def test_impl(n):
+            df = pd.DataFrame({'A': np.arange(n) + 1.0})
+            Ac = df.A.rolling(3).sum()
+            Bc = Ac.shift(1)
+            return Bc.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 121
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertEqual(count_parfor_REPs(), 0)
+
+    def test_rolling_fused_halos(self):
+        # halos of both columns are received in one message
+        def test_impl(n):
+            df = pd.DataFrame({'A': np.arange(n) + 1.0, 'B': np.ones(n)})
+            Ac = df.A.rolling(3).sum()
+            Am = df.A.rolling(5).mean()
+            Bc = df.B.shift(1)
+            return Ac.sum() + Am.sum() + Bc.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 121
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertEqual(count_parfor_REPs(), 0)
+        self.assertEqual(hpat.distributed.fir_text.count('attr=irecv'), 1)
+
+    def test_rolling_alias_write_halos(self):
+        # the column is changed through its values between the stencils, so
+        # the second stencil exchanges its own halos
+        def test_impl(n):
+            df = pd.DataFrame({'A': np.arange(n) + 1.0})
+            Ac = df.A.rolling(3).sum()
+            X = df.A.values
+            for i in hpat.prange(n):
+                X[i] = X[i] * 2.0
+            Bc = df.A.shift(1)
+            return Ac.sum() + Bc.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        n = 121
+        self.assertEqual(hpat_func(n), test_impl(n))
+        self.assertEqual(count_array_REPs(), 0)
+        self.assertEqual(count_parfor_REPs(), 0)
+        self.assertEqual(dist_IR_count('attr=irecv'), 2)
+
     def test_list_convert(self):
         def test_impl():
             df = pd.DataFrame({'one': np.array([-1, np.nan, 2.5]),
@@ -144,6 +268,66 @@ class TestHiFrames(unittest.TestCase):
         self.assertTrue(isinstance(two, list))
         self.assertTrue(isinstance(three, np.ndarray))
 
+    def test_str_contains(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['ABC', 'BB', 'ADEF', 'XAB']})
+            B = df.A.str.contains('AB*')
+            C = df.A.str.contains('AB', regex=False)
+            return B.values.sum() + C.values.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_str_startswith_match_len(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['ABC', 'BB', 'ADEF', 'XAB']})
+            B = df.A.str.startswith('AB')
+            C = df.A.str.match('A.')
+            D = df.A.str.len()
+            return B.values.sum() + C.values.sum() + D.values.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_str_lower_replace(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['ABC', 'BB', 'ADEF', 'XAB']})
+            B = df.A.str.lower()
+            C = df.A.str.replace('B', 'ZZ')
+            return ((B == 'abc').sum() + (C == 'XAZZ').sum()
+                                            + C.str.len().values.sum())
+
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_str_lower_unicode(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['ÉCOLE', 'Straße', 'İX', 'ABC']})
+            B = df.A.str.lower()
+            return (B == 'école').sum() + (B == 'i̇x').sum() + (B == 'abc').sum()
+
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_str_contains_unsupported_regex(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['ABC', 'BB', 'ADEF', 'XAB']})
+            B = df.A.str.contains('(?<=A)B')
+            return B.values.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        with self.assertRaises(ValueError):
+            hpat_func()
+
+    def test_str_split_get(self):
+        def test_impl():
+            df = pd.DataFrame({'A': ['AB,CC', 'BB,D', 'E,FF']})
+            B = df.A.str.split(',').str.get(1)
+            return (B == 'D').sum() + B.str.len().values.sum()
+
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
     def test_intraday(self):
         def test_impl(nsyms):
             max_num_days = 100
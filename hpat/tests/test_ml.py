@@ -86,5 +86,106 @@ class TestML(unittest.TestCase):
         self.assertEqual(count_array_OneDs(), 1)
         self.assertEqual(count_parfor_OneDs(), 2)
 
+    def test_kmeans(self):
+        def test_impl(n, d, k):
+            iterations = 3
+            X = np.ones((n, d))
+            for i in hpat.prange(n):
+                for l in range(d):
+                    X[i, l] = (i % k) + 0.1 * l + 0.01 * i
+            centroids = np.ones((k, d))
+            for j in range(k):
+                for l in range(d):
+                    centroids[j, l] = j + 0.5 * l
+            for it in range(iterations):
+                sums = np.zeros((k, d))
+                counts = np.zeros(k)
+                for i in hpat.prange(n):
+                    dist = np.empty(k)
+                    for j in range(k):
+                        dist[j] = np.sum((X[i,:] - centroids[j,:])**2)
+                    c = np.argmin(dist)
+                    for l in range(d):
+                        sums[c, l] += X[i, l]
+                    counts[c] += 1
+                # empty clusters keep their previous centroid
+                for j in range(k):
+                    if counts[j] > 0:
+                        for l in range(d):
+                            centroids[j, l] = sums[j, l] / counts[j]
+            return centroids
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        d = 4
+        k = 3
+        np.testing.assert_allclose(hpat_func(n, d, k), test_impl(n, d, k))
+        self.assertTrue(count_array_OneDs() > 0)
+        self.assertTrue(dist_IR_contains('dist_arr_accum_init'))
+
+    def test_linear_regression_normal_eq(self):
+        def test_impl(N, D):
+            p = 2
+            X = np.ones((N, D))
+            for i in hpat.prange(N):
+                for l in range(D):
+                    X[i, l] = 1.0 / (i + l + 1)
+            Y = np.ones((N, p))
+            for i in hpat.prange(N):
+                Y[i, 1] = 0.5 * i
+            A = np.dot(X.T, X)
+            B = np.dot(X.T, Y)
+            w = np.linalg.solve(A, B)
+            w2 = np.dot(np.linalg.inv(A), B)
+            w3 = np.linalg.lstsq(A, B)[0]
+            return w + w2 + w3
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        d = 4
+        np.testing.assert_allclose(hpat_func(n, d), test_impl(n, d))
+        self.assertEqual(count_array_OneDs(), 2)
+
+    def test_linear_regression_qr(self):
+        def test_impl(N, D):
+            p = 2
+            X = np.ones((N, D))
+            for i in hpat.prange(N):
+                for l in range(D):
+                    X[i, l] = 1.0 / (i + l + 1)
+            Y = np.ones((N, p))
+            for i in hpat.prange(N):
+                Y[i, 1] = 0.5 * i
+            Q, R = np.linalg.qr(X)
+            w = np.linalg.solve(R, np.dot(Q.T, Y))
+            return w
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        d = 4
+        np.testing.assert_allclose(hpat_func(n, d), test_impl(n, d))
+        self.assertTrue(count_array_OneDs() > 0)
+        self.assertTrue(dist_IR_contains('dist_qr'))
+
+    def test_linear_regression_lstsq(self):
+        def test_impl(N, D):
+            X = np.ones((N, D))
+            for i in hpat.prange(N):
+                for l in range(D):
+                    X[i, l] = 1.0 / (i + l + 1)
+            Y = np.ones(N)
+            for i in hpat.prange(N):
+                Y[i] = 0.5 * i + X[i, 0]
+            w, res, rank, s = np.linalg.lstsq(X, Y, -1.0)
+            return w, res, rank, s
+
+        hpat_func = hpat.jit(test_impl)
+        n = 11
+        d = 4
+        for a, b in zip(hpat_func(n, d), test_impl(n, d)):
+            np.testing.assert_allclose(a, b)
+        self.assertTrue(count_array_OneDs() > 0)
+        self.assertTrue(dist_IR_contains('dist_lstsq'))
+
 if __name__ == "__main__":
     unittest.main()
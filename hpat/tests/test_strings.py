@@ -1,5 +1,16 @@
 import unittest
+import numpy as np
+import pandas as pd
+import numba
 import hpat
+import hdist
+from hpat.str_arr_ext import StringArray, typeof_str_arr_arg
+from hpat.str_arr_ext import (get_str_arr_type, string_array_type,
+                                large_string_array_type,
+                                set_max_str_arr_data_size)
+from hpat.tests.test_utils import get_rank
+if hpat.config._has_pyarrow:
+    import pyarrow
 
 class TestString(unittest.TestCase):
     def test_pass_return(self):
@@ -65,5 +76,190 @@ class TestString(unittest.TestCase):
         arg = '12.2'
         self.assertEqual(hpat_func(arg), test_impl(arg))
 
+    def test_string_array_filter(self):
+        def test_impl():
+            A = StringArray(['ABC', 'BB', 'ABC', 'ABCD'])
+            return (A == 'ABC').sum() + (A != 'BB').sum()
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), 5)
+
+    def test_string_array_getitem(self):
+        def test_impl():
+            A = StringArray(['ABC', 'BB', 'CDEF'])
+            return A[1] == 'BB' and len(A[2]) == 4 and hash(A[0]) == hash('ABC')
+        hpat_func = hpat.jit(test_impl)
+        self.assertTrue(hpat_func())
+
+    def test_string_array_getitem_int_cast(self):
+        def test_impl():
+            A = StringArray(['12', '3'])
+            return int(A[0]) + int(A[1])
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_string_array_getitem_float_cast(self):
+        def test_impl():
+            A = StringArray(['1.5', '2.25'])
+            return float(A[0]) + float(A[1])
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_string_array_getitem_split(self):
+        def test_impl():
+            A = StringArray(['AB,CD', 'E,F,G'])
+            return len(A[1].split(','))
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), test_impl())
+
+    def test_string_array_getitem_getitem(self):
+        def test_impl():
+            A = StringArray(['ABC', 'BB'])
+            return A[0][0] == 'A' and A[1][1] == 'B'
+        hpat_func = hpat.jit(test_impl)
+        self.assertTrue(hpat_func())
+
+    def test_string_array_box_unbox(self):
+        def test_impl(A):
+            return A
+        hpat_func = hpat.jit(test_impl)
+        A = np.array(['AB', '', 'CDE', 'F'], dtype=object)
+        self.assertEqual(hpat_func(A), list(A))
+
+    def test_string_array_unbox_series(self):
+        def test_impl(S):
+            return S
+        hpat_func = hpat.jit(test_impl)
+        S = pd.Series(['AB', '', 'CDE', 'F'])
+        self.assertEqual(hpat_func(S), list(S))
+
+    def test_object_array_not_string_array(self):
+        # object arrays are string arrays only for hpat.jit if all elements
+        # are str, and never for plain numba.jit
+        A = np.array(['AB', 1, 'CDE'], dtype=object)
+        B = np.array(['AB', 'CDE'], dtype=object)
+        self.assertIsNone(typeof_str_arr_arg(A))
+        self.assertEqual(typeof_str_arr_arg(B), string_array_type)
+        try:
+            numba_typ = numba.typeof(B)
+        except ValueError:
+            numba_typ = None
+        self.assertNotEqual(numba_typ, string_array_type)
+
+        def test_impl(A):
+            return len(A)
+        hpat_func = hpat.jit(test_impl)
+        with self.assertRaises(Exception):
+            hpat_func(A)
+        self.assertEqual(hpat_func(B), 2)
+
+    def test_string_array_from_list(self):
+        def test_impl():
+            return StringArray(['AB', '', 'CDE'])
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), ['AB', '', 'CDE'])
+
+    def test_string_array_shuffle(self):
+        def test_impl():
+            A = StringArray(['AB', '', 'CDE'])
+            dests = np.zeros(3, np.int32)
+            B = hpat.distributed_api.shuffle_string_array(A, dests)
+            counts = np.zeros(hpat.distributed_api.get_size(), np.int64)
+            counts[0] = 3
+            return hpat.distributed_api.alltoallv_string_array(B, counts)
+        hpat_func = hpat.jit(test_impl)
+        self.assertEqual(hpat_func(), ['AB', '', 'CDE'])
+
+    def test_string_array_shuffle_ranks(self):
+        # each processor sends string i to processor i % n_pes
+        def test_impl():
+            A = StringArray(['AB', '', 'CDE', 'F', 'GHIJ', 'K'])
+            n_pes = hpat.distributed_api.get_size()
+            dests = np.arange(6) % n_pes
+            return hpat.distributed_api.shuffle_string_array(A,
+                                                        dests.astype(np.int32))
+        hpat_func = hpat.jit(test_impl)
+        strs = ['AB', '', 'CDE', 'F', 'GHIJ', 'K']
+        n_pes = hpat.distributed_api.get_size()
+        rank = get_rank()
+        expected = [s for i, s in enumerate(strs) if i % n_pes == rank]*n_pes
+        self.assertEqual(hpat_func(), expected)
+
+    def test_string_array_shuffle_max_count(self):
+        # lengths and characters split into pieces of 2 elements
+        def test_impl():
+            A = StringArray(['AB', '', 'CDE', 'F', 'GHIJ', 'K'])
+            n_pes = hpat.distributed_api.get_size()
+            dests = np.arange(6) % n_pes
+            return hpat.distributed_api.shuffle_string_array(A,
+                                                        dests.astype(np.int32))
+        hpat_func = hpat.jit(test_impl)
+        strs = ['AB', '', 'CDE', 'F', 'GHIJ', 'K']
+        n_pes = hpat.distributed_api.get_size()
+        rank = get_rank()
+        expected = [s for i, s in enumerate(strs) if i % n_pes == rank]*n_pes
+        old_count = hpat.distributed_api.set_max_count(2)
+        try:
+            self.assertEqual(hpat_func(), expected)
+        finally:
+            hpat.distributed_api.set_max_count(old_count)
+
+    def test_string_array_shuffle_overflow(self):
+        # received data too large for 32-bit offsets raises on all processors
+        def test_impl():
+            A = StringArray(['AB', '', 'CDE', 'F', 'GHIJ', 'K'])
+            dests = np.zeros(6, np.int32)
+            return hpat.distributed_api.shuffle_string_array(A, dests)
+        hpat_func = hpat.jit(test_impl)
+        # lower the limit of the exchange only, input allocation is unchanged
+        old_size = hdist.set_max_str_arr_data_size(4)
+        try:
+            with self.assertRaises(OverflowError):
+                hpat_func()
+        finally:
+            hdist.set_max_str_arr_data_size(old_size)
+
+    def test_str_arr_type_select(self):
+        # 32-bit offsets unless character data exceeds 4GB
+        self.assertEqual(get_str_arr_type(100), string_array_type)
+        self.assertEqual(get_str_arr_type(2**32-1), string_array_type)
+        self.assertEqual(get_str_arr_type(2**32), large_string_array_type)
+        self.assertTrue(large_string_array_type.is_large)
+
+    def test_str_arr_offset_overflow(self):
+        # data larger than the maximum size of 32-bit offsets raises an error
+        def test_impl():
+            return StringArray(['AB', 'CDE'])
+        hpat_func = hpat.jit(test_impl)
+        old_size = set_max_str_arr_data_size(4)
+        try:
+            with self.assertRaises(OverflowError):
+                hpat_func()
+        finally:
+            set_max_str_arr_data_size(old_size)
+
+    @unittest.skipUnless(hpat.config._has_pyarrow, "requires pyarrow")
+    def test_str_arr_large_offsets(self):
+        # lowered threshold selects 64-bit offsets for small data
+        def test_impl(A):
+            return A
+        hpat_func = hpat.jit(test_impl)
+        A = pyarrow.array(['AB', '', 'CDE', 'F'])
+        old_size = set_max_str_arr_data_size(4)
+        try:
+            self.assertEqual(get_str_arr_type(A.buffers()[2].size),
+                                                    large_string_array_type)
+            self.assertEqual(hpat_func(A), ['AB', '', 'CDE', 'F'])
+        finally:
+            set_max_str_arr_data_size(old_size)
+
+    @unittest.skipUnless(hpat.config._has_pyarrow, "requires pyarrow")
+    def test_arrow_str_arr_nulls(self):
+        # string arrays have no null bitmap so Arrow nulls are rejected
+        def test_impl(A):
+            return A
+        hpat_func = hpat.jit(test_impl)
+        with self.assertRaises(ValueError):
+            hpat_func(pyarrow.array(['AB', None, 'CDE']))
+
 if __name__ == "__main__":
     unittest.main()
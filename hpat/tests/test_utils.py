@@ -20,5 +20,23 @@ def count_array_OneDs():
     vals = hpat.distributed.dist_analysis.array_dists.values()
     return sum([v==Distribution.OneD for v in vals])
 
+def count_array_TwoDs():
+    from hpat.distributed import Distribution
+    vals = hpat.distributed.dist_analysis.array_dists.values()
+    return sum([v==Distribution.TwoD for v in vals])
+
 def dist_IR_contains(*args):
     return sum([(s in hpat.distributed.fir_text) for s in args])
+
+def dist_IR_count(s):
+    return hpat.distributed.fir_text.count(s)
+
+def get_rank():
+    import hdist
+    return hdist.get_rank()
+
+@hpat.jit
+def barrier():
+    # synchronize processors around test input files written by rank 0
+    hpat.distributed_api.barrier()
+    return 0
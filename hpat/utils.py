@@ -1,7 +1,25 @@
 import numba
-from numba import ir_utils, ir
+from numba import ir_utils, ir, types
 from numba.ir_utils import guard, get_definition
 
+# data type codes passed to the C libraries for MPI and HDF5 calls,
+# should match HPAT_CTypes in _hpat_common.h
+_h5_typ_table = {
+    types.int8:0,
+    types.uint8:1,
+    types.int32:2,
+    types.int64:3,
+    types.float32:4,
+    types.float64:5,
+    types.uint32:6,
+    types.uint64:7,
+    types.int16:8,
+    types.uint16:9,
+    types.boolean:10,
+    types.complex64:11,
+    types.complex128:12
+    }
+
 # sentinel value representing non-constant values
 class NotConstant:
     pass
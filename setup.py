@@ -20,12 +20,14 @@ else:
 
 
 ext_io = Extension(name="hio",
-                             extra_link_args=['-lmpi','-lhdf5'],
-                             sources=["hpat/_io.c"]
+                             extra_link_args=['-lmpi','-lhdf5','-lpthread'],
+                             sources=["hpat/_io.c"],
+                             depends=["hpat/_hpat_common.h", "hpat/_hpat_stream.h"]
                              )
 
 ext_hdist = Extension(name="hdist",
-                             sources=["hpat/_distributed.c"]
+                             sources=["hpat/_distributed.c"],
+                             depends=["hpat/_hpat_common.h"]
                              )
 
 ext_dict = Extension(name="hdict_ext",
@@ -37,8 +39,9 @@ ext_str = Extension(name="hstr_ext",
                              )
 
 ext_parquet = Extension(name="parquet_cpp",
-                             extra_link_args=['-lparquet', '-larrow'],
-                             sources=["hpat/_parquet.cpp"]
+                             extra_link_args=['-lparquet', '-larrow', '-lpthread'],
+                             sources=["hpat/_parquet.cpp"],
+                             depends=["hpat/_hpat_stream.h"]
                              )
 
 _ext_mods = [ext_hdist, ext_dict, ext_str]
@@ -65,7 +68,7 @@ setup(name='hpat',
       url='https://github.com/IntelLabs/hpat',
       author='Ehsan Totoni',
       author_email='ehsan.totoni@intel.com',
-      packages=['hpat'],
+      packages=['hpat', 'hpat.benchmarks'],
       install_requires=['numba'],
       extras_require={'HDF5': ["h5py"], 'Parquet': ["pyarrow"]},
       ext_modules = _ext_mods)